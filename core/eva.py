@@ -15,7 +15,7 @@ import time
 import asyncio
 import httpx
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Tuple
 from io import BytesIO
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, HTTPException, Depends, UploadFile, File, WebSocket, WebSocketDisconnect
@@ -29,9 +29,14 @@ from integrations.zep_context_manager import ContextualMemoryManager, MemoryCont
 from integrations.elevenlabs_integration import ElevenLabsIntegration
 from integrations.speechrecognition_stt import SpeechRecognitionSTT as WhisperSTT
 try:
-    from integrations.local_stt_handler import get_local_stt
+    from integrations.local_stt_handler import STTQueueFull
+    from integrations.stt_models import get_stt_model_manager, STTModelUnavailable
 except ImportError:
-    get_local_stt = None
+    get_stt_model_manager = None
+    STTQueueFull = None
+    STTModelUnavailable = None
+from integrations.local_tts import get_local_tts
+from integrations.tts_tiers import TTSTierRouter, ELEVENLABS_TIER
 from integrations.private_context_auth import PrivateContextAuth
 from voice.realtime_voice import get_voice_manager, RealTimeVoiceManager
 from voice.eva_voice_workflow import EVAVoiceWorkflow
@@ -40,7 +45,10 @@ from integrations.tool_manager import get_tool_manager, ToolCall
 from integrations.openai_logger import get_openai_logger, log_openai_request, log_token_usage
 from integrations.conversation_revival import ConversationRevival
 from integrations.tts_cost_tracker import TTSCostTracker
+from integrations.tts_pipeline import SentenceChunker, SentenceTTSPipeline, AudioStreamBuffer
+from integrations.tts_cache import TTS_CACHE_PREWARM, load_prewarm_phrases
 from integrations.eva_logger import get_eva_logger
+from integrations.log_aggregates import RouteMetricsMiddleware
 # Removed OpenAI Agents SDK - using direct API calls
 
 # Load environment variables
@@ -56,6 +64,8 @@ OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
 OPENAI_BASE_URL = "https://api.openai.com/v1/chat/completions"
 ZEP_API_KEY = os.getenv("ZEP_API_KEY")
 ZEP_ENABLED = os.getenv("ZEP_ENABLED", "true").lower() == "true"
+SESSION_ARCHIVE_DAYS = int(os.getenv("SESSION_ARCHIVE_DAYS", "7"))
+SESSION_ARCHIVE_DICTIONARY = os.getenv("SESSION_ARCHIVE_DICTIONARY", "false").lower() == "true"
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY", "sk_bd89a58ef5ee69fc40314fdf531568682f291f9376dfac45")
 
 # Initialize FastAPI app
@@ -70,6 +80,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency and 5xx counts for /api/performance/summary
+app.add_middleware(RouteMetricsMiddleware, aggregates=get_eva_logger().aggregates)
+
 # Mount static files directory
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -100,6 +113,7 @@ class RunRequest(BaseModel):
     user_id: Optional[str] = None        # Base user ID for persistent identity
     voice_enabled: bool = False          # Enable TTS for responses
     voice_id: Optional[str] = None       # ElevenLabs voice ID
+    voice_priority: Optional[str] = "normal"  # "low" prefers the offline local TTS tier
     password: Optional[str] = None       # Password for private contexts
     auth_session_id: Optional[str] = None # Auth session for private contexts
     
@@ -109,6 +123,11 @@ class InputRequest(BaseModel):
 # Session storage - direct API approach with persistence
 active_conversations = {}  # run_id -> conversation_data
 
+# Spoken audio of voice turns, served by /agents/eva/runs/{run_id}/audio/{stream_id}
+run_audio_streams: Dict[str, AudioStreamBuffer] = {}  # "run_id/stream_id" -> buffer
+RUN_AUDIO_TTL_SECONDS = int(os.getenv("RUN_AUDIO_TTL_SECONDS", "300"))
+AUDIO_MEDIA_TYPES = {"mp3": "audio/mpeg", "wav": "audio/wav", "pcm_s16le": "audio/L16"}
+
 # Initialize session persistence
 session_persistence = get_session_persistence()
 
@@ -143,11 +162,16 @@ if ZEP_ENABLED and ZEP_API_KEY:
 elevenlabs_tts = None
 whisper_stt = None
 local_stt = None
+stt_models = None
+local_tts = None
+tts_router = None
 tts_cost_tracker = None
 if ELEVENLABS_API_KEY:
     try:
         elevenlabs_tts = ElevenLabsIntegration(api_key=ELEVENLABS_API_KEY)
         tts_cost_tracker = TTSCostTracker()
+        if elevenlabs_tts.cache:
+            elevenlabs_tts.cache.cost_per_character = tts_cost_tracker.cost_per_character
         print("ElevenLabs TTS initialized successfully")
         print("TTS cost tracker initialized")
     except Exception as e:
@@ -162,19 +186,30 @@ except Exception as e:
     print(f"Failed to initialize SpeechRecognition STT: {e}")
     whisper_stt = None
 
-# Initialize local STT (faster-whisper)
+# Initialize local STT (faster-whisper): the default model loads now, others on demand
 try:
-    local_stt = get_local_stt()
-    # Force initialization to check if it works
-    if local_stt and local_stt.initialize():
-        print("Local STT (faster-whisper) initialized successfully")
-    else:
-        print("Local STT initialization failed")
-        local_stt = None
+    stt_models = get_stt_model_manager()
+    local_stt = stt_models.load()
+    print(f"Local STT (faster-whisper {local_stt.name}) initialized successfully")
 except Exception as e:
     print(f"Failed to initialize local STT: {e}")
     local_stt = None
 
+# Initialize local TTS (Piper) as the offline, zero-cost tier
+try:
+    local_tts = get_local_tts()
+    if local_tts and local_tts.initialize():
+        print("Local TTS (Piper) initialized successfully")
+    elif local_tts:
+        print("Local TTS initialization failed")
+        local_tts = None
+except Exception as e:
+    print(f"Failed to initialize local TTS: {e}")
+    local_tts = None
+
+if elevenlabs_tts or local_tts:
+    tts_router = TTSTierRouter(elevenlabs_tts, local_tts, tts_cost_tracker)
+
 # Memory Tools for Eva Agent
 async def get_conversation_memory(session_id: str, context: str = "general") -> str:
     """Retrieve relevant conversation history from Zep memory."""
@@ -460,8 +495,55 @@ if elevenlabs_tts and whisper_stt:
             tts_handler=elevenlabs_tts
         )
         
+        async def voice_session_turn(session_id: str, session: Dict[str, Any], user_message: str,
+                                     on_text: Callable[[str], None]) -> str:
+            """One /ws/voice turn through the agent engine, in the session's context and mode."""
+            # Same conversation as the user's chat in this context/mode, so history carries over
+            run_id = f"{session['user_id']}_{session['context']}_{session['mode']}"
+            conversation = active_conversations.get(run_id) or session_persistence.get_session(run_id)
+            if not conversation:
+                conversation = {
+                    "messages": [],
+                    "status": AgentStatus.RUNNING,
+                    "created_at": datetime.now().isoformat(),
+                    "stream": True,
+                    "context": session["context"],
+                    "mode": session["mode"],
+                    "base_user_id": session["user_id"],
+                    "voice_enabled": True
+                }
+            active_conversations[run_id] = conversation
+            
+            response_text = await get_agent_response(run_id, user_message, on_text=on_text)
+            
+            turn = [{"role": "user", "content": user_message}, {"role": "assistant", "content": response_text}]
+            conversation["messages"].extend(turn)
+            try:
+                session_persistence.save_session(run_id, conversation)
+                if context_manager and conversation.get("context") != "general":
+                    try:
+                        await context_manager.add_contextual_messages(run_id, turn)
+                    except Exception as e:
+                        print(f"Error adding voice turn to contextual Zep: {e}")
+                elif memory_manager:
+                    try:
+                        await memory_manager.add_messages(run_id, turn)
+                    except Exception as e:
+                        print(f"Error adding voice turn to Zep: {e}")
+            except asyncio.CancelledError:
+                # Barged in while saving: the reply wasn't heard, so it doesn't become history
+                del conversation["messages"][-len(turn):]
+                session_persistence.save_session(run_id, conversation)
+                raise
+            return response_text
+        
         # Create voice manager
         voice_manager = get_voice_manager(whisper_stt, elevenlabs_tts)
+        voice_manager.tts_router = tts_router
+        voice_manager.local_stt = local_stt
+        voice_manager.agent_handler = voice_session_turn
+        if tts_cost_tracker:
+            voice_manager.on_tts_usage = tts_cost_tracker.track_usage
         
         print("Real-time voice system initialized successfully")
     except Exception as e:
@@ -483,15 +565,106 @@ def restore_sessions_on_startup():
         
         # Clean up sessions older than 30 days
         session_persistence.cleanup_old_sessions(days=30)
+        
+        # Move idle conversation histories into the compressed archive tier
+        archive_stats = session_persistence.archive_old_sessions(
+            days=SESSION_ARCHIVE_DAYS,
+            use_dictionary=SESSION_ARCHIVE_DICTIONARY
+        )
+        if archive_stats["archived"]:
+            print(f"Archived {archive_stats['archived']} idle conversation histories "
+                  f"(ratio {archive_stats['compression_ratio']}x, "
+                  f"cold read {archive_stats['cold_read_ms_avg']}ms avg)")
     except Exception as e:
         print(f"Error restoring sessions: {e}")
 
 # Restore sessions on module load
 restore_sessions_on_startup()
 
+@app.on_event("startup")
+async def warm_up_stt_models():
+    """Load the extra STT models listed in LOCAL_STT_WARM_MODELS in the background"""
+    if stt_models:
+        stt_models.warm_up()
+
+@app.on_event("startup")
+async def prewarm_tts_cache():
+    """Synthesize Eva's stock phrases in the background so they are served from the TTS cache"""
+    if elevenlabs_tts and elevenlabs_tts.cache and TTS_CACHE_PREWARM:
+        async def prewarm():
+            on_usage = None
+            if tts_cost_tracker:
+                if tts_cost_tracker.should_limit_tts()["should_limit"]:
+                    print("Skipping TTS cache pre-warm: daily TTS budget nearly used")
+                    return
+                # Pre-warm synthesis is billed like any other speech
+                on_usage = lambda phrase: tts_cost_tracker.track_usage(phrase, "tts_cache_prewarm")
+            result = await elevenlabs_tts.prewarm_cache(load_prewarm_phrases(), on_usage=on_usage)
+            if result["synthesized"]:
+                print(f"Pre-warmed TTS cache with {result['synthesized']} of {result['phrases']} phrases "
+                      f"({result['characters']} characters)")
+        asyncio.create_task(prewarm())
+
 # Direct OpenAI API interaction - much simpler!
-async def get_agent_response(run_id: str, user_message: str, tool_choice: str = "auto", parallel_tool_calls: bool = True) -> str:
-    """Get response using direct OpenAI API calls with tool calling support."""
+async def post_chat_completion(client: httpx.AsyncClient, headers: Dict[str, str], payload: Dict[str, Any],
+                               on_text: Optional[Callable[[str], None]] = None) -> Tuple[int, Dict[str, Any]]:
+    """
+    POST a chat completion and return (status_code, response_data).
+    
+    With on_text the completion is streamed and each content delta is passed to on_text as it
+    arrives; content and tool call deltas are reassembled into the usual response shape.
+    """
+    if on_text is None:
+        response = await client.post(OPENAI_BASE_URL, headers=headers, json=payload, timeout=60.0)
+        return response.status_code, (response.json() if response.status_code == 200 else {"error": response.text})
+    
+    stream_payload = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+    content_parts: List[str] = []
+    tool_calls: Dict[int, Dict[str, Any]] = {}
+    response_data: Dict[str, Any] = {}
+    
+    async with client.stream("POST", OPENAI_BASE_URL, headers=headers, json=stream_payload, timeout=60.0) as response:
+        if response.status_code != 200:
+            error_text = (await response.aread()).decode("utf-8", errors="replace")
+            return response.status_code, {"error": error_text}
+        
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            data = line[len("data: "):]
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            response_data["model"] = chunk.get("model", response_data.get("model"))
+            if chunk.get("usage"):
+                response_data["usage"] = chunk["usage"]
+            for choice in chunk.get("choices", []):
+                delta = choice.get("delta", {})
+                if delta.get("content"):
+                    content_parts.append(delta["content"])
+                    on_text(delta["content"])
+                for tool_delta in delta.get("tool_calls") or []:
+                    tool_call = tool_calls.setdefault(tool_delta["index"], {
+                        "id": None, "type": "function", "function": {"name": "", "arguments": ""}
+                    })
+                    if tool_delta.get("id"):
+                        tool_call["id"] = tool_delta["id"]
+                    function = tool_delta.get("function") or {}
+                    tool_call["function"]["name"] += function.get("name") or ""
+                    tool_call["function"]["arguments"] += function.get("arguments") or ""
+    
+    message: Dict[str, Any] = {"role": "assistant", "content": "".join(content_parts) or None}
+    if tool_calls:
+        message["tool_calls"] = [tool_calls[index] for index in sorted(tool_calls)]
+    response_data["choices"] = [{"message": message}]
+    return 200, response_data
+
+async def get_agent_response(run_id: str, user_message: str, tool_choice: str = "auto", parallel_tool_calls: bool = True,
+                             on_text: Optional[Callable[[str], None]] = None) -> str:
+    """Get response using direct OpenAI API calls with tool calling support.
+    
+    If on_text is given, completions are streamed and text is passed to it as it is generated.
+    """
     conversation = active_conversations.get(run_id)
     if not conversation:
         raise ValueError(f"No conversation found for session {run_id}")
@@ -686,29 +859,35 @@ MANDATORY: If the user asks for "latest", "news", "current", "sources", "links"
         # Initialize logger
         openai_logger = get_openai_logger()
         
+        # Text streamed before a tool call has already been shown and spoken, so the
+        # final response is everything streamed rather than just the last completion
+        streamed_parts: List[str] = []
+        if on_text is not None:
+            forward_text = on_text
+            
+            def on_text(delta: str):
+                streamed_parts.append(delta)
+                forward_text(delta)
+        
         async with httpx.AsyncClient() as client:
             # Log request start
-            request_id = openai_logger.log_request_start("POST", OPENAI_BASE_URL, payload)
+            request_id = openai_logger.log_request_start(
+                "POST", OPENAI_BASE_URL, payload,
+                session_id=run_id, user_id=conversation.get("base_user_id")
+            )
             start_time = time.time()
             
             try:
-                response = await client.post(
-                    OPENAI_BASE_URL,
-                    headers=headers,
-                    json=payload,
-                    timeout=60.0
-                )
+                status_code, response_data = await post_chat_completion(client, headers, payload, on_text)
                 
                 # Log request end
                 duration = time.time() - start_time
-                response_data = response.json() if response.status_code == 200 else {"error": response.text}
-                openai_logger.log_request_end(request_id, response_data, duration, response.status_code)
+                openai_logger.log_request_end(request_id, response_data, duration, status_code)
                 
-                if response.status_code != 200:
-                    raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
+                if status_code != 200:
+                    raise Exception(f"OpenAI API error: {status_code} - {response_data.get('error')}")
                 
-                data = response.json()
-                message = data["choices"][0]["message"]
+                message = response_data["choices"][0]["message"]
                 
             except Exception as e:
                 # Log error
@@ -727,6 +906,9 @@ MANDATORY: If the user asks for "latest", "news", "current", "sources", "links"
                 # Check if the model wants to use tools
                 if "tool_calls" in message and message["tool_calls"]:
                     print(f"DEBUG: OpenAI wants to use tools (iteration {iteration}): {message['tool_calls']}")
+                    if streamed_parts and not streamed_parts[-1][-1:].isspace():
+                        # End the pre-tool text so it is spoken now and doesn't run into the next reply
+                        on_text(" ")
                     tool_results = []
                     
                     for tool_call in message["tool_calls"]:
@@ -860,17 +1042,11 @@ MANDATORY: If the user asks for "latest", "news", "current", "sources", "links"
                     
                     # Make another API call with tool results
                     payload["messages"] = messages
-                    api_response = await client.post(
-                        OPENAI_BASE_URL,
-                        headers=headers,
-                        json=payload,
-                        timeout=60.0
-                    )
+                    status_code, response_data = await post_chat_completion(client, headers, payload, on_text)
                     
-                    if api_response.status_code != 200:
-                        raise Exception(f"OpenAI API error: {api_response.status_code} - {api_response.text}")
+                    if status_code != 200:
+                        raise Exception(f"OpenAI API error: {status_code} - {response_data.get('error')}")
                     
-                    response_data = api_response.json()
                     message = response_data["choices"][0]["message"]
                     
                     # Check if there are more tool calls
@@ -892,6 +1068,9 @@ MANDATORY: If the user asks for "latest", "news", "current", "sources", "links"
                 print(f"WARNING: Reached maximum iterations ({max_iterations}) for tool calls")
                 response_content = "I've completed the available steps of the requested task."
             
+            if streamed_parts:
+                response_content = "".join(streamed_parts).strip()
+            
             # Conversation Revival System Integration
             if conversation_revival:
                 try:
@@ -1022,7 +1201,10 @@ async def get_agent_response_with_image(run_id: str, user_message: Dict[str, Any
         
         async with httpx.AsyncClient() as client:
             # Log request start
-            request_id = openai_logger.log_request_start("POST", OPENAI_BASE_URL, payload)
+            request_id = openai_logger.log_request_start(
+                "POST", OPENAI_BASE_URL, payload,
+                session_id=run_id, user_id=conversation.get("base_user_id")
+            )
             start_time = time.time()
             
             try:
@@ -1209,6 +1391,7 @@ async def create_run(request: RunRequest):
             "base_user_id": base_user_id,
             "voice_enabled": request.voice_enabled,
             "voice_id": request.voice_id,
+            "voice_priority": request.voice_priority,
             "auth_session_id": auth_session_id
         }
         
@@ -1261,6 +1444,140 @@ async def create_run(request: RunRequest):
     
     return JSONResponse(response_data)
 
+def register_run_audio(run_id: str, audio_format: str) -> Tuple[str, AudioStreamBuffer]:
+    """Create the audio stream of a voice turn, dropping finished streams past their TTL"""
+    now = time.time()
+    for key, buffer in list(run_audio_streams.items()):
+        if buffer.done and now - buffer.finished_at > RUN_AUDIO_TTL_SECONDS:
+            del run_audio_streams[key]
+    
+    stream_id = uuid.uuid4().hex[:12]
+    buffer = AudioStreamBuffer(audio_format)
+    run_audio_streams[f"{run_id}/{stream_id}"] = buffer
+    return stream_id, buffer
+
+async def stream_voice_turn(run_id: str, conversation: Dict[str, Any], user_message: str,
+                            result: Dict[str, Any]):
+    """
+    Run one voice turn, yielding SSE events as text and audio become available.
+    
+    The LLM response is streamed into a sentence chunker; each sentence goes to ElevenLabs as
+    soon as it is complete. Audio is not embedded in the event stream: once the first audio
+    is ready, an agent.audio event points the client at the turn's chunked audio endpoint.
+    The final response text is stored in result["response"].
+    """
+    events: asyncio.Queue = asyncio.Queue()
+    chunker = SentenceChunker()
+    # The response is still unknown here, so the tier follows priority and budget only
+    choice = tts_router.select(priority=conversation.get("voice_priority") or "normal")
+    on_elevenlabs = choice.tier == ELEVENLABS_TIER
+    pipeline = SentenceTTSPipeline(choice.backend, voice_id=conversation.get("voice_id") if on_elevenlabs else None,
+                                   audio_format=choice.audio_format)
+    stream_id, audio_buffer = register_run_audio(run_id, pipeline.audio_format)
+    streamed_text = False
+    
+    def speak(sentence: str):
+        # Track TTS usage for cost monitoring; cached sentences and the local tier cost nothing
+        if on_elevenlabs and tts_cost_tracker and not elevenlabs_tts.is_cached(sentence, conversation.get("voice_id")):
+            usage = tts_cost_tracker.track_usage(sentence, run_id)
+            print(f"TTS Usage: {usage.character_count} chars, ${usage.estimated_cost:.4f}")
+        pipeline.submit(sentence)
+    
+    def on_text(delta: str):
+        nonlocal streamed_text
+        streamed_text = True
+        events.put_nowait(("text", delta))
+        for sentence in chunker.feed(delta):
+            speak(sentence)
+    
+    async def generate():
+        try:
+            response_content = await get_agent_response(run_id, user_message, on_text=on_text)
+            if streamed_text:
+                rest = chunker.flush()
+                if rest:
+                    speak(rest)
+            elif response_content:
+                # Nothing was streamed (e.g. an error message); speak the whole response
+                speak(response_content)
+            events.put_nowait(("done", response_content))
+        except Exception as e:
+            events.put_nowait(("error", e))
+        finally:
+            pipeline.close()
+    
+    async def forward_audio():
+        started = False
+        async for chunk in pipeline.chunks():
+            if chunk.data and not started:
+                started = True
+                events.put_nowait(("audio_started", None))
+            audio_buffer.append(chunk.data)
+        audio_buffer.finish()
+        events.put_nowait(("audio_done", None))
+    
+    generate_task = asyncio.create_task(generate())
+    audio_task = asyncio.create_task(forward_audio())
+    try:
+        audio_done = False
+        response_done = False
+        while not (audio_done and response_done):
+            kind, value = await events.get()
+            if kind == "text" and conversation["stream"]:
+                yield json.dumps(create_event("agent.message", {
+                    "message": {"role": "assistant", "content": value, "is_partial": True}
+                }))
+            elif kind == "audio_started":
+                yield json.dumps(create_event("agent.audio", {
+                    "url": f"/agents/eva/runs/{run_id}/audio/{stream_id}",
+                    "stream_id": stream_id,
+                    "format": pipeline.audio_format
+                }))
+            elif kind == "done":
+                # The full text is final before the last sentences have been spoken
+                result["response"] = value
+                response_done = True
+                yield json.dumps(create_event("agent.message", {
+                    "message": {"role": "assistant", "content": value, "is_partial": False}
+                }))
+            elif kind == "error":
+                raise value
+            elif kind == "audio_done":
+                audio_done = True
+        
+        metrics = pipeline.get_metrics()
+        tts_router.record(choice.tier, metrics["time_to_first_audio_ms"], metrics["total_ms"])
+        if metrics["time_to_first_audio_ms"] is not None:
+            get_eva_logger().log_performance(run_id, "tts_time_to_first_audio", metrics["time_to_first_audio_ms"],
+                                             {**metrics, "tier": choice.tier})
+        yield json.dumps(create_event("agent.audio", {
+            "is_final": True, "stream_id": stream_id, "format": pipeline.audio_format,
+            "tier": choice.tier, "tier_reason": choice.reason, **metrics
+        }))
+        
+        if tts_cost_tracker:
+            limit_check = tts_cost_tracker.should_limit_tts()
+            if limit_check["should_warn"]:
+                print(f"TTS Budget Warning: {limit_check['recommendation']}")
+    finally:
+        # The client may have gone away mid-turn: stop generating and synthesizing
+        generate_task.cancel()
+        await pipeline.cancel()
+        audio_task.cancel()
+        await asyncio.gather(generate_task, audio_task, return_exceptions=True)
+        audio_buffer.finish()
+
+@app.get("/agents/eva/runs/{run_id}/audio/{stream_id}")
+async def stream_run_audio(run_id: str, stream_id: str):
+    """Chunked audio of one voice turn; playable while it is still being synthesized."""
+    buffer = run_audio_streams.get(f"{run_id}/{stream_id}")
+    if buffer is None:
+        raise HTTPException(status_code=404, detail="Audio stream not found")
+    
+    media_type = AUDIO_MEDIA_TYPES.get(buffer.audio_format, f"audio/{buffer.audio_format}")
+    return StreamingResponse(buffer.iter_chunks(), media_type=media_type,
+                             headers={"Cache-Control": "no-store"})
+
 @app.get("/agents/eva/runs/{run_id}/events")
 async def stream_events(run_id: str):
     """Stream events for a specific run."""
@@ -1282,11 +1599,20 @@ async def stream_events(run_id: str):
                 # Generate thinking event
                 yield json.dumps(create_event("agent.thinking", {"thinking": "Processing your message..."}))
                 
-                # Get response from agent
-                response_content = await get_agent_response(run_id, user_message)
+                speak_response = bool(conversation.get("voice_enabled") and tts_router)
+                if speak_response:
+                    # Speak the response sentence by sentence while it is being generated;
+                    # this also sends the text events
+                    voice_turn = {}
+                    async for event in stream_voice_turn(run_id, conversation, user_message, voice_turn):
+                        yield event
+                    response_content = voice_turn["response"]
+                else:
+                    # Get response from agent
+                    response_content = await get_agent_response(run_id, user_message)
                 
                 # Stream the response if requested
-                if conversation["stream"]:
+                if conversation["stream"] and not speak_response:
                     # Stream by larger chunks for even faster response
                     words = response_content.split()
                     chunk_size = 15  # Bigger chunks = faster
@@ -1302,36 +1628,14 @@ async def stream_events(run_id: str):
                         await asyncio.sleep(0.01)  # Even faster - 10ms delay
                 
                 # Send the final complete message
-                yield json.dumps(create_event("agent.message", {
-                    "message": {
-                        "role": "assistant", 
-                        "content": response_content,
-                        "is_partial": False
-                    }
-                }))
-                
-                # Generate TTS if voice is enabled
-                if conversation.get("voice_enabled") and elevenlabs_tts and response_content:
-                    try:
-                        # Track TTS usage for cost monitoring
-                        if tts_cost_tracker:
-                            usage = tts_cost_tracker.track_usage(response_content, run_id)
-                            print(f"TTS Usage: {usage.character_count} chars, ${usage.estimated_cost:.4f}")
-                            
-                            # Check if we should limit TTS due to budget
-                            limit_check = tts_cost_tracker.should_limit_tts()
-                            if limit_check["should_warn"]:
-                                print(f"TTS Budget Warning: {limit_check['recommendation']}")
-                        
-                        voice_id = conversation.get("voice_id")
-                        audio_data = await elevenlabs_tts.text_to_speech(response_content, voice_id=voice_id)
-                        audio_base64 = elevenlabs_tts.audio_to_base64(audio_data)
-                        yield json.dumps(create_event("agent.audio", {
-                            "audio": audio_base64,
-                            "format": "mp3"
-                        }))
-                    except Exception as e:
-                        print(f"Error generating TTS: {e}")
+                if not speak_response:
+                    yield json.dumps(create_event("agent.message", {
+                        "message": {
+                            "role": "assistant", 
+                            "content": response_content,
+                            "is_partial": False
+                        }
+                    }))
                 
                 # Update conversation messages
                 conversation["messages"].append({"role": "assistant", "content": response_content})
@@ -1888,11 +2192,51 @@ async def restore_session(session_id: str):
         "message_count": len(persisted_session.get("messages", []))
     }
 
+@app.post("/api/sessions/archive")
+async def archive_sessions(days: int = SESSION_ARCHIVE_DAYS, use_dictionary: bool = SESSION_ARCHIVE_DICTIONARY):
+    """Move conversation histories idle for `days` into the compressed archive tier."""
+    try:
+        stats = await asyncio.to_thread(
+            session_persistence.archive_old_sessions, days=days, use_dictionary=use_dictionary
+        )
+        return {"success": True, **stats}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Archiving failed: {str(e)}")
+
+@app.get("/api/users/{user_id}/export")
+async def download_user_data(user_id: str, format: str = "json", compress: bool = False,
+                             after_session_id: Optional[str] = None):
+    """Stream all conversation data for a user as a chunked download.
+    
+    Pass the last received session_id as after_session_id to resume an interrupted export.
+    """
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'json' or 'ndjson'")
+    
+    file_name = f"eva_export_{user_id}.{format}" + (".gz" if compress else "")
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    headers = {"Content-Disposition": f'attachment; filename="{file_name}"'}
+    if compress:
+        media_type = "application/gzip"
+    
+    # A sync generator is iterated in Starlette's threadpool, keeping disk reads off the event loop
+    return StreamingResponse(
+        session_persistence.iter_user_export(
+            user_id, fmt=format, compress=compress, after_session_id=after_session_id
+        ),
+        media_type=media_type,
+        headers=headers
+    )
+
 @app.post("/api/users/{user_id}/export")
-async def export_user_data(user_id: str):
-    """Export all conversation data for a user."""
+async def export_user_data(user_id: str, format: str = "json", compress: bool = False):
+    """Export all conversation data for a user to the server's exports directory."""
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'json' or 'ndjson'")
     try:
-        export_path = session_persistence.export_user_data(user_id, "exports")
+        export_path = await asyncio.to_thread(
+            session_persistence.export_user_data, user_id, "exports", format, compress
+        )
         return {
             "success": True,
             "export_path": export_path,
@@ -1987,32 +2331,61 @@ async def get_user_contexts(user_id: str):
 
 @app.post("/api/tts")
 async def text_to_speech(request: Dict[str, Any]):
-    """Convert text to speech using ElevenLabs."""
-    if not elevenlabs_tts:
+    """Convert text to speech (ElevenLabs or the local tier, see integrations/tts_tiers.py)."""
+    if not tts_router:
         raise HTTPException(status_code=503, detail="TTS service not available")
     
     text = request.get("text")
     if not text:
         raise HTTPException(status_code=400, detail="Text is required")
     
-    voice_id = request.get("voice_id")
     stream = request.get("stream", False)
+    choice = tts_router.select(text, priority=request.get("priority", "normal"))
+    voice_id = request.get("voice_id") if choice.tier == ELEVENLABS_TIER else None
+    media_type = AUDIO_MEDIA_TYPES.get(choice.audio_format, "application/octet-stream")
+    headers = {"X-TTS-Tier": choice.tier}
     
     try:
         if stream:
-            async def audio_stream():
-                async for chunk in elevenlabs_tts.text_to_speech_stream(text, voice_id=voice_id):
-                    yield chunk
-            
-            return StreamingResponse(audio_stream(), media_type="audio/mpeg")
+            audio_stream = tts_router.timed(choice.tier, choice.backend.text_to_speech_stream(text, voice_id=voice_id))
+            return StreamingResponse(audio_stream, media_type=media_type, headers=headers)
         else:
-            audio_data = await elevenlabs_tts.text_to_speech(text, voice_id=voice_id)
-            return StreamingResponse(BytesIO(audio_data), media_type="audio/mpeg")
+            started = time.perf_counter()
+            audio_data = await choice.backend.text_to_speech(text, voice_id=voice_id)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            tts_router.record(choice.tier, elapsed_ms, elapsed_ms)
+            return StreamingResponse(BytesIO(audio_data), media_type=media_type, headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/tts/tiers")
+async def get_tts_tiers():
+    """TTS tier policy, choices and per-tier latency."""
+    if not tts_router:
+        raise HTTPException(status_code=503, detail="TTS service not available")
+    return tts_router.get_stats()
+
+# How often a pending transcription checks whether its client is still connected
+STT_DISCONNECT_POLL_SECONDS = 0.25
+
+async def run_until_disconnected(request: Request, coro):
+    """Await coro, cancelling it if the HTTP client disconnects first."""
+    task = asyncio.create_task(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=STT_DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                # 499: client closed request (nobody is left to read it)
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+
 @app.post("/api/stt")
-async def speech_to_text(file: UploadFile = File(...), use_local: bool = True):
+async def speech_to_text(request: Request, file: UploadFile = File(...), use_local: bool = True):
     """Convert speech to text using Whisper (local or API)."""
     
     try:
@@ -2023,13 +2396,19 @@ async def speech_to_text(file: UploadFile = File(...), use_local: bool = True):
         # Try local STT first if requested and available
         if use_local and local_stt:
             try:
-                text = local_stt.transcribe_audio(audio_data)
+                result = await run_until_disconnected(request, local_stt.transcribe(audio_data))
+                text = result.text
                 if text:
                     return {
                         "text": text,
                         "filename": file.filename,
-                        "provider": "local-whisper"
+                        "provider": "local-whisper",
+                        "timing": {"queue_ms": result.queue_ms, "inference_ms": result.inference_ms}
                     }
+            except HTTPException:
+                raise
+            except STTQueueFull as e:
+                print(f"Local STT busy, falling back to API: {e}")
             except Exception as e:
                 print(f"Local STT failed, falling back to API: {e}")
         
@@ -2045,39 +2424,71 @@ async def speech_to_text(file: UploadFile = File(...), use_local: bool = True):
         # No STT available
         raise HTTPException(status_code=503, detail="No STT service available")
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/stt/local")
-async def local_speech_to_text(file: UploadFile = File(...)):
-    """Convert speech to text using local Whisper only."""
-    if not local_stt:
+async def local_speech_to_text(request: Request, file: UploadFile = File(...), model: Optional[str] = None):
+    """Convert speech to text using local Whisper only (model e.g. "small:int8"; default model if unset)."""
+    if not stt_models:
         raise HTTPException(status_code=503, detail="Local STT service not available")
+    if model:
+        try:
+            model = stt_models.normalize(model)
+        except STTModelUnavailable as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if model not in stt_models.models:
+            raise HTTPException(status_code=400, detail=f"Model {model} is not enabled; available: {', '.join(stt_models.models)}")
+    
+    # Read the upload before taking the model, so a slow upload doesn't hold it
+    audio_data = await file.read()
+    if not audio_data:
+        raise HTTPException(status_code=400, detail="No audio data received")
     
     try:
-        # Read the uploaded file
-        audio_data = await file.read()
-        
-        if not audio_data:
-            raise HTTPException(status_code=400, detail="No audio data received")
-        
-        # Convert to text using local STT
-        text = local_stt.transcribe_audio(audio_data)
+        stt = await stt_models.acquire(model, lease=True)
+    except STTModelUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    
+    try:
+        # Convert to text on the model's worker pool
+        result = await run_until_disconnected(request, stt.transcribe(audio_data))
         
-        if not text:
+        if not result.text:
             raise HTTPException(status_code=422, detail="Could not detect speech in audio. Please speak clearly and try again.")
         
         return {
-            "text": text,
+            "text": result.text,
             "filename": file.filename,
             "provider": "local-whisper",
-            "model": local_stt.model_size
+            "model": result.model,
+            "timing": {"queue_ms": result.queue_ms, "inference_ms": result.inference_ms}
         }
     except HTTPException:
         raise
+    except STTQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Local STT error: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to transcribe audio: {str(e)}")
+    finally:
+        stt_models.release(stt)
+
+@app.get("/api/stt/local/stats")
+async def local_stt_stats():
+    """Local STT worker pool: queue depth, rejections and average queue/inference time."""
+    if not local_stt:
+        raise HTTPException(status_code=503, detail="Local STT service not available")
+    return local_stt.get_stats()
+
+@app.get("/api/stt/models")
+async def local_stt_models():
+    """Local STT models: available, resident (memory estimate and pool stats) and loading."""
+    if not stt_models:
+        raise HTTPException(status_code=503, detail="Local STT service not available")
+    return stt_models.get_stats()
 
 @app.get("/api/voices")
 async def get_voices():
@@ -2123,13 +2534,18 @@ async def cleanup_memories():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/tts/costs")
-async def get_tts_costs():
-    """Get TTS cost tracking information."""
+async def get_tts_costs(session_id: Optional[str] = None):
+    """Get TTS cost tracking information, optionally with one session's totals."""
     if not tts_cost_tracker:
         raise HTTPException(status_code=503, detail="TTS cost tracker not available")
     
     try:
-        return tts_cost_tracker.get_cost_summary()
+        summary = tts_cost_tracker.get_cost_summary()
+        if session_id:
+            summary["session_usage"] = tts_cost_tracker.get_session_usage(session_id)
+        if elevenlabs_tts and elevenlabs_tts.cache:
+            summary["cache"] = elevenlabs_tts.cache.get_stats()
+        return summary
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -2151,7 +2567,10 @@ async def cleanup_tts_logs():
         raise HTTPException(status_code=503, detail="TTS cost tracker not available")
     
     try:
-        result = tts_cost_tracker.cleanup_old_usage(days_to_keep=30)
+        # Compacting rewrites the usage log; keep it off the event loop. The in-memory
+        # totals are only touched here, on the loop that tracks usage.
+        result = await asyncio.to_thread(tts_cost_tracker.compact_log, days_to_keep=30)
+        tts_cost_tracker.prune_totals(days_to_keep=30)
         return {
             "message": "TTS usage cleanup completed",
             **result
@@ -2257,6 +2676,12 @@ async def voice_websocket_endpoint(websocket: WebSocket, session_id: str):
         context = init_data.get("context", "general")
         mode = init_data.get("mode", "assistant")
         auth_session_id = init_data.get("auth_session_id")
+        # Clients opt in to binary audio frames (see voice.audio_framing); default is base64 JSON
+        binary_audio = init_data.get("audio_transport") == "binary"
+        # Optional per-session TTS streaming latency, 0 (best quality) - 4 (lowest latency)
+        tts_latency = init_data.get("tts_latency")
+        if tts_latency is not None:
+            tts_latency = max(0, min(4, int(tts_latency)))
         
         if not user_id:
             await websocket.close(code=4001, reason="User ID required")
@@ -2286,13 +2711,20 @@ async def voice_websocket_endpoint(websocket: WebSocket, session_id: str):
                 return
         
         # Connect to voice manager
-        await voice_manager.connect_voice_session(websocket, session_id, user_id, context, mode)
+        await voice_manager.connect_voice_session(websocket, session_id, user_id, context, mode,
+                                                  binary_audio=binary_audio, tts_latency=tts_latency)
         
-        # Handle messages
+        # Receive loop: binary frames carry audio, text frames carry JSON events. Frames are
+        # only queued here; the session's worker processes them, so reading never waits for STT
         while True:
             try:
-                message = await websocket.receive_text()
-                await voice_manager.handle_websocket_message(session_id, message)
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    await voice_manager.enqueue_input(session_id, message["bytes"])
+                elif message.get("text") is not None:
+                    await voice_manager.enqueue_input(session_id, message["text"])
                 
             except WebSocketDisconnect:
                 break
@@ -2341,8 +2773,19 @@ async def interrupt_voice_session(session_id: str):
         raise HTTPException(status_code=503, detail="Voice system not available")
     
     result = await eva_voice_workflow.handle_interruption(session_id)
+    if result and voice_manager:
+        # The reply itself runs in the realtime voice manager: cancel it there
+        result["cancelled"] = await voice_manager.handle_interruption(session_id)
     return result
 
+@app.get("/api/voice/stats")
+async def get_voice_stats():
+    """Voice turns in flight, the LLM/TTS capacity freed by barge-ins and per-session input queues"""
+    if not voice_manager:
+        raise HTTPException(status_code=503, detail="Voice system not available")
+    
+    return voice_manager.get_stats()
+
 @app.get("/spotify/callback")
 async def spotify_callback(request: Request):
     """Handle Spotify OAuth callback"""
@@ -2430,31 +2873,76 @@ async def get_recent_logs(count: int = 50, log_type: Optional[str] = None):
     }
 
 @app.get("/api/logs/session/{session_id}")
-async def get_session_logs(session_id: str):
-    """Get all logs for a specific session"""
+async def get_session_logs(session_id: str, limit: int = 500, cursor: Optional[int] = None):
+    """Get logs for a specific session, oldest first, paged by cursor"""
     eva_logger = get_eva_logger()
-    logs = eva_logger.get_session_logs(session_id)
+    page = await asyncio.to_thread(
+        eva_logger.query_logs, session_id=session_id, limit=limit, cursor=cursor, oldest_first=True
+    )
     return {
         "session_id": session_id,
-        "log_count": len(logs),
-        "logs": logs
+        "log_count": len(page["results"]),
+        "logs": page["results"],
+        "next_cursor": page["next_cursor"]
     }
 
 @app.get("/api/logs/errors")
 async def get_error_summary(hours: int = 24):
-    """Get summary of recent errors"""
+    """Get error counts by type, tool and route plus the latest errors"""
     eva_logger = get_eva_logger()
-    return eva_logger.get_error_summary(hours)
+    return await asyncio.to_thread(eva_logger.get_error_summary, hours)
+
+@app.get("/api/performance/summary")
+async def get_performance_summary(minutes: int = 60):
+    """Get latency percentiles per operation and route over the last N minutes"""
+    eva_logger = get_eva_logger()
+    return eva_logger.get_performance_summary(minutes)
 
 @app.get("/api/logs/search")
-async def search_logs(query: str, log_type: Optional[str] = None):
-    """Search logs for specific content"""
+async def search_logs(query: Optional[str] = None, log_type: Optional[str] = None,
+                      session_id: Optional[str] = None, tool: Optional[str] = None,
+                      start: Optional[str] = None, end: Optional[str] = None,
+                      limit: int = 100, cursor: Optional[int] = None):
+    """Search logs by content, session, type, tool and time range (ISO timestamps), newest first"""
     eva_logger = get_eva_logger()
-    results = eva_logger.search_logs(query, log_type)
+    page = await asyncio.to_thread(
+        eva_logger.query_logs, query=query, session_id=session_id, log_type=log_type,
+        tool=tool, start=start, end=end, limit=limit, cursor=cursor
+    )
     return {
         "query": query,
-        "result_count": len(results),
-        "results": results
+        "result_count": len(page["results"]),
+        "results": page["results"],
+        "next_cursor": page["next_cursor"]
+    }
+
+@app.get("/api/logs/queue")
+async def get_log_queue_stats():
+    """Get depth, throughput and drop counts for the background log writers"""
+    eva_logger = get_eva_logger()
+    return eva_logger.get_queue_stats()
+
+@app.get("/api/usage/tokens")
+async def get_token_usage(session_id: Optional[str] = None, user_id: Optional[str] = None):
+    """Rolling OpenAI token and cost totals for a session and/or user"""
+    accountant = get_openai_logger().token_accountant
+    result = {"accounting": accountant.get_stats()}
+    if session_id:
+        result["session"] = accountant.get_session_usage(session_id)
+    if user_id:
+        result["user"] = accountant.get_user_usage(user_id)
+    return result
+
+@app.post("/api/logs/trace/{session_id}")
+async def set_session_trace(session_id: str, request: Dict[str, bool]):
+    """Opt a session in or out of full OpenAI payload tracing, independent of sampling"""
+    openai_logger = get_openai_logger()
+    enabled = request.get("enabled", True)
+    openai_logger.set_session_trace(session_id, enabled)
+    return {
+        "session_id": session_id,
+        "trace_enabled": enabled,
+        "sample_rate": openai_logger.trace_sample_rate
     }
 
 @app.post("/api/logs/export")
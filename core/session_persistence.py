@@ -5,14 +5,33 @@ Handles saving and restoring session data between restarts.
 
 import json
 import os
+import gzip
+import zlib
+import time
 import asyncio
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterator
 from pathlib import Path
 import logging
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 logger = logging.getLogger(__name__)
 
+# Archive file suffixes, in lookup order
+ZSTD_SUFFIX = ".json.zst"
+GZIP_SUFFIX = ".json.gz"
+
+
+def _file_version(path: Path):
+    """What changes when a file is rewritten: modification time and size"""
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
 
 class SessionPersistence:
     """Manages persistent storage of Eva's conversation sessions and Zep mappings."""
@@ -27,6 +46,14 @@ class SessionPersistence:
         self.zep_mappings_file = self.storage_dir / "zep_mappings.json"
         self.conversation_history_dir = self.storage_dir / "conversations"
         self.conversation_history_dir.mkdir(exist_ok=True)
+        self.archive_dir = self.storage_dir / "archive"
+        self.archive_dir.mkdir(exist_ok=True)
+        
+        # Held while a hot history file is written, or checked and removed by the archiver
+        self._history_lock = threading.Lock()
+        
+        # Zstandard dictionaries loaded for reading, keyed by dict_id
+        self._zstd_dicts: Dict[int, Any] = {}
         
         # In-memory caches
         self.sessions_cache: Dict[str, Dict[str, Any]] = {}
@@ -154,10 +181,11 @@ class SessionPersistence:
         
         for session_id in sessions_to_remove:
             del self.sessions_cache[session_id]
-            # Also remove conversation history
+            # Also remove conversation history from both tiers
             history_file = self.conversation_history_dir / f"{session_id}.json"
             if history_file.exists():
                 history_file.unlink()
+            self._remove_archived_history(session_id)
                 
         if sessions_to_remove:
             self._persist_sessions()
@@ -193,55 +221,278 @@ class SessionPersistence:
         """Save full conversation history to separate file."""
         try:
             history_file = self.conversation_history_dir / f"{session_id}.json"
-            with open(history_file, 'w') as f:
-                json.dump({"messages": messages}, f, indent=2)
+            with self._history_lock:
+                with open(history_file, 'w') as f:
+                    json.dump({"messages": messages}, f, indent=2)
+                # The hot copy is now authoritative; drop any stale archived copy
+                self._remove_archived_history(session_id)
         except Exception as e:
             logger.error(f"Error saving conversation history for {session_id}: {e}")
     
     def _load_conversation_history(self, session_id: str) -> Optional[List[Dict[str, str]]]:
-        """Load full conversation history from separate file."""
+        """Load full conversation history, falling back to the archive tier."""
         try:
             history_file = self.conversation_history_dir / f"{session_id}.json"
             if history_file.exists():
                 with open(history_file, 'r') as f:
                     data = json.load(f)
                     return data.get("messages", [])
+            
+            archive_file = self._find_archived_history(session_id)
+            if archive_file:
+                data = json.loads(self._decompress(archive_file))
+                return data.get("messages", [])
         except Exception as e:
             logger.error(f"Error loading conversation history for {session_id}: {e}")
         return None
     
-    def export_user_data(self, user_id: str, export_dir: str):
-        """Export all data for a specific user."""
-        export_path = Path(export_dir) / f"eva_export_{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        export_path.mkdir(parents=True, exist_ok=True)
+    def _find_archived_history(self, session_id: str) -> Optional[Path]:
+        """Return the archived history file for a session, if any."""
+        for suffix in (ZSTD_SUFFIX, GZIP_SUFFIX):
+            archive_file = self.archive_dir / f"{session_id}{suffix}"
+            if archive_file.exists():
+                return archive_file
+        return None
+    
+    def _remove_archived_history(self, session_id: str):
+        """Delete archived history for a session from every archive format."""
+        for suffix in (ZSTD_SUFFIX, GZIP_SUFFIX):
+            archive_file = self.archive_dir / f"{session_id}{suffix}"
+            if archive_file.exists():
+                archive_file.unlink()
+    
+    def _load_zstd_dict(self, dict_id: int):
+        """Load a trained zstd dictionary by its id."""
+        if dict_id not in self._zstd_dicts:
+            dict_file = self.archive_dir / f"dict_{dict_id}.zdict"
+            self._zstd_dicts[dict_id] = zstandard.ZstdCompressionDict(dict_file.read_bytes())
+        return self._zstd_dicts[dict_id]
+    
+    def _decompress(self, archive_file: Path) -> bytes:
+        """Decompress an archived history file."""
+        raw = archive_file.read_bytes()
+        if archive_file.name.endswith(GZIP_SUFFIX):
+            return gzip.decompress(raw)
+        
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {archive_file.name}")
+        dict_id = zstandard.get_frame_parameters(raw).dict_id
+        if dict_id:
+            decompressor = zstandard.ZstdDecompressor(dict_data=self._load_zstd_dict(dict_id))
+        else:
+            decompressor = zstandard.ZstdDecompressor()
+        return decompressor.decompress(raw)
+    
+    def _train_zstd_dict(self, samples: List[bytes], dict_size: int = 64 * 1024):
+        """Train a zstd dictionary from history samples and store it by id."""
+        try:
+            dict_data = zstandard.train_dictionary(dict_size, samples)
+        except Exception as e:
+            logger.warning(f"Could not train zstd dictionary, archiving without one: {e}")
+            return None
+        
+        dict_file = self.archive_dir / f"dict_{dict_data.dict_id()}.zdict"
+        dict_file.write_bytes(dict_data.as_bytes())
+        self._zstd_dicts[dict_data.dict_id()] = dict_data
+        return dict_data
+    
+    def archive_old_sessions(self, days: int = 7, compression: Optional[str] = None,
+                             use_dictionary: bool = False, level: int = 19) -> Dict[str, Any]:
+        """
+        Move conversation histories untouched for `days` into the compressed archive tier.
+        
+        Archived histories stay readable through _load_conversation_history, so
+        get_session and export_user_data are unaffected. Uses zstd when available
+        (optionally with a dictionary trained on the batch being archived) and
+        gzip otherwise. Returns compression and cold-read latency statistics.
+        """
+        if compression is None:
+            compression = "zstd" if zstandard is not None else "gzip"
+        if compression == "zstd" and zstandard is None:
+            logger.warning("zstandard not installed, falling back to gzip archives")
+            compression = "gzip"
+        
+        cutoff = time.time() - days * 86400
+        candidates = [
+            history_file for history_file in self.conversation_history_dir.glob("*.json")
+            if history_file.stat().st_mtime < cutoff
+        ]
+        
+        stats = {
+            "archived": 0,
+            "skipped_changed": 0,
+            "compression": compression,
+            "dictionary_id": None,
+            "bytes_before": 0,
+            "bytes_after": 0,
+            "compression_ratio": None,
+            "cold_read_ms_avg": None,
+            "cold_read_ms_max": None
+        }
+        if not candidates:
+            return stats
+        
+        # Store minified JSON: indentation is pure overhead once nobody edits the file
+        payloads = {}
+        read_stats = {}  # (mtime, size) when read; a history saved since then is left in place
+        for history_file in candidates:
+            try:
+                with open(history_file, 'r') as f:
+                    read_stats[history_file] = _file_version(history_file)
+                    data = json.load(f)
+                payloads[history_file] = json.dumps(data, separators=(",", ":")).encode("utf-8")
+            except Exception as e:
+                logger.error(f"Skipping unreadable history file {history_file.name}: {e}")
+        
+        compressor = None
+        if compression == "zstd":
+            dict_data = None
+            if use_dictionary and len(payloads) >= 8:
+                dict_data = self._train_zstd_dict(list(payloads.values()))
+            if dict_data is not None:
+                stats["dictionary_id"] = dict_data.dict_id()
+                compressor = zstandard.ZstdCompressor(level=level, dict_data=dict_data)
+            else:
+                compressor = zstandard.ZstdCompressor(level=level)
         
-        user_data = {
+        cold_reads = []
+        for history_file, payload in payloads.items():
+            session_id = history_file.stem
+            try:
+                if compressor is not None:
+                    archive_file = self.archive_dir / f"{session_id}{ZSTD_SUFFIX}"
+                    compressed = compressor.compress(payload)
+                else:
+                    archive_file = self.archive_dir / f"{session_id}{GZIP_SUFFIX}"
+                    compressed = gzip.compress(payload, compresslevel=9)
+                
+                tmp_file = archive_file.with_name(archive_file.name + ".tmp")
+                tmp_file.write_bytes(compressed)
+                os.replace(tmp_file, archive_file)
+                
+                # Verify the archive round-trips before dropping the hot copy
+                start = time.perf_counter()
+                restored = json.loads(self._decompress(archive_file))
+                cold_reads.append((time.perf_counter() - start) * 1000)
+                if restored.get("messages") != json.loads(payload).get("messages"):
+                    raise ValueError("archive round-trip mismatch")
+                
+                with self._history_lock:
+                    if _file_version(history_file) != read_stats[history_file]:
+                        # Saved while being archived: the hot copy is newer than this archive
+                        archive_file.unlink(missing_ok=True)
+                        stats["skipped_changed"] += 1
+                        continue
+                    stats["bytes_before"] += history_file.stat().st_size
+                    stats["bytes_after"] += len(compressed)
+                    history_file.unlink()
+                stats["archived"] += 1
+            except Exception as e:
+                logger.error(f"Error archiving conversation history for {session_id}: {e}")
+        
+        if stats["bytes_after"]:
+            stats["compression_ratio"] = round(stats["bytes_before"] / stats["bytes_after"], 2)
+        if cold_reads:
+            stats["cold_read_ms_avg"] = round(sum(cold_reads) / len(cold_reads), 3)
+            stats["cold_read_ms_max"] = round(max(cold_reads), 3)
+        
+        logger.info(
+            f"Archived {stats['archived']} conversation histories "
+            f"({stats['bytes_before']} -> {stats['bytes_after']} bytes, ratio {stats['compression_ratio']})"
+        )
+        return stats
+    
+    def _user_session_ids(self, user_id: str) -> List[str]:
+        """Session IDs belonging to a user, in a stable order for resumable exports."""
+        return sorted(
+            session_id for session_id, session_data in list(self.sessions_cache.items())
+            if session_data.get("base_user_id") == user_id or session_data.get("user_id") == user_id
+        )
+    
+    def _export_session_record(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Build the export record for one session, loading its full history."""
+        session_data = self.sessions_cache.get(session_id)
+        if session_data is None:
+            return None
+        messages = self._load_conversation_history(session_id) or session_data.get("messages", [])
+        return {
+            "session_id": session_id,
+            "context": session_data.get("context"),
+            "mode": session_data.get("mode"),
+            "created_at": session_data.get("created_at"),
+            "messages": messages
+        }
+    
+    def iter_user_export(self, user_id: str, fmt: str = "json", compress: bool = False,
+                         after_session_id: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Stream a user's export as byte chunks, one session at a time.
+        
+        fmt is "json" (a single document, same shape as the file export) or
+        "ndjson" (a header line followed by one line per session). Sessions are
+        emitted in session_id order, so an interrupted download can be resumed
+        by passing the last received session_id as after_session_id.
+        """
+        if fmt not in ("json", "ndjson"):
+            raise ValueError(f"Unsupported export format: {fmt}")
+        
+        session_ids = self._user_session_ids(user_id)
+        if after_session_id is not None:
+            session_ids = [session_id for session_id in session_ids if session_id > after_session_id]
+        
+        header = {
             "user_id": user_id,
             "export_date": datetime.now().isoformat(),
-            "sessions": []
+            "session_count": len(session_ids)
         }
+        if after_session_id is not None:
+            header["resumed_after"] = after_session_id
         
-        for session_id, session_data in self.sessions_cache.items():
-            if session_data.get("base_user_id") == user_id or session_data.get("user_id") == user_id:
-                # Get full conversation history
-                messages = self._load_conversation_history(session_id) or session_data.get("messages", [])
-                
-                user_data["sessions"].append({
-                    "session_id": session_id,
-                    "context": session_data.get("context"),
-                    "mode": session_data.get("mode"),
-                    "created_at": session_data.get("created_at"),
-                    "messages": messages
-                })
+        def chunks() -> Iterator[bytes]:
+            if fmt == "ndjson":
+                yield (json.dumps({"type": "export", **header}) + "\n").encode("utf-8")
+            else:
+                yield json.dumps(header)[:-1].encode("utf-8") + b', "sessions": ['
+            
+            first = True
+            for session_id in session_ids:
+                record = self._export_session_record(session_id)
+                if record is None:
+                    continue  # Removed since the export started
+                if fmt == "ndjson":
+                    yield (json.dumps({"type": "session", **record}) + "\n").encode("utf-8")
+                else:
+                    yield (b"" if first else b", ") + json.dumps(record).encode("utf-8")
+                first = False
+            
+            if fmt == "json":
+                yield b"]}\n"
+        
+        if not compress:
+            yield from chunks()
+            return
         
-        # Save export
-        with open(export_path / "eva_conversations.json", 'w') as f:
-            json.dump(user_data, f, indent=2)
+        # wbits=31 produces a gzip container from a streaming zlib compressor
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks():
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+    
+    def export_user_data(self, user_id: str, export_dir: str, fmt: str = "json", compress: bool = False):
+        """Export all data for a specific user, streaming sessions to disk one at a time."""
+        export_path = Path(export_dir) / f"eva_export_{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        export_path.mkdir(parents=True, exist_ok=True)
+        
+        file_name = f"eva_conversations.{fmt}" + (".gz" if compress else "")
+        with open(export_path / file_name, 'wb') as f:
+            for chunk in self.iter_user_export(user_id, fmt=fmt, compress=compress):
+                f.write(chunk)
             
         logger.info(f"Exported data for user {user_id} to {export_path}")
         return str(export_path)
 
-
 # Singleton instance
 _session_persistence = None
 
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Audio Decode - Uploaded audio to 16 kHz mono float32 samples, entirely in memory
+WAV is parsed with the standard library, other containers (webm/opus, m4a, mp3, ogg)
+are decoded with PyAV; raw PCM from the voice websocket is only converted, never decoded.
+"""
+
+import io
+import wave
+import numpy as np
+
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    av = None
+    AV_AVAILABLE = False
+
+# Whisper models expect 16 kHz mono
+TARGET_SAMPLE_RATE = 16000
+
+
+class AudioDecodeError(ValueError):
+    """The audio could not be decoded"""
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    """Linear-interpolation resampling (plenty for speech recognition)"""
+    if from_rate == to_rate or not len(samples):
+        return samples
+    duration = len(samples) / from_rate
+    target_times = np.arange(int(duration * to_rate)) / to_rate
+    source_times = np.arange(len(samples)) / from_rate
+    return np.interp(target_times, source_times, samples).astype(np.float32)
+
+
+def pcm16_to_float32(pcm: bytes, sample_rate: int = TARGET_SAMPLE_RATE, channels: int = 1) -> np.ndarray:
+    """Raw signed 16-bit little-endian PCM to 16 kHz mono float32 in [-1, 1)"""
+    samples = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2).astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return resample(samples, sample_rate)
+
+
+def float32_to_pcm16(samples: np.ndarray) -> bytes:
+    """float32 samples back to 16-bit PCM (for APIs that want raw frames)"""
+    return np.clip(np.round(samples * 32768.0), -32768, 32767).astype("<i2").tobytes()
+
+
+def _decode_wav(data: bytes) -> np.ndarray:
+    with wave.open(io.BytesIO(data), "rb") as wav_file:
+        channels = wav_file.getnchannels()
+        width = wav_file.getsampwidth()
+        rate = wav_file.getframerate()
+        frames = wav_file.readframes(wav_file.getnframes())
+
+    if width == 2:
+        return pcm16_to_float32(frames, rate, channels)
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128.0
+    elif width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8)[:len(frames) - len(frames) % 3].reshape(-1, 3)
+        ints = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int32) << 16))
+        samples = (np.where(ints >= 1 << 23, ints - (1 << 24), ints)).astype(np.float32) / float(1 << 23)
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / float(1 << 31)
+    else:
+        raise AudioDecodeError(f"Unsupported WAV sample width: {width}")
+
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return resample(samples, rate)
+
+
+def _decode_container(data: bytes) -> np.ndarray:
+    chunks = []
+    with av.open(io.BytesIO(data), mode="r") as container:
+        if not container.streams.audio:
+            raise AudioDecodeError("No audio stream found")
+        resampler = av.AudioResampler(format="flt", layout="mono", rate=TARGET_SAMPLE_RATE)
+        for frame in container.decode(container.streams.audio[0]):
+            for resampled in resampler.resample(frame):
+                chunks.append(resampled.to_ndarray().reshape(-1))
+        for resampled in resampler.resample(None):
+            chunks.append(resampled.to_ndarray().reshape(-1))
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks).astype(np.float32, copy=False)
+
+
+def decode_audio(data: bytes) -> np.ndarray:
+    """
+    Decode an audio file held in memory to 16 kHz mono float32 samples.
+
+    Raises AudioDecodeError if the data can't be decoded.
+    """
+    if not data:
+        raise AudioDecodeError("No audio data")
+
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        try:
+            return _decode_wav(data)
+        except wave.Error:
+            pass  # e.g. float or compressed WAV: let PyAV handle it
+
+    if not AV_AVAILABLE:
+        raise AudioDecodeError("Decoding compressed audio needs PyAV. Run: pip install av")
+    try:
+        return _decode_container(data)
+    except AudioDecodeError:
+        raise
+    except Exception as e:
+        raise AudioDecodeError(f"Could not decode audio: {e}") from e
@@ -7,13 +7,18 @@ import asyncio
 import httpx
 import base64
 import json
-from typing import Optional, Dict, Any, AsyncGenerator
+import wave
+from typing import Optional, Dict, Any, AsyncGenerator, Callable, List
 from io import BytesIO
+from integrations.tts_cache import TTSCache, TTS_CACHE_ENABLED, cache_key
+from integrations.elevenlabs_streaming import (
+    StreamingTTSSession, ELEVENLABS_STREAMING_LATENCY, WEBSOCKETS_AVAILABLE
+)
 
 class ElevenLabsIntegration:
     """Handle TTS and STT using ElevenLabs API."""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache: Optional[TTSCache] = None):
         self.api_key = api_key
         self.base_url = "https://api.elevenlabs.io/v1"
         self.headers = {
@@ -23,6 +28,67 @@ class ElevenLabsIntegration:
         # Default voice ID - using your preferred voice
         self.default_voice_id = "L4so9SudEsIYzE9j4qlR"  # Your chosen voice
         self.model_id = "eleven_turbo_v2_5"  # Latest turbo model for better quality
+        self.voice_settings = {
+            "stability": 0.75,        # Higher stability for consistent voice
+            "similarity_boost": 0.8,  # Higher similarity for natural sound
+            "style": 0.4,            # Some style for personality
+            "use_speaker_boost": True
+        }
+        
+        # optimize_streaming_latency for streamed requests (0 best quality - 4 lowest latency)
+        self.streaming_latency = ELEVENLABS_STREAMING_LATENCY
+        
+        # Content-addressed audio cache in front of both TTS methods
+        self.cache = cache if cache is not None else (TTSCache() if TTS_CACHE_ENABLED else None)
+        
+        # Persistent input-streaming connections, one per voice session
+        self.streaming_sessions: Dict[str, StreamingTTSSession] = {}
+    
+    def _cache_key(self, text: str, voice_id: Optional[str], model_id: Optional[str]) -> str:
+        return cache_key(text, voice_id or self.default_voice_id, model_id or self.model_id, self.voice_settings)
+    
+    def is_cached(self, text: str, voice_id: Optional[str] = None, model_id: Optional[str] = None) -> bool:
+        """Whether speech for this text is already cached (no I/O, no stats)"""
+        return self.cache is not None and self._cache_key(text, voice_id, model_id) in self.cache
+    
+    async def _cache_get(self, text: str, voice_id: Optional[str], model_id: Optional[str]) -> Optional[bytes]:
+        if self.cache is None:
+            return None
+        key = self._cache_key(text, voice_id, model_id)
+        return await asyncio.to_thread(self.cache.get, key, len(text))
+    
+    async def _cache_put(self, text: str, voice_id: Optional[str], model_id: Optional[str], audio: bytes):
+        if self.cache is None:
+            return
+        try:
+            await asyncio.to_thread(self.cache.put, self._cache_key(text, voice_id, model_id), audio)
+        except Exception as e:
+            print(f"Error caching TTS audio: {e}")
+    
+    async def cache_audio(self, text: str, audio: bytes, voice_id: Optional[str] = None):
+        """Cache speech produced elsewhere (e.g. a completed streaming-session reply)"""
+        await self._cache_put(text, voice_id, None, audio)
+    
+    async def prewarm_cache(self, phrases: List[str], voice_id: Optional[str] = None,
+                            on_usage: Optional[Callable[[str], Any]] = None) -> Dict[str, int]:
+        """
+        Synthesize phrases that aren't cached yet so later requests are served locally.
+        on_usage is called with each phrase sent to ElevenLabs, to charge it like any other speech.
+        """
+        synthesized = 0
+        characters = 0
+        for phrase in phrases:
+            if self.is_cached(phrase, voice_id):
+                continue
+            try:
+                await self.text_to_speech(phrase, voice_id=voice_id)
+                synthesized += 1
+                characters += len(phrase)
+                if on_usage:
+                    on_usage(phrase)
+            except Exception as e:
+                print(f"Error pre-warming TTS cache for '{phrase[:30]}': {e}")
+        return {"phrases": len(phrases), "synthesized": synthesized, "characters": characters}
         
     async def text_to_speech(
         self, 
@@ -35,6 +101,10 @@ class ElevenLabsIntegration:
         voice_id = voice_id or self.default_voice_id
         model_id = model_id or self.model_id
         
+        cached = await self._cache_get(text, voice_id, model_id)
+        if cached is not None:
+            return cached
+        
         url = f"{self.base_url}/text-to-speech/{voice_id}"
         
         if stream:
@@ -43,12 +113,7 @@ class ElevenLabsIntegration:
         payload = {
             "text": text,
             "model_id": model_id,
-            "voice_settings": {
-                "stability": 0.75,        # Higher stability for consistent voice
-                "similarity_boost": 0.8,  # Higher similarity for natural sound
-                "style": 0.4,            # Some style for personality
-                "use_speaker_boost": True
-            }
+            "voice_settings": self.voice_settings
         }
         
         async with httpx.AsyncClient() as client:
@@ -62,32 +127,38 @@ class ElevenLabsIntegration:
             if response.status_code != 200:
                 raise Exception(f"ElevenLabs TTS error: {response.status_code} - {response.text}")
             
+            await self._cache_put(text, voice_id, model_id, response.content)
             return response.content
     
     async def text_to_speech_stream(
         self, 
         text: str, 
         voice_id: Optional[str] = None,
-        model_id: Optional[str] = None
+        model_id: Optional[str] = None,
+        latency: Optional[int] = None
     ) -> AsyncGenerator[bytes, None]:
         """Stream text to speech using ElevenLabs API."""
         voice_id = voice_id or self.default_voice_id
         model_id = model_id or self.model_id
         
+        cached = await self._cache_get(text, voice_id, model_id)
+        if cached is not None:
+            for chunk in TTSCache.iter_chunks(cached):
+                yield chunk
+            return
+        
         url = f"{self.base_url}/text-to-speech/{voice_id}/stream"
         
         payload = {
             "text": text,
             "model_id": model_id,
-            "voice_settings": {
-                "stability": 0.75,        # Higher stability for consistent voice
-                "similarity_boost": 0.8,  # Higher similarity for natural sound
-                "style": 0.4,            # Some style for personality
-                "use_speaker_boost": True
-            },
-            "optimize_streaming_latency": 2
+            "voice_settings": self.voice_settings,
+            "optimize_streaming_latency": self.streaming_latency if latency is None else latency
         }
         
+        # Keep a copy of the stream; cached only if it completes
+        streamed: List[bytes] = []
+        
         async with httpx.AsyncClient() as client:
             async with client.stream(
                 "POST",
@@ -102,7 +173,36 @@ class ElevenLabsIntegration:
                 
                 async for chunk in response.aiter_bytes():
                     if chunk:
+                        streamed.append(chunk)
                         yield chunk
+        
+        await self._cache_put(text, voice_id, model_id, b"".join(streamed))
+    
+    def streaming_session(self, session_id: str, voice_id: Optional[str] = None,
+                          latency: Optional[int] = None,
+                          chunk_length_schedule: Optional[List[int]] = None) -> StreamingTTSSession:
+        """The persistent input-streaming connection of a voice session (connects on first use)"""
+        session = self.streaming_sessions.get(session_id)
+        if session is None or session.closed:
+            session = StreamingTTSSession(
+                self.api_key,
+                voice_id or self.default_voice_id,
+                self.model_id,
+                self.voice_settings,
+                latency=self.streaming_latency if latency is None else latency,
+                chunk_length_schedule=chunk_length_schedule
+            )
+            self.streaming_sessions[session_id] = session
+        return session
+    
+    async def close_streaming_session(self, session_id: str):
+        session = self.streaming_sessions.pop(session_id, None)
+        if session:
+            await session.close()
+    
+    @property
+    def supports_streaming_sessions(self) -> bool:
+        return WEBSOCKETS_AVAILABLE
     
     async def speech_to_text(self, audio_data: bytes, language_code: Optional[str] = "en") -> str:
         """Convert speech to text using ElevenLabs API."""
@@ -174,9 +274,10 @@ class WhisperSTT:
         audio_data: bytes, 
         language: Optional[str] = None,
         prompt: Optional[str] = None,
-        response_format: str = "text"
+        response_format: str = "text",
+        sample_rate: Optional[int] = None
     ) -> str:
-        """Convert speech to text using OpenAI Whisper."""
+        """Convert speech to text using OpenAI Whisper (raw 16-bit mono PCM when sample_rate is given)."""
         url = f"{self.base_url}/transcriptions"
         
         headers = {
@@ -184,9 +285,21 @@ class WhisperSTT:
         }
         
         # Create form data
-        files = {
-            "file": ("audio.webm", audio_data, "audio/webm")
-        }
+        if sample_rate:
+            # The API wants a container: wrap raw PCM in a WAV header
+            buffer = BytesIO()
+            with wave.open(buffer, "wb") as wav_file:
+                wav_file.setnchannels(1)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(sample_rate)
+                wav_file.writeframes(audio_data)
+            files = {
+                "file": ("audio.wav", buffer.getvalue(), "audio/wav")
+            }
+        else:
+            files = {
+                "file": ("audio.webm", audio_data, "audio/webm")
+            }
         
         data = {
             "model": "whisper-1",
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+ElevenLabs Streaming Sessions - One long-lived input-streaming WebSocket per voice session
+Each reply is a context on the shared connection: text is sent as it becomes available and
+audio is read back concurrently, so connection setup is paid once per conversation instead
+of once per sentence
+"""
+
+import os
+import json
+import base64
+import asyncio
+import itertools
+from typing import Any, AsyncGenerator, Dict, List, Optional
+from urllib.parse import urlencode
+
+try:
+    import websockets
+    WEBSOCKETS_AVAILABLE = True
+except ImportError:
+    WEBSOCKETS_AVAILABLE = False
+
+# Defaults, overridable from the environment
+ELEVENLABS_STREAMING_SESSIONS = os.getenv("ELEVENLABS_STREAMING_SESSIONS", "true").lower() == "true"
+ELEVENLABS_WS_URL = os.getenv("ELEVENLABS_WS_URL", "wss://api.elevenlabs.io/v1")
+# optimize_streaming_latency: 0 (best quality) to 4 (lowest latency)
+ELEVENLABS_STREAMING_LATENCY = int(os.getenv("ELEVENLABS_STREAMING_LATENCY", "2"))
+# Seconds without text before ElevenLabs closes the connection (reconnected on next use)
+TTS_STREAM_INACTIVITY_TIMEOUT = int(os.getenv("TTS_STREAM_INACTIVITY_TIMEOUT", "180"))
+# Characters sent but not yet voiced; senders wait beyond this
+TTS_STREAM_MAX_PENDING_CHARS = int(os.getenv("TTS_STREAM_MAX_PENDING_CHARS", "1000"))
+# Audio chunks buffered per reply; a reply whose reader falls further behind is ended with an
+# error so it doesn't stop the shared connection being read for the others
+TTS_STREAM_AUDIO_QUEUE = int(os.getenv("TTS_STREAM_AUDIO_QUEUE", "64"))
+TTS_STREAM_RECONNECT_ATTEMPTS = int(os.getenv("TTS_STREAM_RECONNECT_ATTEMPTS", "3"))
+TTS_STREAM_OUTPUT_FORMAT = "mp3_44100_128"
+
+
+class TTSStreamError(Exception):
+    """A streamed reply that can't be completed"""
+
+
+class StreamingTTSContext:
+    """One reply on a streaming session: send text, then read its audio"""
+
+    def __init__(self, session: "StreamingTTSSession", context_id: str, audio_queue_size: int):
+        self.session = session
+        self.context_id = context_id
+        self.text_sent: List[str] = []
+        self.pending_chars = 0
+        self.received_audio = False
+        self.closed = False
+        self.finished = False
+        self._audio: asyncio.Queue = asyncio.Queue(maxsize=audio_queue_size)
+
+    async def send_text(self, text: str):
+        """Send text to be spoken; whole words or sentences, ending with a space"""
+        if self.closed:
+            raise TTSStreamError("Context is closed")
+        if text:
+            await self.session._send_text(self, text)
+
+    async def flush(self):
+        """Generate audio for everything sent so far"""
+        await self.session._send_json({"context_id": self.context_id, "flush": True})
+
+    async def close(self):
+        """No more text; the audio stream ends once the rest is spoken"""
+        if not self.closed:
+            await self.session._ensure_connected()
+            self.closed = True
+            await self.flush()
+            await self.session._send_json({"context_id": self.context_id, "close_context": True})
+
+    async def abort(self):
+        """Drop the reply (e.g. the user barged in): stop its generation and free its pending characters"""
+        if not self.finished:
+            self.closed = True
+            await self.session._abort(self)
+
+    async def audio(self) -> AsyncGenerator[bytes, None]:
+        """Audio chunks as they arrive, until the context is finished"""
+        while True:
+            item = await self._audio.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def _end(self, error: Optional[Exception] = None):
+        """Finish the audio stream without waiting for room in the queue"""
+        if self.finished:
+            return
+        self.finished = True
+        while True:
+            try:
+                self._audio.put_nowait(error)
+                return
+            except asyncio.QueueFull:
+                self._audio.get_nowait()  # The reader is gone or behind; the end matters more
+
+
+class StreamingTTSSession:
+    """A persistent ElevenLabs multi-context input-streaming connection"""
+
+    def __init__(self, api_key: str, voice_id: str, model_id: str, voice_settings: Dict[str, Any],
+                 latency: int = ELEVENLABS_STREAMING_LATENCY,
+                 chunk_length_schedule: Optional[List[int]] = None,
+                 base_url: str = ELEVENLABS_WS_URL,
+                 max_pending_chars: int = TTS_STREAM_MAX_PENDING_CHARS,
+                 audio_queue_size: int = TTS_STREAM_AUDIO_QUEUE,
+                 reconnect_attempts: int = TTS_STREAM_RECONNECT_ATTEMPTS):
+        if not WEBSOCKETS_AVAILABLE:
+            raise RuntimeError("websockets not installed. Run: pip install websockets")
+        self.api_key = api_key
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self.voice_settings = voice_settings
+        self.latency = latency
+        self.chunk_length_schedule = chunk_length_schedule
+        self.base_url = base_url
+        self.max_pending_chars = max_pending_chars
+        self.audio_queue_size = audio_queue_size
+        self.reconnect_attempts = reconnect_attempts
+
+        self._ws = None
+        self._reader: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+        self._capacity = asyncio.Condition()
+        self._pending_chars = 0
+        self._contexts: Dict[str, StreamingTTSContext] = {}
+        self._ids = itertools.count(1)
+        self.closed = False
+
+        # Stats
+        self.connects = 0
+        self.contexts_opened = 0
+        self.contexts_aborted = 0
+        self.contexts_overflowed = 0
+        self.audio_bytes = 0
+        self.backpressure_waits = 0
+
+    @property
+    def url(self) -> str:
+        query = urlencode({
+            "model_id": self.model_id,
+            "output_format": TTS_STREAM_OUTPUT_FORMAT,
+            "optimize_streaming_latency": self.latency,
+            "inactivity_timeout": TTS_STREAM_INACTIVITY_TIMEOUT
+        })
+        return f"{self.base_url}/text-to-speech/{self.voice_id}/multi-stream-input?{query}"
+
+    async def open_context(self) -> StreamingTTSContext:
+        """Start a new reply on this session"""
+        await self._ensure_connected()
+        context = StreamingTTSContext(self, f"ctx_{next(self._ids)}", self.audio_queue_size)
+        self._contexts[context.context_id] = context
+        self.contexts_opened += 1
+        await self._send_json(self._context_init(context))
+        return context
+
+    def _context_init(self, context: StreamingTTSContext) -> Dict[str, Any]:
+        message = {"text": " ", "context_id": context.context_id, "voice_settings": self.voice_settings}
+        if self.chunk_length_schedule:
+            message["generation_config"] = {"chunk_length_schedule": self.chunk_length_schedule}
+        return message
+
+    async def _connect(self):
+        headers = {"xi-api-key": self.api_key}
+        try:
+            return await websockets.connect(self.url, additional_headers=headers, max_size=None)
+        except TypeError:
+            # websockets < 14
+            return await websockets.connect(self.url, extra_headers=headers, max_size=None)
+
+    async def _ensure_connected(self):
+        """Connect (or reconnect) and replay replies that hadn't produced audio yet"""
+        async with self._connect_lock:
+            if self._ws is not None:
+                return
+            if self.closed:
+                raise TTSStreamError("Streaming session is closed")
+
+            last_error = None
+            delay = 0.2
+            for attempt in range(self.reconnect_attempts):
+                try:
+                    ws = await self._connect()
+                    break
+                except Exception as e:
+                    last_error = e
+                    if attempt + 1 < self.reconnect_attempts:
+                        await asyncio.sleep(delay)
+                        delay *= 2
+            else:
+                error = TTSStreamError(f"Could not connect to ElevenLabs: {last_error}")
+                await self._fail_contexts(error)
+                raise error
+
+            self._ws = ws
+            self.connects += 1
+            self._reader = asyncio.create_task(self._read_loop(ws))
+
+            for context in list(self._contexts.values()):
+                await ws.send(json.dumps(self._context_init(context)))
+                for text in context.text_sent:
+                    await ws.send(json.dumps({"text": text, "context_id": context.context_id}))
+                if context.closed:
+                    await ws.send(json.dumps({"context_id": context.context_id, "flush": True}))
+                    await ws.send(json.dumps({"context_id": context.context_id, "close_context": True}))
+
+    async def _send_json(self, message: Dict[str, Any]):
+        await self._ensure_connected()
+        try:
+            await self._ws.send(json.dumps(message))
+        except websockets.ConnectionClosed:
+            # The reader notices too; replies without audio are replayed on reconnect
+            await self._handle_disconnect(self._ws)
+
+    async def _send_text(self, context: StreamingTTSContext, text: str):
+        # Backpressure: don't run further ahead of the audio than max_pending_chars
+        async with self._capacity:
+            if not self._has_capacity(len(text)):
+                self.backpressure_waits += 1
+                await self._capacity.wait_for(lambda: self._has_capacity(len(text)))
+            self._pending_chars += len(text)
+            context.pending_chars += len(text)
+        # Connect first: a reconnect replays text_sent, which mustn't include this text yet
+        await self._ensure_connected()
+        context.text_sent.append(text)
+        await self._send_json({"text": text, "context_id": context.context_id})
+
+    def _has_capacity(self, characters: int) -> bool:
+        return self._pending_chars == 0 or self._pending_chars + characters <= self.max_pending_chars
+
+    async def _release(self, context: StreamingTTSContext, characters: int):
+        characters = min(characters, context.pending_chars)
+        if characters <= 0:
+            return
+        async with self._capacity:
+            context.pending_chars -= characters
+            self._pending_chars -= characters
+            self._capacity.notify_all()
+
+    async def _read_loop(self, ws):
+        try:
+            async for message in ws:
+                data = json.loads(message)
+                context = self._contexts.get(data.get("contextId") or data.get("context_id"))
+                if context is None:
+                    continue
+                if data.get("error"):
+                    await self._finish(context, TTSStreamError(f"ElevenLabs stream error: {data['error']}"))
+                    continue
+                if data.get("audio"):
+                    audio = base64.b64decode(data["audio"])
+                    context.received_audio = True
+                    self.audio_bytes += len(audio)
+                    try:
+                        context._audio.put_nowait(audio)
+                    except asyncio.QueueFull:
+                        # Waiting here would stall every other reply on the connection
+                        self.contexts_overflowed += 1
+                        await self._abort(context, TTSStreamError("Audio reader fell behind; reply dropped"))
+                        continue
+                    alignment = data.get("normalizedAlignment") or data.get("alignment") or {}
+                    await self._release(context, len(alignment.get("chars") or []))
+                if data.get("isFinal"):
+                    await self._finish(context)
+        except websockets.ConnectionClosed:
+            pass
+        except Exception as e:
+            print(f"Error reading ElevenLabs stream: {e}")
+        finally:
+            await self._handle_disconnect(ws)
+
+    async def _finish(self, context: StreamingTTSContext, error: Optional[Exception] = None):
+        self._contexts.pop(context.context_id, None)
+        await self._release(context, context.pending_chars)
+        context._end(error)
+
+    async def _abort(self, context: StreamingTTSContext, error: Optional[Exception] = None):
+        self.contexts_aborted += 1
+        await self._finish(context, error)
+        # Closing without a flush stops generation; no reconnect just to say so
+        ws = self._ws
+        if ws is not None:
+            try:
+                await ws.send(json.dumps({"context_id": context.context_id, "close_context": True}))
+            except Exception:
+                pass
+
+    async def _handle_disconnect(self, ws):
+        if ws is None or self._ws is not ws:
+            return
+        self._ws = None
+        # Replies that already produced audio can't be resumed without repeating speech
+        for context in list(self._contexts.values()):
+            if context.received_audio:
+                await self._finish(context, TTSStreamError("ElevenLabs connection lost mid-reply"))
+        if self._contexts and not self.closed:
+            asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        try:
+            await self._ensure_connected()
+        except TTSStreamError as e:
+            print(f"ElevenLabs streaming reconnect failed: {e}")
+
+    async def _fail_contexts(self, error: Exception):
+        for context in list(self._contexts.values()):
+            await self._finish(context, error)
+
+    async def close(self):
+        """Close the connection; unfinished replies end with an error"""
+        self.closed = True
+        ws, self._ws = self._ws, None
+        if ws is not None:
+            try:
+                await ws.send(json.dumps({"close_socket": True}))
+                await ws.close()
+            except Exception:
+                pass
+        if self._reader:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+        await self._fail_contexts(TTSStreamError("Streaming session closed"))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self._ws is not None,
+            "connects": self.connects,
+            "reconnects": max(0, self.connects - 1),
+            "contexts_opened": self.contexts_opened,
+            "contexts_aborted": self.contexts_aborted,
+            "contexts_overflowed": self.contexts_overflowed,
+            "open_contexts": len(self._contexts),
+            "pending_chars": self._pending_chars,
+            "backpressure_waits": self.backpressure_waits,
+            "audio_bytes": self.audio_bytes,
+            "latency": self.latency
+        }
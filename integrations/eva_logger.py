@@ -7,35 +7,64 @@ Tracks all requests, responses, errors, and tool executions
 import os
 import json
 import logging
+import threading
 import traceback
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
 from pathlib import Path
 import asyncio
 from collections import deque
+from integrations.queued_logging import (
+    LOG_QUEUE_ENABLED, BatchingFileHandler, attach_queued_handlers, get_queue_stats
+)
+from integrations.log_index import LogIndex, LogIndexHandler, LOG_INDEX_RETENTION_DAYS
+from integrations.log_rotation import RotatingLogFileHandler
+from integrations.log_aggregates import RollingAggregates
 
 class EvaLogger:
     """Centralized logging system for Eva with audit trails"""
     
-    def __init__(self, log_dir: str = "logs/eva"):
+    def __init__(self, log_dir: str = "logs/eva", queued: bool = LOG_QUEUE_ENABLED):
         self.log_dir = Path(log_dir)
+        self.queued = queued
         self.log_dir.mkdir(parents=True, exist_ok=True)
         
-        # Different log files for different purposes
+        # Different log files for different purposes; each rolls over daily and by size
+        # into gzipped segments (requests.<start time>.log.gz)
         self.files = {
-            "requests": self.log_dir / f"requests_{datetime.now().strftime('%Y%m%d')}.log",
-            "errors": self.log_dir / f"errors_{datetime.now().strftime('%Y%m%d')}.log",
-            "tools": self.log_dir / f"tools_{datetime.now().strftime('%Y%m%d')}.log",
-            "audit": self.log_dir / f"audit_{datetime.now().strftime('%Y%m%d')}.log",
-            "performance": self.log_dir / f"performance_{datetime.now().strftime('%Y%m%d')}.log"
+            "requests": self.log_dir / "requests.log",
+            "errors": self.log_dir / "errors.log",
+            "tools": self.log_dir / "tools.log",
+            "audit": self.log_dir / "audit.log",
+            "performance": self.log_dir / "performance.log"
         }
         
+        # Disk-backed searchable index of structured entries
+        try:
+            self.log_index = LogIndex(str(self.log_dir / "log_index.db"))
+            self.log_index.prune()
+            if self.log_index.is_empty():
+                # Rebuild from the structured log streams (all rotated segments) without delaying startup
+                threading.Thread(
+                    target=self.log_index.backfill_from_logs,
+                    args=([self.files[key] for key in ("requests", "tools", "errors", "performance")],
+                          datetime.now() - timedelta(days=LOG_INDEX_RETENTION_DAYS), datetime.now()),
+                    name="log-index-backfill",
+                    daemon=True
+                ).start()
+        except Exception as e:
+            print(f"Log index unavailable, searching recent logs only: {e}")
+            self.log_index = None
+        
         # Setup formatters
         self.setup_loggers()
         
         # In-memory buffer for recent logs (last 1000 entries)
         self.recent_logs = deque(maxlen=1000)
         
+        # Rolling per-minute error counts and latency histograms
+        self.aggregates = RollingAggregates()
+        
         # Session tracking
         self.active_sessions = {}
         
@@ -49,37 +78,49 @@ class EvaLogger:
         # Request logger
         self.request_logger = logging.getLogger('eva.requests')
         self.request_logger.setLevel(logging.INFO)
-        request_handler = logging.FileHandler(self.files['requests'])
-        request_handler.setFormatter(formatter)
-        self.request_logger.addHandler(request_handler)
         
         # Error logger
         self.error_logger = logging.getLogger('eva.errors')
         self.error_logger.setLevel(logging.ERROR)
-        error_handler = logging.FileHandler(self.files['errors'])
-        error_handler.setFormatter(formatter)
-        self.error_logger.addHandler(error_handler)
         
         # Tool logger
         self.tool_logger = logging.getLogger('eva.tools')
         self.tool_logger.setLevel(logging.DEBUG)
-        tool_handler = logging.FileHandler(self.files['tools'])
-        tool_handler.setFormatter(formatter)
-        self.tool_logger.addHandler(tool_handler)
         
         # Audit logger
         self.audit_logger = logging.getLogger('eva.audit')
         self.audit_logger.setLevel(logging.INFO)
-        audit_handler = logging.FileHandler(self.files['audit'])
-        audit_handler.setFormatter(formatter)
-        self.audit_logger.addHandler(audit_handler)
         
         # Performance logger
         self.perf_logger = logging.getLogger('eva.performance')
         self.perf_logger.setLevel(logging.INFO)
-        perf_handler = logging.FileHandler(self.files['performance'])
-        perf_handler.setFormatter(formatter)
-        self.perf_logger.addHandler(perf_handler)
+        
+        pairs = []
+        for target_logger, file_key in [
+            (self.request_logger, 'requests'),
+            (self.error_logger, 'errors'),
+            (self.tool_logger, 'tools'),
+            (self.audit_logger, 'audit'),
+            (self.perf_logger, 'performance')
+        ]:
+            target_logger.handlers.clear()
+            handler_class = BatchingFileHandler if self.queued else RotatingLogFileHandler
+            handler = handler_class(self.files[file_key])
+            handler.setFormatter(formatter)
+            pairs.append((target_logger, handler))
+        
+        index_handlers = []
+        if self.log_index:
+            index_handlers.append(LogIndexHandler(self.log_index, commit_each=not self.queued))
+        
+        if self.queued:
+            # File writes and indexing happen on a background thread, never on the event loop
+            attach_queued_handlers("eva", pairs, shared_handlers=index_handlers)
+        else:
+            for target_logger, handler in pairs:
+                target_logger.addHandler(handler)
+                for index_handler in index_handlers:
+                    target_logger.addHandler(index_handler)
     
     def log_request(self, session_id: str, user_message: str, context: Dict[str, Any] = None):
         """Log incoming user request"""
@@ -91,7 +132,7 @@ class EvaLogger:
             "context": context or {}
         }
         
-        self.request_logger.info(json.dumps(log_entry))
+        self.request_logger.info(json.dumps(log_entry), extra={"log_entry": log_entry})
         self.recent_logs.append(log_entry)
         self._write_audit_log("USER_REQUEST", session_id, {"message": user_message})
         
@@ -105,7 +146,7 @@ class EvaLogger:
             "metadata": metadata or {}
         }
         
-        self.request_logger.info(json.dumps(log_entry))
+        self.request_logger.info(json.dumps(log_entry), extra={"log_entry": log_entry})
         self.recent_logs.append(log_entry)
         self._write_audit_log("EVA_RESPONSE", session_id, {"response_length": len(response)})
         
@@ -122,7 +163,7 @@ class EvaLogger:
             "success": bool(result and hasattr(result, 'success') and result.success)
         }
         
-        self.tool_logger.debug(json.dumps(log_entry))
+        self.tool_logger.debug(json.dumps(log_entry), extra={"log_entry": log_entry})
         self.recent_logs.append(log_entry)
         self._write_audit_log("TOOL_CALL", session_id, {
             "tool": tool_name,
@@ -142,8 +183,13 @@ class EvaLogger:
             "context": context or {}
         }
         
-        self.error_logger.error(json.dumps(log_entry))
+        self.error_logger.error(json.dumps(log_entry), extra={"log_entry": log_entry})
         self.recent_logs.append(log_entry)
+        self.aggregates.record_error(
+            log_entry["error_type"],
+            tool=log_entry["context"].get("tool"),
+            route=log_entry["context"].get("route")
+        )
         self._write_audit_log("ERROR", session_id, {
             "error_type": log_entry["error_type"],
             "error_message": log_entry["error_message"]
@@ -160,7 +206,8 @@ class EvaLogger:
             "metadata": metadata or {}
         }
         
-        self.perf_logger.info(json.dumps(log_entry))
+        self.perf_logger.info(json.dumps(log_entry), extra={"log_entry": log_entry})
+        self.aggregates.record_latency(operation, duration_ms)
         
         # Alert on slow operations
         if duration_ms > 5000:  # 5 seconds
@@ -179,8 +226,9 @@ class EvaLogger:
             "context": context or {}
         }
         
-        self.error_logger.error(json.dumps(log_entry))
+        self.error_logger.error(json.dumps(log_entry), extra={"log_entry": log_entry})
         self.recent_logs.append(log_entry)
+        self.aggregates.record_error("connection_error", route=log_entry["context"].get("route"))
         self._write_audit_log("CONNECTION_ERROR", session_id, {"details": error_details})
     
     def _write_audit_log(self, event_type: str, session_id: str, data: Dict[str, Any]):
@@ -204,28 +252,37 @@ class EvaLogger:
     
     def get_session_logs(self, session_id: str) -> List[Dict[str, Any]]:
         """Get all logs for a specific session"""
+        if self.log_index:
+            return self.query_logs(session_id=session_id, limit=10000, oldest_first=True)["results"]
         return [log for log in self.recent_logs if log.get("session_id") == session_id]
     
     def get_error_summary(self, hours: int = 24) -> Dict[str, Any]:
         """Get summary of recent errors"""
-        recent_errors = [
-            log for log in self.recent_logs 
-            if log.get("type") in ["error", "connection_error"]
-        ]
-        
-        error_types = {}
-        for error in recent_errors:
-            error_type = error.get("error_type", "connection_error")
-            error_types[error_type] = error_types.get(error_type, 0) + 1
-        
-        return {
-            "total_errors": len(recent_errors),
-            "error_types": error_types,
-            "recent_errors": recent_errors[-10:]  # Last 10 errors
-        }
+        # Counts come from the rolling aggregates; only the last few errors are fetched
+        summary = self.aggregates.error_summary(hours)
+        if self.log_index:
+            since = datetime.now() - timedelta(hours=hours)
+            recent_errors = []
+            for log_type in ("error", "connection_error"):
+                recent_errors += self.query_logs(log_type=log_type, start=since, limit=10)["results"]
+            recent_errors.sort(key=lambda log: log.get("timestamp", ""))
+        else:
+            recent_errors = [
+                log for log in self.recent_logs 
+                if log.get("type") in ["error", "connection_error"]
+            ]
+        summary["recent_errors"] = recent_errors[-10:]  # Last 10 errors
+        return summary
+    
+    def get_performance_summary(self, minutes: int = 60) -> Dict[str, Any]:
+        """Get latency percentiles per operation from the rolling aggregates"""
+        return self.aggregates.performance_summary(minutes)
     
     def search_logs(self, query: str, log_type: Optional[str] = None) -> List[Dict[str, Any]]:
         """Search logs for specific content"""
+        if self.log_index:
+            return self.query_logs(query=query, log_type=log_type, limit=1000)["results"]
+        
         results = []
         for log in self.recent_logs:
             if log_type and log.get("type") != log_type:
@@ -238,6 +295,30 @@ class EvaLogger:
         
         return results
     
+    def query_logs(self, query: Optional[str] = None, session_id: Optional[str] = None,
+                   log_type: Optional[str] = None, tool: Optional[str] = None,
+                   start: Optional[Any] = None, end: Optional[Any] = None,
+                   limit: int = 100, cursor: Optional[int] = None,
+                   oldest_first: bool = False) -> Dict[str, Any]:
+        """Full-text search and filtering over the disk-backed log index, with cursor paging"""
+        if not self.log_index:
+            logs = self.search_logs(query, log_type) if query else self.get_recent_logs(len(self.recent_logs), log_type)
+            if session_id:
+                logs = [log for log in logs if log.get("session_id") == session_id]
+            if tool:
+                logs = [log for log in logs if log.get("tool") == tool]
+            return {"results": logs[-limit:], "next_cursor": None}
+        
+        # Entries still in the log queue become searchable after the writer's next batch flush
+        return self.log_index.query(
+            text=query, session_id=session_id, log_type=log_type, tool=tool,
+            start=start, end=end, limit=limit, cursor=cursor, oldest_first=oldest_first
+        )
+    
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """Get depth, throughput and drop counts for the background log writers"""
+        return get_queue_stats()
+    
     def export_logs(self, session_id: Optional[str] = None, export_path: Optional[str] = None) -> str:
         """Export logs to a file"""
         if not export_path:
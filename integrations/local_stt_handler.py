@@ -1,151 +1,507 @@
 #!/usr/bin/env python3
 """
 Local STT Handler using faster-whisper
-Provides offline speech-to-text without API calls
+Provides offline speech-to-text without API calls. Inference runs on a bounded pool of
+worker threads (one model per worker) so a decode never blocks the event loop; audio is
+decoded in memory (no temp files) and raw PCM goes straight to the model. Short utterances
+from concurrent sessions can be batched into one inference pass.
 """
-import io
 import os
-import tempfile
+import time
+import asyncio
 import logging
-from typing import Optional
-from faster_whisper import WhisperModel
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from integrations.audio_decode import decode_audio, pcm16_to_float32
+
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    WhisperModel = None
+    FASTER_WHISPER_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+_CPU_COUNT = os.cpu_count() or 1
+# Inference workers, each with its own model; CPU threads are split between them
+LOCAL_STT_WORKERS = int(os.getenv("LOCAL_STT_WORKERS", str(max(1, _CPU_COUNT // 2))))
+# Requests allowed to wait for a free worker; more are rejected instead of piling up
+LOCAL_STT_QUEUE_SIZE = int(os.getenv("LOCAL_STT_QUEUE_SIZE", "8"))
+# Collect utterances for this long and run them as one batch (0 = no batching)
+LOCAL_STT_BATCH_WINDOW_MS = int(os.getenv("LOCAL_STT_BATCH_WINDOW_MS", "0"))
+# A batch runs as soon as it has this many utterances
+LOCAL_STT_MAX_BATCH = int(os.getenv("LOCAL_STT_MAX_BATCH", "8"))
+# Whisper's context: longer audio is transcribed on its own
+BATCH_MAX_SECONDS = 30
+
+
+class STTQueueFull(Exception):
+    """All workers are busy and the submission queue is full"""
+
+
+class STTHandlerClosed(Exception):
+    """The handler was closed (its model unloaded); get a fresh one from the model manager"""
+
+
+@dataclass
+class STTResult:
+    """A transcription with its timing"""
+    text: Optional[str]
+    queue_ms: float
+    inference_ms: float
+    model: str
+    words: Optional[List[Tuple[float, float, str]]] = None  # (start s, end s, word) if requested
+    batch_size: int = 1
+
+
+@dataclass
+class _BatchItem:
+    """An utterance waiting for its batch"""
+    audio: Union[bytes, np.ndarray]
+    sample_rate: Optional[int]
+    submitted: float
+    cancelled: threading.Event
+    future: asyncio.Future
+
+
+def whisper_batch_transcribe(model, batch: List[np.ndarray], language: str) -> List[str]:
+    """
+    Transcribe several short (<= 30 s) utterances in one CTranslate2 pass: their mel features
+    are stacked, encoded and decoded as one batch, the way faster-whisper's
+    BatchedInferencePipeline handles the chunks of a single file. There is no VAD filtering
+    here; voice utterances arrive already segmented.
+    """
+    from faster_whisper.audio import pad_or_trim
+    from faster_whisper.tokenizer import Tokenizer
+
+    tokenizer = Tokenizer(model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language=language)
+    features = np.stack([pad_or_trim(model.feature_extractor(samples)) for samples in batch])
+    encoder_output = model.encode(features)
+    prompt = model.get_prompt(tokenizer, [], without_timestamps=True)
+    results = model.model.generate(
+        encoder_output,
+        [prompt] * len(batch),
+        beam_size=5,
+        max_length=448,
+        suppress_blank=True,
+        suppress_tokens=[-1],
+        return_no_speech_prob=True
+    )
+    return ["" if result.no_speech_prob > 0.6 else tokenizer.decode(result.sequences_ids[0]).strip()
+            for result in results]
+
+
 class LocalSTTHandler:
     """Local Speech-to-Text using faster-whisper"""
-    
-    def __init__(self, model_size: str = "tiny"):
+
+    def __init__(self, model_size: str = "tiny", compute_type: str = "int8", workers: int = LOCAL_STT_WORKERS,
+                 queue_size: int = LOCAL_STT_QUEUE_SIZE, model_loader: Optional[Callable[[], Any]] = None,
+                 batch_window_ms: int = LOCAL_STT_BATCH_WINDOW_MS, max_batch: int = LOCAL_STT_MAX_BATCH,
+                 batch_transcriber: Optional[Callable[[Any, List[np.ndarray], str], List[str]]] = None):
         """
         Initialize local STT
-        
+
         Args:
             model_size: tiny, base, small, medium, large-v3
                        tiny = 39MB, fastest
-                       base = 74MB, good balance  
+                       base = 74MB, good balance
                        small = 244MB, better accuracy
+            compute_type: CTranslate2 quantization (int8, int8_float32, float32, ...)
+            workers: Inference worker threads, each loading the model once
+            queue_size: Requests that may wait for a worker before new ones are rejected
+            model_loader: Builds a model (defaults to a CPU WhisperModel)
+            batch_window_ms: How long plain transcriptions wait to share a batch (0 = no batching)
+            max_batch: Utterances per batch
+            batch_transcriber: Runs a batch on a model (defaults to whisper_batch_transcribe)
         """
         self.model_size = model_size
+        self.compute_type = compute_type
+        self.name = f"{model_size}:{compute_type}"
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.cpu_threads = max(1, _CPU_COUNT // self.workers)
+        self.model_loader = model_loader or self._load_whisper_model
         self.model = None
         self.is_initialized = False
-        
+        self.closed = False
+        self.leases = 0  # Callers holding this handler between requests (see STTModelManager.acquire)
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._pending = 0
+
+        self.batch_window_ms = batch_window_ms
+        self.max_batch = max(1, max_batch)
+        self.batch_transcriber = batch_transcriber or whisper_batch_transcribe
+        self._batches: Dict[str, List[_BatchItem]] = {}  # language -> utterances waiting
+        self._batch_timers: Dict[str, asyncio.TimerHandle] = {}
+        self._batch_tasks = set()
+
+        # Stats
+        self.models_loaded = 0
+        self.completed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.total_queue_ms = 0.0
+        self.total_inference_ms = 0.0
+        self.batch_sizes = Counter()
+        self.batch_fallbacks = 0
+
+    @property
+    def capacity(self) -> int:
+        """Requests accepted at once: one (or one batch) per worker plus the queue"""
+        per_worker = self.max_batch if self.batch_window_ms > 0 else 1
+        return self.workers * per_worker + self.queue_size
+
+    @property
+    def free_slots(self) -> int:
+        """Requests that can still be accepted before new ones are rejected"""
+        return max(0, self.capacity - self._pending)
+
+    def _load_whisper_model(self):
+        if not FASTER_WHISPER_AVAILABLE:
+            raise RuntimeError("faster-whisper not installed. Run: pip install faster-whisper")
+
+        # Check if model files exist
+        model_path = os.path.expanduser(f"~/.cache/huggingface/hub/models--Systran--faster-whisper-{self.model_size}")
+        if not os.path.exists(model_path):
+            logger.info(f"Model will be downloaded on first use: {self.model_size}")
+
+        return WhisperModel(
+            self.model_size,
+            device="cpu",
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads
+        )
+
+    def _worker_model(self):
+        """This worker thread's model, loaded on its first job"""
+        model = getattr(self._local, "model", None)
+        if model is None:
+            model = self._local.model = self.model_loader()
+            with self._stats_lock:
+                self.models_loaded += 1
+        return model
+
     def initialize(self) -> bool:
-        """Initialize the Whisper model"""
+        """Initialize the Whisper model (blocking: loads it in the first worker)"""
+        if self.closed:
+            logger.error(f"❌ Local STT {self.name} was closed; not loading it again")
+            return False
         try:
             if self.is_initialized and self.model is not None:
                 return True
-                
-            logger.info(f"Loading Whisper {self.model_size} model...")
-            
-            # Check if model files exist
-            import os
-            model_path = os.path.expanduser(f"~/.cache/huggingface/hub/models--Systran--faster-whisper-{self.model_size}")
-            if not os.path.exists(model_path):
-                logger.info(f"Model will be downloaded on first use: {self.model_size}")
-            
-            self.model = WhisperModel(
-                self.model_size, 
-                device="cpu", 
-                compute_type="int8"
-            )
-            
+
+            logger.info(f"Loading Whisper {self.name} model ({self.workers} workers, {self.cpu_threads} threads each)...")
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="local-stt")
+            self.model = self._executor.submit(self._worker_model).result()
+
             # Test the model with a simple check
             if self.model is None:
                 raise Exception("Model failed to load")
-            
+
             self.is_initialized = True
             logger.info("✅ Local STT initialized successfully")
             return True
-            
+
         except Exception as e:
             logger.error(f"❌ Failed to initialize local STT: {e}")
             self.is_initialized = False
             self.model = None
             return False
-    
-    def transcribe_audio(self, audio_data: bytes, language: str = "en") -> Optional[str]:
+
+    @staticmethod
+    def _to_samples(audio: Union[bytes, np.ndarray], sample_rate: Optional[int] = None) -> np.ndarray:
+        """16 kHz float32 samples from an array, raw 16-bit PCM (sample_rate given) or an audio file"""
+        if isinstance(audio, np.ndarray):
+            return audio
+        if sample_rate:
+            return pcm16_to_float32(audio, sample_rate)
+        return decode_audio(audio)
+
+    def _transcribe_with(self, model, audio: Union[bytes, np.ndarray], language: str,
+                         cancelled: Optional[threading.Event] = None,
+                         sample_rate: Optional[int] = None,
+                         word_timestamps: bool = False,
+                         initial_prompt: Optional[str] = None) -> Tuple[Optional[str], Optional[list]]:
+        """
+        Run one transcription on a model (blocking); stops between segments once cancelled.
+        Returns (text, words), words being (start, end, word) tuples when word_timestamps is set.
         """
-        Transcribe audio bytes to text
-        
+        segments, info = model.transcribe(
+            self._to_samples(audio, sample_rate),
+            language=language,
+            vad_filter=True,  # Voice activity detection
+            vad_parameters=dict(min_silence_duration_ms=500),
+            word_timestamps=word_timestamps,
+            initial_prompt=initial_prompt
+        )
+
+        # Combine segments (decoding happens lazily, segment by segment)
+        texts = []
+        words = [] if word_timestamps else None
+        for segment in segments:
+            if cancelled is not None and cancelled.is_set():
+                return None, None
+            texts.append(segment.text)
+            if word_timestamps:
+                words.extend((word.start, word.end, word.word) for word in segment.words or [])
+        return self._clean_text(" ".join(texts)), words
+
+    @staticmethod
+    def _clean_text(text: str) -> Optional[str]:
+        text = text.strip()
+
+        # Handle empty transcriptions
+        if not text or text == "..." or len(text) < 2:
+            logger.warning("Empty or minimal transcription detected")
+            return None
+
+        logger.info(f"🎤 Transcribed: {text[:100]}...")
+        return text
+
+    def transcribe_audio(self, audio_data: Union[bytes, np.ndarray], language: str = "en",
+                         sample_rate: Optional[int] = None) -> Optional[str]:
+        """
+        Transcribe audio bytes to text (blocking; async code should use transcribe())
+
         Args:
-            audio_data: Audio file bytes (wav, mp3, m4a, etc.)
+            audio_data: Audio file bytes (wav, webm/opus, m4a, etc.), raw 16-bit mono PCM
+                        when sample_rate is given, or 16 kHz float32 samples
             language: Language code (en, es, fr, etc.)
-            
+            sample_rate: Sample rate of raw PCM input (skips decoding)
+
         Returns:
             Transcribed text or None if failed
         """
         if not self.is_initialized:
             if not self.initialize():
                 return None
-                
+
         try:
-            # Save audio to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_file.write(audio_data)
-                temp_path = temp_file.name
-            
-            try:
-                # Transcribe
-                segments, info = self.model.transcribe(
-                    temp_path, 
-                    language=language,
-                    vad_filter=True,  # Voice activity detection
-                    vad_parameters=dict(min_silence_duration_ms=500)
-                )
-                
-                # Combine segments
-                text = " ".join([segment.text for segment in segments]).strip()
-                
-                # Handle empty transcriptions
-                if not text or text == "..." or len(text) < 2:
-                    logger.warning("Empty or minimal transcription detected")
-                    return None
-                
-                logger.info(f"🎤 Transcribed: {text[:100]}...")
-                return text
-                
-            finally:
-                # Clean up temp file
-                os.unlink(temp_path)
-                
+            return self._transcribe_with(self.model, audio_data, language, sample_rate=sample_rate)[0]
         except Exception as e:
             logger.error(f"❌ Transcription failed: {e}")
             return None
-    
+
+    def _run_job(self, audio_data: Union[bytes, np.ndarray], language: str, sample_rate: Optional[int],
+                 submitted: float, cancelled: threading.Event, options: Dict[str, Any]):
+        """Worker side of transcribe(): returns (text, words, queue_ms, inference_ms)"""
+        started = time.perf_counter()
+        queue_ms = (started - submitted) * 1000
+        if cancelled.is_set():
+            return None, None, queue_ms, 0.0
+        text, words = self._transcribe_with(self._worker_model(), audio_data, language, cancelled, sample_rate, **options)
+        return text, words, queue_ms, (time.perf_counter() - started) * 1000
+
+    async def transcribe(self, audio_data: Union[bytes, np.ndarray], language: str = "en",
+                         sample_rate: Optional[int] = None, word_timestamps: bool = False,
+                         initial_prompt: Optional[str] = None) -> STTResult:
+        """
+        Transcribe on the worker pool without blocking the event loop. Input is as for
+        transcribe_audio(); decoding happens in the worker and counts as inference time.
+        word_timestamps adds per-word timings to the result; initial_prompt conditions the
+        decoder on preceding text.
+
+        Raises STTQueueFull when every worker is busy and the queue is full. Cancelling the
+        caller (e.g. the client disconnected) drops a queued job, or stops a running one
+        at the next segment. Raises STTHandlerClosed once the handler was closed, instead of
+        silently loading a second copy of the model outside the manager's memory budget.
+        """
+        if self.closed:
+            raise STTHandlerClosed(f"Local STT {self.name} was unloaded")
+        if not self.is_initialized and not await asyncio.to_thread(self.initialize):
+            raise RuntimeError("Local STT not available")
+        if self._pending >= self.capacity:
+            self.rejected += 1
+            raise STTQueueFull(f"Local STT busy: {self._pending} requests in progress")
+
+        self._pending += 1
+        cancelled = threading.Event()
+        batch_size = 1
+        try:
+            if self.batch_window_ms > 0 and not word_timestamps and not initial_prompt:
+                text, words, queue_ms, inference_ms, batch_size = await self._enqueue_batch(
+                    audio_data, language, sample_rate, cancelled
+                )
+            else:
+                loop = asyncio.get_running_loop()
+                text, words, queue_ms, inference_ms = await loop.run_in_executor(
+                    self._executor, self._run_job, audio_data, language, sample_rate, time.perf_counter(), cancelled,
+                    {"word_timestamps": word_timestamps, "initial_prompt": initial_prompt}
+                )
+        except asyncio.CancelledError:
+            cancelled.set()
+            self.cancelled += 1
+            raise
+        finally:
+            self._pending -= 1
+
+        self.completed += 1
+        self.total_queue_ms += queue_ms
+        self.total_inference_ms += inference_ms
+        return STTResult(text, round(queue_ms, 1), round(inference_ms, 1), self.name, words, batch_size)
+
+    def _enqueue_batch(self, audio_data, language: str, sample_rate: Optional[int],
+                       cancelled: threading.Event) -> asyncio.Future:
+        """Add an utterance to its language's batch; the batch runs when full or when the window ends"""
+        loop = asyncio.get_running_loop()
+        item = _BatchItem(audio_data, sample_rate, time.perf_counter(), cancelled, loop.create_future())
+        batch = self._batches.setdefault(language, [])
+        batch.append(item)
+        if len(batch) >= self.max_batch:
+            self._flush_batch(language)
+        elif len(batch) == 1:
+            self._batch_timers[language] = loop.call_later(self.batch_window_ms / 1000, self._flush_batch, language)
+        return item.future
+
+    def _flush_batch(self, language: str):
+        timer = self._batch_timers.pop(language, None)
+        if timer:
+            timer.cancel()
+        items = self._batches.pop(language, [])
+        if items:
+            task = asyncio.create_task(self._dispatch_batch(items, language))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _dispatch_batch(self, items: List[_BatchItem], language: str):
+        """Run a batch on the pool and route each result back to its caller's future"""
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self._executor, self._run_batch, items, language)
+        except Exception as e:
+            results = [e] * len(items)
+        for item, result in zip(items, results):
+            if item.future.done():
+                continue  # Caller went away
+            if isinstance(result, Exception):
+                item.future.set_exception(result)
+            else:
+                item.future.set_result(result)
+
+    def _run_batch(self, items: List[_BatchItem], language: str) -> list:
+        """Worker side of a batch: one (text, words, queue_ms, inference_ms, batch_size) or exception per item"""
+        started = time.perf_counter()
+        results: List[Any] = [None] * len(items)
+        samples = {}
+        for index, item in enumerate(items):
+            if item.cancelled.is_set():
+                continue
+            try:
+                samples[index] = self._to_samples(item.audio, item.sample_rate)
+            except Exception as e:
+                results[index] = e
+
+        model = self._worker_model()
+        texts: Dict[int, Optional[str]] = {}
+        short = [index for index, audio in samples.items() if len(audio) <= BATCH_MAX_SECONDS * 16000]
+        if len(short) > 1:
+            try:
+                batch_texts = self.batch_transcriber(model, [samples[index] for index in short], language)
+                texts.update({index: self._clean_text(text) for index, text in zip(short, batch_texts)})
+            except Exception as e:
+                logger.warning(f"Batched transcription failed, transcribing one by one: {e}")
+                with self._stats_lock:
+                    self.batch_fallbacks += 1
+        for index, audio in samples.items():
+            if index not in texts:
+                try:
+                    texts[index] = self._transcribe_with(model, audio, language, items[index].cancelled)[0]
+                except Exception as e:
+                    results[index] = e
+
+        inference_ms = (time.perf_counter() - started) * 1000
+        size = len(texts)
+        if size:
+            with self._stats_lock:
+                self.batch_sizes[size] += 1
+        for index, text in texts.items():
+            if results[index] is None:
+                results[index] = (text, None, (started - items[index].submitted) * 1000, inference_ms, size)
+        return [result if result is not None else (None, None, 0.0, 0.0, 0) for result in results]
+
     def transcribe_file(self, file_path: str, language: str = "en") -> Optional[str]:
         """
         Transcribe audio file to text
-        
+
         Args:
             file_path: Path to audio file
             language: Language code
-            
+
         Returns:
             Transcribed text or None if failed
         """
         if not self.is_initialized:
             if not self.initialize():
                 return None
-                
+
         try:
             segments, info = self.model.transcribe(
-                file_path, 
+                file_path,
                 language=language,
                 vad_filter=True,
                 vad_parameters=dict(min_silence_duration_ms=500)
             )
-            
+
             text = " ".join([segment.text for segment in segments]).strip()
             logger.info(f"🎤 Transcribed file: {text[:100]}...")
             return text
-            
+
         except Exception as e:
             logger.error(f"❌ File transcription failed: {e}")
             return None
 
+    @property
+    def in_use(self) -> bool:
+        return self._pending > 0 or self.leases > 0
+
+    def close(self):
+        """Release the models: worker threads exit (dropping their copy) once their current job is done"""
+        self.closed = True
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._local = threading.local()
+        self.model = None
+        self.is_initialized = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.name,
+            "workers": self.workers,
+            "cpu_threads_per_worker": self.cpu_threads,
+            "models_loaded": self.models_loaded,
+            "in_progress": self._pending,
+            "leases": self.leases,
+            "queue_capacity": self.queue_size,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "avg_queue_ms": round(self.total_queue_ms / self.completed, 1) if self.completed else 0.0,
+            "avg_inference_ms": round(self.total_inference_ms / self.completed, 1) if self.completed else 0.0,
+            "batching": {
+                "window_ms": self.batch_window_ms,
+                "max_batch": self.max_batch,
+                "batches": sum(self.batch_sizes.values()),
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+                "fallbacks": self.batch_fallbacks
+            }
+        }
+
 # Global instance
 local_stt = LocalSTTHandler()
 
 def get_local_stt() -> LocalSTTHandler:
     """Get the global local STT instance"""
-    return local_stt
\ No newline at end of file
+    return local_stt
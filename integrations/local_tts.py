@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Local TTS Handler using Piper (ONNX voice models on CPU)
+Offline, zero-cost speech behind the same interface as ElevenLabsIntegration; the voice model
+is loaded once per worker thread and synthesis streams PCM sentence by sentence
+"""
+
+import io
+import os
+import wave
+import struct
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncGenerator, Callable, Dict, Iterator, Optional
+
+try:
+    from piper import PiperVoice
+    PIPER_AVAILABLE = True
+except ImportError:
+    PiperVoice = None
+    PIPER_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Path to a Piper .onnx voice (its .onnx.json config next to it); local TTS is off without one
+LOCAL_TTS_MODEL = os.getenv("LOCAL_TTS_MODEL", "")
+# Worker threads, each holding its own copy of the voice (ONNX Runtime releases the GIL)
+LOCAL_TTS_WORKERS = int(os.getenv("LOCAL_TTS_WORKERS", "2"))
+# "wav" (streamable WAV, plays in browsers) or "pcm_s16le" (raw mono 16-bit PCM)
+LOCAL_TTS_FORMAT = os.getenv("LOCAL_TTS_FORMAT", "wav")
+
+
+def wav_header(sample_rate: int, data_bytes: int = 0xFFFFFFFF - 36, channels: int = 1) -> bytes:
+    """RIFF/WAVE header for 16-bit PCM; the default (maximum) sizes let players stream it"""
+    byte_rate = sample_rate * channels * 2
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_bytes, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, byte_rate, channels * 2, 16,
+        b"data", data_bytes
+    )
+
+
+class LocalTTSHandler:
+    """Offline text-to-speech on CPU with a pool of Piper workers"""
+
+    def __init__(self, model_path: str = LOCAL_TTS_MODEL, workers: int = LOCAL_TTS_WORKERS,
+                 audio_format: str = LOCAL_TTS_FORMAT, voice_loader: Optional[Callable[[], Any]] = None):
+        """
+        Args:
+            model_path: Piper .onnx voice model
+            workers: Worker threads, each with the model loaded once
+            audio_format: wav or pcm_s16le
+            voice_loader: Builds a voice object (defaults to PiperVoice.load(model_path))
+        """
+        self.model_path = model_path
+        self.workers = workers
+        self.audio_format = audio_format
+        self.voice_loader = voice_loader or self._load_piper_voice
+        self.default_voice_id = "local"
+        self.cache = None
+        self.sample_rate = None
+        self.is_initialized = False
+        self.models_loaded = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._load_lock = threading.Lock()
+
+    def _load_piper_voice(self):
+        if not PIPER_AVAILABLE:
+            raise RuntimeError("piper-tts not installed. Run: pip install piper-tts")
+        if not self.model_path or not os.path.exists(self.model_path):
+            raise RuntimeError(f"Local TTS model not found: {self.model_path or '(LOCAL_TTS_MODEL not set)'}")
+        return PiperVoice.load(self.model_path)
+
+    def initialize(self) -> bool:
+        """Start the worker pool and load the voice in a first worker to validate it (blocking)"""
+        try:
+            if self.is_initialized:
+                return True
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="local-tts")
+            voice = self._executor.submit(self._worker_voice).result()
+            self.sample_rate = voice.config.sample_rate
+            self.is_initialized = True
+            logger.info(f"✅ Local TTS initialized ({self.workers} workers, {self.sample_rate} Hz)")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize local TTS: {e}")
+            self.is_initialized = False
+            return False
+
+    def _worker_voice(self):
+        """This thread's voice, loaded on its first job"""
+        voice = getattr(self._local, "voice", None)
+        if voice is None:
+            voice = self._local.voice = self.voice_loader()
+            with self._load_lock:
+                self.models_loaded += 1
+        return voice
+
+    def _synthesize_pcm(self, text: str) -> Iterator[bytes]:
+        """16-bit mono PCM, one chunk per sentence (runs in a worker thread)"""
+        voice = self._worker_voice()
+        if hasattr(voice, "synthesize_stream_raw"):
+            # piper-tts < 1.3
+            yield from voice.synthesize_stream_raw(text)
+        else:
+            for chunk in voice.synthesize(text):
+                yield chunk.audio_int16_bytes
+
+    def is_cached(self, text: str, voice_id: Optional[str] = None, model_id: Optional[str] = None) -> bool:
+        return False
+
+    async def text_to_speech_stream(
+        self,
+        text: str,
+        voice_id: Optional[str] = None,
+        model_id: Optional[str] = None,
+        latency: Optional[int] = None
+    ) -> AsyncGenerator[bytes, None]:
+        """Stream synthesized audio as each sentence is ready"""
+        if not self.is_initialized and not await asyncio.to_thread(self.initialize):
+            raise Exception("Local TTS not available")
+
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        stopped = threading.Event()
+
+        def work():
+            try:
+                for pcm in self._synthesize_pcm(text):
+                    if stopped.is_set():
+                        break
+                    loop.call_soon_threadsafe(chunks.put_nowait, pcm)
+            except Exception as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(chunks.put_nowait, None)
+
+        loop.run_in_executor(self._executor, work)
+        # The WAV header goes out with the first audio, so the first chunk is playable sound
+        header = wav_header(self.sample_rate) if self.audio_format == "wav" else b""
+        try:
+            while True:
+                item = await chunks.get()
+                if item is None:
+                    if header:
+                        yield header
+                    return
+                if isinstance(item, Exception):
+                    raise Exception(f"Local TTS error: {item}")
+                if item:
+                    yield header + item
+                    header = b""
+        finally:
+            # The consumer went away: let the worker stop after its current sentence
+            stopped.set()
+
+    async def text_to_speech(
+        self,
+        text: str,
+        voice_id: Optional[str] = None,
+        model_id: Optional[str] = None,
+        stream: bool = False
+    ) -> bytes:
+        """Synthesize text completely (a proper WAV file, or raw PCM)"""
+        audio = b"".join([chunk async for chunk in self.text_to_speech_stream(text)])
+        if self.audio_format != "wav":
+            return audio
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(self.sample_rate)
+            wav_file.writeframes(audio[len(wav_header(self.sample_rate)):])  # Replace the streaming header
+        return buffer.getvalue()
+
+    async def get_voices(self) -> Dict[str, Any]:
+        return {"voices": [{"voice_id": self.default_voice_id, "name": os.path.basename(self.model_path) or "local"}]}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "initialized": self.is_initialized,
+            "model": self.model_path,
+            "workers": self.workers,
+            "models_loaded": self.models_loaded,
+            "audio_format": self.audio_format,
+            "sample_rate": self.sample_rate
+        }
+
+
+# Global instance
+local_tts = None
+
+def get_local_tts() -> Optional[LocalTTSHandler]:
+    """Get the global local TTS instance (None when no voice model is configured)"""
+    global local_tts
+    if local_tts is None and LOCAL_TTS_MODEL:
+        local_tts = LocalTTSHandler()
+    return local_tts
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Log Aggregates - Rolling per-minute error counts and latency histograms
+Updated in O(1) per event so summaries never have to scan logs
+"""
+
+import os
+import math
+import time
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Any, Optional
+
+# How much per-minute history is kept
+LOG_AGGREGATE_HORIZON_HOURS = int(os.getenv("LOG_AGGREGATE_HORIZON_HOURS", "24"))
+
+# Latency histogram resolution: bucket boundaries grow by this factor (~2.5% relative error)
+HISTOGRAM_GROWTH = 1.05
+HISTOGRAM_MIN_MS = 0.01
+
+# Route label for requests no route matched (404s), so scanned paths don't each add a series
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram (HDR-style): O(1) record, mergeable, bounded relative error"""
+
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    _log_growth = math.log(HISTOGRAM_GROWTH)
+
+    def __init__(self):
+        self.buckets: Counter = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value_ms: float):
+        value_ms = max(value_ms, HISTOGRAM_MIN_MS)
+        self.buckets[int(math.log(value_ms / HISTOGRAM_MIN_MS) / self._log_growth)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.min = min(self.min, value_ms)
+        self.max = max(self.max, value_ms)
+
+    def merge(self, other: "LatencyHistogram"):
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile (0-100) in milliseconds"""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # Midpoint of the bucket, clamped to the observed range
+                value = HISTOGRAM_MIN_MS * HISTOGRAM_GROWTH ** (index + 0.5)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 2) if self.count else 0.0,
+            "min_ms": round(self.min, 2) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 2),
+            "p90_ms": round(self.percentile(90), 2),
+            "p99_ms": round(self.percentile(99), 2),
+            "max_ms": round(self.max, 2)
+        }
+
+
+class MinuteBucket:
+    """Error counters and per-operation latency histograms for one minute"""
+
+    __slots__ = ("errors_by_type", "errors_by_tool", "errors_by_route", "latency")
+
+    def __init__(self):
+        self.errors_by_type: Counter = Counter()
+        self.errors_by_tool: Counter = Counter()
+        self.errors_by_route: Counter = Counter()
+        self.latency: Dict[str, LatencyHistogram] = {}
+
+
+class RollingAggregates:
+    """Per-minute buckets kept for a configurable horizon, evicted as time moves on"""
+
+    def __init__(self, horizon_hours: int = LOG_AGGREGATE_HORIZON_HOURS):
+        self.horizon_minutes = horizon_hours * 60
+        self.buckets: "OrderedDict[int, MinuteBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bucket(self, now: Optional[float] = None) -> MinuteBucket:
+        """Current minute's bucket; evicts expired buckets (amortized O(1))"""
+        minute = int((now or time.time()) // 60)
+        bucket = self.buckets.get(minute)
+        if bucket is None:
+            bucket = self.buckets[minute] = MinuteBucket()
+            oldest_allowed = minute - self.horizon_minutes
+            while self.buckets and next(iter(self.buckets)) <= oldest_allowed:
+                self.buckets.popitem(last=False)
+        return bucket
+
+    def record_error(self, error_type: str, tool: Optional[str] = None,
+                     route: Optional[str] = None, now: Optional[float] = None):
+        with self._lock:
+            bucket = self._bucket(now)
+            bucket.errors_by_type[error_type] += 1
+            if tool:
+                bucket.errors_by_tool[tool] += 1
+            if route:
+                bucket.errors_by_route[route] += 1
+
+    def record_latency(self, operation: str, duration_ms: float, now: Optional[float] = None):
+        with self._lock:
+            bucket = self._bucket(now)
+            histogram = bucket.latency.get(operation)
+            if histogram is None:
+                histogram = bucket.latency[operation] = LatencyHistogram()
+            histogram.record(duration_ms)
+
+    def _window(self, minutes: int):
+        """Buckets within the last `minutes` minutes, newest last"""
+        first_minute = int(time.time() // 60) - minutes + 1
+        with self._lock:
+            return [bucket for minute, bucket in self.buckets.items() if minute >= first_minute]
+
+    def error_summary(self, hours: int = 24) -> Dict[str, Any]:
+        minutes = min(hours * 60, self.horizon_minutes)
+        by_type, by_tool, by_route = Counter(), Counter(), Counter()
+        for bucket in self._window(minutes):
+            by_type.update(bucket.errors_by_type)
+            by_tool.update(bucket.errors_by_tool)
+            by_route.update(bucket.errors_by_route)
+        return {
+            "hours": round(minutes / 60, 2),
+            "total_errors": sum(by_type.values()),
+            "error_types": dict(by_type),
+            "errors_by_tool": dict(by_tool),
+            "errors_by_route": dict(by_route)
+        }
+
+    def performance_summary(self, minutes: int = 60) -> Dict[str, Any]:
+        minutes = min(minutes, self.horizon_minutes)
+        merged: Dict[str, LatencyHistogram] = {}
+        for bucket in self._window(minutes):
+            for operation, histogram in bucket.latency.items():
+                merged.setdefault(operation, LatencyHistogram()).merge(histogram)
+        return {
+            "minutes": minutes,
+            "operations": {operation: histogram.summary() for operation, histogram in sorted(merged.items())}
+        }
+
+
+def _mount_path(scope, root_path: str) -> Optional[str]:
+    """Path of the mounted app (e.g. StaticFiles at /static) that handled the request, if any"""
+    # A matched Mount makes its app the scope's endpoint and extends root_path
+    endpoint = scope.get("endpoint")
+    for route in getattr(scope.get("app"), "routes", ()):
+        if endpoint is not None and getattr(route, "app", None) is endpoint and hasattr(route, "path"):
+            return route.path
+    mounted = scope.get("root_path", "")[len(root_path):]
+    return mounted or None
+
+
+class RouteMetricsMiddleware:
+    """ASGI middleware recording time-to-response-start per route and 5xx errors by route"""
+
+    def __init__(self, app, aggregates: RollingAggregates):
+        self.app = app
+        self.aggregates = aggregates
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        recorded = False
+        root_path = scope.get("root_path", "")
+
+        def route_name() -> str:
+            # FastAPI stores the matched route in the scope, giving the path template
+            route = scope.get("route")
+            if route is not None:
+                return f"{scope['method']} {route.path}"
+            return f"{scope['method']} {_mount_path(scope, root_path) or UNMATCHED_ROUTE}"
+
+        async def send_wrapper(message):
+            nonlocal recorded
+            if message["type"] == "http.response.start" and not recorded:
+                recorded = True
+                name = route_name()
+                self.aggregates.record_latency(f"http {name}", (time.perf_counter() - start) * 1000)
+                if message["status"] >= 500:
+                    self.aggregates.record_error(f"HTTP {message['status']}", route=name)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            if not recorded:
+                self.aggregates.record_error(type(e).__name__, route=route_name())
+            raise
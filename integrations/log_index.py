@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Log Index - Disk-backed, searchable index of Eva's structured log entries
+Backed by SQLite with an FTS5 trigram index, so text search matches any substring like
+the in-memory search it replaced, fed from the background log writer
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+from integrations.log_rotation import iter_log_lines
+
+# How long indexed entries are kept, and how often the writer deletes older ones
+LOG_INDEX_RETENTION_DAYS = int(os.getenv("LOG_INDEX_RETENTION_DAYS", "30"))
+LOG_INDEX_PRUNE_HOURS = float(os.getenv("LOG_INDEX_PRUNE_HOURS", "24"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    session_id TEXT,
+    type TEXT,
+    tool TEXT,
+    error_type TEXT,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_logs_ts ON logs(ts);
+CREATE INDEX IF NOT EXISTS idx_logs_session ON logs(session_id, id);
+CREATE INDEX IF NOT EXISTS idx_logs_type ON logs(type, id);
+CREATE INDEX IF NOT EXISTS idx_logs_type_ts ON logs(type, ts);
+CREATE INDEX IF NOT EXISTS idx_logs_tool ON logs(tool, id);
+"""
+
+
+def _parse_timestamp(value: Any) -> float:
+    """Epoch seconds from an ISO timestamp, datetime or number"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            pass
+    return datetime.now().timestamp()
+
+
+def _searchable_text(value: Any) -> str:
+    """Flatten the values of a log entry into one string for full-text search"""
+    if isinstance(value, dict):
+        return " ".join(_searchable_text(item) for item in value.values())
+    if isinstance(value, list):
+        return " ".join(_searchable_text(item) for item in value)
+    if value is None:
+        return ""
+    return str(value)
+
+
+class LogIndex:
+    """SQLite/FTS5 index over structured log entries with filtering and keyset paging"""
+
+    def __init__(self, db_path: str = "logs/eva/log_index.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._writer.executescript(SCHEMA)
+        self.fts_enabled = self._create_fts_table()
+        self._writer.commit()
+        self.pending = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=10)
+        # WAL lets API queries read while the log writer thread inserts
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _create_fts_table(self) -> bool:
+        """Create (or upgrade to) the trigram text index; False when SQLite can't provide one"""
+        row = self._writer.execute("SELECT sql FROM sqlite_master WHERE name = 'logs_fts'").fetchone()
+        if row and "trigram" in row[0]:
+            return True
+        try:
+            # Word-tokenized indexes from earlier versions missed partial words and ids
+            self._writer.execute("DROP TABLE IF EXISTS logs_fts")
+            self._writer.execute("CREATE VIRTUAL TABLE logs_fts USING fts5(body, tokenize='trigram')")
+        except sqlite3.OperationalError:
+            logging.getLogger(__name__).warning("SQLite FTS5 trigram tokenizer unavailable, log search falls back to LIKE")
+            return False
+        for rowid, entry in self._writer.execute("SELECT id, entry FROM logs").fetchall():
+            self._writer.execute("INSERT INTO logs_fts (rowid, body) VALUES (?, ?)",
+                                 (rowid, _searchable_text(json.loads(entry))))
+        return True
+
+    def add(self, entry: Dict[str, Any], commit: bool = False):
+        """Index one log entry; call commit() (or pass commit=True) to make it visible"""
+        with self._write_lock:
+            cursor = self._writer.execute(
+                "INSERT INTO logs (ts, session_id, type, tool, error_type, entry) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    _parse_timestamp(entry.get("timestamp")),
+                    entry.get("session_id"),
+                    entry.get("type"),
+                    entry.get("tool"),
+                    entry.get("error_type"),
+                    json.dumps(entry)
+                )
+            )
+            if self.fts_enabled:
+                self._writer.execute(
+                    "INSERT INTO logs_fts (rowid, body) VALUES (?, ?)",
+                    (cursor.lastrowid, _searchable_text(entry))
+                )
+            self.pending += 1
+            if commit:
+                self._writer.commit()
+                self.pending = 0
+
+    def commit(self):
+        with self._write_lock:
+            if self.pending:
+                self._writer.commit()
+                self.pending = 0
+
+    def query(self, text: Optional[str] = None, session_id: Optional[str] = None,
+              log_type: Optional[str] = None, tool: Optional[str] = None,
+              start: Optional[Any] = None, end: Optional[Any] = None,
+              limit: int = 100, cursor: Optional[int] = None,
+              oldest_first: bool = False) -> Dict[str, Any]:
+        """
+        Search indexed entries, newest first unless oldest_first is set.
+
+        text matches any case-insensitive substring of the entry's values (trigram index);
+        queries under 3 characters, which trigrams can't match, scan with LIKE instead.
+        Pass the returned next_cursor back as cursor to fetch the following page.
+        """
+        clauses, params = [], []
+        source = "logs"
+        if text:
+            if self.fts_enabled and len(text) >= 3:
+                # Drive the scan from FTS in rowid order so LIMIT stops it early
+                source = "logs_fts JOIN logs ON logs.id = logs_fts.rowid"
+                clauses.append("logs_fts MATCH ?")
+                params.append('"' + text.replace('"', '""') + '"')
+            else:
+                clauses.append("logs.entry LIKE ?")
+                params.append(f"%{text}%")
+        for column, value in (("session_id", session_id), ("type", log_type), ("tool", tool)):
+            if value is not None:
+                clauses.append(f"logs.{column} = ?")
+                params.append(value)
+        if start is not None:
+            clauses.append("logs.ts >= ?")
+            params.append(_parse_timestamp(start))
+        if end is not None:
+            clauses.append("logs.ts < ?")
+            params.append(_parse_timestamp(end))
+        if cursor is not None:
+            clauses.append("logs.id > ?" if oldest_first else "logs.id < ?")
+            params.append(cursor)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "ASC" if oldest_first else "DESC"
+        order_column = "logs_fts.rowid" if source != "logs" else "logs.id"
+        sql = f"SELECT logs.id, logs.entry FROM {source} {where} ORDER BY {order_column} {order} LIMIT ?"
+        params.append(limit + 1)
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            "results": [json.loads(entry) for _, entry in rows],
+            "next_cursor": rows[-1][0] if has_more else None
+        }
+
+    def count_by(self, column: str, start: Optional[Any] = None,
+                 log_types: Optional[List[str]] = None) -> Dict[str, int]:
+        """Count entries grouped by an indexed column, optionally within a time window"""
+        if column not in ("session_id", "type", "tool", "error_type"):
+            raise ValueError(f"Cannot group by {column}")
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(_parse_timestamp(start))
+        if log_types:
+            clauses.append(f"type IN ({', '.join('?' for _ in log_types)})")
+            params.extend(log_types)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(f"SELECT {column}, COUNT(*) FROM logs {where} GROUP BY {column}", params).fetchall()
+        finally:
+            conn.close()
+        return {key if key is not None else "unknown": count for key, count in rows}
+
+    def is_empty(self) -> bool:
+        with self._write_lock:
+            return self._writer.execute("SELECT 1 FROM logs LIMIT 1").fetchone() is None
+
+    def backfill_from_logs(self, log_paths: List[Path], since: Optional[datetime] = None,
+                           until: Optional[datetime] = None) -> int:
+        """Index structured entries from log files, including rotated and gzipped segments
+
+        Used to rebuild the index (e.g. after the database was deleted) from the log streams.
+        Entries at or after `until` are skipped, since the live pipeline indexes those.
+        """
+        until_ts = until.timestamp() if until else None
+        added = 0
+        for log_path in log_paths:
+            for line in iter_log_lines(log_path, since=since):
+                json_start = line.find('{')
+                if json_start == -1:
+                    continue
+                try:
+                    entry = json.loads(line[json_start:])
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(entry, dict) or "type" not in entry:
+                    continue
+                if until_ts is not None and _parse_timestamp(entry.get("timestamp")) >= until_ts:
+                    continue
+                self.add(entry)
+                added += 1
+                if added % 10_000 == 0:
+                    self.commit()
+        self.commit()
+        return added
+
+    def prune(self, days: int = LOG_INDEX_RETENTION_DAYS) -> int:
+        """Delete entries older than the retention window"""
+        cutoff = (datetime.now() - timedelta(days=days)).timestamp()
+        with self._write_lock:
+            if self.fts_enabled:
+                self._writer.execute("DELETE FROM logs_fts WHERE rowid IN (SELECT id FROM logs WHERE ts < ?)", (cutoff,))
+            removed = self._writer.execute("DELETE FROM logs WHERE ts < ?", (cutoff,)).rowcount
+            self._writer.commit()
+        return removed
+
+    def close(self):
+        self.commit()
+        self._writer.close()
+
+
+class LogIndexHandler(logging.Handler):
+    """Logging handler that indexes records carrying a structured `log_entry`
+
+    Behind the queue listener it runs on the writer thread and commits once per batch
+    (on flush); attached directly to loggers it commits every record. Entries past the
+    retention window are pruned every prune_hours from the same thread.
+    """
+
+    def __init__(self, index: LogIndex, commit_each: bool = False, prune_hours: float = LOG_INDEX_PRUNE_HOURS):
+        super().__init__()
+        self.index = index
+        self.commit_each = commit_each
+        self.prune_seconds = prune_hours * 3600
+        self._last_prune = time.monotonic()  # The index is pruned when it is opened
+
+    def emit(self, record: logging.LogRecord):
+        entry = getattr(record, "log_entry", None)
+        if entry is None:
+            return
+        try:
+            self.index.add(entry, commit=self.commit_each)
+        except Exception:
+            self.handleError(record)
+        if self.commit_each:
+            self._prune_if_due()
+
+    def flush(self):
+        self.index.commit()
+        self._prune_if_due()
+
+    def _prune_if_due(self):
+        if time.monotonic() - self._last_prune < self.prune_seconds:
+            return
+        self._last_prune = time.monotonic()
+        try:
+            removed = self.index.prune()
+            if removed:
+                logging.getLogger(__name__).info(f"Pruned {removed} log index entries past retention")
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"Log index prune failed: {e}")
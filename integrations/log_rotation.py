@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Log Rotation - Daily and size-based rotation of Eva's log files
+Rotated segments are gzipped in the background and pruned after a retention period
+"""
+
+import os
+import re
+import gzip
+import shutil
+import atexit
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+# Defaults, overridable from the environment
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "14"))
+
+SEGMENT_TIME_FORMAT = "%Y%m%d-%H%M%S"
+
+# One background thread compresses rotated segments so log writers never wait on gzip
+_compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-compress")
+atexit.register(_compressor.shutdown, wait=True)
+
+
+def _compress_segment(segment: Path):
+    """Gzip a rotated segment in place (segment.log -> segment.log.gz)"""
+    compressed = segment.with_name(segment.name + ".gz")
+    tmp = compressed.with_name(compressed.name + ".tmp")
+    stat = segment.stat()
+    with open(segment, "rb") as src, gzip.open(tmp, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    # Keep the segment's last-write time: readers order and prune segments by it
+    os.utime(tmp, (stat.st_atime, stat.st_mtime))
+    os.replace(tmp, compressed)
+    segment.unlink()
+
+
+def _prune_segments(active_path: Path, retention_days: int):
+    """Delete rotated segments last written before the retention window"""
+    cutoff = (datetime.now() - timedelta(days=retention_days)).timestamp()
+    for segment in list_segments(active_path)[:-1]:
+        try:
+            if segment.stat().st_mtime < cutoff:
+                segment.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _compress_and_prune(segment: Path, active_path: Path, retention_days: int):
+    try:
+        _compress_segment(segment)
+    except Exception as e:
+        print(f"Error compressing log segment {segment}: {e}")
+    _prune_segments(active_path, retention_days)
+
+
+class RotatingLogFileHandler(logging.FileHandler):
+    """FileHandler that rotates at local midnight or when the file exceeds max_bytes
+
+    The active file keeps a stable name (e.g. requests.log); rotated segments are
+    renamed to requests.<start time>.log and gzipped in the background.
+
+    A record may carry a segment_preamble: (key, message) pairs, the message a string or a
+    callable returning one, that must appear in the same segment before the record. Each key
+    is written once per segment, so every segment stays readable on its own.
+    """
+
+    flush_each_record = True
+
+    def __init__(self, filename: Union[str, Path], max_bytes: int = LOG_MAX_BYTES,
+                 retention_days: int = LOG_RETENTION_DAYS, encoding: Optional[str] = "utf-8"):
+        super().__init__(filename, encoding=encoding, delay=True)
+        self.active_path = Path(self.baseFilename)
+        self.max_bytes = max_bytes
+        self.retention_days = retention_days
+        self.size = 0
+        self.segment_keys = set()  # segment_preamble keys already written to the active segment
+        self.segment_start = datetime.now()
+        if self.active_path.exists() and self.active_path.stat().st_size:
+            # Resume an existing segment; it rolls over at once if it was last written on an earlier day
+            stat = self.active_path.stat()
+            self.size = stat.st_size
+            self.segment_start = datetime.fromtimestamp(stat.st_mtime)
+        self.next_rollover = self._next_midnight(self.segment_start)
+
+    @staticmethod
+    def _next_midnight(moment: datetime) -> float:
+        return (moment.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)).timestamp()
+
+    def should_rollover(self, record: logging.LogRecord, message_size: int) -> bool:
+        if not self.size:
+            return False
+        return record.created >= self.next_rollover or self.size + message_size > self.max_bytes
+
+    def do_rollover(self):
+        """Close the active file, rename it to a timestamped segment and compress it in the background"""
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        if self.active_path.exists():
+            stamp = self.segment_start.strftime(SEGMENT_TIME_FORMAT)
+            segment = self.active_path.with_name(f"{self.active_path.stem}.{stamp}{self.active_path.suffix}")
+            counter = 1
+            while segment.exists() or segment.with_name(segment.name + ".gz").exists():
+                segment = self.active_path.with_name(
+                    f"{self.active_path.stem}.{stamp}-{counter}{self.active_path.suffix}"
+                )
+                counter += 1
+            os.replace(self.active_path, segment)
+            _compressor.submit(_compress_and_prune, segment, self.active_path, self.retention_days)
+
+        self.size = 0
+        self.segment_keys = set()
+        self.segment_start = datetime.now()
+        self.next_rollover = self._next_midnight(self.segment_start)
+
+    def _preamble(self, record: logging.LogRecord) -> str:
+        """Lines of the record's segment_preamble not yet written to the active segment"""
+        lines = []
+        for key, message in getattr(record, "segment_preamble", None) or ():
+            if key in self.segment_keys:
+                continue
+            self.segment_keys.add(key)
+            line = logging.makeLogRecord({**record.__dict__, "msg": message() if callable(message) else message,
+                                          "args": None, "exc_info": None, "exc_text": None})
+            lines.append(self.format(line) + self.terminator)
+        return "".join(lines)
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            message = self.format(record) + self.terminator
+            message_size = len(message.encode(self.encoding or "utf-8", errors="replace"))
+            if self.should_rollover(record, message_size):
+                self.do_rollover()
+            # Decided after any rollover, so the definitions land in the record's own segment
+            message = self._preamble(record) + message
+            message_size = len(message.encode(self.encoding or "utf-8", errors="replace"))
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(message)
+            self.size += message_size
+            if self.flush_each_record:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+def list_segments(active_path: Union[str, Path]) -> List[Path]:
+    """All segments of a log stream, oldest first, ending with the active file if it exists
+
+    Includes the daily files written before rotation existed (e.g. requests_20250101.log),
+    so their entries stay searchable until retention prunes them like any other segment.
+    """
+    active_path = Path(active_path)
+    pattern = f"{active_path.stem}.*{active_path.suffix}*"
+    rotated = [
+        path for path in active_path.parent.glob(pattern)
+        if path != active_path and not path.name.endswith(".tmp")
+    ]
+    legacy = re.compile(rf"{re.escape(active_path.stem)}_\d{{8}}{re.escape(active_path.suffix)}")
+    rotated += [
+        path for path in active_path.parent.glob(f"{active_path.stem}_*{active_path.suffix}")
+        if legacy.fullmatch(path.name)
+    ]
+    # A segment may exist both raw and compressed while compression is in flight
+    names = {path.name for path in rotated}
+    rotated = [path for path in rotated if not (path.suffix == active_path.suffix and path.name + ".gz" in names)]
+    rotated.sort(key=_mtime)
+    if active_path.exists():
+        rotated.append(active_path)
+    return rotated
+
+
+def open_segment(path: Union[str, Path], mode: str = "rt"):
+    """Open a log segment for reading, transparently decompressing .gz segments"""
+    path = Path(path)
+    if path.name.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8", errors="replace") if "t" in mode else gzip.open(path, mode)
+    if "t" in mode:
+        return open(path, mode.replace("t", ""), encoding="utf-8", errors="replace")
+    return open(path, mode)
+
+
+def iter_log_lines(active_path: Union[str, Path], since: Optional[datetime] = None) -> Iterator[str]:
+    """Yield lines across every segment of a log stream in chronological order
+
+    Segments last written before `since` are skipped without being opened.
+    """
+    cutoff = since.timestamp() if since else None
+    for segment in list_segments(active_path):
+        try:
+            if cutoff is not None and segment.stat().st_mtime < cutoff:
+                continue
+            with open_segment(segment) as f:
+                yield from f
+        except FileNotFoundError:
+            continue  # Compressed or pruned while we were listing
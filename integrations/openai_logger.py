@@ -2,29 +2,89 @@
 """
 OpenAI API Logger - Comprehensive logging and tracing for OpenAI API calls
 """
+import os
+import re
 import logging
 import json
 import time
 import uuid
+import random
+import hashlib
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional, Set
 from pathlib import Path
 import asyncio
 import httpx
 from functools import wraps
+from integrations.queued_logging import LOG_QUEUE_ENABLED, BatchingFileHandler, attach_queued_handlers
+from integrations.log_rotation import RotatingLogFileHandler
+from integrations.token_accounting import TokenAccountant, calculate_cost
+
+# Fraction of requests whose full payload/response is written to the trace log
+TRACE_SAMPLE_RATE = float(os.getenv("OPENAI_TRACE_SAMPLE_RATE", "1.0"))
+
+# Strings at least this long that look like base64 are treated as binary blobs
+BLOB_MIN_LENGTH = 1024
+_BASE64_RE = re.compile(r'^[A-Za-z0-9+/=\r\n]+$')
+_DATA_URL_RE = re.compile(r'^data:([\w/+.-]+)?;base64,')
+
+
+def _content_hash(value: Any) -> str:
+    """Short stable hash of a JSON-serializable value"""
+    if isinstance(value, bytes):
+        data = value
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+    else:
+        data = json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def strip_blobs(value: Any) -> Any:
+    """Replace binary and base64 blobs (e.g. data:image/jpeg URLs) with their hash and size"""
+    if isinstance(value, dict):
+        return {key: strip_blobs(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [strip_blobs(item) for item in value]
+    if isinstance(value, (bytes, bytearray)):
+        return {"blob": _content_hash(bytes(value)), "bytes": len(value)}
+    if isinstance(value, str) and len(value) >= BLOB_MIN_LENGTH:
+        match = _DATA_URL_RE.match(value)
+        if match:
+            return {"blob": _content_hash(value), "mime": match.group(1), "bytes": len(value) - match.end()}
+        if _BASE64_RE.match(value[:BLOB_MIN_LENGTH]):
+            return {"blob": _content_hash(value), "bytes": len(value)}
+    return value
+
 
 class OpenAILogger:
     """Comprehensive OpenAI API logging and tracing"""
     
-    def __init__(self, log_dir: str = "logs/openai", log_level: str = "INFO"):
+    def __init__(self, log_dir: str = "logs/openai", log_level: str = "INFO", queued: bool = LOG_QUEUE_ENABLED):
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.queued = queued
+        self._handler_pairs = []
         
         # Create separate loggers for different purposes
         self.api_logger = self._setup_logger("openai_api", "openai_api.log", log_level)
         self.error_logger = self._setup_logger("openai_errors", "openai_errors.log", "ERROR")
         self.trace_logger = self._setup_logger("openai_trace", "openai_trace.log", "DEBUG")
         
+        if self.queued:
+            # File and console writes happen on a background thread, never on the event loop
+            attach_queued_handlers("openai", self._handler_pairs)
+        
+        # Trace sampling: head-based per request, plus sessions that opted in
+        self.trace_sample_rate = TRACE_SAMPLE_RATE
+        self.traced_sessions: Set[str] = set()
+        self._traced_requests: "OrderedDict[str, bool]" = OrderedDict()
+        
+        # Tokenizer-based estimates and per-session/per-user usage totals
+        self.token_accountant = TokenAccountant()
+        self._pending_requests: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        
         # Track request metrics
         self.request_count = 0
         self.total_tokens = 0
@@ -39,13 +99,13 @@ class OpenAILogger:
         logger.handlers.clear()
         
         # File handler
-        file_handler = logging.FileHandler(self.log_dir / filename)
+        file_handler = (BatchingFileHandler if self.queued else RotatingLogFileHandler)(self.log_dir / filename)
         file_formatter = logging.Formatter(
             '%(asctime)s - %(levelname)s - %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+        self._handler_pairs.append((logger, file_handler))
         
         # Console handler for errors
         if level == "ERROR":
@@ -55,40 +115,71 @@ class OpenAILogger:
                 datefmt='%H:%M:%S'
             )
             console_handler.setFormatter(console_formatter)
-            logger.addHandler(console_handler)
+            self._handler_pairs.append((logger, console_handler))
+        
+        if not self.queued:
+            for handler in [h for l, h in self._handler_pairs if l is logger]:
+                logger.addHandler(handler)
         
         return logger
     
-    def estimate_tokens(self, text: str) -> int:
-        """Rough token estimation (4 chars = 1 token)"""
-        return len(text) // 4
+    def estimate_tokens(self, text: str, model: str = "gpt-4o") -> int:
+        """Token count of a text with the model's tokenizer"""
+        return self.token_accountant.count_text(text, model)
     
-    def estimate_cost(self, model: str, input_tokens: int, output_tokens: int = 0) -> float:
-        """Estimate API call cost based on model and tokens"""
-        # Pricing as of 2024 (USD per 1M tokens)
-        pricing = {
-            "gpt-4.1": {"input": 15.0, "output": 60.0},
-            "gpt-4-turbo": {"input": 10.0, "output": 30.0},
-            "gpt-4o": {"input": 5.0, "output": 15.0},
-            "gpt-4o-mini": {"input": 0.15, "output": 0.6},
-            "gpt-3.5-turbo": {"input": 0.5, "output": 1.5},
-            "dall-e-3": {"per_image": 40.0},
-            "dall-e-2": {"per_image": 20.0},
-            "whisper": {"per_minute": 6.0}
-        }
+    def estimate_cost(self, model: str, input_tokens: int, output_tokens: int = 0, cached_tokens: int = 0) -> float:
+        """Estimate API call cost based on model and tokens (see token_accounting.MODEL_PRICING)"""
+        return calculate_cost(model, input_tokens, output_tokens, cached_tokens)
+    
+    def set_session_trace(self, session_id: str, enabled: bool = True):
+        """Opt a session in or out of full tracing regardless of the sample rate"""
+        if enabled:
+            self.traced_sessions.add(session_id)
+        else:
+            self.traced_sessions.discard(session_id)
+    
+    def _should_trace(self, request_id: str, session_id: Optional[str]) -> bool:
+        """Make the head-based sampling decision for a request and remember it"""
+        if not self.trace_logger.isEnabledFor(logging.DEBUG):
+            return False
+        traced = (session_id in self.traced_sessions) or random.random() < self.trace_sample_rate
+        if traced:
+            self._traced_requests[request_id] = True
+            # Requests that never finish must not grow this forever
+            while len(self._traced_requests) > 1000:
+                self._traced_requests.popitem(last=False)
+        return traced
+    
+    def _static_ref(self, kind: str, value: Any, static_parts: Dict[str, Callable[[], str]]) -> str:
+        """Reference a static payload part by content hash; its definition goes into static_parts"""
+        ref = f"{kind}:{_content_hash(value)}"
+        static_parts[ref] = lambda: f"Static {ref}: {json.dumps(strip_blobs(value))}"
+        return ref
+    
+    def serialize_payload_for_trace(self, payload: Dict[str, Any],
+                                    static_parts: Optional[Dict[str, Callable[[], str]]] = None) -> str:
+        """
+        Compact trace form of a request payload: blobs hashed, tool schema and system prompt by
+        reference. The referenced definitions are added to static_parts, to be logged as the
+        record's segment_preamble: the trace file handler writes each once per log segment.
+        """
+        static_parts = {} if static_parts is None else static_parts
+        trace_payload = dict(payload)
+        if trace_payload.get("tools"):
+            trace_payload["tools"] = {"ref": self._static_ref("tools", trace_payload["tools"], static_parts)}
         
-        if model in pricing:
-            rates = pricing[model]
-            if "per_image" in rates:
-                return rates["per_image"] / 1000  # Convert to dollars
-            else:
-                input_cost = (input_tokens / 1_000_000) * rates["input"]
-                output_cost = (output_tokens / 1_000_000) * rates["output"]
-                return input_cost + output_cost
+        messages = []
+        for msg in trace_payload.get("messages", []):
+            if msg.get("role") == "system" and isinstance(msg.get("content"), str):
+                msg = {**msg, "content": {"ref": self._static_ref("system", msg["content"], static_parts)}}
+            messages.append(msg)
+        if messages:
+            trace_payload["messages"] = messages
         
-        return 0.0
+        return json.dumps(strip_blobs(trace_payload))
     
-    def log_request_start(self, method: str, url: str, payload: Dict[str, Any]) -> str:
+    def log_request_start(self, method: str, url: str, payload: Dict[str, Any],
+                          session_id: Optional[str] = None, user_id: Optional[str] = None) -> str:
         """Log the start of an API request"""
         request_id = str(uuid.uuid4())[:8]
         self.request_count += 1
@@ -97,19 +188,19 @@ class OpenAILogger:
         model = payload.get("model", "unknown")
         messages = payload.get("messages", [])
         
-        # Estimate tokens
-        total_input_text = ""
-        for msg in messages:
-            if isinstance(msg.get("content"), str):
-                total_input_text += msg["content"]
-            elif isinstance(msg.get("content"), list):
-                for content in msg["content"]:
-                    if content.get("type") == "text":
-                        total_input_text += content.get("text", "")
-        
-        estimated_tokens = self.estimate_tokens(total_input_text)
+        # Estimate prompt tokens: messages (memoized), image parts and the tool schema
+        estimated_tokens = self.token_accountant.estimate_request(payload)
         estimated_cost = self.estimate_cost(model, estimated_tokens)
         
+        # Remembered until the response arrives, for reconciliation against its usage block
+        self._pending_requests[request_id] = {
+            "estimated_input_tokens": estimated_tokens,
+            "session_id": session_id,
+            "user_id": user_id
+        }
+        while len(self._pending_requests) > 1000:
+            self._pending_requests.popitem(last=False)
+        
         # Log request details
         log_data = {
             "request_id": request_id,
@@ -125,8 +216,17 @@ class OpenAILogger:
             "parallel_tool_calls": payload.get("parallel_tool_calls", True)
         }
         
+        if session_id:
+            log_data["session_id"] = session_id
+        if user_id:
+            log_data["user_id"] = user_id
+        
         self.api_logger.info(f"📤 REQUEST START: {json.dumps(log_data)}")
-        self.trace_logger.debug(f"Full payload: {json.dumps(payload, indent=2)}")
+        if self._should_trace(request_id, session_id):
+            static_parts = {}
+            trace = self.serialize_payload_for_trace(payload, static_parts)
+            self.trace_logger.debug(f"[{request_id}] Full payload: {trace}",
+                                    extra={"segment_preamble": list(static_parts.items())})
         
         return request_id
     
@@ -134,18 +234,25 @@ class OpenAILogger:
                        duration: float, status_code: int):
         """Log the end of an API request"""
         
-        # Extract response information
+        # Extract response information and reconcile with the estimate made at request start
         usage = response_data.get("usage", {})
-        input_tokens = usage.get("input_tokens", 0) or usage.get("prompt_tokens", 0)
-        output_tokens = usage.get("output_tokens", 0) or usage.get("completion_tokens", 0)
+        model = response_data.get("model", "unknown")
+        pending = self._pending_requests.pop(request_id, {})
+        accounted = self.token_accountant.record_usage(
+            model, usage,
+            estimated_input_tokens=pending.get("estimated_input_tokens"),
+            session_id=pending.get("session_id"),
+            user_id=pending.get("user_id")
+        )
+        input_tokens = accounted["input_tokens"]
+        output_tokens = accounted["output_tokens"]
         total_tokens = usage.get("total_tokens", input_tokens + output_tokens)
         
         # Update totals
         self.total_tokens += total_tokens
         
         # Calculate actual cost
-        model = response_data.get("model", "unknown")
-        actual_cost = self.estimate_cost(model, input_tokens, output_tokens)
+        actual_cost = accounted["cost_usd"]
         self.total_cost += actual_cost
         
         # Log response details
@@ -153,10 +260,13 @@ class OpenAILogger:
             "request_id": request_id,
             "timestamp": datetime.now().isoformat(),
             "status_code": status_code,
+            "model": model,
             "duration_seconds": round(duration, 3),
             "input_tokens": input_tokens,
             "output_tokens": output_tokens,
             "total_tokens": total_tokens,
+            "cached_tokens": accounted["cached_tokens"],
+            "estimate_error_tokens": accounted["estimate_error_tokens"],
             "actual_cost_usd": round(actual_cost, 6),
             "cumulative_tokens": self.total_tokens,
             "cumulative_cost_usd": round(self.total_cost, 4)
@@ -167,7 +277,8 @@ class OpenAILogger:
         else:
             self.api_logger.error(f"❌ REQUEST FAILED: {json.dumps(log_data)}")
             
-        self.trace_logger.debug(f"Full response: {json.dumps(response_data, indent=2)}")
+        if self._traced_requests.pop(request_id, False):
+            self.trace_logger.debug(f"[{request_id}] Full response: {json.dumps(strip_blobs(response_data))}")
     
     def log_error(self, request_id: str, error: Exception, context: Dict[str, Any] = None):
         """Log an API error"""
@@ -180,6 +291,8 @@ class OpenAILogger:
         }
         
         self.error_logger.error(f"API Error: {json.dumps(error_data)}")
+        self._traced_requests.pop(request_id, None)
+        self._pending_requests.pop(request_id, None)
         
         # Also log to console for immediate visibility
         print(f"🚨 OpenAI API Error [{request_id}]: {error}")
@@ -190,7 +303,8 @@ class OpenAILogger:
             "total_requests": self.request_count,
             "total_tokens": self.total_tokens,
             "total_cost_usd": round(self.total_cost, 4),
-            "avg_tokens_per_request": round(self.total_tokens / max(1, self.request_count), 2)
+            "avg_tokens_per_request": round(self.total_tokens / max(1, self.request_count), 2),
+            "token_accounting": self.token_accountant.get_stats()
         }
     
     def log_stats(self):
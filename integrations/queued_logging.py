@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Queued Logging - Moves Eva's log file writes off the asyncio event loop
+Log calls enqueue records; a background thread writes and flushes them in batches
+"""
+
+import os
+import queue
+import atexit
+import logging
+import threading
+import time
+from logging.handlers import QueueHandler
+from typing import Dict, Any, List, Optional
+from integrations.log_rotation import RotatingLogFileHandler
+
+# Defaults, overridable from the environment
+LOG_QUEUE_ENABLED = os.getenv("LOG_QUEUE_ENABLED", "true").lower() == "true"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "0.5"))
+
+# Every listener started in this process, for stats and shutdown
+_listeners: List["BatchingQueueListener"] = []
+_listeners_lock = threading.Lock()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops and counts records when the queue is full instead of blocking"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.enqueued = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingFileHandler(RotatingLogFileHandler):
+    """Rotating file handler that writes without flushing; the listener flushes once per batch"""
+
+    flush_each_record = False
+
+
+class BatchingQueueListener:
+    """Drains a log queue in a background thread, flushing on a size or time threshold"""
+
+    _sentinel = None
+
+    def __init__(self, log_queue: queue.Queue, handlers: List[logging.Handler], name: str,
+                 batch_size: int = LOG_BATCH_SIZE, flush_interval: float = LOG_FLUSH_INTERVAL):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue_handlers: List[DroppingQueueHandler] = []
+        self.written = 0
+        self.batches = 0
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._monitor, name=f"log-writer-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Flush everything queued so far and stop the writer thread"""
+        if not self._thread:
+            return
+        # Unlike QueueListener, never fail to stop just because the queue is full
+        self.queue.put(self._sentinel, timeout=timeout)
+        self._thread.join(timeout)
+        self._thread = None
+        for handler in self.handlers:
+            handler.close()
+
+    def _handle(self, record: logging.LogRecord):
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        self.written += 1
+
+    def _flush(self):
+        for handler in self.handlers:
+            try:
+                handler.flush()
+            except Exception:
+                pass
+        self.batches += 1
+
+    def _monitor(self):
+        while True:
+            try:
+                record = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            # Collect a batch until it is full or the flush interval has passed
+            stopping = record is self._sentinel
+            if not stopping:
+                self._handle(record)
+                count = 1
+                deadline = time.monotonic() + self.flush_interval
+                while count < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        record = self.queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if record is self._sentinel:
+                        stopping = True
+                        break
+                    self._handle(record)
+                    count += 1
+
+            self._flush()
+            if stopping:
+                return
+
+
+def attach_queued_handlers(name: str, loggers_and_handlers: List[tuple],
+                           maxsize: int = LOG_QUEUE_SIZE,
+                           shared_handlers: Optional[List[logging.Handler]] = None) -> BatchingQueueListener:
+    """
+    Route each (logger, handler) pair through one shared bounded queue.
+
+    Each logger gets a DroppingQueueHandler; each file handler is filtered to its own
+    logger's records so one writer thread can serve several log files. Shared handlers
+    (e.g. the log index) see every record on the queue.
+    """
+    # Replace the writer from any previous instance that used the same name
+    with _listeners_lock:
+        previous = [listener for listener in _listeners if listener.name == name]
+        for listener in previous:
+            _listeners.remove(listener)
+    for listener in previous:
+        listener.stop()
+
+    log_queue = queue.Queue(maxsize=maxsize)
+    listener = BatchingQueueListener(log_queue, [], name)
+    for target_logger, handler in loggers_and_handlers:
+        handler.addFilter(logging.Filter(target_logger.name))
+        listener.handlers.append(handler)
+        # Loggers sharing a queue share one queue handler
+        if not any(isinstance(h, DroppingQueueHandler) and h.queue is log_queue for h in target_logger.handlers):
+            queue_handler = DroppingQueueHandler(log_queue)
+            target_logger.addHandler(queue_handler)
+            listener.queue_handlers.append(queue_handler)
+    listener.handlers.extend(shared_handlers or [])
+
+    listener.start()
+    with _listeners_lock:
+        _listeners.append(listener)
+    return listener
+
+
+def get_queue_stats() -> Dict[str, Any]:
+    """Depth, throughput and drop counts for every log queue"""
+    with _listeners_lock:
+        listeners = list(_listeners)
+    return {
+        listener.name: {
+            "queue_depth": listener.queue.qsize(),
+            "queue_capacity": listener.queue.maxsize,
+            "enqueued": sum(handler.enqueued for handler in listener.queue_handlers),
+            "dropped": sum(handler.dropped for handler in listener.queue_handlers),
+            "written": listener.written,
+            "batches": listener.batches
+        }
+        for listener in listeners
+    }
+
+
+def stop_all_listeners():
+    """Flush and stop every log writer thread (registered with atexit)"""
+    with _listeners_lock:
+        listeners = list(_listeners)
+        _listeners.clear()
+    for listener in listeners:
+        try:
+            listener.stop()
+        except Exception:
+            pass
+
+
+atexit.register(stop_all_listeners)
@@ -3,12 +3,11 @@ SpeechRecognition STT integration to replace WhisperSTT in Eva Agent.
 Drop-in replacement for the WhisperSTT class.
 """
 
-import os
 import asyncio
-import tempfile
 import speech_recognition as sr
 from typing import Optional
-from io import BytesIO
+
+from integrations.audio_decode import decode_audio, float32_to_pcm16, TARGET_SAMPLE_RATE
 
 class SpeechRecognitionSTT:
     """Speech-to-text using SpeechRecognition library as drop-in replacement for WhisperSTT."""
@@ -22,44 +21,30 @@ class SpeechRecognitionSTT:
         self.recognizer.pause_threshold = 0.8
         self.recognizer.phrase_threshold = 0.3
         
-    async def speech_to_text(self, audio_data: bytes, language: str = "en-US") -> str:
+    async def speech_to_text(self, audio_data: bytes, language: str = "en-US",
+                             sample_rate: Optional[int] = None) -> str:
         """
         Convert audio bytes to text using Google Speech Recognition.
         Drop-in replacement for WhisperSTT.speech_to_text()
+
+        Audio files (wav, webm/opus, m4a, ...) are decoded in memory; raw 16-bit mono PCM
+        (sample_rate given) is used as is. Decoding and recognition run in a worker thread.
         """
         try:
-            # Write audio data to temporary file
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_file.write(audio_data)
-                temp_file_path = temp_file.name
-            
-            try:
-                # Load audio file
-                with sr.AudioFile(temp_file_path) as source:
-                    audio = self.recognizer.record(source)
-                
-                # Run recognition in thread pool to avoid blocking
-                loop = asyncio.get_event_loop()
-                text = await loop.run_in_executor(
-                    None, 
-                    self._recognize_speech, 
-                    audio, 
-                    language
-                )
-                
-                return text
-                
-            finally:
-                # Clean up temporary file
-                try:
-                    os.unlink(temp_file_path)
-                except OSError:
-                    pass
-                    
+            return await asyncio.to_thread(self._transcribe, audio_data, language, sample_rate)
         except Exception as e:
             print(f"SpeechRecognition STT error: {e}")
             return ""
     
+    def _transcribe(self, audio_data: bytes, language: str, sample_rate: Optional[int]) -> str:
+        """Decode (unless raw PCM) and recognize (run in executor)."""
+        if sample_rate:
+            audio = sr.AudioData(audio_data, sample_rate, 2)
+        else:
+            pcm = float32_to_pcm16(decode_audio(audio_data))
+            audio = sr.AudioData(pcm, TARGET_SAMPLE_RATE, 2)
+        return self._recognize_speech(audio, language)
+    
     def _recognize_speech(self, audio, language: str = "en-US") -> str:
         """Synchronous speech recognition (run in executor)."""
         try:
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+STT Models - Resident set of local whisper models (size x compute type) under a memory cap
+Requests pick a model by name ("small:int8"); models load on demand or warm up in the
+background, and the least recently used idle model is unloaded when memory runs short
+(the default model is never unloaded).
+"""
+
+import os
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from integrations.local_stt_handler import LocalSTTHandler, LOCAL_STT_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Models requests may choose from; the first is the default
+LOCAL_STT_MODELS = [name.strip() for name in os.getenv("LOCAL_STT_MODELS", "tiny:int8").split(",") if name.strip()]
+# Models loaded in the background at startup (besides the default)
+LOCAL_STT_WARM_MODELS = [name.strip() for name in os.getenv("LOCAL_STT_WARM_MODELS", "").split(",") if name.strip()]
+# Memory budget for resident models (estimated, all workers included)
+LOCAL_STT_MEMORY_MB = int(os.getenv("LOCAL_STT_MEMORY_MB", "2048"))
+
+# Approximate parameter counts (millions) and bytes per parameter, for the memory estimate
+MODEL_PARAMS_M = {
+    "tiny": 39, "tiny.en": 39, "base": 74, "base.en": 74, "small": 244, "small.en": 244,
+    "medium": 769, "medium.en": 769, "large-v1": 1550, "large-v2": 1550, "large-v3": 1550,
+    "distil-small.en": 166, "distil-medium.en": 394, "distil-large-v2": 756, "distil-large-v3": 756
+}
+BYTES_PER_PARAM = {"int8": 1.0, "int8_float32": 1.2, "int8_float16": 1.2, "int8_bfloat16": 1.2,
+                   "int16": 2.0, "float16": 2.0, "bfloat16": 2.0, "float32": 4.0}
+# Runtime overhead per loaded model (CTranslate2 buffers, tokenizer, ...)
+MODEL_OVERHEAD_MB = 60
+
+
+class STTModelUnavailable(Exception):
+    """The model can't be loaded (unknown name, or no room under the memory cap)"""
+
+
+def parse_model_name(name: str):
+    """'small:int8' -> ('small', 'int8'); a bare size means int8"""
+    size, _, compute_type = name.partition(":")
+    compute_type = compute_type or "int8"
+    if size not in MODEL_PARAMS_M:
+        raise STTModelUnavailable(f"Unknown whisper model size: {size}")
+    if compute_type not in BYTES_PER_PARAM:
+        raise STTModelUnavailable(f"Unknown compute type: {compute_type}")
+    return size, compute_type
+
+
+def estimate_memory_mb(name: str, workers: int = 1) -> float:
+    size, compute_type = parse_model_name(name)
+    return (MODEL_PARAMS_M[size] * BYTES_PER_PARAM[compute_type] + MODEL_OVERHEAD_MB) * workers
+
+
+class STTModelManager:
+    """Keeps whisper models resident within a memory budget, least recently used out first"""
+
+    def __init__(self, models: List[str] = None, memory_mb: int = LOCAL_STT_MEMORY_MB,
+                 workers: int = LOCAL_STT_WORKERS,
+                 handler_factory: Optional[Callable[[str, str], LocalSTTHandler]] = None):
+        """
+        Args:
+            models: Names requests may pick ("size:compute_type"); the first is the default
+            memory_mb: Budget for all resident models
+            workers: Worker threads (model copies) per model
+            handler_factory: Builds an (uninitialized) handler for (size, compute_type)
+        """
+        self.models = [self.normalize(name) for name in (models or LOCAL_STT_MODELS)]
+        self.default_model = self.models[0]
+        self.memory_mb = memory_mb
+        self.workers = workers
+        self.handler_factory = handler_factory or self._create_handler
+        self.resident: "OrderedDict[str, LocalSTTHandler]" = OrderedDict()  # Least recently used first
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._reserved: Dict[str, float] = {}  # Memory of models being loaded
+        self._pending_leases: Dict[str, int] = {}  # Leases requested while a model loads
+
+        # Stats
+        self.loads = 0
+        self.unloads = 0
+        self.load_failures = 0
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        return ":".join(parse_model_name(name))
+
+    def _create_handler(self, size: str, compute_type: str) -> LocalSTTHandler:
+        return LocalSTTHandler(size, compute_type, workers=self.workers)
+
+    def memory_used_mb(self) -> float:
+        """Estimated memory of resident models plus models being loaded"""
+        resident = sum(estimate_memory_mb(name, handler.workers) for name, handler in self.resident.items())
+        return resident + sum(self._reserved.values())
+
+    def _make_room(self, name: str, needed_mb: float):
+        """Unload idle models, least recently used first, until needed_mb fits"""
+        for resident_name in list(self.resident):
+            if self.memory_used_mb() + needed_mb <= self.memory_mb:
+                return
+            handler = self.resident[resident_name]
+            if handler.in_use or resident_name == self.default_model:
+                continue
+            logger.info(f"Unloading STT model {resident_name} to make room for {name}")
+            del self.resident[resident_name]
+            handler.close()
+            self.unloads += 1
+        if self.memory_used_mb() + needed_mb > self.memory_mb:
+            raise STTModelUnavailable(
+                f"Not enough STT memory for {name}: needs ~{needed_mb:.0f}MB, "
+                f"{self.memory_used_mb():.0f}MB of {self.memory_mb}MB held by models in use or loading"
+            )
+
+    def _resident(self, name: str) -> Optional[LocalSTTHandler]:
+        if name not in self.models:
+            raise STTModelUnavailable(f"Model {name} is not enabled (LOCAL_STT_MODELS: {', '.join(self.models)})")
+        handler = self.resident.get(name)
+        if handler is not None:
+            self.resident.move_to_end(name)
+        return handler
+
+    def _prepare(self, name: str) -> LocalSTTHandler:
+        """Build the handler and reserve its memory, unloading others if needed"""
+        handler = self.handler_factory(*parse_model_name(name))
+        needed_mb = estimate_memory_mb(name, handler.workers)
+        self._make_room(name, needed_mb)
+        self._reserved[name] = needed_mb
+        return handler
+
+    def _finish_load(self, name: str, handler: LocalSTTHandler, loaded: bool) -> LocalSTTHandler:
+        self._reserved.pop(name, None)
+        leases = self._pending_leases.pop(name, 0)
+        if not loaded:
+            self.load_failures += 1
+            handler.close()
+            raise STTModelUnavailable(f"Failed to load STT model {name}")
+        # Leased before it is published: waiters resume later, and another request making room
+        # in between must not unload the model they are waiting for
+        handler.leases += leases
+        self.resident[name] = handler
+        self.loads += 1
+        logger.info(f"✅ STT model {name} resident ({self.memory_used_mb():.0f}/{self.memory_mb}MB)")
+        return handler
+
+    def load(self, name: Optional[str] = None) -> LocalSTTHandler:
+        """Get a model, loading it if needed (blocking; for startup)"""
+        name = self.normalize(name or self.default_model)
+        handler = self._resident(name)
+        if handler is not None:
+            return handler
+        handler = self._prepare(name)
+        return self._finish_load(name, handler, handler.initialize())
+
+    async def _load_async(self, name: str) -> LocalSTTHandler:
+        handler = self._prepare(name)
+        loaded = False
+        try:
+            loaded = await asyncio.to_thread(handler.initialize)
+        finally:
+            if not loaded:
+                self._reserved.pop(name, None)
+                self._pending_leases.pop(name, None)
+        return self._finish_load(name, handler, loaded)
+
+    async def acquire(self, name: Optional[str] = None, lease: bool = False) -> LocalSTTHandler:
+        """
+        Get a model without blocking the event loop; concurrent requests share one load.
+        With lease=True the model can't be unloaded until release(handler) is called, so a
+        request can hold it across awaits before its transcription starts.
+        """
+        name = self.normalize(name or self.default_model)
+        handler = self._resident(name)
+        if handler is not None:
+            if lease:
+                handler.leases += 1
+            return handler
+        
+        task = self._loading.get(name)
+        if task is None:
+            task = asyncio.create_task(self._load_async(name))
+            self._loading[name] = task
+            task.add_done_callback(lambda _: self._loading.pop(name, None))
+        if lease:
+            # Taken by _finish_load as the model is published
+            self._pending_leases[name] = self._pending_leases.get(name, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if lease:
+                if not task.done():
+                    self._pending_leases[name] -= 1
+                elif not task.cancelled() and task.exception() is None:
+                    self.release(task.result())
+            raise
+
+    def release(self, handler: LocalSTTHandler):
+        """End a lease taken with acquire(lease=True)"""
+        handler.leases = max(0, handler.leases - 1)
+
+    def warm_up(self, names: Optional[List[str]] = None) -> List[asyncio.Task]:
+        """Load models in the background (failures are logged, not raised)"""
+        async def warm(name: str):
+            try:
+                await self.acquire(name)
+            except Exception as e:
+                logger.warning(f"STT model warm-up failed for {name}: {e}")
+
+        return [asyncio.create_task(warm(name)) for name in (names if names is not None else LOCAL_STT_WARM_MODELS)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "default_model": self.default_model,
+            "available": self.models,
+            "resident": {
+                name: {"memory_mb": round(estimate_memory_mb(name, handler.workers)), **handler.get_stats()}
+                for name, handler in self.resident.items()
+            },
+            "loading": list(self._loading),
+            "memory_used_mb": round(self.memory_used_mb()),
+            "memory_cap_mb": self.memory_mb,
+            "loads": self.loads,
+            "unloads": self.unloads,
+            "load_failures": self.load_failures
+        }
+
+
+# Global instance
+stt_model_manager = None
+
+def get_stt_model_manager() -> STTModelManager:
+    """Get the global STT model manager"""
+    global stt_model_manager
+    if stt_model_manager is None:
+        stt_model_manager = STTModelManager()
+    return stt_model_manager
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Token Accounting - Tokenizer-based request estimates, pricing and rolling usage totals
+Estimates are reconciled against the API's usage block; per-session and per-user
+totals can be queried in O(1) by the context budgeter and admission control
+"""
+
+import os
+import io
+import json
+import math
+import time
+import base64
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional, List, Tuple
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Rolling window for per-session / per-user totals
+TOKEN_USAGE_WINDOW_HOURS = int(os.getenv("TOKEN_USAGE_WINDOW_HOURS", "24"))
+# Cached message token counts
+TOKEN_MEMO_SIZE = int(os.getenv("TOKEN_MEMO_SIZE", "20000"))
+# Reported as the tokenizer when counts are estimated from characters (no tiktoken, or it failed to load)
+CHARS_ESTIMATE = "chars/4 estimate"
+
+# USD per 1M tokens. Dated model ids (gpt-4o-2024-08-06) resolve to the longest matching prefix.
+# OPENAI_PRICING may hold a JSON object with the same shape to add or override models.
+MODEL_PRICING = {
+    "gpt-4.1": {"input": 2.0, "cached_input": 0.5, "output": 8.0},
+    "gpt-4.1-mini": {"input": 0.4, "cached_input": 0.1, "output": 1.6},
+    "gpt-4.1-nano": {"input": 0.1, "cached_input": 0.025, "output": 0.4},
+    "gpt-4o": {"input": 2.5, "cached_input": 1.25, "output": 10.0},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.6},
+    "o4-mini": {"input": 1.1, "cached_input": 0.275, "output": 4.4},
+    "o3": {"input": 2.0, "cached_input": 0.5, "output": 8.0},
+    "gpt-4-turbo": {"input": 10.0, "output": 30.0},
+    "gpt-4": {"input": 30.0, "output": 60.0},
+    "gpt-3.5-turbo": {"input": 0.5, "output": 1.5},
+    "gpt-image-1": {"per_image": 40.0},
+    "dall-e-3": {"per_image": 40.0},
+    "dall-e-2": {"per_image": 20.0},
+    "whisper": {"per_minute": 6.0}
+}
+if os.getenv("OPENAI_PRICING"):
+    try:
+        MODEL_PRICING.update(json.loads(os.getenv("OPENAI_PRICING")))
+    except json.JSONDecodeError as e:
+        print(f"Ignoring invalid OPENAI_PRICING: {e}")
+
+# Chat format overheads (tokens)
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_NAME = 1
+TOKENS_REPLY_PRIMING = 3
+TOKENS_PER_TOOL = 8
+
+# Vision tile rules
+IMAGE_BASE_TOKENS = 85
+IMAGE_TILE_TOKENS = 170
+IMAGE_TILE_SIZE = 512
+IMAGE_MAX_SIDE = 2048
+IMAGE_SHORT_SIDE = 768
+# Assumed size when an image URL can't be inspected (remote URL or unreadable data)
+IMAGE_DEFAULT_SIZE = (1024, 1024)
+
+
+def resolve_pricing(model: str) -> Optional[Dict[str, float]]:
+    """Pricing for a model id, matching dated snapshots to their base model"""
+    if model in MODEL_PRICING:
+        return MODEL_PRICING[model]
+    matches = [name for name in MODEL_PRICING if model.startswith(name + "-")]
+    return MODEL_PRICING[max(matches, key=len)] if matches else None
+
+
+def calculate_cost(model: str, input_tokens: int, output_tokens: int = 0, cached_tokens: int = 0) -> float:
+    """Cost in USD; cached input tokens are billed at the cached rate where one exists"""
+    rates = resolve_pricing(model)
+    if not rates:
+        return 0.0
+    if "per_image" in rates:
+        return rates["per_image"] / 1000  # Convert to dollars
+    if "input" not in rates:
+        return 0.0
+    cached_tokens = min(cached_tokens, input_tokens)
+    cached_rate = rates.get("cached_input", rates["input"])
+    return ((input_tokens - cached_tokens) * rates["input"]
+            + cached_tokens * cached_rate
+            + output_tokens * rates.get("output", 0.0)) / 1_000_000
+
+
+def image_tokens(width: int, height: int, detail: str = "auto") -> int:
+    """Vision tokens for an image: fixed cost at low detail, 512px tiles otherwise"""
+    if detail == "low":
+        return IMAGE_BASE_TOKENS
+    # Fit within 2048x2048, then scale so the shortest side is 768px
+    scale = min(1.0, IMAGE_MAX_SIDE / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, IMAGE_SHORT_SIDE / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / IMAGE_TILE_SIZE) * math.ceil(height / IMAGE_TILE_SIZE)
+    return IMAGE_BASE_TOKENS + IMAGE_TILE_TOKENS * tiles
+
+
+def image_size_from_url(url: str) -> Tuple[int, int]:
+    """Pixel size of a data: URL image (header only); a default size for anything else"""
+    if PIL_AVAILABLE and url.startswith("data:") and ";base64," in url:
+        try:
+            # The header is enough for PIL to read the size; avoid decoding the whole image
+            head = base64.b64decode(url.split(";base64,", 1)[1][:65536].rstrip("=") + "==", validate=False)
+            with Image.open(io.BytesIO(head)) as image:
+                return image.size
+        except Exception:
+            pass
+    return IMAGE_DEFAULT_SIZE
+
+
+class RollingTotal:
+    """Token and cost totals over a sliding window, kept in per-minute buckets
+
+    Adding and querying are amortized O(1): expired buckets are subtracted as they fall out.
+    """
+
+    __slots__ = ("window_seconds", "buckets", "requests", "input_tokens", "output_tokens",
+                 "cached_tokens", "cost")
+
+    def __init__(self, window_seconds: int):
+        self.window_seconds = window_seconds
+        self.buckets: deque = deque()  # [minute, requests, input, output, cached, cost]
+        self.requests = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.cost = 0.0
+
+    def _expire(self, now: float):
+        oldest_allowed = int((now - self.window_seconds) // 60)
+        while self.buckets and self.buckets[0][0] <= oldest_allowed:
+            _, requests, input_tokens, output_tokens, cached_tokens, cost = self.buckets.popleft()
+            self.requests -= requests
+            self.input_tokens -= input_tokens
+            self.output_tokens -= output_tokens
+            self.cached_tokens -= cached_tokens
+            self.cost -= cost
+
+    def add(self, input_tokens: int, output_tokens: int, cached_tokens: int, cost: float,
+            now: Optional[float] = None):
+        now = now or time.time()
+        self._expire(now)
+        minute = int(now // 60)
+        if not self.buckets or self.buckets[-1][0] != minute:
+            self.buckets.append([minute, 0, 0, 0, 0, 0.0])
+        bucket = self.buckets[-1]
+        bucket[1] += 1
+        bucket[2] += input_tokens
+        bucket[3] += output_tokens
+        bucket[4] += cached_tokens
+        bucket[5] += cost
+        self.requests += 1
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        self.cached_tokens += cached_tokens
+        self.cost += cost
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        self._expire(now or time.time())
+        return {
+            "window_hours": round(self.window_seconds / 3600, 2),
+            "requests": self.requests,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cached_tokens": self.cached_tokens,
+            "total_tokens": self.input_tokens + self.output_tokens,
+            "cost_usd": round(self.cost, 6)
+        }
+
+
+class TokenAccountant:
+    """Counts request tokens with the model's tokenizer and tracks actual usage"""
+
+    def __init__(self, window_hours: int = TOKEN_USAGE_WINDOW_HOURS, memo_size: int = TOKEN_MEMO_SIZE,
+                 max_tracked: int = 10000):
+        self.window_seconds = window_hours * 3600
+        self.memo_size = memo_size
+        self.max_tracked = max_tracked
+        self._memo: "OrderedDict[str, int]" = OrderedDict()
+        self._encodings: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+        # Rolling totals; least recently active sessions/users are dropped beyond max_tracked
+        self.session_totals: "OrderedDict[str, RollingTotal]" = OrderedDict()
+        self.user_totals: "OrderedDict[str, RollingTotal]" = OrderedDict()
+
+        # Estimate accuracy: actual / estimated prompt tokens, per model
+        self.calibration: Dict[str, Dict[str, float]] = {}
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+    # Tokenizing
+
+    def _encoding(self, model: str):
+        """The model's tokenizer; None (chars/4 estimates) if tiktoken is missing or can't load it"""
+        if not TIKTOKEN_AVAILABLE:
+            return None
+        if model in self._encodings:
+            return self._encodings[model]
+        try:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            # e.g. the BPE file can't be downloaded; remembered so it's reported once per model
+            print(f"Tokenizer unavailable for {model}, estimating tokens from characters: {e}")
+            encoding = None
+        self._encodings[model] = encoding
+        return encoding
+
+    def count_text(self, text: str, model: str = "gpt-4o") -> int:
+        encoding = self._encoding(model)
+        if encoding is None:
+            return len(text) // 4
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def _memoized(self, kind: str, model: str, value: Any, count) -> int:
+        """Count a message or tool schema once per distinct content"""
+        encoding = self._encoding(model)
+        encoding_name = encoding.name if encoding is not None else "chars"
+        data = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+        key = f"{kind}:{encoding_name}:{hashlib.sha256(data).hexdigest()}"
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                self.memo_hits += 1
+                return self._memo[key]
+        tokens = count(value, model)
+        with self._lock:
+            self.memo_misses += 1
+            self._memo[key] = tokens
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return tokens
+
+    def _count_content(self, content: Any, model: str) -> int:
+        if content is None:
+            return 0
+        if isinstance(content, str):
+            return self.count_text(content, model)
+        tokens = 0
+        for part in content:
+            part_type = part.get("type")
+            if part_type in ("text", "input_text"):
+                tokens += self.count_text(part.get("text", ""), model)
+            elif part_type in ("image_url", "input_image"):
+                image = part.get("image_url", {})
+                url = image.get("url", "") if isinstance(image, dict) else image
+                detail = (image.get("detail") if isinstance(image, dict) else None) or part.get("detail", "auto")
+                tokens += image_tokens(*image_size_from_url(url), detail=detail)
+        return tokens
+
+    def _count_message(self, message: Dict[str, Any], model: str) -> int:
+        tokens = TOKENS_PER_MESSAGE + self.count_text(message.get("role", ""), model)
+        tokens += self._count_content(message.get("content"), model)
+        if message.get("name"):
+            tokens += TOKENS_PER_NAME + self.count_text(message["name"], model)
+        for tool_call in message.get("tool_calls") or []:
+            function = tool_call.get("function", {})
+            tokens += self.count_text(function.get("name", ""), model)
+            tokens += self.count_text(function.get("arguments", ""), model)
+        if message.get("tool_call_id"):
+            tokens += self.count_text(message["tool_call_id"], model)
+        return tokens
+
+    def _count_tools(self, tools: List[Dict[str, Any]], model: str) -> int:
+        return sum(TOKENS_PER_TOOL + self.count_text(json.dumps(tool, separators=(",", ":")), model)
+                   for tool in tools)
+
+    def count_messages(self, messages: List[Dict[str, Any]], model: str = "gpt-4o") -> int:
+        tokens = TOKENS_REPLY_PRIMING
+        for message in messages:
+            tokens += self._memoized("msg", model, message, self._count_message)
+        return tokens
+
+    def estimate_request(self, payload: Dict[str, Any]) -> int:
+        """Prompt tokens for a chat completions payload, including the tool schema once"""
+        model = payload.get("model", "gpt-4o")
+        tokens = self.count_messages(payload.get("messages", []), model)
+        if payload.get("tools"):
+            tokens += self._memoized("tools", model, payload["tools"], self._count_tools)
+        return tokens
+
+    # Reconciliation and totals
+
+    def _total_for(self, totals: "OrderedDict[str, RollingTotal]", key: str) -> RollingTotal:
+        total = totals.get(key)
+        if total is None:
+            total = totals[key] = RollingTotal(self.window_seconds)
+            while len(totals) > self.max_tracked:
+                totals.popitem(last=False)
+        else:
+            totals.move_to_end(key)
+        return total
+
+    def record_usage(self, model: str, usage: Dict[str, Any], estimated_input_tokens: Optional[int] = None,
+                     session_id: Optional[str] = None, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """Fold an API usage block into the rolling totals and the estimate calibration"""
+        input_tokens = usage.get("input_tokens", 0) or usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("output_tokens", 0) or usage.get("completion_tokens", 0)
+        details = usage.get("prompt_tokens_details") or usage.get("input_tokens_details") or {}
+        cached_tokens = details.get("cached_tokens", 0) or 0
+        cost = calculate_cost(model, input_tokens, output_tokens, cached_tokens)
+
+        with self._lock:
+            for totals, key in ((self.session_totals, session_id), (self.user_totals, user_id)):
+                if key:
+                    self._total_for(totals, key).add(input_tokens, output_tokens, cached_tokens, cost)
+            if estimated_input_tokens and input_tokens:
+                stats = self.calibration.setdefault(model, {"requests": 0, "estimated": 0, "actual": 0})
+                stats["requests"] += 1
+                stats["estimated"] += estimated_input_tokens
+                stats["actual"] += input_tokens
+
+        return {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cached_tokens": cached_tokens,
+            "cost_usd": cost,
+            "estimate_error_tokens": (input_tokens - estimated_input_tokens) if estimated_input_tokens else None
+        }
+
+    def get_session_usage(self, session_id: str) -> Dict[str, Any]:
+        with self._lock:
+            total = self.session_totals.get(session_id)
+            return total.snapshot() if total else RollingTotal(self.window_seconds).snapshot()
+
+    def get_user_usage(self, user_id: str) -> Dict[str, Any]:
+        with self._lock:
+            total = self.user_totals.get(user_id)
+            return total.snapshot() if total else RollingTotal(self.window_seconds).snapshot()
+
+    def _tokenizer_name(self, model: str) -> str:
+        """What counts the model's tokens, without loading anything"""
+        if not TIKTOKEN_AVAILABLE or (model in self._encodings and self._encodings[model] is None):
+            return CHARS_ESTIMATE
+        encoding = self._encodings.get(model)
+        return f"tiktoken {encoding.name}" if encoding is not None else "tiktoken"
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            failed = sorted(model for model, encoding in self._encodings.items() if encoding is None)
+            if not TIKTOKEN_AVAILABLE or (failed and len(failed) == len(self._encodings)):
+                tokenizer = CHARS_ESTIMATE
+            elif failed:
+                tokenizer = f"tiktoken ({CHARS_ESTIMATE} for {', '.join(failed)})"
+            else:
+                tokenizer = "tiktoken"
+            calibration = {
+                model: {
+                    "tokenizer": self._tokenizer_name(model),
+                    "requests": stats["requests"],
+                    "actual_to_estimated": round(stats["actual"] / max(1, stats["estimated"]), 3)
+                }
+                for model, stats in self.calibration.items()
+            }
+            lookups = self.memo_hits + self.memo_misses
+            return {
+                "tokenizer": tokenizer,
+                "memo_entries": len(self._memo),
+                "memo_hit_ratio": round(self.memo_hits / lookups, 3) if lookups else 0.0,
+                "tracked_sessions": len(self.session_totals),
+                "tracked_users": len(self.user_totals),
+                "calibration": calibration
+            }
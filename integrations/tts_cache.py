@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+TTS Cache - Content-addressed cache of synthesized speech
+Keyed by normalized text, voice, model and voice settings; an in-memory LRU tier sits in
+front of a size-capped disk tier so repeated phrases never cost another ElevenLabs call
+"""
+
+import os
+import re
+import json
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+# Defaults, overridable from the environment
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "data/tts_cache")
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+TTS_CACHE_CHUNK_BYTES = 16 * 1024
+TTS_CACHE_PREWARM = os.getenv("TTS_CACHE_PREWARM", "true").lower() == "true"
+# Pre-warming is paid synthesis: at most this many phrases of at most this many characters
+TTS_PREWARM_MAX_PHRASES = int(os.getenv("TTS_PREWARM_MAX_PHRASES", "50"))
+TTS_PREWARM_MAX_CHARS = int(os.getenv("TTS_PREWARM_MAX_CHARS", "200"))
+
+# Phrases Eva says over and over; synthesized once at startup (one line per phrase in
+# TTS_PREWARM_FILE replaces this list)
+DEFAULT_PREWARM_PHRASES = [
+    "I've completed the requested task.",
+    "I've completed the available steps of the requested task.",
+    "Got it, working on that now.",
+    "Sure, one moment.",
+    "Hey! How can I help?",
+    "Done!",
+    "Sorry, I didn't catch that. Could you say it again?",
+    "Your appointment is booked.",
+    "Is there anything else I can help you with?"
+]
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of text for cache keys: NFC, collapsed whitespace, trimmed"""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(text: str, voice_id: str, model_id: str, voice_settings: Optional[Dict[str, Any]] = None) -> str:
+    """Content address of one synthesis request"""
+    material = json.dumps(
+        [normalize_text(text), voice_id, model_id, voice_settings or {}],
+        sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def load_prewarm_phrases(max_phrases: int = TTS_PREWARM_MAX_PHRASES, max_chars: int = TTS_PREWARM_MAX_CHARS) -> List[str]:
+    path = os.getenv("TTS_PREWARM_FILE")
+    if path and os.path.exists(path):
+        with open(path, "r") as f:
+            phrases = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    else:
+        phrases = list(DEFAULT_PREWARM_PHRASES)
+    kept = [phrase for phrase in phrases if len(phrase) <= max_chars][:max_phrases]
+    if len(kept) < len(phrases):
+        print(f"Pre-warming {len(kept)} of {len(phrases)} TTS phrases "
+              f"(limits: {max_phrases} phrases of up to {max_chars} characters)")
+    return kept
+
+
+class TTSCache:
+    """Two-tier (memory LRU + disk) cache of audio bytes by content address"""
+
+    def __init__(self, cache_dir: str = TTS_CACHE_DIR, memory_bytes: int = TTS_CACHE_MEMORY_BYTES,
+                 disk_bytes: int = TTS_CACHE_DISK_BYTES, cost_per_character: float = 0.00003):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.cost_per_character = cost_per_character
+        self._lock = threading.Lock()
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_used = 0
+
+        # Disk index (key -> size), least recently used first; rebuilt from file mtimes
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_used = 0
+        self._load_disk_index()
+
+        # Stats
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.characters_saved = 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.audio"
+
+    def _load_disk_index(self):
+        entries = []
+        for path in self.cache_dir.glob("*/*.audio"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_used += size
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._memory or key in self._disk
+
+    def _remember(self, key: str, audio: bytes):
+        """Put audio in the memory tier, evicting least recently used entries (lock held)"""
+        if len(audio) > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = audio
+        self._memory_used += len(audio)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def get(self, key: str, characters: int = 0) -> Optional[bytes]:
+        """Cached audio for a key, or None; reads the disk tier on a memory miss (blocking)"""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self.characters_saved += characters
+                return audio
+            on_disk = key in self._disk
+
+        if on_disk:
+            path = self._path(key)
+            try:
+                audio = path.read_bytes()
+                os.utime(path)  # Disk LRU order follows mtime
+            except FileNotFoundError:
+                audio = None
+            with self._lock:
+                if audio is not None:
+                    self._disk.move_to_end(key)
+                    self._remember(key, audio)
+                    self.disk_hits += 1
+                    self.characters_saved += characters
+                    return audio
+                size = self._disk.pop(key, 0)
+                self._disk_used -= size
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, audio: bytes):
+        """Store audio in both tiers (blocking disk write), evicting old disk entries over the cap"""
+        if not audio:
+            return
+        with self._lock:
+            self._remember(key, audio)
+            if key in self._disk:
+                return
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(audio)
+        os.replace(tmp, path)
+
+        evicted = []
+        with self._lock:
+            self._disk[key] = len(audio)
+            self._disk_used += len(audio)
+            while self._disk_used > self.disk_bytes and len(self._disk) > 1:
+                old_key, size = self._disk.popitem(last=False)
+                self._disk_used -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                self._path(old_key).unlink()
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def iter_chunks(audio: bytes, chunk_size: int = TTS_CACHE_CHUNK_BYTES) -> Iterator[bytes]:
+        """Serve cached audio chunk by chunk, like a live stream"""
+        for start in range(0, len(audio), chunk_size):
+            yield audio[start:start + chunk_size]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "characters_saved": self.characters_saved,
+                "estimated_cost_saved": round(self.characters_saved * self.cost_per_character, 4),
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_used,
+                "memory_capacity_bytes": self.memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_used,
+                "disk_capacity_bytes": self.disk_bytes
+            }
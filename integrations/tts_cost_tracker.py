@@ -1,13 +1,22 @@
 """
 TTS Cost Tracker for ElevenLabs Credit Management
+Usage is an append-only JSON-lines log; per-day and per-session totals are kept in
+memory (rebuilt from the log at startup) so budget checks never scan the history
 """
 
 import json
+import threading
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Deque, Dict, List, Optional
 from dataclasses import dataclass, asdict
 import os
 
+# Recent usage entries kept in memory for efficiency stats
+TTS_USAGE_HISTORY_SIZE = int(os.getenv("TTS_USAGE_HISTORY_SIZE", "1000"))
+# Sessions with running totals; least recently used sessions are dropped beyond this
+TTS_USAGE_MAX_SESSIONS = int(os.getenv("TTS_USAGE_MAX_SESSIONS", "10000"))
+
 @dataclass
 class TTSUsage:
     """Track TTS usage for cost estimation"""
@@ -20,14 +29,23 @@ class TTSUsage:
 class TTSCostTracker:
     """Track and manage TTS costs"""
     
-    def __init__(self, storage_path: str = "logs/tts_usage.json"):
+    def __init__(self, storage_path: str = "logs/tts_usage.jsonl",
+                 history_size: int = TTS_USAGE_HISTORY_SIZE, max_sessions: int = TTS_USAGE_MAX_SESSIONS):
         self.storage_path = storage_path
-        self.usage_history: List[TTSUsage] = []
+        self.usage_history: Deque[TTSUsage] = deque(maxlen=history_size)
         self.cost_per_character = 0.00003  # Approximate ElevenLabs cost per character
         self.daily_budget = 1.0  # $1 per day budget
+        self.max_sessions = max_sessions
+        
+        # Running totals: "YYYY-mm-dd" -> totals, session_id -> totals
+        self.daily_totals: Dict[str, Dict] = {}
+        self.session_totals: "OrderedDict[str, Dict]" = OrderedDict()
+        
+        # Held for appends and while a compaction swaps the log file
+        self._log_lock = threading.Lock()
         
         # Ensure logs directory exists
-        os.makedirs(os.path.dirname(storage_path), exist_ok=True)
+        os.makedirs(os.path.dirname(storage_path) or ".", exist_ok=True)
         
         # Load existing usage
         self._load_usage_history()
@@ -50,48 +68,57 @@ class TTSCostTracker:
             content_preview=text[:50] + "..." if len(text) > 50 else text
         )
         
-        self.usage_history.append(usage)
-        self._save_usage_history()
+        self._apply(usage)
+        self._append_usage(usage)
         
         return usage
     
+    @staticmethod
+    def _day_key(date: datetime) -> str:
+        return date.strftime("%Y-%m-%d")
+    
+    @staticmethod
+    def _add_to(totals: Dict, usage: TTSUsage):
+        totals["characters"] += usage.character_count
+        totals["cost"] += usage.estimated_cost
+        totals["count"] += 1
+    
+    def _apply(self, usage: TTSUsage):
+        """Add one usage entry to the running totals and the recent history"""
+        day = self.daily_totals.setdefault(self._day_key(usage.timestamp), {"characters": 0, "cost": 0.0, "count": 0})
+        self._add_to(day, usage)
+        
+        session = self.session_totals.get(usage.session_id)
+        if session is None:
+            session = self.session_totals[usage.session_id] = {"characters": 0, "cost": 0.0, "count": 0}
+            if len(self.session_totals) > self.max_sessions:
+                self.session_totals.popitem(last=False)
+        else:
+            self.session_totals.move_to_end(usage.session_id)
+        self._add_to(session, usage)
+        
+        self.usage_history.append(usage)
+    
     def get_daily_usage(self, date: Optional[datetime] = None) -> Dict:
         """Get usage statistics for a specific day"""
         if date is None:
             date = datetime.now()
         
-        start_of_day = date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = start_of_day + timedelta(days=1)
-        
-        daily_usage = [
-            usage for usage in self.usage_history
-            if start_of_day <= usage.timestamp < end_of_day
-        ]
-        
-        total_characters = sum(usage.character_count for usage in daily_usage)
-        total_cost = sum(usage.estimated_cost for usage in daily_usage)
+        totals = self.daily_totals.get(self._day_key(date), {"characters": 0, "cost": 0.0, "count": 0})
+        total_cost = totals["cost"]
         
         return {
             "date": date.strftime("%Y-%m-%d"),
-            "total_characters": total_characters,
+            "total_characters": totals["characters"],
             "total_cost": total_cost,
-            "usage_count": len(daily_usage),
+            "usage_count": totals["count"],
             "budget_remaining": max(0, self.daily_budget - total_cost),
             "budget_percentage": min(100, (total_cost / self.daily_budget) * 100)
         }
     
     def get_weekly_usage(self) -> Dict:
-        """Get usage statistics for the past week"""
+        """Get usage statistics for the past week (today and the six days before)"""
         now = datetime.now()
-        week_ago = now - timedelta(days=7)
-        
-        weekly_usage = [
-            usage for usage in self.usage_history
-            if usage.timestamp >= week_ago
-        ]
-        
-        total_characters = sum(usage.character_count for usage in weekly_usage)
-        total_cost = sum(usage.estimated_cost for usage in weekly_usage)
         
         # Daily breakdown
         daily_breakdown = []
@@ -102,12 +129,22 @@ class TTSCostTracker:
         
         return {
             "period": "last_7_days",
-            "total_characters": total_characters,
-            "total_cost": total_cost,
-            "usage_count": len(weekly_usage),
+            "total_characters": sum(day["total_characters"] for day in daily_breakdown),
+            "total_cost": sum(day["total_cost"] for day in daily_breakdown),
+            "usage_count": sum(day["usage_count"] for day in daily_breakdown),
             "daily_breakdown": daily_breakdown
         }
     
+    def get_session_usage(self, session_id: str) -> Dict:
+        """Get usage statistics for one session"""
+        totals = self.session_totals.get(session_id, {"characters": 0, "cost": 0.0, "count": 0})
+        return {
+            "session_id": session_id,
+            "total_characters": totals["characters"],
+            "total_cost": totals["cost"],
+            "usage_count": totals["count"]
+        }
+    
     def should_limit_tts(self) -> Dict:
         """Check if TTS should be limited due to budget concerns"""
         today = self.get_daily_usage()
@@ -141,7 +178,7 @@ class TTSCostTracker:
         if not self.usage_history:
             return {"message": "No usage data available"}
         
-        recent_usage = self.usage_history[-50:]  # Last 50 uses
+        recent_usage = list(self.usage_history)[-50:]  # Last 50 uses
         
         char_counts = [usage.character_count for usage in recent_usage]
         avg_chars = sum(char_counts) / len(char_counts)
@@ -178,57 +215,125 @@ class TTSCostTracker:
             return "POOR - Consider shorter responses"
     
     def cleanup_old_usage(self, days_to_keep: int = 30):
-        """Clean up old usage data"""
-        cutoff_date = datetime.now() - timedelta(days=days_to_keep)
-        
-        original_count = len(self.usage_history)
-        self.usage_history = [
-            usage for usage in self.usage_history
-            if usage.timestamp >= cutoff_date
-        ]
+        """Clean up old usage data: compact the log and drop old daily totals"""
+        result = self.compact_log(days_to_keep)
+        self.prune_totals(days_to_keep)
+        return result
+    
+    def compact_log(self, days_to_keep: int = 30) -> Dict:
+        """
+        Rewrite the usage log without entries older than days_to_keep. Safe to run in a
+        worker thread while usage is tracked: only the complete entries present when it
+        starts are filtered, and whatever was appended since is copied over verbatim under
+        the log lock before the new file replaces the old one.
+        """
+        cutoff_day = self._day_key(datetime.now() - timedelta(days=days_to_keep))
         
-        removed_count = original_count - len(self.usage_history)
-        self._save_usage_history()
+        kept = 0
+        removed_count = 0
+        tmp_path = self.storage_path + ".tmp"
+        try:
+            with open(self.storage_path, 'rb') as source, open(tmp_path, 'wb') as target:
+                with self._log_lock:
+                    # Appends happen under the lock, so everything before this offset is whole lines
+                    end = source.seek(0, os.SEEK_END)
+                source.seek(0)
+                while source.tell() < end:
+                    line = source.readline(end - source.tell())
+                    usage = self._parse_line(line.decode("utf-8", errors="replace"))
+                    if usage is None:
+                        continue
+                    if self._day_key(usage.timestamp) >= cutoff_day:
+                        target.write(line if line.endswith(b"\n") else line + b"\n")
+                        kept += 1
+                    else:
+                        removed_count += 1
+                with self._log_lock:
+                    # Entries tracked since the read started are new; keep them all
+                    source.seek(end)
+                    appended = source.read()
+                    target.write(appended)
+                    kept += appended.count(b"\n")
+                    target.close()
+                    os.replace(tmp_path, self.storage_path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error compacting TTS usage log: {e}")
         
         return {
             "removed_entries": removed_count,
-            "remaining_entries": len(self.usage_history),
+            "remaining_entries": kept,
             "days_kept": days_to_keep
         }
     
+    def prune_totals(self, days_to_keep: int = 30):
+        """Drop in-memory totals and history older than days_to_keep (call from the tracking thread)"""
+        cutoff_day = self._day_key(datetime.now() - timedelta(days=days_to_keep))
+        for day in [day for day in self.daily_totals if day < cutoff_day]:
+            del self.daily_totals[day]
+        cutoff_date = datetime.now() - timedelta(days=days_to_keep)
+        self.usage_history = deque(
+            (usage for usage in self.usage_history if usage.timestamp >= cutoff_date),
+            maxlen=self.usage_history.maxlen
+        )
+    
+    @staticmethod
+    def _parse_line(line: str) -> Optional[TTSUsage]:
+        """One log line as a TTSUsage; None for blank or torn lines"""
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            item = json.loads(line)
+            return TTSUsage(
+                timestamp=datetime.fromisoformat(item['timestamp']),
+                character_count=item['character_count'],
+                estimated_cost=item['estimated_cost'],
+                session_id=item['session_id'],
+                content_preview=item.get('content_preview', '')
+            )
+        except (ValueError, KeyError, TypeError):
+            return None
+    
     def _load_usage_history(self):
-        """Load usage history from storage"""
+        """Rebuild running totals and recent history from the usage log"""
+        self._migrate_legacy_history()
         try:
             if os.path.exists(self.storage_path):
                 with open(self.storage_path, 'r') as f:
-                    data = json.load(f)
-                    self.usage_history = [
-                        TTSUsage(
-                            timestamp=datetime.fromisoformat(item['timestamp']),
-                            character_count=item['character_count'],
-                            estimated_cost=item['estimated_cost'],
-                            session_id=item['session_id'],
-                            content_preview=item.get('content_preview', '')
-                        )
-                        for item in data
-                    ]
+                    for line in f:
+                        usage = self._parse_line(line)
+                        if usage is not None:
+                            self._apply(usage)
         except Exception as e:
             print(f"Error loading TTS usage history: {e}")
-            self.usage_history = []
     
-    def _save_usage_history(self):
-        """Save usage history to storage"""
+    def _migrate_legacy_history(self):
+        """Convert the old whole-file JSON history (tts_usage.json) into the append-only log"""
+        legacy_path = os.path.splitext(self.storage_path)[0] + ".json"
+        if legacy_path == self.storage_path or not os.path.exists(legacy_path) or os.path.exists(self.storage_path):
+            return
         try:
-            data = []
-            for usage in self.usage_history:
-                usage_dict = asdict(usage)
-                usage_dict['timestamp'] = usage.timestamp.isoformat()
-                data.append(usage_dict)
-            
+            with open(legacy_path, 'r') as f:
+                data = json.load(f)
             with open(self.storage_path, 'w') as f:
-                json.dump(data, f, indent=2)
+                for item in data:
+                    f.write(json.dumps(item) + "\n")
+            os.replace(legacy_path, legacy_path + ".migrated")
+            print(f"Migrated {len(data)} TTS usage entries to {self.storage_path}")
+        except Exception as e:
+            print(f"Error migrating TTS usage history: {e}")
+    
+    def _append_usage(self, usage: TTSUsage):
+        """Append one usage entry to the log"""
+        try:
+            usage_dict = asdict(usage)
+            usage_dict['timestamp'] = usage.timestamp.isoformat()
+            with self._log_lock, open(self.storage_path, 'a') as f:
+                f.write(json.dumps(usage_dict) + "\n")
         except Exception as e:
-            print(f"Error saving TTS usage history: {e}")
+            print(f"Error saving TTS usage: {e}")
     
     def get_cost_summary(self) -> Dict:
         """Get comprehensive cost summary"""
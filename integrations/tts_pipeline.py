@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+TTS Pipeline - Speaks a streaming LLM response sentence by sentence
+Text is split into sentences as it arrives; each sentence is synthesized with bounded
+concurrency and its audio is emitted strictly in order, so playback starts after the
+first sentence instead of after the whole response
+"""
+
+import os
+import re
+import time
+import asyncio
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, List, Optional
+
+# How many sentences may be synthesized at once
+TTS_PIPELINE_CONCURRENCY = int(os.getenv("TTS_PIPELINE_CONCURRENCY", "2"))
+# Sentences shorter than this are merged with the next one (fewer, more natural requests)
+TTS_MIN_SENTENCE_CHARS = int(os.getenv("TTS_MIN_SENTENCE_CHARS", "20"))
+# Text without a sentence end is split at a clause boundary once it grows this long
+TTS_MAX_SENTENCE_CHARS = int(os.getenv("TTS_MAX_SENTENCE_CHARS", "200"))
+
+_SENTENCE_END_RE = re.compile(r'[.!?…]+["\')\]]*\s+|\n+')
+_CLAUSE_END_RE = re.compile(r'[,;:—]\s+')
+_ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "st.", "vs.", "etc.", "e.g.", "i.e.", "approx."}
+
+
+class SentenceChunker:
+    """Incrementally splits streamed text into sentences (or clauses, for long runs)"""
+
+    def __init__(self, min_chars: int = TTS_MIN_SENTENCE_CHARS, max_chars: int = TTS_MAX_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text; returns the sentences it completed"""
+        self.buffer += text
+        sentences = []
+        search_from = 0
+        while True:
+            match = _SENTENCE_END_RE.search(self.buffer, search_from)
+            if not match:
+                break
+            candidate = self.buffer[:match.end()].strip()
+            last_word = candidate.rsplit(None, 1)[-1].lower() if candidate else ""
+            if len(candidate) < self.min_chars or last_word in _ABBREVIATIONS:
+                search_from = match.end()
+                continue
+            sentences.append(candidate)
+            self.buffer = self.buffer[match.end():]
+            search_from = 0
+
+        # A long run without a sentence end: cut at the last clause boundary, else the last space
+        while len(self.buffer) > self.max_chars:
+            cut = None
+            for match in _CLAUSE_END_RE.finditer(self.buffer, 0, self.max_chars):
+                cut = match.end()
+            if cut is None:
+                cut = self.buffer.rfind(" ", 0, self.max_chars) + 1 or self.max_chars
+            sentences.append(self.buffer[:cut].strip())
+            self.buffer = self.buffer[cut:]
+        return [sentence for sentence in sentences if sentence]
+
+    def flush(self) -> Optional[str]:
+        """Whatever text is left once the stream has ended"""
+        rest, self.buffer = self.buffer.strip(), ""
+        return rest or None
+
+
+@dataclass
+class AudioChunk:
+    """One piece of synthesized audio, in playback order"""
+    sequence: int
+    sentence_index: int
+    data: bytes
+    is_sentence_end: bool
+
+
+class SentenceTTSPipeline:
+    """Synthesizes submitted sentences concurrently and yields their audio in order"""
+
+    def __init__(self, tts: Any, voice_id: Optional[str] = None,
+                 max_concurrency: int = TTS_PIPELINE_CONCURRENCY, audio_format: str = "mp3"):
+        self.tts = tts
+        self.voice_id = voice_id
+        self.audio_format = audio_format
+        self.started = time.perf_counter()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._segments: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._closed = False
+
+        # Per-turn metrics
+        self.sentences = 0
+        self.characters = 0
+        self.sentences_done = 0   # Sentences whose audio has been fully yielded
+        self.characters_done = 0
+        self.audio_bytes = 0
+        self.errors = 0
+        self.time_to_first_audio_ms: Optional[float] = None
+
+    def submit(self, text: str):
+        """Queue a sentence for synthesis; its audio follows every earlier sentence's"""
+        if self._closed:
+            raise RuntimeError("Pipeline is closed")
+        audio: asyncio.Queue = asyncio.Queue()
+        self._tasks.append(asyncio.create_task(self._synthesize(text, audio)))
+        self._segments.put_nowait((self.sentences, text, audio))
+        self.sentences += 1
+        self.characters += len(text)
+
+    def close(self):
+        """No more sentences will be submitted"""
+        if not self._closed:
+            self._closed = True
+            self._segments.put_nowait(None)
+
+    async def _synthesize(self, text: str, audio: asyncio.Queue):
+        async with self._semaphore:
+            try:
+                if hasattr(self.tts, "text_to_speech_stream"):
+                    async for chunk in self.tts.text_to_speech_stream(text, voice_id=self.voice_id):
+                        audio.put_nowait(chunk)
+                else:
+                    audio.put_nowait(await self.tts.text_to_speech(text, voice_id=self.voice_id))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                audio.put_nowait(e)
+            finally:
+                audio.put_nowait(None)
+
+    async def chunks(self) -> AsyncGenerator[AudioChunk, None]:
+        """Audio chunks in sentence order, each sentence's chunks as soon as they arrive"""
+        sequence = 0
+        while True:
+            segment = await self._segments.get()
+            if segment is None:
+                return
+            sentence_index, text, audio = segment
+            while True:
+                item = await audio.get()
+                if isinstance(item, Exception):
+                    self.errors += 1
+                    print(f"Error synthesizing sentence {sentence_index}: {item}")
+                    continue
+                if item is None:
+                    break
+                yield self._chunk(sequence, sentence_index, item, False)
+                sequence += 1
+            self.sentences_done += 1
+            self.characters_done += len(text)
+            # Empty marker closing the sentence, so clients can play it as one unit
+            yield self._chunk(sequence, sentence_index, b"", True)
+            sequence += 1
+
+    def _chunk(self, sequence: int, sentence_index: int, data: bytes, is_sentence_end: bool) -> AudioChunk:
+        if self.time_to_first_audio_ms is None and data:
+            self.time_to_first_audio_ms = (time.perf_counter() - self.started) * 1000
+        self.audio_bytes += len(data)
+        return AudioChunk(sequence, sentence_index, data, is_sentence_end)
+
+    @property
+    def in_flight(self) -> int:
+        """Sentences being synthesized or waiting for a synthesis slot"""
+        return sum(1 for task in self._tasks if not task.done())
+
+    async def cancel(self):
+        """Stop all synthesis in flight (e.g. the client went away or the user barged in)"""
+        self.close()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def get_metrics(self):
+        return {
+            "sentences": self.sentences,
+            "characters": self.characters,
+            "sentences_done": self.sentences_done,
+            "audio_bytes": self.audio_bytes,
+            "errors": self.errors,
+            "time_to_first_audio_ms": round(self.time_to_first_audio_ms, 1) if self.time_to_first_audio_ms else None,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1)
+        }
+
+
+class AudioStreamBuffer:
+    """Audio of one response, readable by any number of clients while it is still being produced"""
+
+    def __init__(self, audio_format: str = "mp3"):
+        self.audio_format = audio_format
+        self.chunks: List[bytes] = []
+        self.done = False
+        self.finished_at: Optional[float] = None
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def append(self, data: bytes):
+        if data and not self.done:
+            self.chunks.append(data)
+            self._notify()
+
+    def finish(self):
+        if not self.done:
+            self.done = True
+            self.finished_at = time.time()
+            self._notify()
+
+    async def iter_chunks(self) -> AsyncGenerator[bytes, None]:
+        """Every chunk from the start, then new ones as they arrive, until the stream finishes"""
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                return
+            await self._changed.wait()
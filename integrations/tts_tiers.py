@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+TTS Tiers - Picks local (offline, free) or ElevenLabs synthesis per utterance
+Short and low-priority utterances, and everything once the daily budget is nearly spent,
+go to the local tier; the rest go to ElevenLabs. Latency is recorded per tier.
+"""
+
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, AsyncIterator, Deque, Dict, Optional
+
+# Utterances up to this many characters are spoken locally
+LOCAL_TTS_MAX_CHARS = int(os.getenv("LOCAL_TTS_MAX_CHARS", "40"))
+# Use the local tier once this fraction of the daily ElevenLabs budget is spent
+LOCAL_TTS_BUDGET_THRESHOLD = float(os.getenv("LOCAL_TTS_BUDGET_THRESHOLD", "0.8"))
+# Latency samples kept per tier
+TTS_TIER_LATENCY_SAMPLES = 200
+
+LOCAL_TIER = "local"
+ELEVENLABS_TIER = "elevenlabs"
+
+
+@dataclass
+class TTSChoice:
+    """The backend chosen for one utterance"""
+    tier: str
+    backend: Any
+    audio_format: str
+    reason: str
+
+
+class TierLatency:
+    """Time to first audio and total synthesis time of recent utterances on one tier"""
+
+    def __init__(self, samples: int = TTS_TIER_LATENCY_SAMPLES):
+        self.first_audio_ms: Deque[float] = deque(maxlen=samples)
+        self.total_ms: Deque[float] = deque(maxlen=samples)
+        self.utterances = 0
+        self.errors = 0
+
+    def record(self, first_audio_ms: Optional[float], total_ms: float):
+        self.utterances += 1
+        if first_audio_ms is not None:
+            self.first_audio_ms.append(first_audio_ms)
+        self.total_ms.append(total_ms)
+
+    @staticmethod
+    def _percentiles(values) -> Dict[str, Optional[float]]:
+        if not values:
+            return {"p50": None, "p95": None}
+        ordered = sorted(values)
+        return {
+            "p50": round(ordered[len(ordered) // 2], 1),
+            "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "utterances": self.utterances,
+            "errors": self.errors,
+            "time_to_first_audio_ms": self._percentiles(self.first_audio_ms),
+            "total_ms": self._percentiles(self.total_ms)
+        }
+
+
+class TTSTierRouter:
+    """Chooses between the local and ElevenLabs TTS backends"""
+
+    def __init__(self, elevenlabs_tts=None, local_tts=None, cost_tracker=None,
+                 max_local_chars: int = LOCAL_TTS_MAX_CHARS,
+                 budget_threshold: float = LOCAL_TTS_BUDGET_THRESHOLD):
+        self.elevenlabs_tts = elevenlabs_tts
+        self.local_tts = local_tts
+        self.cost_tracker = cost_tracker
+        self.max_local_chars = max_local_chars
+        self.budget_threshold = budget_threshold
+        self.latency = {LOCAL_TIER: TierLatency(), ELEVENLABS_TIER: TierLatency()}
+        self.choices = {LOCAL_TIER: 0, ELEVENLABS_TIER: 0}
+
+    def _budget_used(self) -> float:
+        if not self.cost_tracker:
+            return 0.0
+        return self.cost_tracker.should_limit_tts()["budget_used_percentage"] / 100
+
+    def select(self, text: Optional[str] = None, priority: str = "normal") -> Optional[TTSChoice]:
+        """
+        Pick a tier for an utterance. text may be None when it isn't known yet
+        (a streamed response); then only priority and budget decide.
+        """
+        if not self.elevenlabs_tts and not self.local_tts:
+            return None
+        if not self.local_tts:
+            tier, reason = ELEVENLABS_TIER, "local tier unavailable"
+        elif not self.elevenlabs_tts:
+            tier, reason = LOCAL_TIER, "elevenlabs unavailable"
+        elif text is not None and self.elevenlabs_tts.is_cached(text):
+            tier, reason = ELEVENLABS_TIER, "cached"
+        elif priority == "low":
+            tier, reason = LOCAL_TIER, "low priority"
+        elif self._budget_used() >= self.budget_threshold:
+            tier, reason = LOCAL_TIER, "budget"
+        elif text is not None and len(text.strip()) <= self.max_local_chars:
+            tier, reason = LOCAL_TIER, "short utterance"
+        else:
+            tier, reason = ELEVENLABS_TIER, "default"
+
+        self.choices[tier] += 1
+        if tier == LOCAL_TIER:
+            return TTSChoice(tier, self.local_tts, self.local_tts.audio_format, reason)
+        return TTSChoice(tier, self.elevenlabs_tts, "mp3", reason)
+
+    def record(self, tier: str, first_audio_ms: Optional[float], total_ms: float):
+        self.latency[tier].record(first_audio_ms, total_ms)
+
+    async def timed(self, tier: str, chunks: AsyncIterator[bytes]) -> AsyncGenerator[bytes, None]:
+        """Pass audio through, recording the tier's time to first audio and total time"""
+        started = time.perf_counter()
+        first_audio_ms = None
+        try:
+            async for chunk in chunks:
+                if first_audio_ms is None and chunk:
+                    first_audio_ms = (time.perf_counter() - started) * 1000
+                yield chunk
+        except Exception:
+            self.latency[tier].errors += 1
+            raise
+        self.record(tier, first_audio_ms, (time.perf_counter() - started) * 1000)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "tiers": {
+                LOCAL_TIER: {
+                    "available": self.local_tts is not None,
+                    "choices": self.choices[LOCAL_TIER],
+                    **self.latency[LOCAL_TIER].get_stats(),
+                    **({"backend": self.local_tts.get_stats()} if self.local_tts else {})
+                },
+                ELEVENLABS_TIER: {
+                    "available": self.elevenlabs_tts is not None,
+                    "choices": self.choices[ELEVENLABS_TIER],
+                    **self.latency[ELEVENLABS_TIER].get_stats()
+                }
+            },
+            "policy": {
+                "max_local_chars": self.max_local_chars,
+                "budget_threshold": self.budget_threshold
+            }
+        }
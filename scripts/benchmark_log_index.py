@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Log Index Benchmark - Query latency of the SQLite/FTS5 log index at scale
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.log_index import LogIndex
+
+WORDS = ["calendar", "spotify", "email", "weather", "meeting", "playlist", "invoice", "reminder",
+         "jazz", "report", "flight", "dinner", "contract", "birthday", "gym", "budget"] + \
+        [f"word{i}" for i in range(2000)]
+TOOLS = ["calendar", "spotify", "email", "web_search", "image_generation", None]
+TYPES = ["user_request", "eva_response", "tool_call", "performance", "error"]
+
+
+def synthetic_entry(i: int, start: datetime, step: timedelta) -> dict:
+    log_type = random.choice(TYPES)
+    entry = {
+        "timestamp": (start + step * i).isoformat(),
+        "session_id": f"session_{random.randrange(5000)}",
+        "type": log_type,
+        "message": " ".join(random.choices(WORDS, k=20))
+    }
+    if log_type == "tool_call":
+        entry["tool"] = random.choice(TOOLS[:-1])
+    if log_type == "error":
+        entry["error_type"] = random.choice(["TimeoutError", "ValueError", "HTTPStatusError"])
+    return entry
+
+
+def timed(label: str, func, repeat: int = 20):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"{label:<40} p50 {timings[len(timings) // 2]:8.2f}ms  max {timings[-1]:8.2f}ms  "
+          f"({len(result['results'])} results)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark log index query latency")
+    parser.add_argument("--records", type=int, default=1_000_000, help="Number of synthetic log entries")
+    parser.add_argument("--days", type=int, default=30, help="Days of history the entries span")
+    args = parser.parse_args()
+
+    random.seed(42)
+    index = LogIndex(os.path.join(tempfile.mkdtemp(prefix="eva_log_index_"), "log_index.db"))
+    start = datetime.now() - timedelta(days=args.days)
+    step = timedelta(days=args.days) / args.records
+
+    print(f"📥 Indexing {args.records:,} entries spanning {args.days} days...")
+    load_start = time.perf_counter()
+    for i in range(args.records):
+        index.add(synthetic_entry(i, start, step))
+        if i % 10_000 == 0:
+            index.commit()
+    index.commit()
+    load_seconds = time.perf_counter() - load_start
+    print(f"   {args.records / load_seconds:,.0f} entries/s, "
+          f"{os.path.getsize(index.db_path) / 1_000_000:.0f} MB on disk")
+
+    print("=" * 60)
+    yesterday = datetime.now() - timedelta(days=1)
+    timed("full-text 'jazz playlist'", lambda: index.query(text="jazz playlist", limit=100))
+    timed("session filter", lambda: index.query(session_id="session_42", limit=500))
+    timed("type=error, last 24h", lambda: index.query(log_type="error", start=yesterday, limit=100))
+    timed("tool=spotify + full-text 'gym'", lambda: index.query(text="gym", tool="spotify", limit=100))
+    page = index.query(log_type="tool_call", limit=100)
+    for _ in range(50):
+        page = index.query(log_type="tool_call", limit=100, cursor=page["next_cursor"])
+    timed("page 51 of type=tool_call", lambda: index.query(log_type="tool_call", limit=100, cursor=page["next_cursor"]))
+    start_count = time.perf_counter()
+    counts = index.count_by("error_type", start=yesterday, log_types=["error"])
+    print(f"{'error counts by type, last 24h':<40} {(time.perf_counter() - start_count) * 1000:8.2f}ms  {counts}")
+
+
+if __name__ == "__main__":
+    main()
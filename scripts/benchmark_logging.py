@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Logging Benchmark - Measure event-loop blocking time per turn, direct vs queued logging
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import logging
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.eva_logger import EvaLogger
+from integrations.openai_logger import OpenAILogger
+from integrations.queued_logging import stop_all_listeners, get_queue_stats, BatchingFileHandler
+
+
+def simulate_disk_latency(latency_ms: float):
+    """Make every file flush stall, like a write to a network-backed volume"""
+    original_flush = logging.FileHandler.flush
+
+    def slow_flush(self):
+        original_flush(self)
+        time.sleep(latency_ms / 1000)
+
+    logging.FileHandler.flush = slow_flush
+    BatchingFileHandler.flush = slow_flush
+
+
+def simulate_turn(eva_logger: EvaLogger, openai_logger: OpenAILogger, turn: int, payload: dict):
+    """The log calls made by one tool-using chat turn in get_agent_response"""
+    session_id = f"bench_{turn % 20}"
+    eva_logger.log_request(session_id, "What's on my calendar tomorrow?", {"context": "work"})
+    request_id = openai_logger.log_request_start("POST", "https://api.openai.com/v1/chat/completions", payload)
+    openai_logger.log_request_end(request_id, {"model": "gpt-4o", "usage": {"prompt_tokens": 900, "completion_tokens": 80}}, 0.8, 200)
+    for tool in range(3):
+        eva_logger.log_tool_call(session_id, "calendar", "list_events", {"day": "tomorrow"}, "3 events found")
+    eva_logger.log_response(session_id, "You have three meetings tomorrow.", {"duration_ms": 900})
+    eva_logger.log_performance(session_id, "full_response", 900.0, {"tool_calls": 3})
+
+
+async def run(queued: bool, turns: int) -> dict:
+    log_dir = tempfile.mkdtemp(prefix="eva_log_bench_")
+    eva_logger = EvaLogger(log_dir=os.path.join(log_dir, "eva"), queued=queued)
+    openai_logger = OpenAILogger(log_dir=os.path.join(log_dir, "openai"), queued=queued)
+    payload = {
+        "model": "gpt-4o",
+        "messages": [{"role": "user", "content": "hello " * 400}] * 10,
+        "tools": [{"type": "function", "function": {"name": f"tool_{i}", "parameters": {}}} for i in range(20)]
+    }
+
+    blocked = []
+    for turn in range(turns):
+        start = time.perf_counter()
+        simulate_turn(eva_logger, openai_logger, turn, payload)
+        blocked.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.002)  # Turns are separated by network waits in production
+
+    stats = get_queue_stats()
+    stop_all_listeners()  # Include the final flush so nothing is left unwritten
+    blocked.sort()
+    return {
+        "mode": "queued" if queued else "direct",
+        "mean_ms": sum(blocked) / len(blocked),
+        "p50_ms": blocked[len(blocked) // 2],
+        "p99_ms": blocked[int(len(blocked) * 0.99)],
+        "dropped": sum(entry["dropped"] for entry in stats.values())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark event-loop blocking time of Eva's logging")
+    parser.add_argument("--turns", type=int, default=1000, help="Number of simulated turns")
+    parser.add_argument("--disk-latency-ms", type=float, default=0.0,
+                        help="Simulated stall per file flush (e.g. 2 for a network volume)")
+    args = parser.parse_args()
+
+    if args.disk_latency_ms:
+        simulate_disk_latency(args.disk_latency_ms)
+
+    print(f"📊 Event-loop blocking time per turn ({args.turns} turns, "
+          f"{args.disk_latency_ms}ms simulated disk latency)")
+    print("=" * 60)
+    for queued in (False, True):
+        result = asyncio.run(run(queued, args.turns))
+        print(f"{result['mode']:>7}: mean {result['mean_ms']:.3f}ms  p50 {result['p50_ms']:.3f}ms  "
+              f"p99 {result['p99_ms']:.3f}ms  dropped {result['dropped']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+STT Batching Benchmark - Throughput per core and added latency of batched local whisper
+Simulates N voice sessions finishing utterances at the same moment, for each max batch size
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.audio_decode import decode_audio
+from integrations.local_stt_handler import LocalSTTHandler, FASTER_WHISPER_AVAILABLE
+
+
+def load_utterances(paths, seconds: float):
+    if paths:
+        return [decode_audio(open(path, "rb").read()) for path in paths]
+    # Without fixtures: noisy voiced tones (the decoder still does a full pass per utterance)
+    t = np.arange(int(seconds * 16000)) / 16000
+    return [(0.3 * np.sin(2 * np.pi * (120 + 15 * i) * t) + 0.02 * np.random.randn(len(t))).astype(np.float32)
+            for i in range(8)]
+
+
+async def run(stt: LocalSTTHandler, utterances, sessions: int):
+    started = time.perf_counter()
+    results = await asyncio.gather(*[stt.transcribe(utterances[i % len(utterances)]) for i in range(sessions)])
+    return results, time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--sessions", type=int, default=16, help="Concurrent utterances per round")
+    parser.add_argument("--window-ms", type=int, default=20)
+    parser.add_argument("--batch-sizes", default="1,2,4,8")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Length of synthetic utterances")
+    parser.add_argument("audio", nargs="*", help="Audio files to use instead of synthetic utterances")
+    args = parser.parse_args()
+
+    if not FASTER_WHISPER_AVAILABLE:
+        print("faster-whisper not installed. Run: pip install faster-whisper")
+        return
+
+    utterances = load_utterances(args.audio, args.seconds)
+    audio_seconds = sum(len(utterances[i % len(utterances)]) for i in range(args.sessions)) / 16000
+    cores = os.cpu_count() or 1
+    print(f"🎤 {args.sessions} concurrent utterances ({audio_seconds:.1f}s of audio), model {args.model}, "
+          f"{args.workers} workers on {cores} cores\n")
+    print(f"{'max batch':>10} {'audio s/s/core':>15} {'p50 latency':>12} {'p95 latency':>12} {'p50 added':>10}")
+
+    baseline_p50 = None
+    for max_batch in [0] + [int(size) for size in args.batch_sizes.split(",")]:
+        stt = LocalSTTHandler(args.model, workers=args.workers, queue_size=args.sessions,
+                              batch_window_ms=args.window_ms if max_batch else 0, max_batch=max(1, max_batch))
+        if not stt.initialize():
+            return
+        await run(stt, utterances, args.workers)  # Warm up every worker's model
+        results, elapsed = await run(stt, utterances, args.sessions)
+        latencies = sorted(r.queue_ms + r.inference_ms for r in results)
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        baseline_p50 = baseline_p50 or p50
+        label = str(max_batch) if max_batch else "off"
+        print(f"{label:>10} {audio_seconds / elapsed / cores:>15.2f} {p50:>10.0f}ms {p95:>10.0f}ms "
+              f"{p50 - baseline_p50:>8.0f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
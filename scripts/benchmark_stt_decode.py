@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+STT Decode Benchmark - Temp-file round trip vs in-memory decoding for short utterances
+"""
+import io
+import os
+import sys
+import time
+import wave
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.audio_decode import decode_audio, pcm16_to_float32, AV_AVAILABLE
+
+
+def synthetic_utterance(seconds: float, sample_rate: int) -> bytes:
+    """A voiced-ish tone with noise, as 16-bit mono PCM"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = 0.3 * np.sin(2 * np.pi * 180 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t)) + 0.02 * np.random.randn(len(t))
+    return (np.clip(signal, -1, 1) * 32767).astype("<i2").tobytes()
+
+
+def to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def to_webm(pcm: bytes, sample_rate: int) -> bytes:
+    import av
+    buffer = io.BytesIO()
+    with av.open(buffer, mode="w", format="webm") as container:
+        stream = container.add_stream("libopus", rate=48000)
+        stream.layout = "mono"
+        frame = av.AudioFrame.from_ndarray(np.frombuffer(pcm, dtype="<i2").reshape(1, -1), format="s16", layout="mono")
+        frame.sample_rate = sample_rate
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buffer.getvalue()
+
+
+def temp_file_round_trip(data: bytes, suffix: str):
+    """The old path: write the upload to disk, then decode it from the path"""
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as temp_file:
+        temp_file.write(data)
+        temp_path = temp_file.name
+    try:
+        with open(temp_path, "rb") as f:
+            return decode_audio(f.read())
+    finally:
+        os.unlink(temp_path)
+
+
+def timed(label: str, func, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"{label:<34} p50 {timings[len(timings) // 2]:7.3f}ms  p95 {timings[int(len(timings) * 0.95)]:7.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--durations", default="0.5,1,2,5", help="Utterance lengths in seconds")
+    args = parser.parse_args()
+
+    for seconds in [float(d) for d in args.durations.split(",")]:
+        print(f"\n🎤 {seconds:g}s utterance")
+        pcm = synthetic_utterance(seconds, 16000)
+        wav = to_wav(pcm, 16000)
+        wav_44k = to_wav(synthetic_utterance(seconds, 44100), 44100)
+
+        timed("wav 16k via temp file", lambda: temp_file_round_trip(wav, ".wav"), args.repeat)
+        timed("wav 16k in memory", lambda: decode_audio(wav), args.repeat)
+        timed("wav 44.1k in memory (resampled)", lambda: decode_audio(wav_44k), args.repeat)
+        timed("raw PCM (no decoding)", lambda: pcm16_to_float32(pcm), args.repeat)
+        if AV_AVAILABLE:
+            webm = to_webm(pcm, 16000)
+            timed("webm/opus via temp file", lambda: temp_file_round_trip(webm, ".webm"), args.repeat)
+            timed("webm/opus in memory", lambda: decode_audio(webm), args.repeat)
+        else:
+            print("(PyAV not installed: skipping webm/opus)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+STT Model Benchmark - Real-time factor and word error rate of each whisper size x compute type
+Runs every model over a local fixture set: audio files (wav, webm, m4a, ...) each with a
+reference transcript next to it (same name, .txt). tests/fixtures/stt holds reference
+transcripts; --generate synthesizes the audio for those without any (ElevenLabs, needs
+ELEVENLABS_API_KEY), or add your own recordings next to them.
+"""
+import os
+import re
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.audio_decode import decode_audio, TARGET_SAMPLE_RATE
+from integrations.local_stt_handler import LocalSTTHandler, FASTER_WHISPER_AVAILABLE
+from integrations.stt_models import LOCAL_STT_MODELS, parse_model_name, estimate_memory_mb
+from integrations.elevenlabs_integration import ElevenLabsIntegration
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "fixtures", "stt")
+AUDIO_EXTENSIONS = (".wav", ".webm", ".ogg", ".m4a", ".mp3", ".flac")
+
+
+def normalize_words(text: str):
+    return re.sub(r"[^\w' ]", " ", (text or "").lower()).split()
+
+
+def word_errors(reference, hypothesis) -> int:
+    """Word-level edit distance (substitutions + deletions + insertions)"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1]
+
+
+def load_fixtures(directory: str):
+    """[(name, samples, reference words)] for each audio file with a .txt reference"""
+    fixtures = []
+    for filename in sorted(os.listdir(directory)):
+        base, extension = os.path.splitext(filename)
+        reference_path = os.path.join(directory, base + ".txt")
+        if extension.lower() not in AUDIO_EXTENSIONS or not os.path.exists(reference_path):
+            continue
+        with open(os.path.join(directory, filename), "rb") as f:
+            samples = decode_audio(f.read())
+        with open(reference_path) as f:
+            fixtures.append((filename, samples, normalize_words(f.read())))
+    return fixtures
+
+
+def generate_fixtures(directory: str) -> int:
+    """Synthesize audio (mp3) for reference transcripts that have none yet; returns how many"""
+    api_key = os.getenv("ELEVENLABS_API_KEY")
+    if not api_key:
+        print("ELEVENLABS_API_KEY not set: can't generate fixture audio")
+        return 0
+    tts = ElevenLabsIntegration(api_key=api_key)
+    tts.cache = None  # Fixtures are written to the fixture directory, not the TTS cache
+
+    generated = 0
+    for filename in sorted(os.listdir(directory)):
+        base, extension = os.path.splitext(filename)
+        has_audio = any(os.path.exists(os.path.join(directory, base + audio)) for audio in AUDIO_EXTENSIONS)
+        if extension != ".txt" or has_audio:
+            continue
+        with open(os.path.join(directory, filename)) as f:
+            text = f.read().strip()
+        try:
+            audio = asyncio.run(tts.text_to_speech(text))
+        except Exception as e:
+            print(f"Could not generate {base}.mp3: {e}")
+            continue
+        with open(os.path.join(directory, base + ".mp3"), "wb") as f:
+            f.write(audio)
+        generated += 1
+    print(f"Generated audio for {generated} fixtures in {directory}")
+    return generated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", default=",".join(LOCAL_STT_MODELS),
+                        help="Comma-separated size:compute_type combinations (default: LOCAL_STT_MODELS)")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Directory of audio files + .txt references")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--verbose", action="store_true", help="Print each transcript")
+    parser.add_argument("--generate", action="store_true",
+                        help="Synthesize missing fixture audio from the .txt references first")
+    args = parser.parse_args()
+
+    if args.generate and os.path.isdir(args.fixtures):
+        generate_fixtures(args.fixtures)
+
+    if not FASTER_WHISPER_AVAILABLE:
+        print("faster-whisper not installed. Run: pip install faster-whisper")
+        return
+    if not os.path.isdir(args.fixtures):
+        print(f"No fixtures at {args.fixtures}: add audio files with a same-named .txt reference transcript")
+        return
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"No audio files with .txt references in {args.fixtures} (run with --generate to synthesize them)")
+        return
+    audio_seconds = sum(len(samples) for _, samples, _ in fixtures) / TARGET_SAMPLE_RATE
+    reference_words = sum(len(words) for _, _, words in fixtures)
+    print(f"🎤 {len(fixtures)} fixtures, {audio_seconds:.1f}s of audio, {reference_words} reference words\n")
+    print(f"{'model':>20} {'~memory':>8} {'load':>7} {'RTF':>7} {'WER':>7}")
+
+    for name in [name.strip() for name in args.models.split(",") if name.strip()]:
+        size, compute_type = parse_model_name(name)
+        stt = LocalSTTHandler(size, compute_type, workers=1, batch_window_ms=0)
+        started = time.perf_counter()
+        if not stt.initialize():
+            print(f"{stt.name:>20}  failed to load")
+            continue
+        load_seconds = time.perf_counter() - started
+
+        stt.transcribe_audio(fixtures[0][1][:TARGET_SAMPLE_RATE], args.language)  # Warm-up pass
+        inference_seconds = 0.0
+        errors = 0
+        for filename, samples, reference in fixtures:
+            started = time.perf_counter()
+            text = stt.transcribe_audio(samples, args.language)
+            inference_seconds += time.perf_counter() - started
+            errors += word_errors(reference, normalize_words(text))
+            if args.verbose:
+                print(f"    {filename}: {text!r}")
+        stt.close()
+
+        rtf = inference_seconds / audio_seconds
+        wer = errors / max(1, reference_words)
+        print(f"{stt.name:>20} {estimate_memory_mb(stt.name):>6.0f}MB {load_seconds:>6.1f}s {rtf:>7.3f} {wer:>6.1%}")
+
+    print("\nRTF = inference time / audio duration (below 1 is faster than real time)")
+
+
+if __name__ == "__main__":
+    main()
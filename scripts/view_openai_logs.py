@@ -2,170 +2,355 @@
 """
 OpenAI Log Viewer - View and analyze OpenAI API logs
 """
+import os
+import sys
 import json
+import time
+import hashlib
 import argparse
+import threading
+from collections import deque
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Iterator, List, Optional, Dict, Any
 import re
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.log_rotation import LOG_RETENTION_DAYS, list_segments, open_segment
+
+COST_CHECKPOINT = Path("logs/openai/.cost_checkpoint.json")
+HEAD_SIGNATURE_BYTES = 256
+
+def display_line(line: str):
+    """Pretty-print one log line"""
+    line = line.strip()
+    if not line:
+        return
+        
+    # Parse and format JSON logs
+    if 'REQUEST START:' in line or 'REQUEST SUCCESS:' in line or 'REQUEST FAILED:' in line:
+        try:
+            # Extract JSON part
+            json_start = line.find('{')
+            if json_start != -1:
+                timestamp_part = line[:json_start].strip()
+                json_part = line[json_start:]
+                data = json.loads(json_part)
+                
+                if 'REQUEST START:' in line:
+                    print(f"🚀 {timestamp_part}")
+                    print(f"   Model: {data.get('model', 'unknown')}")
+                    print(f"   Est. Tokens: {data.get('estimated_input_tokens', 0)}")
+                    print(f"   Est. Cost: ${data.get('estimated_cost_usd', 0):.6f}")
+                    if data.get('has_tools'):
+                        print(f"   Tools: {data.get('tool_choice', 'auto')}")
+                
+                elif 'REQUEST SUCCESS:' in line:
+                    duration = data.get('duration_seconds', 0)
+                    total_tokens = data.get('total_tokens', 0)
+                    cost = data.get('actual_cost_usd', 0)
+                    cumulative_cost = data.get('cumulative_cost_usd', 0)
+                    
+                    print(f"✅ {timestamp_part}")
+                    print(f"   Duration: {duration}s")
+                    print(f"   Tokens: {total_tokens}")
+                    print(f"   Cost: ${cost:.6f}")
+                    print(f"   Total Cost: ${cumulative_cost:.4f}")
+                
+                elif 'REQUEST FAILED:' in line:
+                    print(f"❌ {timestamp_part}")
+                    print(f"   Status: {data.get('status_code', 'unknown')}")
+                    print(f"   Duration: {data.get('duration_seconds', 0)}s")
+                
+                print()
+            else:
+                print(line)
+        except json.JSONDecodeError:
+            print(line)
+    
+    elif 'STATS:' in line:
+        try:
+            json_start = line.find('{')
+            if json_start != -1:
+                timestamp_part = line[:json_start].strip()
+                json_part = line[json_start:]
+                data = json.loads(json_part)
+                
+                print(f"📊 {timestamp_part}")
+                print(f"   Requests: {data.get('total_requests', 0)}")
+                print(f"   Total Tokens: {data.get('total_tokens', 0):,}")
+                print(f"   Total Cost: ${data.get('total_cost_usd', 0):.4f}")
+                print(f"   Avg Tokens/Req: {data.get('avg_tokens_per_request', 0):.1f}")
+                print()
+        except json.JSONDecodeError:
+            print(line)
+    
+    else:
+        # Regular log line
+        if '❌' in line or 'ERROR' in line:
+            print(f"🚨 {line}")
+        elif '✅' in line:
+            print(f"✅ {line}")
+        else:
+            print(f"ℹ️  {line}")
+
+def _matches(line: str, filter_type: Optional[str], show_errors_only: bool) -> bool:
+    if show_errors_only and not ('ERROR' in line or '❌' in line):
+        return False
+    if filter_type and filter_type.upper() not in line:
+        return False
+    return True
+
+def read_lines_backwards(path: Path, block_size: int = 64 * 1024) -> Iterator[str]:
+    """Yield the lines of a plain file from last to first, reading fixed blocks from EOF"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            chunk = f.read(read_size) + remainder
+            lines = chunk.split(b"\n")
+            # The first piece may be a partial line; keep it for the next block
+            remainder = lines.pop(0)
+            for raw in reversed(lines):
+                if raw:
+                    yield raw.decode('utf-8', errors='replace')
+        if remainder:
+            yield remainder.decode('utf-8', errors='replace')
+
+def tail_lines(log_path: Path, count: int, filter_type: Optional[str] = None,
+               show_errors_only: bool = False) -> List[str]:
+    """Last `count` matching lines across rotated segments, reading only as far back as needed"""
+    collected: List[str] = []
+    for segment in reversed(list_segments(log_path)):
+        if segment.name.endswith('.gz'):
+            # Compressed segments can't be read backwards; stream them keeping only the tail
+            recent = deque(maxlen=count - len(collected))
+            with open_segment(segment) as f:
+                for line in f:
+                    if _matches(line, filter_type, show_errors_only):
+                        recent.append(line.rstrip('\n'))
+            collected.extend(reversed(recent))
+        else:
+            for line in read_lines_backwards(segment):
+                if _matches(line, filter_type, show_errors_only):
+                    collected.append(line)
+                    if len(collected) >= count:
+                        break
+        if len(collected) >= count:
+            break
+    return list(reversed(collected))
+
+def follow_log(log_path: Path, filter_type: Optional[str] = None, show_errors_only: bool = False,
+               poll_interval: float = 0.5, stop: Optional[threading.Event] = None):
+    """Print new lines as they are appended, reopening the file when it rotates (until Ctrl+C or stop)"""
+    f = None
+    inode = None
+    partial = ""
+    try:
+        while stop is None or not stop.is_set():
+            try:
+                stat = log_path.stat()
+            except FileNotFoundError:
+                stat = None
+
+            # Rotation replaces the active file: start reading the new one from the top
+            if stat is not None and (f is None or stat.st_ino != inode or stat.st_size < f.tell()):
+                if f is not None:
+                    partial += f.read()
+                    f.close()
+                f = open(log_path, 'r', encoding='utf-8', errors='replace')
+                if inode is None:
+                    f.seek(0, os.SEEK_END)
+                inode = stat.st_ino
+
+            if f is not None:
+                data = partial + f.read()
+                lines = data.split('\n')
+                partial = lines.pop()
+                for line in lines:
+                    if _matches(line, filter_type, show_errors_only):
+                        display_line(line)
+                sys.stdout.flush()
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if f is not None:
+            f.close()
+
 def view_logs(log_file: str, tail: int = 20, follow: bool = False, 
               filter_type: str = None, show_errors_only: bool = False):
     """View OpenAI logs with filtering options"""
     
     log_path = Path("logs/openai") / log_file
     
-    if not log_path.exists():
+    if not list_segments(log_path) and not follow:
         print(f"❌ Log file not found: {log_path}")
         return
     
-    print(f"📋 Viewing: {log_path}")
+    print(f"📋 Viewing: {log_path} (including rotated segments)")
     print("=" * 60)
     
-    # Read lines
+    # Read only the last N matching lines, newest segments first
     try:
-        with open(log_path, 'r') as f:
-            lines = f.readlines()
+        lines = tail_lines(log_path, tail, filter_type, show_errors_only) if tail > 0 else []
     except Exception as e:
         print(f"❌ Error reading log file: {e}")
         return
     
-    # Filter lines
-    if show_errors_only:
-        lines = [line for line in lines if 'ERROR' in line or '❌' in line]
+    for line in lines:
+        display_line(line)
     
-    if filter_type:
-        lines = [line for line in lines if filter_type.upper() in line]
+    if follow:
+        print("👀 Following new entries (Ctrl+C to stop)...")
+        follow_log(log_path, filter_type, show_errors_only)
+
+def _head_signature(segment: Path, length: int = HEAD_SIGNATURE_BYTES) -> str:
+    """Identify a segment by its first bytes; survives renaming and gzip on rotation"""
+    with open_segment(segment, 'rb') as f:
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+def _empty_checkpoint() -> Dict[str, Any]:
+    return {"processed_segments": [], "active_signature": None, "signature_bytes": HEAD_SIGNATURE_BYTES,
+            "offset": 0, "hours": {}}
+
+def _load_checkpoint() -> Dict[str, Any]:
+    try:
+        with open(COST_CHECKPOINT, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return _empty_checkpoint()
+
+def _save_checkpoint(checkpoint: Dict[str, Any]):
+    tmp = COST_CHECKPOINT.with_name(COST_CHECKPOINT.name + ".tmp")
+    with open(tmp, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, COST_CHECKPOINT)
+
+def _aggregate_line(line: bytes, hours: Dict[str, Any]):
+    """Fold one REQUEST SUCCESS line into the per-hour aggregates"""
+    if b'REQUEST SUCCESS:' not in line:
+        return
+    try:
+        text = line.decode('utf-8', errors='replace')
+        timestamp_match = re.search(r'(\d{4}-\d{2}-\d{2} \d{2}):\d{2}:\d{2}', text)
+        json_start = text.find('{')
+        if not timestamp_match or json_start == -1:
+            return
+        data = json.loads(text[json_start:])
+    except Exception:
+        return
+    
+    bucket = hours.setdefault(timestamp_match.group(1), {})
+    model = data.get('model', 'unknown')
+    stats = bucket.setdefault(model, {'requests': 0, 'tokens': 0, 'cost': 0.0})
+    stats['requests'] += 1
+    stats['tokens'] += data.get('total_tokens', 0)
+    stats['cost'] += data.get('actual_cost_usd', 0)
+
+def update_cost_checkpoint(log_path: Path, checkpoint: Dict[str, Any]) -> int:
+    """Process only bytes not seen by previous runs; returns the number of new bytes read"""
+    segments = list_segments(log_path)
+    processed = set(checkpoint["processed_segments"])
+    bytes_read = 0
     
-    # Get last N lines
-    if tail > 0:
-        lines = lines[-tail:]
+    # Rotated segments are keyed by content, not name: a segment is renamed on rotation and
+    # renamed again once it is gzipped in the background, possibly between two runs
+    signatures = {segment: _head_signature(segment) for segment in segments if segment != log_path}
     
-    # Display lines
-    for line in lines:
-        line = line.strip()
-        if not line:
+    for segment in segments:
+        is_active = segment == log_path
+        if not is_active and segment.name in processed:
+            # Checkpoints written before segments were keyed by content list names
+            processed.add(signatures[segment])
+        if not is_active and signatures[segment] in processed:
             continue
-            
-        # Parse and format JSON logs
-        if 'REQUEST START:' in line or 'REQUEST SUCCESS:' in line or 'REQUEST FAILED:' in line:
-            try:
-                # Extract JSON part
-                json_start = line.find('{')
-                if json_start != -1:
-                    timestamp_part = line[:json_start].strip()
-                    json_part = line[json_start:]
-                    data = json.loads(json_part)
-                    
-                    if 'REQUEST START:' in line:
-                        print(f"🚀 {timestamp_part}")
-                        print(f"   Model: {data.get('model', 'unknown')}")
-                        print(f"   Est. Tokens: {data.get('estimated_input_tokens', 0)}")
-                        print(f"   Est. Cost: ${data.get('estimated_cost_usd', 0):.6f}")
-                        if data.get('has_tools'):
-                            print(f"   Tools: {data.get('tool_choice', 'auto')}")
-                    
-                    elif 'REQUEST SUCCESS:' in line:
-                        duration = data.get('duration_seconds', 0)
-                        total_tokens = data.get('total_tokens', 0)
-                        cost = data.get('actual_cost_usd', 0)
-                        cumulative_cost = data.get('cumulative_cost_usd', 0)
-                        
-                        print(f"✅ {timestamp_part}")
-                        print(f"   Duration: {duration}s")
-                        print(f"   Tokens: {total_tokens}")
-                        print(f"   Cost: ${cost:.6f}")
-                        print(f"   Total Cost: ${cumulative_cost:.4f}")
-                    
-                    elif 'REQUEST FAILED:' in line:
-                        print(f"❌ {timestamp_part}")
-                        print(f"   Status: {data.get('status_code', 'unknown')}")
-                        print(f"   Duration: {data.get('duration_seconds', 0)}s")
-                    
-                    print()
-                else:
-                    print(line)
-            except json.JSONDecodeError:
-                print(line)
         
-        elif 'STATS:' in line:
-            try:
-                json_start = line.find('{')
-                if json_start != -1:
-                    timestamp_part = line[:json_start].strip()
-                    json_part = line[json_start:]
-                    data = json.loads(json_part)
-                    
-                    print(f"📊 {timestamp_part}")
-                    print(f"   Requests: {data.get('total_requests', 0)}")
-                    print(f"   Total Tokens: {data.get('total_tokens', 0):,}")
-                    print(f"   Total Cost: ${data.get('total_cost_usd', 0):.4f}")
-                    print(f"   Avg Tokens/Req: {data.get('avg_tokens_per_request', 0):.1f}")
-                    print()
-            except json.JSONDecodeError:
-                print(line)
+        # Compare only the prefix that was hashed: a file shorter than HEAD_SIGNATURE_BYTES
+        # keeps growing into it. The previously active file may since have been rotated.
+        signature_bytes = checkpoint.get("signature_bytes", HEAD_SIGNATURE_BYTES)
+        is_checkpointed = checkpoint["active_signature"] is not None \
+            and _head_signature(segment, signature_bytes) == checkpoint["active_signature"]
+        start = checkpoint["offset"] if is_checkpointed else 0
         
-        else:
-            # Regular log line
-            if '❌' in line or 'ERROR' in line:
-                print(f"🚨 {line}")
-            elif '✅' in line:
-                print(f"✅ {line}")
+        with open_segment(segment, 'rb') as f:
+            if segment.name.endswith('.gz'):
+                # No random access into gzip: decompress past what was already counted
+                remaining = start
+                while remaining:
+                    skipped = f.read(min(remaining, 1024 * 1024))
+                    if not skipped:
+                        break
+                    remaining -= len(skipped)
             else:
-                print(f"ℹ️  {line}")
+                f.seek(start)
+            offset = start
+            for line in f:
+                if is_active and not line.endswith(b'\n'):
+                    break  # Partial line still being written; pick it up next run
+                offset += len(line)
+                bytes_read += len(line)
+                _aggregate_line(line, checkpoint["hours"])
+        
+        if is_active:
+            checkpoint["signature_bytes"] = min(offset, HEAD_SIGNATURE_BYTES)
+            checkpoint["active_signature"] = _head_signature(segment, checkpoint["signature_bytes"])
+            checkpoint["offset"] = offset
+        else:
+            processed.add(signatures[segment])
+            if is_checkpointed:
+                checkpoint["active_signature"] = None
+                checkpoint["offset"] = 0
+    
+    # Forget segments that retention has deleted
+    existing = set(signatures.values())
+    checkpoint["processed_segments"] = sorted(processed & existing)
+    return bytes_read
 
-def analyze_costs(days: int = 1):
-    """Analyze costs over the last N days"""
+def analyze_costs(days: int = 1, reset: bool = False):
+    """Analyze costs over the last N days, incrementally from a persisted checkpoint"""
     log_path = Path("logs/openai/openai_api.log")
     
-    if not log_path.exists():
+    if not list_segments(log_path):
         print(f"❌ Log file not found: {log_path}")
         return
     
-    # Calculate cutoff date
-    cutoff_date = datetime.now() - timedelta(days=days)
+    checkpoint = _empty_checkpoint() if reset else _load_checkpoint()
+    
+    started = time.time()
+    bytes_read = update_cost_checkpoint(log_path, checkpoint)
+    # Hours older than the rotated logs themselves can never be asked for again
+    retention_cutoff = (datetime.now() - timedelta(days=LOG_RETENTION_DAYS)).strftime('%Y-%m-%d %H')
+    checkpoint["hours"] = {hour: models for hour, models in checkpoint["hours"].items() if hour >= retention_cutoff}
+    _save_checkpoint(checkpoint)
     
+    # Sum the hourly buckets inside the window
+    cutoff_hour = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H')
     total_requests = 0
     total_tokens = 0
     total_cost = 0.0
     model_stats = {}
-    
-    with open(log_path, 'r') as f:
-        for line in f:
-            if 'REQUEST SUCCESS:' in line:
-                try:
-                    # Extract timestamp
-                    timestamp_match = re.search(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})', line)
-                    if timestamp_match:
-                        timestamp_str = timestamp_match.group(1)
-                        timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-                        
-                        if timestamp > cutoff_date:
-                            # Parse JSON
-                            json_start = line.find('{')
-                            if json_start != -1:
-                                data = json.loads(line[json_start:])
-                                
-                                total_requests += 1
-                                tokens = data.get('total_tokens', 0)
-                                cost = data.get('actual_cost_usd', 0)
-                                
-                                total_tokens += tokens
-                                total_cost += cost
-                                
-                                # Track by model (would need to be in the log)
-                                model = data.get('model', 'unknown')
-                                if model not in model_stats:
-                                    model_stats[model] = {'requests': 0, 'tokens': 0, 'cost': 0.0}
-                                
-                                model_stats[model]['requests'] += 1
-                                model_stats[model]['tokens'] += tokens
-                                model_stats[model]['cost'] += cost
-                
-                except Exception:
-                    continue
+    for hour, models in checkpoint["hours"].items():
+        if hour < cutoff_hour:
+            continue
+        for model, stats in models.items():
+            total_requests += stats['requests']
+            total_tokens += stats['tokens']
+            total_cost += stats['cost']
+            if model not in model_stats:
+                model_stats[model] = {'requests': 0, 'tokens': 0, 'cost': 0.0}
+            model_stats[model]['requests'] += stats['requests']
+            model_stats[model]['tokens'] += stats['tokens']
+            model_stats[model]['cost'] += stats['cost']
     
     print(f"\n📊 Cost Analysis - Last {days} day(s)")
     print("=" * 50)
+    print(f"Processed {bytes_read:,} new bytes in {time.time() - started:.2f}s")
     print(f"Total Requests: {total_requests}")
     print(f"Total Tokens: {total_tokens:,}")
     print(f"Total Cost: ${total_cost:.4f}")
@@ -188,16 +373,19 @@ def main():
     parser.add_argument('--tail', type=int, default=20, help='Show last N lines')
     parser.add_argument('--errors', action='store_true', help='Show only errors')
     parser.add_argument('--filter', help='Filter lines containing text')
+    parser.add_argument('--follow', '-f', action='store_true', help='Keep printing new lines as they are written')
     parser.add_argument('--analyze', type=int, metavar='DAYS', help='Analyze costs for last N days')
+    parser.add_argument('--reset-checkpoint', action='store_true', help='Re-read all logs for --analyze')
     
     args = parser.parse_args()
     
     if args.analyze:
-        analyze_costs(args.analyze)
+        analyze_costs(args.analyze, reset=args.reset_checkpoint)
     else:
         view_logs(
             log_file=args.file,
             tail=args.tail,
+            follow=args.follow,
             show_errors_only=args.errors,
             filter_type=args.filter
         )
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Stand-ins for faster-whisper's WhisperModel and its results, shared by the local STT tests
+"""
+
+import time
+from typing import Callable, List, Optional, Union
+
+import numpy as np
+
+
+class FakeWord:
+    def __init__(self, start, end, word):
+        self.start, self.end, self.word = start, end, word
+
+
+class FakeSegment:
+    def __init__(self, text: str = "", words: Optional[List[FakeWord]] = None):
+        self.words = words or []
+        self.text = text or "".join(word.word for word in self.words)
+
+
+class FakeWhisperModel:
+    """
+    Stands in for WhisperModel: hear(audio) gives the segments (texts or FakeSegments), which
+    are decoded lazily with delay seconds of blocking work each, like the real generator.
+    Without hear, it hears "segment 0", "segment 1", ... up to segments.
+    """
+
+    def __init__(self, hear: Optional[Callable[[np.ndarray], List[Union[str, FakeSegment]]]] = None,
+                 segments: int = 1, delay: float = 0.0):
+        self.hear = hear or (lambda audio: [f"segment {i}" for i in range(segments)])
+        self.delay = delay
+        self.decoded = 0          # Segments decoded so far
+        self.window_seconds = []  # Length of each audio transcribed
+
+    def transcribe(self, audio, language="en", **kwargs):
+        self.window_seconds.append(len(audio) / 16000)
+        heard = self.hear(audio)
+
+        def decode():
+            for segment in heard:
+                time.sleep(self.delay)
+                self.decoded += 1
+                yield segment if isinstance(segment, FakeSegment) else FakeSegment(segment)
+        return decode(), None
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test the realtime AudioBuffer: pre-roll, utterance cap, fixed memory, and a soak run
+streaming audio through a voice session while watching RSS (half an hour of audio by
+default; pass --hours for a multi-hour soak)
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.websockets import WebSocketState
+from voice.realtime_voice import AudioBuffer, RealTimeVoiceManager
+
+RATE = 16000
+FRAME = 480  # 30ms
+
+
+def frame(level: int) -> bytes:
+    return np.full(FRAME, level, dtype=np.int16).tobytes()
+
+
+def rss_mb() -> float:
+    """Resident set size of this process"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class FakeWebSocket:
+    client_state = WebSocketState.CONNECTED
+
+    async def send_text(self, data):
+        pass
+
+
+class FakeSTT:
+    def __init__(self):
+        self.utterances = 0
+
+    async def speech_to_text(self, audio_data, sample_rate=None):
+        self.utterances += 1
+        return ""
+
+
+def conversation_audio(seconds: float) -> bytes:
+    """Alternating 3s of voiced sound and 2s of quiet, as one long PCM stream"""
+    t = np.arange(int(5 * RATE)) / RATE
+    voiced = 0.3 * np.sin(2 * np.pi * 130 * t[:3 * RATE]) * (1 + 0.3 * np.sin(2 * np.pi * 4 * t[:3 * RATE]))
+    for k in range(2, 20):
+        voiced += 0.3 / k * np.sin(2 * np.pi * 130 * k * t[:3 * RATE])
+    cycle = np.concatenate([voiced, np.zeros(2 * RATE)])
+    cycle = (cycle / np.abs(cycle).max() * 0.3 * 32767).astype(np.int16).tobytes()
+    return cycle * max(1, int(seconds // 5))
+
+
+async def test_audio_buffer(hours: float):
+    """Test the realtime AudioBuffer"""
+    print("🧺 Testing realtime AudioBuffer...")
+
+    # Test 1: The utterance starts with the pre-roll before the detected onset
+    print("\n1️⃣ Testing pre-roll...")
+    buffer = AudioBuffer(pre_roll_ms=300)
+    for i in range(20):
+        buffer.add_audio(frame(i), False)  # Quiet frames, the last 10 are the pre-roll
+    for _ in range(5):
+        buffer.add_audio(frame(100), True)
+    audio = buffer.get_speech_audio()
+    samples = np.frombuffer(audio, dtype=np.int16)
+    if len(samples) == 15 * FRAME and samples[0] == 10 and samples[-1] == 100:
+        print("✓ Utterance includes the 300ms (10 frames) before speech was detected")
+    else:
+        print(f"✗ Unexpected utterance: {len(samples) // FRAME} frames starting at level {samples[0]}")
+
+    # Test 2: Pre-roll doesn't reach back into the previous utterance
+    print("\n2️⃣ Testing pre-roll after an utterance...")
+    buffer.add_audio(frame(7), False)
+    buffer.add_audio(frame(100), True)
+    samples = np.frombuffer(buffer.get_speech_audio(), dtype=np.int16)
+    if len(samples) == 2 * FRAME and samples[0] == 7:
+        print("✓ Next utterance's pre-roll starts after the previous utterance")
+    else:
+        print(f"✗ Pre-roll overlapped the previous utterance ({len(samples) // FRAME} frames)")
+
+    # Test 3: Utterances are capped; the ring wraps without corrupting audio
+    print("\n3️⃣ Testing utterance cap...")
+    buffer = AudioBuffer(pre_roll_ms=300, max_utterance_seconds=3)
+    results = []
+    for i in range(300):  # 9s of continuous speech
+        done = buffer.add_audio(frame(i % 1000), True)
+        if done:
+            results.append(np.frombuffer(done, dtype=np.int16))
+    levels_ok = all(np.array_equal(r[::FRAME], (np.arange(r[0], r[0] + len(r) // FRAME)) % 1000) for r in results)
+    if len(results) == 3 and all(len(r) == 3 * RATE for r in results) and levels_ok \
+            and buffer.get_stats()["truncated"] == 3:
+        print(f"✓ 9s of speech ended as 3 capped utterances of 3s, frames in order across ring wrap-around")
+    else:
+        print(f"✗ Unexpected capped utterances: {[len(r) / RATE for r in results]}, in order: {levels_ok}")
+    print(f"  Memory per session: {buffer.memory_bytes / 1024:.0f}KB (3s cap), "
+          f"{AudioBuffer().memory_bytes / 1024:.0f}KB with defaults")
+
+    # Test 4: Soak: hours of streaming through a voice session keep RSS flat
+    print(f"\n4️⃣ Soak test: {hours:g}h of streamed audio through a voice session...")
+    stt = FakeSTT()
+    manager = RealTimeVoiceManager(stt, None)
+    await manager.connect_voice_session(FakeWebSocket(), "soak", "user", "general", "assistant")
+    session = manager.voice_sessions["soak"]
+    session["transcriber"] = None
+    block = conversation_audio(15 * 60)  # 15 minutes
+    chunk_bytes = 4096  # Browser-sized chunks, not frame aligned
+    rss = []
+    started = time.perf_counter()
+    for quarter in range(int(hours * 4)):
+        for i in range(0, len(block), chunk_bytes):
+            await manager.process_audio_chunk("soak", block[i:i + chunk_bytes])
+        rss.append(rss_mb())
+    elapsed = time.perf_counter() - started
+    growth = max(rss[1:] or rss) - rss[0]
+    streamed_mb = len(block) * len(rss) / 1024 / 1024
+    print("  RSS every 15 min of audio: " + ", ".join(f"{value:.1f}" for value in rss) + " MB")
+    if growth < 2 and stt.utterances >= len(rss) * 150:
+        print(f"✓ {stt.utterances} utterances, {streamed_mb:.0f}MB of PCM streamed in {elapsed:.0f}s; "
+              f"RSS grew {growth:.2f}MB after the first 15 min (buffer {session['audio_buffer'].memory_bytes / 1024:.0f}KB)")
+    else:
+        print(f"✗ RSS grew {growth:.2f}MB ({stt.utterances} utterances)")
+
+    print("\n✅ AudioBuffer tests completed!")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    # A short soak by default; pass e.g. --hours 2 for the multi-hour run
+    parser.add_argument("--hours", type=float, default=0.5, help="Hours of audio to stream in the soak test")
+    asyncio.run(test_audio_buffer(parser.parse_args().hours))
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test in-memory audio decoding for STT (WAV variants, raw PCM, resampling)
+"""
+
+import asyncio
+import io
+import sys
+import os
+import wave
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.audio_decode import (
+    decode_audio, pcm16_to_float32, float32_to_pcm16, AudioDecodeError, AV_AVAILABLE, TARGET_SAMPLE_RATE
+)
+from integrations.local_stt_handler import LocalSTTHandler
+
+
+def tone(seconds: float, sample_rate: int) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+def wav_bytes(samples: np.ndarray, sample_rate: int, width: int = 2, channels: int = 1) -> bytes:
+    if width == 1:
+        frames = ((samples * 127) + 128).astype(np.uint8)
+    elif width == 2:
+        frames = (samples * 32767).astype("<i2")
+    else:
+        frames = (samples * (2 ** 31 - 1)).astype("<i4")
+    if channels > 1:
+        frames = np.repeat(frames, channels)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(width)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(frames.tobytes())
+    return buffer.getvalue()
+
+
+class RecordingModel:
+    """Fake WhisperModel that records what it was given"""
+
+    def __init__(self):
+        self.inputs = []
+
+    def transcribe(self, audio, language="en", **kwargs):
+        self.inputs.append(audio)
+        return iter([type("Segment", (), {"text": "hello there"})()]), None
+
+
+async def test_audio_decode():
+    """Test in-memory audio decoding"""
+    print("🔊 Testing in-memory audio decoding...")
+
+    # Test 1: WAV variants decode to 16 kHz mono float32
+    print("\n1️⃣ Testing WAV decoding...")
+    reference = tone(1.0, TARGET_SAMPLE_RATE)
+    cases = {
+        "16-bit 16 kHz": wav_bytes(reference, 16000),
+        "16-bit 44.1 kHz stereo": wav_bytes(tone(1.0, 44100), 44100, channels=2),
+        "8-bit 16 kHz": wav_bytes(reference, 16000, width=1),
+        "32-bit 48 kHz": wav_bytes(tone(1.0, 48000), 48000, width=4),
+    }
+    for name, data in cases.items():
+        samples = decode_audio(data)
+        error = float(np.abs(samples[:1000] - reference[:len(samples[:1000])]).max())
+        if samples.dtype == np.float32 and abs(len(samples) - 16000) <= 1 and error < 0.05:
+            print(f"✓ {name}: {len(samples)} samples, max error {error:.4f}")
+        else:
+            print(f"✗ {name}: {samples.dtype}, {len(samples)} samples, max error {error:.4f}")
+
+    # Test 2: Raw PCM converts without decoding and round-trips
+    print("\n2️⃣ Testing raw PCM...")
+    pcm = float32_to_pcm16(reference)
+    samples = pcm16_to_float32(pcm)
+    if np.abs(samples - reference).max() < 1e-3 and float32_to_pcm16(samples) == pcm:
+        print(f"✓ {len(pcm)} bytes of PCM -> {len(samples)} samples and back")
+    else:
+        print("✗ Raw PCM did not round-trip")
+
+    # Test 3: Undecodable input raises AudioDecodeError
+    print("\n3️⃣ Testing bad input...")
+    try:
+        decode_audio(b"definitely not audio")
+        print("✗ Garbage decoded without an error")
+    except AudioDecodeError as e:
+        print(f"✓ Rejected: {e}" + ("" if AV_AVAILABLE else " (PyAV not installed)"))
+
+    # Test 4: Local STT hands the model arrays, never file paths
+    print("\n4️⃣ Testing local STT input...")
+    model = RecordingModel()
+    stt = LocalSTTHandler(workers=1, model_loader=lambda: model)
+    await stt.transcribe(cases["16-bit 44.1 kHz stereo"])
+    await stt.transcribe(pcm, sample_rate=16000)
+    if all(isinstance(audio, np.ndarray) and audio.dtype == np.float32 for audio in model.inputs):
+        print(f"✓ Model received {[len(audio) for audio in model.inputs]} samples as float32 arrays")
+    else:
+        print(f"✗ Model received {[type(audio).__name__ for audio in model.inputs]}")
+
+    print("\n✅ Audio decoding tests completed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_audio_decode())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test binary audio transport: frame encoding, binary voice WebSocket audio and the per-run audio stream
+"""
+
+import asyncio
+import json
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.websockets import WebSocketState
+from voice.audio_framing import FRAME_HEADER, FrameError, encode_frame, decode_frame
+from voice.realtime_voice import RealTimeVoiceManager
+from integrations.tts_pipeline import AudioStreamBuffer
+
+
+class FakeWebSocket:
+    """Records what the voice manager sends"""
+
+    client_state = WebSocketState.CONNECTED
+
+    def __init__(self):
+        self.text = []
+        self.binary = []
+
+    async def send_text(self, data):
+        self.text.append(json.loads(data))
+
+    async def send_bytes(self, data):
+        self.binary.append(data)
+
+
+class FakeSTT:
+    def __init__(self):
+        self.received = []
+
+    async def speech_to_text(self, audio_data):
+        self.received.append(audio_data)
+        return ""
+
+
+class FakeTTS:
+    async def text_to_speech_stream(self, text, voice_id=None):
+        for part in range(3):
+            yield f"{text}|{part};".encode() * 2000
+
+
+def websocket_errors(manager, session_id):
+    return [event for event in manager.active_connections[session_id].text if event["type"] == "error"]
+
+
+async def test_audio_framing():
+    """Test binary audio transport"""
+    print("📦 Testing binary audio transport...")
+
+    # Test 1: Frames round-trip with stream id, sequence, codec and END flag
+    print("\n1️⃣ Testing frame encoding...")
+    payload = os.urandom(1000)
+    frame = decode_frame(encode_frame(7, 42, "webm", payload, end=True))
+    errors = 0
+    for bad in (b"\x01\x00", b"\x09" + bytes(11), bytes([1, 0, 99, 0]) + bytes(8)):
+        try:
+            decode_frame(bad)
+        except FrameError:
+            errors += 1
+    if (frame.stream_id, frame.sequence, frame.codec, frame.payload, frame.end) == (7, 42, "webm", payload, True) \
+            and errors == 3:
+        print(f"✓ {FRAME_HEADER.size}-byte header round-trips; short, wrong-version and unknown-codec frames rejected")
+    else:
+        print(f"✗ Unexpected frame {frame} or {errors}/3 errors")
+
+    # Test 2: Binary sessions get TTS audio as frames instead of base64 JSON
+    print("\n2️⃣ Testing binary TTS output...")
+    stt = FakeSTT()
+    manager = RealTimeVoiceManager(stt, FakeTTS())
+    websocket = FakeWebSocket()
+    await manager.connect_voice_session(websocket, "s1", "user", "general", "assistant", binary_audio=True)
+    await manager.generate_voice_response("s1", "Hello there")
+    frames = [decode_frame(data) for data in websocket.binary]
+    announced = [event for event in websocket.text if event["type"] == "voice_response"]
+    audio = b"".join(frame.payload for frame in frames)
+    expected = b"".join([f"Hello there|{part};".encode() * 2000 for part in range(3)])
+    if audio == expected and frames[-1].end and not any(frame.end for frame in frames[:-1]) \
+            and [frame.sequence for frame in frames] == list(range(len(frames))) \
+            and announced and announced[0]["data"]["transport"] == "binary" and "audio" not in announced[0]["data"]:
+        print(f"✓ {len(audio)} bytes sent as {len(frames)} frames of stream {frames[0].stream_id}, last one flagged END")
+    else:
+        print(f"✗ Unexpected output: {len(frames)} frames, events {announced}")
+
+    # Test 3: Legacy sessions still get one base64 voice_response
+    websocket = FakeWebSocket()
+    await manager.connect_voice_session(websocket, "s2", "user", "general", "assistant")
+    await manager.generate_voice_response("s2", "Hello there")
+    legacy = [event for event in websocket.text if event["type"] == "voice_response"]
+    if not websocket.binary and legacy and "audio" in legacy[0]["data"]:
+        print("✓ Clients that didn't opt in still get base64 JSON")
+    else:
+        print("✗ Legacy transport broken")
+
+    # Test 4: A compressed input stream is transcribed as one utterance when it ends
+    print("\n3️⃣ Testing binary microphone input...")
+    chunks = [os.urandom(500) for _ in range(4)]
+    for sequence, chunk in enumerate(chunks):
+        await manager.handle_websocket_binary("s1", encode_frame(1, sequence, "webm", chunk))
+    before_end = len(stt.received)
+    await manager.handle_websocket_binary("s1", encode_frame(1, len(chunks), "webm", b"", end=True))
+    if before_end == 0 and stt.received == [b"".join(chunks)]:
+        print(f"✓ {len(chunks)} webm frames transcribed as one {len(stt.received[0])}-byte utterance")
+    else:
+        print(f"✗ Unexpected STT input: {[len(audio) for audio in stt.received]}")
+
+    # Test 5: Streams over the size cap, or beyond the open-streams cap, are dropped with an error
+    manager.max_stream_bytes = 1200
+    manager.max_incoming_streams = 2
+    received = len(stt.received)
+    for sequence in range(4):
+        await manager.handle_websocket_binary("s1", encode_frame(2, sequence, "webm", os.urandom(500)))
+    await manager.handle_websocket_binary("s1", encode_frame(2, 4, "webm", b"", end=True))
+    for stream_id in (3, 4, 5):
+        await manager.handle_websocket_binary("s1", encode_frame(stream_id, 0, "webm", os.urandom(100)))
+    session = manager.voice_sessions["s1"]
+    errors = [event["data"]["stream_id"] for event in websocket_errors(manager, "s1")]
+    if len(stt.received) == received and errors == [2, 5] and sorted(session["incoming_streams"]) == [3, 4] \
+            and list(session["rejected_streams"]) == [5] and manager.get_stats()["streams_rejected"] == 2:
+        print("✓ 1.2KB stream and a third open stream dropped with one error each; later frames ignored")
+    else:
+        print(f"✗ Unexpected caps: errors {errors}, open {list(session['incoming_streams'])}")
+    incoming = session["incoming_streams"]
+    await manager.disconnect_voice_session("s1")
+    if not incoming:
+        print("✓ Partial streams released on disconnect")
+    else:
+        print(f"✗ {len(incoming)} partial streams kept after disconnect")
+
+    # Test 6: The per-run audio stream serves late and concurrent readers from the start
+    print("\n4️⃣ Testing per-run audio stream...")
+    buffer = AudioStreamBuffer()
+
+    async def read():
+        return b"".join([chunk async for chunk in buffer.iter_chunks()])
+
+    early = asyncio.create_task(read())
+    for part in (b"one", b"two"):
+        buffer.append(part)
+        await asyncio.sleep(0)
+    late = asyncio.create_task(read())
+    buffer.append(b"three")
+    buffer.finish()
+    results = await asyncio.gather(early, late)
+    if results == [b"onetwothree", b"onetwothree"]:
+        print("✓ Early and late readers both get the whole stream")
+    else:
+        print(f"✗ Unexpected reads: {results}")
+
+    print("\n✅ Binary audio transport tests completed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_audio_framing())
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Test barge-in: speech onset or an interrupt message cancels the voice turn in progress
+(agent call, tool call, TTS streams) within a bounded time, and the freed work is counted
+"""
+
+import asyncio
+import json
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.websockets import WebSocketState
+from voice.audio_framing import decode_frame
+from voice.realtime_voice import RealTimeVoiceManager, VoiceTurn, VOICE_CANCEL_TIMEOUT_MS
+
+RATE = 16000
+WORDS = ("Here is a long answer that keeps going so there is plenty left to say when the user "
+         "talks over it. ") * 6
+
+
+def vowel(seconds: float, f0: float = 130) -> bytes:
+    """Synthetic voiced speech, loud enough to start the VAD"""
+    t = np.arange(int(seconds * RATE)) / RATE
+    signal = sum(np.exp(-((k * f0 - 700) / 400) ** 2) * np.sin(2 * np.pi * k * f0 * t) for k in range(1, 25))
+    signal *= 1 + 0.3 * np.sin(2 * np.pi * 4 * t)
+    return (signal / np.abs(signal).max() * 0.3 * 32767).astype(np.int16).tobytes()
+
+
+class FakeWebSocket:
+    client_state = WebSocketState.CONNECTED
+
+    def __init__(self):
+        self.events = []
+        self.binary = []
+
+    async def send_text(self, data):
+        self.events.append(json.loads(data))
+
+    async def send_bytes(self, data):
+        self.binary.append(decode_frame(data))
+
+    def of_type(self, event_type):
+        return [event["data"] for event in self.events if event["type"] == event_type]
+
+
+class FakeSTT:
+    async def speech_to_text(self, audio_data, sample_rate=None):
+        return "tell me everything"
+
+
+class FakeTTS:
+    """Slow streaming synthesis; open counts streams not yet closed"""
+
+    def __init__(self):
+        self.open = 0
+        self.cancelled = 0
+
+    async def text_to_speech_stream(self, text, voice_id=None):
+        self.open += 1
+        try:
+            for word in text.split():
+                await asyncio.sleep(0.02)
+                yield word.encode()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.open -= 1
+
+
+class FakeAgent:
+    """An optional slow tool call, then the answer streamed word by word; open counts calls in progress"""
+
+    def __init__(self, tool_seconds: float = 0.0):
+        self.tool_seconds = tool_seconds
+        self.open = 0
+        self.cancelled = 0
+        self.completed = 0
+
+    async def __call__(self, session_id, session, user_text, on_text):
+        self.open += 1
+        try:
+            if self.tool_seconds:
+                await asyncio.sleep(self.tool_seconds)
+            for word in WORDS.split(" "):
+                await asyncio.sleep(0.005)
+                on_text(word + " ")
+            self.completed += 1
+            return WORDS
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.open -= 1
+
+
+async def wait_until(condition, timeout: float = 5.0):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        await asyncio.sleep(0.005)
+
+
+async def new_session(agent, tts, session_id="s1"):
+    manager = RealTimeVoiceManager(FakeSTT(), tts)
+    manager.agent_handler = agent
+    websocket = FakeWebSocket()
+    await manager.connect_voice_session(websocket, session_id, "lu", "general", "assistant", binary_audio=True)
+    return manager, websocket
+
+
+async def test_barge_in():
+    """Test barge-in cancellation"""
+    print("✋ Testing barge-in cancellation...")
+
+    # Test 1: An interrupt message cancels the agent stream and the TTS streams
+    print("\n1️⃣ Testing interrupt message...")
+    agent, tts = FakeAgent(), FakeTTS()
+    manager, websocket = await new_session(agent, tts)
+    await manager.process_speech_utterance("s1", b"\x00\x00" * 1600, RATE)
+    turn = manager.voice_sessions["s1"]["turn"]
+    await wait_until(lambda: any(frame.payload for frame in websocket.binary))
+    during = manager.get_stats()
+    started = time.perf_counter()
+    await manager.handle_websocket_message("s1", json.dumps({"type": "interrupt"}))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    frames_after_cancel = len(websocket.binary)
+    await asyncio.sleep(0.2)
+    cancelled = websocket.of_type("turn_cancelled")
+    report = cancelled[0] if cancelled else {}
+    if agent.open == 0 and tts.open == 0 and agent.cancelled == 1 and not turn.active \
+            and report.get("reason") == "interrupt" and report.get("llm_streams") == 1 and report.get("tts_requests", 0) >= 1:
+        print(f"✓ Interrupted in {elapsed_ms:.1f}ms: 1 agent stream and {report['tts_requests']} TTS stream(s) "
+              f"cancelled, {report['sentences_dropped']} sentences ({report['characters_dropped']} characters) not spoken")
+    else:
+        print(f"✗ Work still running: agent {agent.open}, tts {tts.open}, report {report}")
+    if len(websocket.binary) == frames_after_cancel and not websocket.of_type("eva_response") \
+            and websocket.of_type("interrupted"):
+        print("✓ No audio or final response sent after the interrupt")
+    else:
+        print(f"✗ {len(websocket.binary) - frames_after_cancel} frames sent after the interrupt")
+
+    # Test 2: Capacity held by the turn is visible while it runs and freed afterwards
+    print("\n2️⃣ Testing freed capacity...")
+    after = manager.get_stats()
+    if during["active_turns"] == 1 and during["llm_streams_in_flight"] == 1 and during["tts_requests_in_flight"] >= 1 \
+            and after["active_turns"] == 0 and after["llm_streams_in_flight"] == 0 and after["tts_requests_in_flight"] == 0 \
+            and after["turns_cancelled"] == 1 and after["freed"]["llm_streams"] == 1:
+        print(f"✓ In flight during the turn: {during['llm_streams_in_flight']} LLM, {during['tts_requests_in_flight']} TTS; "
+              f"after: 0/0; freed {after['freed']}")
+    else:
+        print(f"✗ Unexpected stats during {during} / after {after}")
+
+    # Test 3: Speech onset while Eva replies cancels the reply (barge-in)
+    print("\n3️⃣ Testing speech onset...")
+    agent, tts = FakeAgent(), FakeTTS()
+    manager, websocket = await new_session(agent, tts)
+    await manager.process_speech_utterance("s1", b"\x00\x00" * 1600, RATE)
+    await wait_until(lambda: any(frame.payload for frame in websocket.binary))
+    speech = vowel(0.5)
+    for start in range(0, len(speech), 960):
+        await manager.process_audio_chunk("s1", speech[start:start + 960])
+        if websocket.of_type("turn_cancelled"):
+            onset_ms = (start + 960) / 2 / RATE * 1000
+            break
+    cancelled = websocket.of_type("turn_cancelled")
+    if cancelled and cancelled[0]["reason"] == "speech" and agent.open == 0 and tts.open == 0 \
+            and manager.voice_sessions["s1"]["audio_buffer"].is_recording:
+        print(f"✓ Reply cancelled {onset_ms:.0f}ms into the user's speech in {cancelled[0]['cancel_ms']}ms; "
+              f"the new utterance keeps recording")
+    else:
+        print(f"✗ Speech onset did not cancel the reply: {cancelled}, agent {agent.open}, tts {tts.open}")
+
+    # Test 4: A tool call in progress is cancelled too, and a new utterance replaces an old turn
+    print("\n4️⃣ Testing tool call and new turn...")
+    agent, tts = FakeAgent(tool_seconds=5), FakeTTS()
+    manager, websocket = await new_session(agent, tts)
+    await manager.process_speech_utterance("s1", b"\x00\x00" * 1600, RATE)
+    await asyncio.sleep(0.05)
+    agent.tool_seconds = 0
+    started = time.perf_counter()
+    await manager.process_speech_utterance("s1", b"\x00\x00" * 1600, RATE)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    await manager.voice_sessions["s1"]["turn"].wait()
+    cancelled = websocket.of_type("turn_cancelled")
+    if cancelled and cancelled[0]["reason"] == "new_turn" and agent.cancelled == 1 and agent.completed == 1 \
+            and len(websocket.of_type("eva_response")) == 1:
+        print(f"✓ Turn stuck in a 5s tool call cancelled by the next utterance in {elapsed_ms:.1f}ms; "
+              f"the new turn completed")
+    else:
+        print(f"✗ Unexpected turns: cancelled {cancelled}, agent {agent.cancelled}/{agent.completed}")
+
+    # Test 5: Cleanup is bounded even if a task is slow to unwind
+    print("\n5️⃣ Testing bounded cleanup...")
+    turn = VoiceTurn()
+
+    async def slow_cleanup():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.3)
+
+    task = turn.spawn(slow_cleanup())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    report = await turn.cancel(timeout_ms=100)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if report["stragglers"] == 1 and elapsed_ms < 200:
+        print(f"✓ cancel() returned after {elapsed_ms:.0f}ms (bound 100ms) with 1 straggler reported")
+    else:
+        print(f"✗ Unexpected cancel: {report} in {elapsed_ms:.0f}ms")
+    await task
+
+    # Test 6: Disconnecting cancels the turn in progress
+    agent, tts = FakeAgent(), FakeTTS()
+    manager, websocket = await new_session(agent, tts)
+    await manager.process_speech_utterance("s1", b"\x00\x00" * 1600, RATE)
+    await wait_until(lambda: agent.open == 1)
+    await manager.disconnect_voice_session("s1")
+    if agent.open == 0 and tts.open == 0 and manager.turns_cancelled == 1:
+        print("✓ Disconnect cancelled the turn in progress")
+    else:
+        print(f"✗ Turn still running after disconnect: agent {agent.open}, tts {tts.open}")
+
+    print(f"\n📊 Cancel bound: {VOICE_CANCEL_TIMEOUT_MS}ms")
+    print("\n✅ Barge-in tests completed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_barge_in())
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Test persistent ElevenLabs streaming sessions against a local fake input-streaming server
+"""
+
+import asyncio
+import base64
+import json
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shutil
+import tempfile
+
+import websockets
+from integrations.elevenlabs_streaming import StreamingTTSSession, TTSStreamError
+from integrations.elevenlabs_integration import ElevenLabsIntegration
+from integrations.tts_cache import TTSCache
+from voice.realtime_voice import RealTimeVoiceManager
+
+
+class FakeElevenLabs:
+    """Speaks each context's text back as 'audio' once 10+ characters are buffered or on flush"""
+
+    def __init__(self, audio_delay: float = 0.0):
+        self.audio_delay = audio_delay
+        self.connections = 0
+        self.paths = []
+        self.drop_next_text = False
+        self.messages = []
+
+    async def handler(self, connection):
+        self.connections += 1
+        request = getattr(connection, "request", None)
+        self.paths.append(request.path if request else connection.path)
+        buffers = {}
+        try:
+            async for message in connection:
+                data = json.loads(message)
+                self.messages.append(data)
+                context_id = data.get("context_id")
+                if data.get("close_socket"):
+                    break
+                if "voice_settings" in data:
+                    buffers[context_id] = ""
+                    continue
+                if data.get("text"):
+                    if self.drop_next_text:
+                        self.drop_next_text = False
+                        await connection.close()
+                        return
+                    buffers[context_id] += data["text"]
+                if (data.get("flush") or len(buffers.get(context_id, "")) >= 10) and buffers.get(context_id):
+                    text, buffers[context_id] = buffers[context_id], ""
+                    await asyncio.sleep(self.audio_delay)
+                    await connection.send(json.dumps({
+                        "audio": base64.b64encode(text.encode()).decode(),
+                        "contextId": context_id,
+                        "normalizedAlignment": {"chars": list(text)}
+                    }))
+                if data.get("close_context"):
+                    await connection.send(json.dumps({"isFinal": True, "contextId": context_id}))
+        except websockets.ConnectionClosed:
+            pass
+
+
+async def speak(session, sentences):
+    context = await session.open_context()
+
+    async def feed():
+        for sentence in sentences:
+            await context.send_text(sentence)
+        await context.close()
+
+    feeder = asyncio.create_task(feed())
+    audio = b"".join([chunk async for chunk in context.audio()])
+    await feeder
+    return audio.decode()
+
+
+async def test_elevenlabs_streaming():
+    """Test persistent streaming TTS sessions"""
+    print("🔌 Testing persistent ElevenLabs streaming sessions...")
+    fake = FakeElevenLabs()
+    server = await websockets.serve(fake.handler, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    base_url = f"ws://127.0.0.1:{port}/v1"
+
+    try:
+        # Test 1: Several replies share one connection; text in, audio out concurrently
+        print("\n1️⃣ Testing replies on one connection...")
+        session = StreamingTTSSession("test", "voice", "model", {"stability": 0.5}, latency=4, base_url=base_url)
+        first = await speak(session, ["Hello there. ", "How are you today? "])
+        second = await speak(session, ["Second reply. "])
+        if first == "Hello there. How are you today? " and second == "Second reply. " \
+                and fake.connections == 1 and "optimize_streaming_latency=4" in fake.paths[0]:
+            print(f"✓ 2 replies over {fake.connections} connection, latency setting sent: {fake.paths[0].split('?')[1]}")
+        else:
+            print(f"✗ Unexpected replies {first!r}, {second!r} over {fake.connections} connections")
+
+        # Test 2: A dropped connection is reopened and a reply without audio yet is replayed
+        print("\n2️⃣ Testing reconnect...")
+        fake.drop_next_text = True
+        replayed = await speak(session, ["This reply survives a dropped connection. "])
+        stats = session.get_stats()
+        if replayed == "This reply survives a dropped connection. " and stats["reconnects"] == 1:
+            print(f"✓ Reply completed after reconnect ({stats['connects']} connects)")
+        else:
+            print(f"✗ Unexpected reply {replayed!r}, stats {stats}")
+        await session.close()
+
+        # Test 3: Text waits when too much is sent ahead of the audio
+        print("\n3️⃣ Testing backpressure...")
+        fake.audio_delay = 0.01
+        session = StreamingTTSSession("test", "voice", "model", {}, base_url=base_url, max_pending_chars=30)
+        words = [f"word{i} " for i in range(40)]
+        started = time.perf_counter()
+        audio = await speak(session, words)
+        elapsed = (time.perf_counter() - started) * 1000
+        stats = session.get_stats()
+        if audio == "".join(words) and stats["backpressure_waits"] > 0 and stats["pending_chars"] == 0:
+            print(f"✓ Sender waited {stats['backpressure_waits']} times; all {len(audio)} characters voiced in {elapsed:.0f}ms")
+        else:
+            print(f"✗ Unexpected backpressure: {stats}")
+        await session.close()
+
+        # Test 4: Closing a session ends unfinished replies instead of leaving readers hanging
+        print("\n4️⃣ Testing close...")
+        session = StreamingTTSSession("test", "voice", "model", {}, base_url=base_url)
+        context = await session.open_context()
+        await session.close()
+        try:
+            async for _ in context.audio():
+                pass
+            print("✗ Unfinished reply ended without an error")
+        except Exception as e:
+            print(f"✓ Unfinished reply ended with: {e}")
+
+        # Test 5: Aborting a reply (barge-in) stops it without a flush and frees its capacity
+        print("\n5️⃣ Testing abort...")
+        fake.audio_delay = 0.05
+        fake.messages.clear()
+        session = StreamingTTSSession("test", "voice", "model", {}, base_url=base_url)
+        context = await session.open_context()
+        for i in range(10):
+            await context.send_text(f"Sentence number {i}. ")
+        first_chunk = await context.audio().__anext__()
+        await context.abort()
+        rest = [chunk async for chunk in context.audio()]
+        stats = session.get_stats()
+        after = await speak(session, ["Still works. "])
+        endings = [message for message in fake.messages if message.get("context_id") == context.context_id
+                   and (message.get("flush") or message.get("close_context"))]
+        if first_chunk and not rest and stats["open_contexts"] == 0 and stats["pending_chars"] == 0 \
+                and stats["contexts_aborted"] == 1 and endings == [{"context_id": context.context_id, "close_context": True}] \
+                and after == "Still works. ":
+            print("✓ Reply aborted after 1 chunk: context closed without flush, pending characters released")
+        else:
+            print(f"✗ Unexpected abort: rest {len(rest)} chunks, stats {stats}, sent {endings}")
+        await session.close()
+        fake.audio_delay = 0.0
+
+        # Test 6: A reply nobody reads is dropped instead of stalling the others on the connection
+        print("\n6️⃣ Testing a slow reader...")
+        session = StreamingTTSSession("test", "voice", "model", {}, base_url=base_url, audio_queue_size=2)
+        stalled = await session.open_context()
+        for i in range(5):
+            await stalled.send_text(f"Sentence number {i}. ")
+        try:
+            other = await asyncio.wait_for(speak(session, ["Other reply. "]), timeout=5)
+        except asyncio.TimeoutError:
+            other = None
+        received, error = [], None
+        try:
+            async for chunk in stalled.audio():
+                received.append(chunk)
+        except TTSStreamError as e:
+            error = e
+        stats = session.get_stats()
+        if other == "Other reply. " and error and len(received) <= 2 and stats["contexts_overflowed"] == 1 \
+                and stats["pending_chars"] == 0:
+            print(f"✓ Other reply completed; stalled reply ended after {len(received)} buffered chunks with: {error}")
+        else:
+            print(f"✗ Unexpected slow reader: other {other!r}, {len(received)} chunks, error {error}, stats {stats}")
+        await session.close()
+
+        # Test 7: ElevenLabsIntegration keeps one session per voice session with its own latency
+        tts = ElevenLabsIntegration(api_key="test", cache=None)
+        fast = tts.streaming_session("voice_a", latency=4)
+        default = tts.streaming_session("voice_b")
+        if tts.streaming_session("voice_a") is fast and fast.latency == 4 and default.latency == tts.streaming_latency:
+            print(f"✓ Per-session latency: voice_a={fast.latency}, voice_b={default.latency}")
+        else:
+            print("✗ Streaming sessions not kept per voice session")
+        await tts.close_streaming_session("voice_a")
+        await tts.close_streaming_session("voice_b")
+
+        # Test 8: A completed streaming-session reply is cached and served locally the next time
+        print("\n7️⃣ Testing caching of streamed replies...")
+        cache_dir = tempfile.mkdtemp(prefix="tts_stream_cache_test_")
+        try:
+            tts = ElevenLabsIntegration(api_key="test", cache=TTSCache(cache_dir))
+            tts.streaming_sessions["s1"] = StreamingTTSSession("test", tts.default_voice_id, tts.model_id,
+                                                               tts.voice_settings, base_url=base_url)
+            manager = RealTimeVoiceManager(None, tts)
+            manager.voice_sessions["s1"] = {"tts_latency": None}
+            text = "Cache this streamed reply."
+            streamed = b"".join([chunk async for chunk in manager._synthesize("s1", text)])
+            contexts = tts.streaming_sessions["s1"].get_stats()["contexts_opened"]
+            again = b"".join([chunk async for chunk in manager._synthesize("s1", text)])
+            if tts.is_cached(text) and again == streamed == (text + " ").encode() \
+                    and tts.streaming_sessions["s1"].get_stats()["contexts_opened"] == contexts == 1:
+                print(f"✓ Streamed reply cached ({len(streamed)} bytes); repeat served without a new context")
+            else:
+                print(f"✗ Streamed reply not cached: {streamed!r} / {again!r}")
+            await tts.close_streaming_session("s1")
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    finally:
+        server.close()
+        await server.wait_closed()
+
+    print("\n✅ ElevenLabs streaming session tests completed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_elevenlabs_streaming())
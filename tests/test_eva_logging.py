@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test Eva's logging pipeline: queued writers, log index and rolling aggregates
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+from fastapi.testclient import TestClient
+from integrations.eva_logger import EvaLogger
+from integrations.log_aggregates import RollingAggregates, RouteMetricsMiddleware, UNMATCHED_ROUTE
+from integrations.queued_logging import get_queue_stats, stop_all_listeners
+
+
+def test_eva_logging():
+    """Test the logging pipeline end to end"""
+    print("📋 Testing Eva logging pipeline...")
+    log_dir = tempfile.mkdtemp(prefix="eva_logging_test_")
+    eva_logger = EvaLogger(log_dir=log_dir)
+
+    # Test 1: Events are queued and written by the background writer
+    print("\n1️⃣ Testing queued writes...")
+    eva_logger.log_request("session_a", "Play some jazz for dinner")
+    eva_logger.log_tool_call("session_a", "spotify", "play", {"query": "jazz"}, "ok")
+    eva_logger.log_error("session_b", TimeoutError("calendar timed out"), {"tool": "calendar"})
+    eva_logger.log_performance("session_a", "full_response", 850.0)
+    time.sleep(1.0)  # Let the writer flush its batch
+    stats = get_queue_stats()["eva"]
+    if stats["written"] >= 4 and stats["dropped"] == 0:
+        print(f"✓ Writer flushed {stats['written']} records in {stats['batches']} batch(es)")
+    else:
+        print(f"✗ Unexpected queue stats: {stats}")
+
+    # Test 2: Indexed search and filters
+    print("\n2️⃣ Testing log index search...")
+    jazz = eva_logger.search_logs("jazz")
+    spotify = eva_logger.query_logs(tool="spotify")["results"]
+    session = eva_logger.get_session_logs("session_a")
+    if len(jazz) == 2 and len(spotify) == 1 and len(session) == 3:
+        print("✓ Full-text, tool and session queries returned the expected entries")
+    else:
+        print(f"✗ Search returned jazz={len(jazz)} spotify={len(spotify)} session={len(session)}")
+
+    # Test 3: Error summary from aggregates
+    print("\n3️⃣ Testing error summary...")
+    summary = eva_logger.get_error_summary(hours=1)
+    if summary["error_types"] == {"TimeoutError": 1} and summary["errors_by_tool"] == {"calendar": 1}:
+        print(f"✓ Error summary: {summary['error_types']} by tool {summary['errors_by_tool']}")
+    else:
+        print(f"✗ Unexpected error summary: {summary}")
+
+    # Test 4: Bucket eviction and latency percentiles
+    print("\n4️⃣ Testing rolling aggregates...")
+    aggregates = RollingAggregates(horizon_hours=1)
+    now = time.time()
+    aggregates.record_error("ValueError", now=now - 7200)  # Outside the horizon
+    for i in range(1, 101):
+        aggregates.record_latency("tts", float(i), now=now)
+    perf = aggregates.performance_summary(60)["operations"]["tts"]
+    if aggregates.error_summary(24)["total_errors"] == 0 and 48 <= perf["p50_ms"] <= 52 and 97 <= perf["p99_ms"] <= 100:
+        print(f"✓ Expired buckets evicted; tts p50={perf['p50_ms']}ms p99={perf['p99_ms']}ms")
+    else:
+        print(f"✗ Aggregates off: {perf}")
+
+    # Test 5: Requests matching no route share one label; mounted apps are labelled by mount path
+    print("\n5️⃣ Testing route labels...")
+    route_aggregates = RollingAggregates(horizon_hours=1)
+    static_dir = os.path.join(log_dir, "static")
+    os.makedirs(static_dir)
+    with open(os.path.join(static_dir, "app.js"), "w") as f:
+        f.write("// app")
+    app = FastAPI()
+    app.add_middleware(RouteMetricsMiddleware, aggregates=route_aggregates)
+
+    @app.get("/api/sessions/{session_id}")
+    async def get_session(session_id: str):
+        return {"session_id": session_id}
+
+    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+    client = TestClient(app)
+    paths = ["/api/sessions/a", "/api/sessions/b", "/static/app.js", "/static/app.js", "/static/missing.css"]
+    statuses = [client.get(path).status_code for path in paths + [f"/wp-admin/{i}.php" for i in range(50)]]
+    operations = route_aggregates.performance_summary(60)["operations"]
+    counts = {operation: summary["count"] for operation, summary in operations.items()}
+    if counts == {"http GET /api/sessions/{session_id}": 2, "http GET /static": 3, f"http GET {UNMATCHED_ROUTE}": 50} \
+            and statuses.count(404) == 51:
+        print(f"✓ {len(statuses)} requests recorded as {len(counts)} operations: {counts}")
+    else:
+        print(f"✗ Unexpected operations: {counts}")
+
+    stop_all_listeners()
+    shutil.rmtree(log_dir)
+    print("\n✅ Logging pipeline test completed!")
+
+
+if __name__ == "__main__":
+    test_eva_logging()
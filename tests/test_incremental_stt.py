@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test incremental transcription: rolling-window partials with stable-prefix commitment
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.local_stt_handler import LocalSTTHandler
+from integrations.audio_decode import float32_to_pcm16
+from voice.incremental_stt import IncrementalTranscriber
+from tests.fake_whisper import FakeSegment, FakeWhisperModel, FakeWord
+
+WORDS = "so I was thinking we could book a table for four at the new place downtown tonight".split()
+WORD_SECONDS = 0.4
+RATE = 16000
+
+
+def hear_words(audio: np.ndarray):
+    """
+    'Hears' word i as 0.4s of constant level (i + 1) / 100. A word cut off by the end of
+    the window comes out garbled, like a real decoder guessing at half a word.
+    """
+    levels = np.round(audio * 100).astype(int)
+    bounds = [0, *(np.flatnonzero(np.diff(levels)) + 1), len(levels)]
+    words = []
+    for start, end in zip(bounds, bounds[1:]):
+        index = levels[start] - 1
+        if index < 0 or end - start < RATE // 20:  # Too short to hear anything
+            continue
+        text = WORDS[index] if (end - start) / RATE >= 0.3 else WORDS[index][:2] + "-"
+        words.append(FakeWord(start / RATE, end / RATE, " " + text))
+    return [FakeSegment(words=words)] if words else []
+
+
+def speech(words: int) -> bytes:
+    return float32_to_pcm16(np.concatenate([
+        np.full(int(WORD_SECONDS * RATE), (i + 1) / 100, dtype=np.float32) for i in range(words)
+    ]))
+
+
+async def speak(transcriber, pcm: bytes, frame_bytes: int = 960):
+    """Feed 30ms frames, a little faster than real time"""
+    for i in range(0, len(pcm), frame_bytes):
+        transcriber.feed(pcm[i:i + frame_bytes])
+        await asyncio.sleep(0.003)
+
+
+async def test_incremental_stt():
+    """Test incremental transcription"""
+    print("📝 Testing incremental transcription...")
+    model = FakeWhisperModel(hear=hear_words)
+    stt = LocalSTTHandler(workers=1, model_loader=lambda: model)
+    partials = []
+
+    async def on_partial(partial):
+        partials.append(partial)
+
+    # Test 1: Partials arrive while speaking and the committed prefix only grows
+    print("\n1️⃣ Testing partials...")
+    transcriber = IncrementalTranscriber(stt, on_partial=on_partial, interval_ms=300, window_seconds=3)
+    await speak(transcriber, speech(len(WORDS)))
+    text, timing = await transcriber.finish()
+    committed = [p["committed"] for p in partials]
+    grows = all(later.startswith(earlier) for earlier, later in zip(committed, committed[1:]))
+    if len(partials) >= 5 and grows and committed[-1] and "-" not in committed[-1]:
+        print(f"✓ {len(partials)} partials; committed prefix grew to {committed[-1]!r}")
+        print(f"  e.g. {partials[len(partials) // 2]}")
+    else:
+        print(f"✗ Unexpected partials: {committed}")
+
+    # Test 2: End of speech decodes only the trailing window and the text is complete
+    print("\n2️⃣ Testing final decode...")
+    if text == " ".join(WORDS) and timing["final_window_ms"] < timing["utterance_ms"] / 2 \
+            and max(model.window_seconds) <= 3.5:
+        print(f"✓ Final text complete; last decode {timing['final_window_ms']}ms of a "
+              f"{timing['utterance_ms']}ms utterance ({timing['committed_words']} words already committed)")
+    else:
+        print(f"✗ Unexpected final result {text!r}, {timing}, windows {model.window_seconds}")
+
+    # Test 3: Rolling windows keep total decoded audio close to linear in utterance length
+    stats = transcriber.get_stats()
+    utterance = len(WORDS) * WORD_SECONDS
+    redecode_all = sum(min(utterance, (i + 1) * 0.3) for i in range(stats["decodes"]))
+    print(f"✓ {stats['decodes']} decodes covering {stats['decoded_seconds']}s of audio "
+          f"(re-decoding the whole utterance each time: ~{redecode_all:.1f}s)")
+
+    # Test 4: reset() drops an utterance (e.g. on interruption)
+    transcriber.feed(speech(3))
+    transcriber.reset()
+    if not transcriber.has_audio and not transcriber.committed:
+        print("✓ reset() cleared the utterance")
+    else:
+        print("✗ reset() left state behind")
+
+    # Test 5: Partials are skipped while the STT pool is nearly full; the final decode still runs
+    print("\n3️⃣ Testing partials under load...")
+
+    def hear_slowly(audio):
+        if len(audio) == 1:  # The request keeping the pool busy
+            time.sleep(1.0)
+            return []
+        return hear_words(audio)
+
+    busy_stt = LocalSTTHandler(workers=1, queue_size=2, model_loader=lambda: FakeWhisperModel(hear=hear_slowly))
+    transcriber = IncrementalTranscriber(busy_stt, on_partial=on_partial, interval_ms=300, window_seconds=3)
+    blocker = asyncio.create_task(busy_stt.transcribe(np.zeros(1, dtype=np.float32)))
+    await asyncio.sleep(0.1)
+    partials.clear()
+    await speak(transcriber, speech(5))
+    skipped, free = transcriber.get_stats()["partials_skipped"], busy_stt.free_slots
+    await blocker
+    text, _ = await transcriber.finish()
+    if not partials and skipped >= 3 and text == " ".join(WORDS[:5]):
+        print(f"✓ {skipped} partials skipped with {free} of {busy_stt.capacity} pool slots free; "
+              f"final text {text!r} complete")
+    else:
+        print(f"✗ Unexpected load shedding: {len(partials)} partials, {skipped} skipped, text {text!r}")
+
+    print("\n✅ Incremental transcription tests completed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_incremental_stt())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test the local STT worker pool: off-loop inference, queue/inference timing, bounded queue and cancellation
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.local_stt_handler import LocalSTTHandler, STTQueueFull
+from tests.fake_whisper import FakeWhisperModel
+
+# One second of 16 kHz samples (already decoded, so only the fake model's time counts)
+AUDIO = np.zeros(16000, dtype=np.float32)
+
+
+async def max_loop_lag(coro):
+    """Run coro while measuring the worst event loop stall in ms"""
+    lags = []
+    done = False
+
+    async def ticker():
+        while not done:
+            tick = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append((time.perf_counter() - tick) * 1000 - 5)
+
+    tick_task = asyncio.create_task(ticker())
+    try:
+        return await coro, max(lags) if lags else 0.0
+    finally:
+        done = True
+        await tick_task
+
+
+async def test_local_stt_pool():
+    """Test the local STT worker pool"""
+    print("🎙️ Testing local STT worker pool...")
+    models = []
+
+    def loader():
+        model = FakeWhisperModel(segments=2, delay=0.03)  # 30ms of blocking work per segment
+        models.append(model)
+        return model
+
+    # Test 1: Inference runs off the event loop
+    print("\n1️⃣ Testing off-loop inference...")
+    stt = LocalSTTHandler(workers=2, queue_size=4, model_loader=loader)
+    result, lag_ms = await max_loop_lag(stt.transcribe(AUDIO))
+    if result.text == "segment 0 segment 1" and lag_ms < 30:
+        print(f"✓ Transcribed {result.text!r} in {result.inference_ms}ms; worst loop stall {lag_ms:.1f}ms")
+    else:
+        print(f"✗ Unexpected result {result}, loop stall {lag_ms:.1f}ms")
+
+    # Test 2: Queue wait and inference time are reported separately; one model per worker
+    print("\n2️⃣ Testing queue wait vs inference time...")
+    results = await asyncio.gather(*[stt.transcribe(AUDIO) for _ in range(6)])
+    queued = [r.queue_ms for r in results]
+    stats = stt.get_stats()
+    if max(queued) > 50 and all(r.inference_ms >= 55 for r in results) and stats["models_loaded"] <= 2:
+        print(f"✓ Queue waits {sorted(queued)}ms, inference ~{stats['avg_inference_ms']}ms each; "
+              f"{stats['models_loaded']} model loads on {stats['workers']} workers")
+    else:
+        print(f"✗ Unexpected timing: {[(r.queue_ms, r.inference_ms) for r in results]}, {stats}")
+
+    # Test 3: The submission queue is bounded
+    print("\n3️⃣ Testing bounded queue...")
+    pending = [asyncio.create_task(stt.transcribe(AUDIO)) for _ in range(6)]
+    await asyncio.sleep(0)
+    try:
+        await stt.transcribe(AUDIO)
+        print("✗ Request beyond the queue was accepted")
+    except STTQueueFull as e:
+        print(f"✓ Rejected when full: {e}")
+    await asyncio.gather(*pending)
+
+    # Test 4: Cancelled requests (client disconnected) stop using the workers
+    print("\n4️⃣ Testing cancellation...")
+    decoded_before = sum(model.decoded for model in models)
+    tasks = [asyncio.create_task(stt.transcribe(AUDIO)) for _ in range(6)]
+    await asyncio.sleep(0.01)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.sleep(0.1)  # Let running jobs reach their next segment
+    decoded = sum(model.decoded for model in models) - decoded_before
+    stats = stt.get_stats()
+    if decoded <= 2 and stats["cancelled"] == 6 and stats["in_progress"] == 0:
+        print(f"✓ 6 cancelled requests decoded only {decoded} segments (12 if run to completion)")
+    else:
+        print(f"✗ Cancelled work kept running: {decoded} segments, {stats}")
+
+    print("\n✅ Local STT pool tests completed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_local_stt_pool())
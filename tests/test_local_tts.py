@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test the offline local TTS tier: worker pool, PCM/WAV streaming and the tier policy
+"""
+
+import asyncio
+import io
+import sys
+import os
+import time
+import wave
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.local_tts import LocalTTSHandler
+from integrations.tts_tiers import TTSTierRouter, LOCAL_TIER, ELEVENLABS_TIER
+
+
+class FakeVoiceConfig:
+    sample_rate = 22050
+
+
+class FakePiperVoice:
+    """Stands in for a Piper voice: 20ms of CPU-ish work and 0.1s of silence per sentence"""
+
+    config = FakeVoiceConfig()
+
+    def synthesize_stream_raw(self, text):
+        for sentence in text.split(". "):
+            time.sleep(0.02)
+            yield b"\x00\x00" * (FakeVoiceConfig.sample_rate // 10)
+
+
+class FakeElevenLabs:
+    def __init__(self, cached=()):
+        self.cached = set(cached)
+
+    def is_cached(self, text, voice_id=None, model_id=None):
+        return text in self.cached
+
+
+class FakeCostTracker:
+    def __init__(self, used_percentage):
+        self.used_percentage = used_percentage
+
+    def should_limit_tts(self):
+        return {"budget_used_percentage": self.used_percentage}
+
+
+async def test_local_tts():
+    """Test the local TTS tier"""
+    print("🖥️ Testing local TTS tier...")
+
+    # Test 1: Audio streams sentence by sentence as a playable WAV
+    print("\n1️⃣ Testing streaming synthesis...")
+    tts = LocalTTSHandler(workers=2, voice_loader=FakePiperVoice)
+    started = time.perf_counter()
+    first_audio_ms = None
+    chunks = []
+    async for chunk in tts.text_to_speech_stream("First sentence. Second sentence. Third sentence"):
+        if not chunks:
+            first_audio_ms = (time.perf_counter() - started) * 1000
+        chunks.append(chunk)
+    total_ms = (time.perf_counter() - started) * 1000
+    with wave.open(io.BytesIO(await tts.text_to_speech("Hello there. General Kenobi")), "rb") as wav_file:
+        frames = wav_file.getnframes()
+        rate = wav_file.getframerate()
+    if len(chunks) == 3 and chunks[0].startswith(b"RIFF") and frames == 2 * rate // 10:
+        print(f"✓ 3 sentence chunks, the first with the WAV header; first audio after {first_audio_ms:.0f}ms of {total_ms:.0f}ms; "
+              f"full WAV {frames} frames at {rate} Hz")
+    else:
+        print(f"✗ Unexpected stream: {len(chunks)} chunks, {frames} frames")
+
+    # Test 2: Requests run in parallel on the pool; each worker loads the model once
+    print("\n2️⃣ Testing worker pool...")
+    started = time.perf_counter()
+    await asyncio.gather(*[tts.text_to_speech(f"Utterance {i}. With two sentences") for i in range(8)])
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    stats = tts.get_stats()
+    serial_ms = 8 * 2 * 20
+    if stats["models_loaded"] <= stats["workers"] and elapsed_ms < serial_ms * 0.8:
+        print(f"✓ 8 utterances in {elapsed_ms:.0f}ms (~{serial_ms}ms serial) with "
+              f"{stats['models_loaded']} model loads on {stats['workers']} workers")
+    else:
+        print(f"✗ Unexpected pool behaviour: {elapsed_ms:.0f}ms, {stats}")
+
+    # Test 3: Tier policy
+    print("\n3️⃣ Testing tier policy...")
+    long_text = "This is a longer answer that is worth the better ElevenLabs voice quality."
+    router = TTSTierRouter(FakeElevenLabs(cached=["Done!"]), tts, FakeCostTracker(10))
+    decisions = {
+        "short": router.select("Sure, one moment.").tier,
+        "long": router.select(long_text).tier,
+        "cached": router.select("Done!").tier,
+        "low priority": router.select(long_text, priority="low").tier,
+        "unknown text": router.select().tier
+    }
+    router.cost_tracker = FakeCostTracker(85)
+    decisions["budget nearly spent"] = router.select(long_text).tier
+    expected = {"short": LOCAL_TIER, "long": ELEVENLABS_TIER, "cached": ELEVENLABS_TIER,
+                "low priority": LOCAL_TIER, "unknown text": ELEVENLABS_TIER, "budget nearly spent": LOCAL_TIER}
+    if decisions == expected:
+        print(f"✓ {decisions}")
+    else:
+        print(f"✗ Unexpected decisions: {decisions}")
+
+    # Test 4: Latency is reported per tier
+    choice = router.select("Hi!")
+    async for _ in router.timed(choice.tier, choice.backend.text_to_speech_stream("Hi!")):
+        pass
+    local_stats = router.get_stats()["tiers"][LOCAL_TIER]
+    if local_stats["utterances"] == 1 and local_stats["time_to_first_audio_ms"]["p50"] is not None:
+        print(f"✓ Local tier latency: {local_stats['time_to_first_audio_ms']} to first audio, "
+              f"{local_stats['total_ms']} total")
+    else:
+        print(f"✗ Latency not recorded: {local_stats}")
+
+    print("\n✅ Local TTS tier tests completed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_local_tts())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test the log index: inserts, full-text and filtered search with paging, and retention pruning
+"""
+
+import sys
+import os
+import json
+import logging
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.log_index import LogIndex, LogIndexHandler, SCHEMA
+
+
+def entry(index: int, days_ago: float = 0, **fields):
+    return {
+        "timestamp": (datetime.now() - timedelta(days=days_ago)).isoformat(),
+        "type": "request",
+        "session_id": f"session_{index % 3}",
+        "message": f"request number {index}",
+        **fields
+    }
+
+
+def test_log_index():
+    """Test the log index"""
+    print("🗂️ Testing log index...")
+    log_dir = tempfile.mkdtemp(prefix="log_index_test_")
+    index = LogIndex(os.path.join(log_dir, "log_index.db"))
+
+    # Test 1: Entries become visible on commit
+    print("\n1️⃣ Testing inserts...")
+    for i in range(30):
+        index.add(entry(i))
+    index.add(entry(30, type="tool_call", tool="spotify", message="play some jazz"))
+    index.add(entry(31, type="error", error_type="TimeoutError", tool="calendar", message="calendar timed out"))
+    before_commit = index.query(limit=100)["results"]
+    index.commit()
+    if not before_commit and len(index.query(limit=100)["results"]) == 32 and not index.is_empty():
+        print(f"✓ 32 entries indexed (FTS5 {'on' if index.fts_enabled else 'off, LIKE fallback'})")
+    else:
+        print(f"✗ Unexpected visibility: {len(before_commit)} before commit")
+
+    # Test 2: Full-text search, column filters and counts
+    print("\n2️⃣ Testing search...")
+    jazz = index.query("jazz")["results"]
+    spotify = index.query(tool="spotify")["results"]
+    session = index.query(session_id="session_1", log_type="request")["results"]
+    counts = index.count_by("type")
+    if [item["message"] for item in jazz] == ["play some jazz"] and len(spotify) == 1 and len(session) == 10 \
+            and counts == {"request": 30, "tool_call": 1, "error": 1}:
+        print(f"✓ Text, tool and session queries matched; counts by type {counts}")
+    else:
+        print(f"✗ Unexpected search results: jazz {jazz}, spotify {len(spotify)}, session {len(session)}, {counts}")
+
+    # Test 3: Text search matches substrings, like the in-memory search it replaced
+    partial = [item["message"] for item in index.query("jaz")["results"]]
+    id_part = index.query("sion_2")["results"]
+    short = index.query("zz")["results"]
+    if partial == ["play some jazz"] and len(id_part) == 10 and [item["message"] for item in short] == ["play some jazz"]:
+        print("✓ Partial words, partial ids and 2-character queries match")
+    else:
+        print(f"✗ Unexpected substring search: {partial}, {len(id_part)} for part of an id, {short}")
+
+    # Test 4: Keyset paging walks every entry once, newest first
+    pages, cursor = [], None
+    while True:
+        page = index.query(log_type="request", limit=7, cursor=cursor)
+        pages.append([item["message"] for item in page["results"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    messages = [message for page in pages for message in page]
+    if messages == [f"request number {i}" for i in reversed(range(30))] and len(pages) == 5:
+        print(f"✓ {len(messages)} entries in {len(pages)} pages of 7, newest first, none repeated")
+    else:
+        print(f"✗ Unexpected paging: {pages}")
+
+    # Test 5: Entries past the retention window are pruned from the table and the text index
+    print("\n3️⃣ Testing pruning...")
+    for i in range(10):
+        index.add(entry(100 + i, days_ago=40, message=f"ancient request {i}"))
+    index.commit()
+    removed = index.prune(days=30)
+    if removed == 10 and not index.query("ancient")["results"] and len(index.query(limit=100)["results"]) == 32:
+        print(f"✓ Pruned {removed} entries older than 30 days; recent entries kept")
+    else:
+        print(f"✗ Unexpected prune: removed {removed}, ancient {len(index.query('ancient')['results'])}")
+
+    # Test 6: The writer's handler prunes periodically, not only at startup
+    handler = LogIndexHandler(index, prune_hours=0)
+    record = logging.LogRecord("eva.requests", logging.INFO, __file__, 0, "old", None, None)
+    record.log_entry = entry(200, days_ago=45, message="stale request")
+    handler.emit(record)
+    handler.flush()
+    if not index.query("stale")["results"] and len(index.query(limit=100)["results"]) == 32:
+        print("✓ Handler flush pruned an entry past retention")
+    else:
+        print("✗ Handler did not prune")
+
+    index.close()
+
+    # Test 7: An index built with the old word tokenizer is rebuilt for substring search
+    print("\n4️⃣ Testing upgrade of an older index...")
+    old_path = os.path.join(log_dir, "old_index.db")
+    conn = sqlite3.connect(old_path)
+    conn.executescript(SCHEMA)
+    conn.execute("CREATE VIRTUAL TABLE logs_fts USING fts5(body)")
+    conn.execute("INSERT INTO logs (ts, type, entry) VALUES (?, 'request', ?)",
+                 (datetime.now().timestamp(), json.dumps(entry(1, message="play some jazz"))))
+    conn.execute("INSERT INTO logs_fts (rowid, body) VALUES (1, 'play some jazz')")
+    conn.commit()
+    conn.close()
+    upgraded = LogIndex(old_path)
+    if [item["message"] for item in upgraded.query("jaz")["results"]] == ["play some jazz"]:
+        print("✓ Existing entries reindexed with trigrams on open")
+    else:
+        print("✗ Older index not upgraded")
+    upgraded.close()
+
+    shutil.rmtree(log_dir)
+    print("\n✅ Log index tests completed!")
+
+
+if __name__ == "__main__":
+    test_log_index()
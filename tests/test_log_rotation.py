@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Test log rotation: size and daily rollover, background gzip of rotated segments, retention,
+segment ordering and reading a stream across plain and gzipped segments
+"""
+
+import sys
+import os
+import gzip
+import time
+import shutil
+import logging
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations import log_rotation
+from integrations.log_rotation import RotatingLogFileHandler, list_segments, open_segment, iter_log_lines
+
+
+def wait_for_compression():
+    """The compressor runs one job at a time, so a no-op job finishes after every earlier one"""
+    log_rotation._compressor.submit(lambda: None).result()
+
+
+def log(handler: RotatingLogFileHandler, message: str, created: float = None):
+    record = logging.LogRecord("test", logging.INFO, __file__, 0, message, None, None)
+    if created is not None:
+        record.created = created
+    handler.emit(record)
+
+
+def log_with_preamble(handler: RotatingLogFileHandler, message: str, preamble):
+    record = logging.LogRecord("test", logging.DEBUG, __file__, 0, message, None, None)
+    record.segment_preamble = preamble
+    handler.emit(record)
+
+
+def test_log_rotation():
+    """Test log rotation"""
+    print("🔄 Testing log rotation...")
+    log_dir = Path(tempfile.mkdtemp(prefix="log_rotation_test_"))
+    active = log_dir / "requests.log"
+
+    # Test 1: The active file rolls over before a record would take it past max_bytes
+    print("\n1️⃣ Testing size rotation...")
+    handler = RotatingLogFileHandler(active, max_bytes=200)
+    for i in range(20):
+        log(handler, f"size line {i:02d} " + "x" * 30)  # 48 bytes: 4 lines per segment
+    handler.close()
+    wait_for_compression()
+    rotated = list_segments(active)[:-1]
+    sizes = [len(open_segment(segment).read()) for segment in rotated]
+    if len(rotated) == 4 and all(segment.name.endswith(".log.gz") for segment in rotated) \
+            and all(size <= 200 for size in sizes) and active.stat().st_size <= 200:
+        print(f"✓ 20 lines in {len(rotated)} rotated segments of {sizes} bytes plus the active file")
+    else:
+        print(f"✗ Unexpected segments {[segment.name for segment in rotated]} ({sizes})")
+
+    # Test 2: Rotated segments are gzipped in the background, keeping their name stamp and mtime
+    print("\n2️⃣ Testing gzip of rotated segments...")
+    raw_left = [path.name for path in log_dir.iterdir() if path.name.endswith(".log") and path != active]
+    stamps = {segment.name.split(".")[1] for segment in rotated}
+    with gzip.open(rotated[0], "rt") as f:
+        first = f.readline()
+    if not raw_left and first.startswith("size line 00") and all(len(stamp) >= 15 for stamp in stamps) \
+            and not any(path.name.endswith(".tmp") for path in log_dir.iterdir()):
+        print(f"✓ No raw segments left; names like {rotated[0].name}; first line {first.strip()[:20]!r}")
+    else:
+        print(f"✗ Compression incomplete: raw {raw_left}, first line {first!r}")
+
+    # Test 3: A record from the next day rolls the segment over even when it is small
+    print("\n3️⃣ Testing daily rotation...")
+    daily_dir = log_dir / "daily"
+    daily_dir.mkdir()
+    daily_active = daily_dir / "tools.log"
+    handler = RotatingLogFileHandler(daily_active, max_bytes=10_000)
+    log(handler, "today")
+    tomorrow = handler.next_rollover + 60
+    log(handler, "tomorrow", created=tomorrow)
+    handler.close()
+    wait_for_compression()
+    segments = list_segments(daily_active)
+    if len(segments) == 2 and open_segment(segments[0]).read() == "today\n" \
+            and daily_active.read_text() == "tomorrow\n" and handler.next_rollover > tomorrow - 86400:
+        print(f"✓ Midnight rollover: {segments[0].name} holds yesterday, the active file today")
+    else:
+        print(f"✗ Unexpected daily segments {[segment.name for segment in segments]}")
+
+    # Test 4: A handler reopening a file last written on an earlier day rolls it over first
+    yesterday = time.time() - 86400
+    os.utime(daily_active, (yesterday, yesterday))
+    handler = RotatingLogFileHandler(daily_active, max_bytes=10_000)
+    log(handler, "after restart")
+    handler.close()
+    wait_for_compression()
+    if len(list_segments(daily_active)) == 3 and daily_active.read_text() == "after restart\n":
+        print("✓ Stale active file from an earlier day rolled over on restart")
+    else:
+        print(f"✗ Restart did not roll over: {[segment.name for segment in list_segments(daily_active)]}")
+
+    # Test 5: Segments last written before the retention window are deleted on rotation
+    old = daily_dir / "tools.20000101-000000.log.gz"
+    with gzip.open(old, "wt") as f:
+        f.write("ancient\n")
+    ancient = time.time() - 30 * 86400
+    os.utime(old, (ancient, ancient))
+    handler = RotatingLogFileHandler(daily_active, max_bytes=20, retention_days=14)
+    log(handler, "fills the segment")
+    log(handler, "rolls it over")
+    handler.close()
+    wait_for_compression()
+    if not old.exists() and len(list_segments(daily_active)) == 5:
+        print("✓ Segment older than 14 days pruned; recent segments kept")
+    else:
+        print(f"✗ Retention not applied: {[segment.name for segment in list_segments(daily_active)]}")
+
+    # Test 6: list_segments orders by last write, includes pre-rotation daily files, skips temp files
+    # and raw copies being compressed
+    print("\n4️⃣ Testing list_segments ordering...")
+    order_dir = log_dir / "order"
+    order_dir.mkdir()
+    order_active = order_dir / "errors.log"
+    now = time.time()
+    files = {
+        "errors_20241231.log": now - 400,  # Daily file from before rotation
+        "errors.20250301-000000.log.gz": now - 300,  # Name sorts last, written first
+        "errors.20250101-000000.log": now - 200,
+        "errors.20250201-000000.log.gz": now - 100,
+    }
+    for name, mtime in files.items():
+        path = order_dir / name
+        with (gzip.open(path, "wt") if name.endswith(".gz") else open(path, "w")) as f:
+            f.write(f"from {name}\n")
+        os.utime(path, (mtime, mtime))
+    (order_dir / "errors.20250201-000000.log").write_text("raw copy being compressed\n")
+    (order_dir / "errors.20250401-000000.log.gz.tmp").write_bytes(b"partial")
+    (order_dir / "errors_backup.log").write_text("not a segment\n")
+    order_active.write_text("from active\n")
+    names = [segment.name for segment in list_segments(order_active)]
+    if names == ["errors_20241231.log", "errors.20250301-000000.log.gz", "errors.20250101-000000.log",
+                 "errors.20250201-000000.log.gz", "errors.log"]:
+        print(f"✓ Oldest write first, active file last: {names}")
+    else:
+        print(f"✗ Unexpected order {names}")
+
+    # Test 7: iter_log_lines reads plain and gzipped segments in order, skipping old ones with since
+    print("\n5️⃣ Testing iter_log_lines...")
+    lines = [line.strip() for line in iter_log_lines(order_active)]
+    recent = [line.strip() for line in iter_log_lines(order_active, since=datetime.now() - timedelta(seconds=150))]
+    all_sizes = [line.split()[2] for line in iter_log_lines(active)]
+    if lines == ["from errors_20241231.log", "from errors.20250301-000000.log.gz", "from errors.20250101-000000.log",
+                 "from errors.20250201-000000.log.gz", "from active"] \
+            and recent == ["from errors.20250201-000000.log.gz", "from active"] \
+            and all_sizes == [f"{i:02d}" for i in range(20)]:
+        print(f"✓ {len(lines)} lines across plain and gzip segments in order; since skipped {len(lines) - len(recent)}; "
+              f"size-rotated stream reads back all 20 lines in order")
+    else:
+        print(f"✗ Unexpected lines {lines} / {recent} / {all_sizes}")
+
+    # Test 8: Preamble lines are written once per segment, in the segment of the record needing them
+    print("\n6️⃣ Testing segment preambles...")
+    trace_dir = log_dir / "trace"
+    trace_dir.mkdir()
+    trace_active = trace_dir / "trace.log"
+    handler = RotatingLogFileHandler(trace_active, max_bytes=150)
+    built = []
+
+    def definition():
+        built.append(1)
+        return "Static tools:abc: [...]"
+
+    for i in range(6):
+        log_with_preamble(handler, f"payload {i} uses tools:abc " + "x" * 20, [("tools:abc", definition)])
+    handler.close()
+    wait_for_compression()
+    segments = [open_segment(segment).read().splitlines() for segment in list_segments(trace_active)]
+    self_contained = all(lines and lines[0] == "Static tools:abc: [...]"
+                         and sum(line.startswith("Static") for line in lines) == 1 for lines in segments)
+    if len(segments) > 1 and self_contained and len(built) == len(segments):
+        print(f"✓ {len(segments)} segments each open with the definition their payloads reference "
+              f"(built {len(built)} times for 6 records)")
+    else:
+        print(f"✗ Unexpected segments: {segments}")
+
+    shutil.rmtree(log_dir)
+    print("\n✅ Log rotation tests completed!")
+
+
+if __name__ == "__main__":
+    test_log_rotation()
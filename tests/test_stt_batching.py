@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test cross-session batched local STT: batching window, routing, throughput and added latency
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.local_stt_handler import LocalSTTHandler
+from tests.fake_whisper import FakeWhisperModel
+
+# Fake costs: a pass has fixed overhead, each extra utterance in a batch is cheap
+PASS_SECONDS = 0.04
+PER_ITEM_SECONDS = 0.005
+
+
+def utterance(k: int) -> np.ndarray:
+    """One second of audio the fakes 'hear' as 'utterance k'"""
+    return np.full(16000, k / 100, dtype=np.float32)
+
+
+def heard(samples: np.ndarray) -> str:
+    return f"utterance {int(round(samples[0] * 100))}"
+
+
+def whisper_model():
+    return FakeWhisperModel(hear=lambda audio: [heard(audio)], delay=PASS_SECONDS + PER_ITEM_SECONDS)
+
+
+def fake_batch_transcriber(model, batch, language):
+    time.sleep(PASS_SECONDS + PER_ITEM_SECONDS * len(batch))
+    return [heard(samples) for samples in batch]
+
+
+def failing_batch_transcriber(model, batch, language):
+    raise RuntimeError("batched generate not supported")
+
+
+async def run_sessions(stt, count: int):
+    """count sessions finish an utterance at the same time"""
+    started = time.perf_counter()
+    results = await asyncio.gather(*[stt.transcribe(utterance(k)) for k in range(1, count + 1)])
+    return results, time.perf_counter() - started
+
+
+async def test_stt_batching():
+    """Test batched local STT"""
+    print("📦 Testing cross-session STT batching...")
+
+    # Test 1: Concurrent utterances share one pass and each caller gets its own text
+    print("\n1️⃣ Testing batching and routing...")
+    stt = LocalSTTHandler(workers=1, model_loader=whisper_model, batch_window_ms=20, max_batch=8,
+                          batch_transcriber=fake_batch_transcriber)
+    results, _ = await run_sessions(stt, 8)
+    routed = all(result.text == f"utterance {k}" for k, result in enumerate(results, 1))
+    if routed and {result.batch_size for result in results} == {8}:
+        print(f"✓ 8 utterances in 1 batch, each routed back: {results[0].text!r} ... {results[-1].text!r}")
+    else:
+        print(f"✗ Unexpected results: {[(r.text, r.batch_size) for r in results]}")
+
+    # Test 2: A full batch runs immediately; the rest wait for the window
+    stt = LocalSTTHandler(workers=1, model_loader=whisper_model, batch_window_ms=20, max_batch=4,
+                          batch_transcriber=fake_batch_transcriber)
+    await run_sessions(stt, 10)
+    sizes = stt.get_stats()["batching"]["batch_sizes"]
+    if sizes == {2: 1, 4: 2}:
+        print(f"✓ 10 utterances with max batch 4 ran as batches {sizes}")
+    else:
+        print(f"✗ Unexpected batch sizes: {sizes}")
+
+    # Test 3: Throughput per core and added latency across batch sizes
+    print("\n3️⃣ Throughput and latency across batch sizes (16 concurrent utterances, 1 worker)...")
+    print(f"{'max batch':>10} {'utt/s/core':>11} {'p50 latency':>12} {'p50 batch wait':>15}")
+    baseline = None
+    for max_batch in (0, 1, 2, 4, 8):
+        stt = LocalSTTHandler(workers=1, queue_size=16, model_loader=whisper_model,
+                              batch_window_ms=20 if max_batch else 0, max_batch=max(1, max_batch),
+                              batch_transcriber=fake_batch_transcriber)
+        results, elapsed = await run_sessions(stt, 16)
+        latencies = sorted(r.queue_ms + r.inference_ms for r in results)
+        waits = sorted(r.queue_ms for r in results)
+        throughput = 16 / elapsed / stt.workers
+        baseline = baseline or throughput
+        label = str(max_batch) if max_batch else "off"
+        print(f"{label:>10} {throughput:>11.1f} {latencies[8]:>10.0f}ms {waits[8]:>13.0f}ms")
+    if throughput > baseline * 2:
+        print(f"✓ Batches of 8 give {throughput / baseline:.1f}x the throughput of unbatched inference")
+    else:
+        print(f"✗ Batching did not raise throughput ({throughput:.1f} vs {baseline:.1f})")
+
+    # Test 4: A caller that goes away while waiting for its batch is left out of it
+    print("\n4️⃣ Testing cancellation and fallbacks...")
+    stt = LocalSTTHandler(workers=1, model_loader=whisper_model, batch_window_ms=30, max_batch=8,
+                          batch_transcriber=fake_batch_transcriber)
+    tasks = [asyncio.create_task(stt.transcribe(utterance(k))) for k in range(1, 5)]
+    await asyncio.sleep(0.005)
+    tasks[0].cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    if isinstance(results[0], asyncio.CancelledError) and [r.batch_size for r in results[1:]] == [3, 3, 3]:
+        print("✓ Cancelled utterance dropped; the other 3 ran as one batch")
+    else:
+        print(f"✗ Unexpected results after cancel: {results}")
+
+    # Test 5: Without batched inference support, the batch is transcribed one by one
+    stt = LocalSTTHandler(workers=1, model_loader=whisper_model, batch_window_ms=10, max_batch=8,
+                          batch_transcriber=failing_batch_transcriber)
+    results, _ = await run_sessions(stt, 3)
+    if [r.text for r in results] == ["utterance 1", "utterance 2", "utterance 3"] \
+            and stt.get_stats()["batching"]["fallbacks"] == 1:
+        print("✓ Failed batch fell back to one-by-one transcription with correct results")
+    else:
+        print(f"✗ Unexpected fallback: {[r.text for r in results]}, {stt.get_stats()['batching']}")
+
+    # Test 6: Requests needing word timestamps (partial transcripts) are never batched
+    result = await stt.transcribe(utterance(7), word_timestamps=True)
+    if result.batch_size == 1 and stt.get_stats()["batching"]["batches"] == 1:
+        print("✓ Word-timestamp request bypassed the batcher")
+    else:
+        print(f"✗ Word-timestamp request was batched: {stt.get_stats()['batching']}")
+
+    print("\n✅ STT batching tests completed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_stt_batching())
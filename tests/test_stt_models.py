@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Test the local STT model manager: per-request model choice, memory cap with LRU unloading,
+shared loads and background warm-up
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.local_stt_handler import LocalSTTHandler, STTHandlerClosed
+from integrations.stt_models import STTModelManager, STTModelUnavailable, estimate_memory_mb
+from tests.fake_whisper import FakeWhisperModel
+
+LOAD_SECONDS = 0.05
+AUDIO = np.zeros(16000, dtype=np.float32)
+
+
+def fake_factory(loads):
+    """Handlers whose models take LOAD_SECONDS to load; loads counts loads per model"""
+    def create(size, compute_type):
+        name = f"{size}:{compute_type}"
+
+        def loader():
+            time.sleep(LOAD_SECONDS)
+            loads[name] = loads.get(name, 0) + 1
+            return FakeWhisperModel(hear=lambda audio: [f"heard by {name}"], delay=0.05)
+        return LocalSTTHandler(size, compute_type, workers=1, model_loader=loader)
+    return create
+
+
+async def test_stt_models():
+    """Test the STT model manager"""
+    print("🗂️ Testing STT model manager...")
+    models = ["tiny:int8", "base:int8", "small:int8", "tiny:float32"]
+    print("  Estimates: " + ", ".join(f"{name} ~{estimate_memory_mb(name):.0f}MB" for name in models))
+
+    # Test 1: Requests pick a model by name; a bare size means int8
+    print("\n1️⃣ Testing per-request model choice...")
+    loads = {}
+    manager = STTModelManager(models, memory_mb=650, workers=1, handler_factory=fake_factory(loads))
+    manager.load()
+    small = await manager.acquire("small")
+    result = await small.transcribe(AUDIO)
+    default = await manager.acquire()
+    if result.text == "heard by small:int8" and result.model == "small:int8" and default.name == "tiny:int8":
+        print(f"✓ 'small' served by {result.model}; default is {default.name}")
+    else:
+        print(f"✗ Unexpected model choice: {result}, default {default.name}")
+
+    # Test 2: Unknown or disabled models are rejected
+    rejected = []
+    for name in ("huge:int8", "small:int3", "medium:int8"):
+        try:
+            await manager.acquire(name)
+        except STTModelUnavailable:
+            rejected.append(name)
+    if len(rejected) == 3:
+        print("✓ Unknown size, unknown compute type and disabled model rejected")
+    else:
+        print(f"✗ Only rejected {rejected}")
+
+    # Test 3: Over the cap, the least recently used idle model is unloaded (never the default)
+    print("\n2️⃣ Testing LRU unloading under the memory cap...")
+    await manager.acquire("base")          # tiny + small + base = 537MB
+    await manager.acquire("small")         # small is now most recently used
+    await manager.acquire("tiny:float32")  # +216MB: base (LRU idle, not default) must go
+    resident = list(manager.resident)
+    if resident == ["tiny:int8", "small:int8", "tiny:float32"] and manager.memory_used_mb() <= 650 \
+            and manager.unloads == 1:
+        print(f"✓ base:int8 unloaded; resident {resident} using {manager.memory_used_mb():.0f}/650MB")
+    else:
+        print(f"✗ Unexpected resident set {resident} ({manager.memory_used_mb():.0f}MB)")
+
+    # Test 4: A model serving a request is not unloaded; if nothing else can go, the load fails
+    print("\n3️⃣ Testing in-use models are kept...")
+    busy = asyncio.create_task(small.transcribe(AUDIO))
+    await asyncio.sleep(0.01)
+    try:
+        await manager.acquire("base")  # Needs small or tiny:float32 out; small is busy
+        kept = "small:int8" in manager.resident
+    except STTModelUnavailable:
+        kept = False
+    await busy
+    if kept and "tiny:float32" not in manager.resident:
+        print("✓ Busy small:int8 kept; idle tiny:float32 unloaded instead")
+    else:
+        print(f"✗ Unexpected resident set {list(manager.resident)}")
+
+    tight = STTModelManager(["tiny", "small"], memory_mb=350, workers=1, handler_factory=fake_factory({}))
+    tight.load()
+    try:
+        await tight.acquire("small")
+        print("✗ Model loaded beyond the memory cap")
+    except STTModelUnavailable as e:
+        print(f"✓ Load refused when only the default is resident: {e}")
+
+    # Test 5: Concurrent requests for a cold model share one load
+    print("\n4️⃣ Testing shared loads and background warm-up...")
+    loads = {}
+    manager = STTModelManager(models, memory_mb=2000, workers=1, handler_factory=fake_factory(loads))
+    handlers = await asyncio.gather(*[manager.acquire("base") for _ in range(5)])
+    if loads.get("base:int8") == 1 and len({id(handler) for handler in handlers}) == 1:
+        print("✓ 5 concurrent requests for base:int8 caused 1 load")
+    else:
+        print(f"✗ Unexpected loads {loads}")
+
+    # Test 6: Warm-up runs in the background without blocking the event loop
+    started = time.perf_counter()
+    tasks = manager.warm_up(["small", "tiny:float32", "medium"])
+    returned_ms = (time.perf_counter() - started) * 1000
+    await asyncio.sleep(LOAD_SECONDS / 5)
+    loading = manager.get_stats()["loading"]
+    await asyncio.gather(*tasks)
+    stats = manager.get_stats()
+    if returned_ms < LOAD_SECONDS * 1000 and loading and {"small:int8", "tiny:float32"} <= set(stats["resident"]):
+        print(f"✓ warm_up() returned in {returned_ms:.1f}ms (loading {loading}); "
+              f"resident now {list(stats['resident'])}, failed names logged and skipped")
+    else:
+        print(f"✗ Unexpected warm-up: {returned_ms:.1f}ms, {stats}")
+
+    # Test 7: A leased model isn't unloaded before its transcription starts
+    print("\n5️⃣ Testing leases and closed handlers...")
+    loads = {}
+    manager = STTModelManager(["tiny", "small", "base"], memory_mb=450, workers=1, handler_factory=fake_factory(loads))
+    manager.load()
+    leased = await manager.acquire("small", lease=True)
+    await asyncio.sleep(0.01)  # e.g. the upload is still being read
+    try:
+        await manager.acquire("base")  # Only small could make room, but it is leased
+        print("✗ Leased model unloaded")
+    except STTModelUnavailable:
+        result = await leased.transcribe(AUDIO)
+        manager.release(leased)
+        if result.text == "heard by small:int8" and "small:int8" in manager.resident:
+            print("✓ Leased small:int8 kept while idle between acquire and transcribe")
+        else:
+            print(f"✗ Unexpected result {result}")
+
+    # Test 8: Once released it can be unloaded; the closed handler raises instead of reloading
+    await manager.acquire("base")
+    try:
+        await leased.transcribe(AUDIO)
+        print(f"✗ Closed handler transcribed (loads {loads})")
+    except STTHandlerClosed:
+        if "small:int8" not in manager.resident and loads.get("small:int8") == 1:
+            print("✓ Released small:int8 unloaded; its closed handler raised instead of loading a hidden copy")
+        else:
+            print(f"✗ Unexpected loads {loads}")
+
+    # Test 9: A lease taken while the model loads holds from the moment it is published
+    loads = {}
+    manager = STTModelManager(["tiny", "small", "base"], memory_mb=450, workers=1, handler_factory=fake_factory(loads))
+    manager.load()
+    waiter = asyncio.create_task(manager.acquire("small", lease=True))
+    await asyncio.sleep(0)
+    made_room = []
+
+    def make_room_for_base(_):
+        # Another request making room after the load finished but before the waiter resumed
+        try:
+            manager._make_room("base:int8", estimate_memory_mb("base:int8", 1))
+            made_room.append(True)
+        except STTModelUnavailable:
+            made_room.append(False)
+
+    manager._loading["small:int8"].add_done_callback(make_room_for_base)
+    leased = await waiter
+    try:
+        result = await leased.transcribe(AUDIO)
+        manager.release(leased)
+        if made_room == [False] and result.text == "heard by small:int8" and leased.leases == 0:
+            print("✓ Model leased as it was published; making room in between left it loaded")
+        else:
+            print(f"✗ Unexpected lease: made room {made_room}, {result}, leases {leased.leases}")
+    except STTHandlerClosed:
+        print("✗ Model unloaded between its load and the waiting request resuming")
+
+    print(f"\n📊 Stats: {stats['memory_used_mb']}/{stats['memory_cap_mb']}MB, loads {stats['loads']}, "
+          f"unloads {stats['unloads']}")
+
+    print("\n✅ STT model manager tests completed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_stt_models())
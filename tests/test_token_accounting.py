@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test token accounting: request estimates, image tiles, pricing and rolling usage totals
+"""
+
+import sys
+import os
+import io
+import base64
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations import token_accounting
+from integrations.token_accounting import (
+    TokenAccountant, RollingTotal, calculate_cost, image_tokens, image_size_from_url, PIL_AVAILABLE,
+    CHARS_ESTIMATE
+)
+
+
+def test_token_accounting():
+    """Test token accounting end to end"""
+    print("🧮 Testing token accounting...")
+    accountant = TokenAccountant(window_hours=1)
+
+    # Test 1: Image parts follow the detail and tile rules
+    print("\n1️⃣ Testing image token rules...")
+    cases = [((512, 512), "low", 85), ((512, 512), "high", 255), ((1024, 1024), "high", 765),
+             ((2048, 4096), "high", 1105)]
+    for (width, height), detail, expected in cases:
+        tokens = image_tokens(width, height, detail)
+        if tokens == expected:
+            print(f"✓ {width}x{height} detail={detail}: {tokens} tokens")
+        else:
+            print(f"✗ {width}x{height} detail={detail}: expected {expected}, got {tokens}")
+
+    if PIL_AVAILABLE:
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new("RGB", (300, 200)).save(buffer, format="PNG")
+        url = "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+        size = image_size_from_url(url)
+        print(f"{'✓' if size == (300, 200) else '✗'} Read data URL image size: {size}")
+
+    # Test 2: Messages are memoized and the tool schema is counted once per request
+    print("\n2️⃣ Testing request estimates...")
+    tools = [{"type": "function", "function": {"name": "spotify", "description": "Play music",
+                                               "parameters": {"type": "object", "properties": {}}}}]
+    payload = {
+        "model": "gpt-4o",
+        "messages": [
+            {"role": "system", "content": "You are Eva."},
+            {"role": "user", "content": [
+                {"type": "text", "text": "What is in this picture?"},
+                {"type": "image_url", "image_url": {"url": "https://example.com/cat.png", "detail": "low"}}
+            ]},
+            {"role": "assistant", "content": None,
+             "tool_calls": [{"id": "call_1", "function": {"name": "spotify", "arguments": "{\"query\": \"jazz\"}"}}]},
+            {"role": "tool", "tool_call_id": "call_1", "content": "Playing jazz"}
+        ],
+        "tools": tools
+    }
+    first = accountant.estimate_request(payload)
+    without_tools = accountant.estimate_request({**payload, "tools": []})
+    second = accountant.estimate_request(payload)
+    stats = accountant.get_stats()
+    if first == second and first > without_tools > 85:
+        print(f"✓ Estimate {first} tokens ({first - without_tools} for tools), memo hit ratio {stats['memo_hit_ratio']}")
+    else:
+        print(f"✗ Unexpected estimates: {first}, {second}, without tools {without_tools}")
+
+    # Test 3: Pricing resolves dated snapshots and bills cached input at the cached rate
+    print("\n3️⃣ Testing pricing...")
+    dated = calculate_cost("gpt-4o-2024-08-06", 1_000_000, 0)
+    cached = calculate_cost("gpt-4o", 1_000_000, 0, cached_tokens=1_000_000)
+    if dated == calculate_cost("gpt-4o", 1_000_000, 0) and 0 < cached < dated:
+        print(f"✓ Dated model priced (${dated:.2f}/1M), cached input ${cached:.2f}/1M")
+    else:
+        print(f"✗ Unexpected pricing: dated {dated}, cached {cached}")
+
+    # Test 4: Reconciliation feeds per-session and per-user totals
+    print("\n4️⃣ Testing usage reconciliation...")
+    usage = {"prompt_tokens": first + 10, "completion_tokens": 50,
+             "prompt_tokens_details": {"cached_tokens": 20}}
+    result = accountant.record_usage("gpt-4o-2024-08-06", usage, estimated_input_tokens=first,
+                                     session_id="session_a", user_id="user_a")
+    accountant.record_usage("gpt-4o", usage, estimated_input_tokens=first, session_id="session_b", user_id="user_a")
+    session = accountant.get_session_usage("session_a")
+    user = accountant.get_user_usage("user_a")
+    if result["estimate_error_tokens"] == 10 and session["requests"] == 1 and user["requests"] == 2:
+        print(f"✓ Session total {session['total_tokens']} tokens, user total {user['total_tokens']} tokens")
+    else:
+        print(f"✗ Unexpected totals: {result}, {session}, {user}")
+
+    # Test 5: Rolling totals forget usage outside the window
+    print("\n5️⃣ Testing rolling window...")
+    total = RollingTotal(window_seconds=3600)
+    now = time.time()
+    total.add(100, 10, 0, 0.01, now=now - 7200)
+    total.add(200, 20, 0, 0.02, now=now)
+    snapshot = total.snapshot(now=now)
+    if snapshot["requests"] == 1 and snapshot["input_tokens"] == 200:
+        print("✓ Expired usage dropped from the window")
+    else:
+        print(f"✗ Unexpected window totals: {snapshot}")
+
+    # Test 6: A tokenizer that fails to load falls back to chars/4, tried once per model
+    print("\n6️⃣ Testing tokenizer failure fallback...")
+    attempts = []
+
+    class OfflineTiktoken:
+        """tiktoken whose BPE files can't be downloaded"""
+
+        @staticmethod
+        def encoding_for_model(model):
+            attempts.append(model)
+            raise OSError("BPE file download failed")
+
+    saved = token_accounting.TIKTOKEN_AVAILABLE, getattr(token_accounting, "tiktoken", None)
+    token_accounting.TIKTOKEN_AVAILABLE, token_accounting.tiktoken = True, OfflineTiktoken
+    try:
+        offline = TokenAccountant()
+        counts = [offline.count_text("x" * 400, "gpt-offline") for _ in range(3)]
+        offline.record_usage("gpt-offline", {"prompt_tokens": 120}, estimated_input_tokens=100)
+        stats = offline.get_stats()
+    finally:
+        token_accounting.TIKTOKEN_AVAILABLE, token_accounting.tiktoken = saved
+    if counts == [100] * 3 and attempts == ["gpt-offline"] and stats["tokenizer"] == CHARS_ESTIMATE \
+            and stats["calibration"]["gpt-offline"]["tokenizer"] == CHARS_ESTIMATE:
+        print(f"✓ Load failure estimated as chars/4 and reported as {stats['tokenizer']!r}; "
+              f"loading not retried for the model")
+    else:
+        print(f"✗ Unexpected fallback: counts {counts}, attempts {attempts}")
+
+    print("\n✅ Token accounting tests completed!")
+
+
+if __name__ == "__main__":
+    test_token_accounting()
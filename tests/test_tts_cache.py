@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test the content-addressed TTS cache: keys, memory/disk tiers, eviction and cached streaming
+"""
+
+import asyncio
+import sys
+import os
+import shutil
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.tts_cache import TTSCache, cache_key, load_prewarm_phrases
+from integrations.elevenlabs_integration import ElevenLabsIntegration
+
+
+async def test_tts_cache():
+    """Test the TTS cache"""
+    print("🗄️ Testing TTS cache...")
+    cache_dir = tempfile.mkdtemp(prefix="tts_cache_test_")
+
+    try:
+        # Test 1: Keys ignore whitespace differences but not voice, model or settings
+        print("\n1️⃣ Testing cache keys...")
+        settings = {"stability": 0.75}
+        key = cache_key("Done!", "voice_a", "model_a", settings)
+        same = cache_key("  Done!\n", "voice_a", "model_a", settings)
+        different = {cache_key("Done!", "voice_b", "model_a", settings),
+                     cache_key("Done!", "voice_a", "model_b", settings),
+                     cache_key("Done!", "voice_a", "model_a", {"stability": 0.5})}
+        if key == same and key not in different and len(different) == 3:
+            print("✓ Normalized text shares a key; voice, model and settings don't")
+        else:
+            print("✗ Unexpected cache keys")
+
+        # Test 2: Memory tier is an LRU bounded by bytes; disk tier keeps what memory evicts
+        print("\n2️⃣ Testing memory and disk tiers...")
+        cache = TTSCache(cache_dir, memory_bytes=250, disk_bytes=10_000)
+        for i in range(3):
+            cache.put(f"key{i}", bytes([i]) * 100)
+        stats = cache.get_stats()
+        audio = cache.get("key0", characters=10)
+        stats_after = cache.get_stats()
+        if stats["memory_entries"] == 2 and stats["disk_entries"] == 3 and audio == bytes([0]) * 100 \
+                and stats_after["disk_hits"] == 1:
+            print(f"✓ Memory holds {stats['memory_entries']} entries, disk {stats['disk_entries']}; evicted entry served from disk")
+        else:
+            print(f"✗ Unexpected tiers: {stats}, {stats_after}")
+
+        # Test 3: Disk tier survives restarts and evicts least recently used entries over its cap
+        print("\n3️⃣ Testing disk cap and restart...")
+        cache = TTSCache(cache_dir, memory_bytes=250, disk_bytes=350)
+        cache.put("key3", bytes([3]) * 100)
+        stats = cache.get_stats()
+        if stats["disk_entries"] == 3 and stats["disk_bytes"] <= 350 and cache.get("key3") is not None:
+            print(f"✓ Disk index rebuilt at startup and capped at {stats['disk_bytes']} bytes")
+        else:
+            print(f"✗ Unexpected disk tier: {stats}")
+
+        # Test 4: Cached audio is streamed chunk by chunk without calling ElevenLabs
+        print("\n4️⃣ Testing cached streaming through ElevenLabsIntegration...")
+        tts = ElevenLabsIntegration(api_key="test", cache=TTSCache(cache_dir))
+        phrase = "I've completed the requested task."
+        audio = os.urandom(40_000)
+        tts.cache.put(tts._cache_key(phrase, None, None), audio)
+        chunks = [chunk async for chunk in tts.text_to_speech_stream(phrase)]
+        full = await tts.text_to_speech(phrase)
+        stats = tts.cache.get_stats()
+        if b"".join(chunks) == audio and len(chunks) > 1 and full == audio and tts.is_cached(phrase):
+            print(f"✓ Served {len(chunks)} chunks from cache; hit ratio {stats['hit_ratio']}, "
+                  f"{stats['characters_saved']} characters (${stats['estimated_cost_saved']}) saved")
+        else:
+            print(f"✗ Unexpected cached stream: {len(chunks)} chunks, stats {stats}")
+
+        # Test 5: Pre-warming charges each phrase it synthesizes; the phrase list is bounded
+        print("\n5️⃣ Testing pre-warm cost and limits...")
+
+        async def synthesize(text, voice_id=None):
+            tts.cache.put(tts._cache_key(text, voice_id, None), b"audio")
+            return b"audio"
+
+        tts.text_to_speech = synthesize
+        charged = []
+        phrases = [phrase, "Sure, one moment.", "Done!"]
+        result = await tts.prewarm_cache(phrases, on_usage=charged.append)
+        again = await tts.prewarm_cache(phrases, on_usage=charged.append)
+        bounded = load_prewarm_phrases(max_phrases=3, max_chars=20)
+        if charged == ["Sure, one moment.", "Done!"] and result["characters"] == 22 and again["synthesized"] == 0 \
+                and len(bounded) == 3 and all(len(text) <= 20 for text in bounded):
+            print(f"✓ {result['synthesized']} uncached phrases charged ({result['characters']} characters), "
+                  f"none on the second run; list bounded to {bounded}")
+        else:
+            print(f"✗ Unexpected pre-warm: charged {charged}, {result}, {again}, bounded {bounded}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print("\n✅ TTS cache tests completed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_tts_cache())
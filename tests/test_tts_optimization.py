@@ -4,8 +4,14 @@ Test TTS optimization and cost tracking
 """
 
 import asyncio
+import json
 import sys
 import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -67,6 +73,93 @@ async def test_tts_optimization():
     summary = tracker.get_cost_summary()
     print(f"Cost summary: {summary}")
     
+    # Test 7: Usage log is append-only and totals are rebuilt at startup
+    print("\n7️⃣ Testing append-only usage log...")
+    log_dir = tempfile.mkdtemp(prefix="tts_usage_test_")
+    try:
+        storage_path = os.path.join(log_dir, "tts_usage.jsonl")
+        tracker = TTSCostTracker(storage_path=storage_path, history_size=100)
+        for i in range(500):
+            tracker.track_usage("x" * 100, f"session_{i % 5}")
+        restarted = TTSCostTracker(storage_path=storage_path, history_size=100)
+        with open(storage_path) as f:
+            lines = sum(1 for _ in f)
+        today = restarted.get_daily_usage()
+        session = restarted.get_session_usage("session_3")
+        if lines == 500 and today["usage_count"] == 500 and today["total_characters"] == 50_000 \
+                and session["usage_count"] == 100 and len(restarted.usage_history) == 100:
+            print(f"✓ {lines} log lines; totals rebuilt on restart, {len(restarted.usage_history)} entries kept in memory")
+        else:
+            print(f"✗ Unexpected totals: {today}, {session}, {len(restarted.usage_history)} in memory")
+        
+        # Budget checks don't depend on history length
+        started = time.perf_counter()
+        for _ in range(10_000):
+            restarted.should_limit_tts()
+        per_check_us = (time.perf_counter() - started) * 100
+        print(f"✓ should_limit_tts: {per_check_us:.1f}µs per check")
+        
+        # Cleanup compacts the log
+        old_entry = {"timestamp": (datetime.now() - timedelta(days=40)).isoformat(), "character_count": 10,
+                     "estimated_cost": 0.0003, "session_id": "old", "content_preview": "old"}
+        with open(storage_path, "a") as f:
+            f.write(json.dumps(old_entry) + "\n")
+        result = TTSCostTracker(storage_path=storage_path).cleanup_old_usage(days_to_keep=30)
+        if result["removed_entries"] == 1 and result["remaining_entries"] == 500:
+            print(f"✓ Cleanup removed {result['removed_entries']} old entry, kept {result['remaining_entries']}")
+        else:
+            print(f"✗ Unexpected cleanup: {result}")
+        
+        # Compacting in a worker thread while usage is tracked loses no new entries
+        tracker = TTSCostTracker(storage_path=storage_path)
+        with open(storage_path, "a") as f:
+            for _ in range(20_000):
+                f.write(json.dumps(old_entry) + "\n")
+        compaction = threading.Thread(target=tracker.compact_log, kwargs={"days_to_keep": 30})
+        compaction.start()
+        tracked = 0
+        while compaction.is_alive() or tracked < 50:
+            tracker.track_usage("y" * 10, "during_compaction")
+            tracked += 1
+        compaction.join()
+        with open(storage_path) as f:
+            during = sum(1 for line in f if "during_compaction" in line)
+        if during == tracked:
+            print(f"✓ {tracked} entries tracked during compaction all kept in the log")
+        else:
+            print(f"✗ {tracked - during} of {tracked} entries tracked during compaction lost")
+        
+        # An entry half written when compaction starts is kept whole
+        torn = json.dumps({**old_entry, "timestamp": datetime.now().isoformat(), "session_id": "torn"}) + "\n"
+        with tracker._log_lock:
+            with open(storage_path, "a") as f:
+                f.write(torn[:40])
+            compaction = threading.Thread(target=tracker.compact_log, kwargs={"days_to_keep": 30})
+            compaction.start()
+            time.sleep(0.1)
+            with open(storage_path, "a") as f:
+                f.write(torn[40:])
+        compaction.join()
+        with open(storage_path) as f:
+            torn_kept = sum(1 for line in f if '"torn"' in line)
+        if torn_kept == 1:
+            print("✓ Entry being appended when compaction started kept intact")
+        else:
+            print("✗ Entry being appended when compaction started was lost")
+        
+        # The old whole-file JSON history is migrated once
+        legacy_dir = os.path.join(log_dir, "legacy")
+        os.makedirs(legacy_dir)
+        with open(os.path.join(legacy_dir, "tts_usage.json"), "w") as f:
+            json.dump([old_entry, {**old_entry, "timestamp": datetime.now().isoformat()}], f)
+        migrated = TTSCostTracker(storage_path=os.path.join(legacy_dir, "tts_usage.jsonl"))
+        if migrated.get_daily_usage()["usage_count"] == 1 and len(migrated.usage_history) == 2:
+            print("✓ Legacy tts_usage.json migrated to the append-only log")
+        else:
+            print("✗ Legacy history not migrated")
+    finally:
+        shutil.rmtree(log_dir, ignore_errors=True)
+    
     print("\n✅ TTS optimization test completed!")
     
     # Recommendations
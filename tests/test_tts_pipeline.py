@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test the sentence-pipelined TTS: sentence splitting, ordering and time to first audio
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.tts_pipeline import SentenceChunker, SentenceTTSPipeline
+
+
+class FakeTTS:
+    """Streams a few chunks per sentence; longer sentences take longer"""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+
+    async def text_to_speech_stream(self, text, voice_id=None):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            for part in range(3):
+                await asyncio.sleep(0.002 * len(text) / 3)
+                yield f"{text[:10]}|{part};".encode()
+        finally:
+            self.active -= 1
+
+
+async def test_tts_pipeline():
+    """Test sentence-pipelined TTS"""
+    print("🗣️ Testing sentence-pipelined TTS...")
+
+    # Test 1: Streamed text is split into sentences as it arrives
+    print("\n1️⃣ Testing sentence chunker...")
+    chunker = SentenceChunker(min_chars=10, max_chars=80)
+    text = ("Hi! Dr. Smith called about your appointment. It's at 3.30 tomorrow, "
+            "and he asked whether you could bring the forms; the clinic needs them signed before the visit starts "
+            "so please don't forget")
+    sentences = []
+    for i in range(0, len(text), 7):  # Token-sized deltas
+        sentences.extend(chunker.feed(text[i:i + 7]))
+    rest = chunker.flush()
+    if rest:
+        sentences.append(rest)
+    if sentences[0] == "Hi! Dr. Smith called about your appointment." and " ".join(sentences) == text:
+        print(f"✓ Split into {len(sentences)} pieces: {sentences}")
+    else:
+        print(f"✗ Unexpected split: {sentences}")
+
+    # Test 2: Audio comes out in sentence order with bounded concurrency
+    print("\n2️⃣ Testing ordered audio with bounded concurrency...")
+    tts = FakeTTS()
+    pipeline = SentenceTTSPipeline(tts, max_concurrency=2)
+    spoken = ["This first sentence is rather long and slow to synthesize.", "Short one.",
+              "A third sentence.", "And the last sentence of the turn."]
+    for sentence in spoken:
+        pipeline.submit(sentence)
+    pipeline.close()
+    chunks = [chunk async for chunk in pipeline.chunks()]
+    order = [chunk.sentence_index for chunk in chunks]
+    sequences = [chunk.sequence for chunk in chunks]
+    ends = [chunk.sentence_index for chunk in chunks if chunk.is_sentence_end]
+    if order == sorted(order) and sequences == list(range(len(chunks))) and ends == [0, 1, 2, 3] \
+            and tts.max_active == 2:
+        print(f"✓ {len(chunks)} chunks in order, at most {tts.max_active} sentences synthesized at once")
+    else:
+        print(f"✗ Unexpected order {order}, ends {ends}, max concurrency {tts.max_active}")
+
+    # Test 3: First audio arrives after the first sentence, not after the whole response
+    print("\n3️⃣ Testing time to first audio...")
+    tts = FakeTTS()
+    pipeline = SentenceTTSPipeline(tts)
+    chunker = SentenceChunker()
+    started = time.perf_counter()
+
+    async def fake_llm():
+        # ~20ms per delta, like a streaming completion
+        for word in ("Sure, I can help with that. " * 6).split(" "):
+            await asyncio.sleep(0.02)
+            for sentence in chunker.feed(word + " "):
+                pipeline.submit(sentence)
+        rest = chunker.flush()
+        if rest:
+            pipeline.submit(rest)
+        pipeline.close()
+
+    llm_task = asyncio.create_task(fake_llm())
+    async for _ in pipeline.chunks():
+        pass
+    await llm_task
+    total_ms = (time.perf_counter() - started) * 1000
+    metrics = pipeline.get_metrics()
+    if metrics["time_to_first_audio_ms"] < total_ms / 2:
+        print(f"✓ First audio after {metrics['time_to_first_audio_ms']}ms of a {total_ms:.0f}ms turn")
+    else:
+        print(f"✗ First audio too late: {metrics}")
+
+    # Test 4: Text streamed before a tool call stays in the final response
+    print("\n4️⃣ Testing text streamed around a tool call...")
+    from core import eva
+
+    completions = [
+        ("Let me check.", [{"id": "call_1", "type": "function", "function": {"name": "web_search_tool", "arguments": "{}"}}]),
+        ("It is sunny today.", None)
+    ]
+
+    async def fake_completion(client, headers, payload, on_text=None):
+        content, tool_calls = completions.pop(0)
+        on_text(content)
+        message = {"role": "assistant", "content": content}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        return 200, {"model": payload["model"], "choices": [{"message": message}]}
+
+    run_id = "test_tts_pipeline_tool_turn"
+    eva.active_conversations[run_id] = {"messages": [], "context": "general", "mode": "assistant", "stream": True}
+    chunker = SentenceChunker(min_chars=5)
+    spoken = []
+    saved = eva.post_chat_completion
+    eva.post_chat_completion = fake_completion
+    try:
+        response = await eva.get_agent_response(run_id, "What's the weather?",
+                                                on_text=lambda delta: spoken.extend(chunker.feed(delta)))
+    finally:
+        eva.post_chat_completion = saved
+        eva.active_conversations.pop(run_id, None)
+    spoken.append(chunker.flush())
+    if response == "Let me check. It is sunny today." and spoken == ["Let me check.", "It is sunny today."]:
+        print(f"✓ Final response matches what was spoken: {response!r}")
+    else:
+        print(f"✗ Final response {response!r} differs from spoken {spoken}")
+
+    print("\n✅ TTS pipeline tests completed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_tts_pipeline())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Test realtime VAD: re-framing of arbitrary chunks, energy/zero-crossing pre-gate and hysteresis
+"""
+
+import asyncio
+import json
+import random
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.websockets import WebSocketState
+from voice.realtime_voice import PCMReframer, VoiceActivityDetector, RealTimeVoiceManager
+
+RATE = 16000
+
+
+def vowel(seconds: float, f0: float = 130, level: float = 0.3) -> bytes:
+    """Synthetic voiced speech: harmonics of f0 shaped by vowel-like formants, slowly modulated"""
+    t = np.arange(int(seconds * RATE)) / RATE
+    signal = np.zeros_like(t)
+    for k in range(1, 30):
+        f = k * f0
+        weight = (np.exp(-((f - 700) / 300) ** 2) + 0.5 * np.exp(-((f - 1200) / 300) ** 2)
+                  + 0.2 * np.exp(-((f - 2500) / 400) ** 2) + 0.05)
+        signal += weight * np.sin(2 * np.pi * f * t)
+    signal *= 1 + 0.3 * np.sin(2 * np.pi * 4 * t)
+    return (signal / np.abs(signal).max() * level * 32767).astype(np.int16).tobytes()
+
+
+def silence(seconds: float) -> bytes:
+    return bytes(int(seconds * RATE) * 2)
+
+
+def hiss(seconds: float, dbfs: float = -50) -> bytes:
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(seconds * RATE)) * 32767 * 10 ** (dbfs / 20)).astype(np.int16).tobytes()
+
+
+def random_chunks(data: bytes, low: int = 1, high: int = 3000):
+    """Split like a browser would: arbitrary sizes, odd byte counts included"""
+    chunks, i = [], 0
+    while i < len(data):
+        size = random.randint(low, high)
+        chunks.append(data[i:i + size])
+        i += size
+    return chunks
+
+
+def run(vad: VoiceActivityDetector, data: bytes, chunk_bytes=None):
+    chunks = random_chunks(data) if chunk_bytes is None else \
+        [data[i:i + chunk_bytes] for i in range(0, len(data), chunk_bytes)]
+    return [result for chunk in chunks for result in vad.process(chunk)]
+
+
+def speech_span(results):
+    """(first, last) frame index decided as speech"""
+    flags = [speech for _, speech in results]
+    if True not in flags:
+        return None
+    return flags.index(True), len(flags) - 1 - flags[::-1].index(True)
+
+
+class FakeWebSocket:
+    client_state = WebSocketState.CONNECTED
+
+    def __init__(self):
+        self.text = []
+
+    async def send_text(self, data):
+        self.text.append(json.loads(data))
+
+
+class FakeSTT:
+    def __init__(self):
+        self.received = []
+
+    async def speech_to_text(self, audio_data, sample_rate=None):
+        self.received.append(audio_data)
+        return ""
+
+
+async def test_vad():
+    """Test realtime VAD"""
+    print("🎙️ Testing realtime VAD...")
+    random.seed(1)
+    utterance = silence(0.6) + vowel(1.2) + silence(0.9)
+
+    # Test 1: Arbitrary chunk sizes come out as exact frames with nothing lost
+    print("\n1️⃣ Testing re-framing...")
+    reframer = PCMReframer(480)
+    chunks = random_chunks(utterance)
+    frames = [frame for chunk in chunks for frame in reframer.split(chunk)]
+    rebuilt = b"".join(frame.tobytes() for frame in frames)
+    if all(len(frame) == 480 for frame in frames) and rebuilt == utterance[:len(rebuilt)] \
+            and len(rebuilt) + reframer.pending_bytes == len(utterance):
+        print(f"✓ {len(chunks)} chunks of 1-3000 bytes -> {len(frames)} exact 30ms frames, "
+              f"{reframer.pending_bytes} bytes carried over")
+    else:
+        print(f"✗ Re-framing lost or reordered audio ({len(rebuilt)} of {len(utterance)} bytes)")
+
+    # Test 2: Speech is detected whatever the chunk size (it used to need exactly one frame per chunk)
+    print("\n2️⃣ Testing detection across chunk sizes...")
+    spans = {}
+    for label, size in (("random", None), ("100 bytes", 100), ("4096 bytes", 4096), ("1 frame", 960)):
+        spans[label] = speech_span(run(VoiceActivityDetector(), utterance, size))
+    if all(spans.values()) and len(set(spans.values())) == 1:
+        start, end = spans["1 frame"]
+        print(f"✓ Same speech span (frames {start}-{end} of 30ms) for chunks of {', '.join(spans)}")
+    else:
+        print(f"✗ Detection depends on chunk size: {spans}")
+    if VoiceActivityDetector().is_speech(vowel(0.5)[:10000]):
+        print("✓ is_speech() on a 10000-byte chunk of speech returns True")
+    else:
+        print("✗ is_speech() missed speech in a non-frame-sized chunk")
+
+    # Test 3: Clear silence and quiet hiss skip the WebRTC VAD call
+    print("\n3️⃣ Testing pre-gate...")
+    vad = VoiceActivityDetector()
+    quiet = silence(2) + hiss(2)
+    results = run(vad, quiet)
+    stats = vad.get_stats()
+    if not any(speech for _, speech in results) and stats["pre_gated"] == stats["frames"]:
+        print(f"✓ {stats['frames']} frames of silence and -50 dBFS hiss: 0 VAD calls")
+    else:
+        print(f"✗ Unexpected gating: {stats}")
+    vad = VoiceActivityDetector()
+    run(vad, utterance)
+    stats = vad.get_stats()
+    speech_frames = int(1.2 * 1000 / 30)
+    if stats["vad_calls"] <= speech_frames + 2:
+        print(f"✓ Utterance: {stats['vad_calls']} VAD calls for {stats['frames']} frames "
+              f"({stats['pre_gated']} pre-gated)")
+    else:
+        print(f"✗ Silence around the utterance was not gated: {stats}")
+
+    # Timing: with and without the pre-gate (gate disabled = VAD on every frame), 100ms chunks
+    mostly_quiet = (silence(20) + vowel(2) + hiss(8)) * 3
+    for label, gate_dbfs in (("pre-gate", -55), ("no gate", -200)):
+        best = None
+        for _ in range(3):
+            vad = VoiceActivityDetector(energy_gate_dbfs=gate_dbfs, noise_zcr=1.0 if gate_dbfs < -100 else 0.35)
+            started = time.perf_counter()
+            run(vad, mostly_quiet, 3200)
+            elapsed = (time.perf_counter() - started) * 1000
+            best = min(best or elapsed, elapsed)
+        print(f"  {label}: {len(mostly_quiet) / 2 / RATE:.0f}s of mostly quiet audio in {best:.0f}ms, "
+              f"{vad.get_stats()['vad_calls']} VAD calls")
+
+    # Test 4: Hysteresis is configurable: a higher start ratio starts later, a higher end ratio ends sooner
+    print("\n4️⃣ Testing hysteresis...")
+    default = speech_span(run(VoiceActivityDetector(), utterance, 960))
+    strict = speech_span(run(VoiceActivityDetector(start_ratio=0.9, end_ratio=0.6), utterance, 960))
+    if strict[0] > default[0] and strict[1] < default[1]:
+        print(f"✓ Default span {default}, strict (start 0.9, end 0.6) span {strict}")
+    else:
+        print(f"✗ Hysteresis settings had no effect: {default} vs {strict}")
+    short_gap = vowel(0.6) + silence(0.15) + vowel(0.6)
+    flags = [speech for _, speech in run(VoiceActivityDetector(), short_gap, 960)]
+    first = flags.index(True)
+    if all(flags[first:]):
+        print("✓ A 150ms pause inside speech does not end it")
+    else:
+        print("✗ Speech dropped out during a short pause")
+    try:
+        VoiceActivityDetector(frame_duration=25)
+        print("✗ 25ms frames accepted")
+    except ValueError:
+        print("✓ Frame durations other than 10/20/30ms rejected")
+
+    # Test 5: The voice manager finds the utterance in arbitrarily chunked audio
+    print("\n5️⃣ Testing voice session...")
+    stt = FakeSTT()
+    manager = RealTimeVoiceManager(stt, None)
+    await manager.connect_voice_session(FakeWebSocket(), "s1", "user", "general", "assistant")
+    for chunk in random_chunks(utterance + silence(0.5)):
+        await manager.process_audio_chunk("s1", chunk)
+    if len(stt.received) == 1 and len(stt.received[0]) > len(vowel(1.2)) // 2:
+        print(f"✓ One utterance of {len(stt.received[0]) / 2 / RATE:.2f}s sent to STT")
+    else:
+        print(f"✗ Unexpected utterances: {[len(audio) for audio in stt.received]}")
+
+    print("\n✅ Realtime VAD tests completed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_vad())
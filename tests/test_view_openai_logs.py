@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Test the OpenAI log viewer: backwards reading, tail across rotated segments, follow across
+rotation and the incremental cost checkpoint
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import view_openai_logs
+from scripts.view_openai_logs import (read_lines_backwards, tail_lines, follow_log,
+                                      update_cost_checkpoint, _empty_checkpoint)
+
+
+def success_line(hour: str = "2025-01-01 12", model: str = "gpt-4o", tokens: int = 10, cost: float = 0.001) -> str:
+    data = {"model": model, "total_tokens": tokens, "actual_cost_usd": cost}
+    return f"{hour}:00:00 - INFO - ✅ REQUEST SUCCESS: {json.dumps(data)}\n"
+
+
+def requests_counted(checkpoint) -> int:
+    return sum(stats["requests"] for models in checkpoint["hours"].values() for stats in models.values())
+
+
+def test_view_openai_logs():
+    """Test the OpenAI log viewer"""
+    print("📜 Testing OpenAI log viewer...")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        # Test 1: Lines come back last to first, across block boundaries and without a final newline
+        print("\n1️⃣ Testing read_lines_backwards...")
+        path = tmp / "plain.log"
+        lines = [f"line {i} " + "x" * (i % 37) for i in range(500)]
+        path.write_text("\n".join(lines))
+        backwards = list(read_lines_backwards(path, block_size=64))
+        if backwards == lines[::-1]:
+            print(f"✓ {len(lines)} lines read backwards in 64-byte blocks, last line without newline included")
+        else:
+            print(f"✗ Backwards read differs: {backwards[:3]}")
+
+        # Test 2: tail spans the active file and rotated (plain and gzip) segments, filters applied
+        print("\n2️⃣ Testing tail_lines...")
+        active = tmp / "openai_api.log"
+        old = tmp / "openai_api.20250101-000000.log.gz"
+        middle = tmp / "openai_api.20250102-000000.log"
+        with gzip.open(old, "wt") as f:
+            f.write("".join(f"old {i} REQUEST START\n" for i in range(5)))
+        middle.write_text("".join(f"middle {i} ERROR\n" for i in range(3)))
+        active.write_text("".join(f"active {i} REQUEST START\n" for i in range(2)))
+        now = time.time()
+        os.utime(old, (now - 200, now - 200))
+        os.utime(middle, (now - 100, now - 100))
+        tail = tail_lines(active, 7)
+        errors = tail_lines(active, 10, show_errors_only=True)
+        starts = tail_lines(active, 3, filter_type="request start")
+        if tail == ["old 3 REQUEST START", "old 4 REQUEST START", "middle 0 ERROR", "middle 1 ERROR",
+                    "middle 2 ERROR", "active 0 REQUEST START", "active 1 REQUEST START"] \
+                and errors == ["middle 0 ERROR", "middle 1 ERROR", "middle 2 ERROR"] \
+                and starts == ["old 4 REQUEST START", "active 0 REQUEST START", "active 1 REQUEST START"]:
+            print("✓ Last 7 lines span gzip, plain and active segments in order; filters applied")
+        else:
+            print(f"✗ Unexpected tail {tail} / errors {errors} / starts {starts}")
+
+        # Test 3: follow prints appended lines and picks up the new file after rotation
+        print("\n3️⃣ Testing follow_log...")
+        followed = []
+        original_display = view_openai_logs.display_line
+        view_openai_logs.display_line = followed.append
+        stop = threading.Event()
+        follower = threading.Thread(target=follow_log, args=(active,), kwargs={"poll_interval": 0.02, "stop": stop})
+        follower.start()
+        try:
+            time.sleep(0.1)
+            with open(active, "a") as f:
+                f.write("after start 1\nafter ")
+            time.sleep(0.1)
+            with open(active, "a") as f:
+                f.write("start 2\n")
+            time.sleep(0.1)
+            os.replace(active, tmp / "openai_api.20250103-000000.log")
+            active.write_text("rotated 1\n")
+            time.sleep(0.2)
+        finally:
+            stop.set()
+            follower.join(timeout=2)
+            view_openai_logs.display_line = original_display
+        if followed == ["after start 1", "after start 2", "rotated 1"] and not follower.is_alive():
+            print(f"✓ Followed {followed} (existing lines skipped, split line joined, rotation handled)")
+        else:
+            print(f"✗ Unexpected follow output {followed}")
+
+        # Test 4: Repeated cost runs only count new lines, even while the file is under 256 bytes
+        print("\n4️⃣ Testing cost checkpoint...")
+        costs = tmp / "costs" / "openai_api.log"
+        costs.parent.mkdir()
+        checkpoint = _empty_checkpoint()
+        costs.write_text(success_line())
+        update_cost_checkpoint(costs, checkpoint)
+        with open(costs, "a") as f:
+            f.write(success_line())
+        update_cost_checkpoint(costs, checkpoint)
+        small_file_count = requests_counted(checkpoint)
+        if costs.stat().st_size < 256 and small_file_count == 2:
+            print(f"✓ Growing {costs.stat().st_size}-byte file: 2 lines counted as {small_file_count} requests")
+        else:
+            print(f"✗ Growing small file counted {small_file_count} requests for 2 lines")
+
+        for _ in range(5):
+            with open(costs, "a") as f:
+                f.write(success_line(tokens=20))
+            bytes_read = update_cost_checkpoint(costs, checkpoint)
+        if requests_counted(checkpoint) == 7 and bytes_read == len(success_line(tokens=20).encode()):
+            print(f"✓ Past 256 bytes: 7 requests, last run read only {bytes_read} new bytes")
+        else:
+            print(f"✗ Unexpected count {requests_counted(checkpoint)} (last run read {bytes_read} bytes)")
+
+        # Test 5: After rotation (rename + gzip) the old segment isn't recounted; the new file is counted
+        rotated = costs.with_name("openai_api.20250104-000000.log")
+        os.replace(costs, rotated)
+        with open(rotated, "a") as f:
+            f.write(success_line())  # Written just before rotation, not seen yet
+        with open(rotated, "rb") as src, gzip.open(str(rotated) + ".gz", "wb") as dst:
+            dst.write(src.read())
+        rotated.unlink()
+        costs.write_text(success_line(model="gpt-4o-mini"))
+        update_cost_checkpoint(costs, checkpoint)
+        again = requests_counted(checkpoint)
+        update_cost_checkpoint(costs, checkpoint)
+        models = checkpoint["hours"]["2025-01-01 12"]
+        if again == 9 and requests_counted(checkpoint) == 9 and models["gpt-4o-mini"]["requests"] == 1:
+            print("✓ Rotated segment's unseen tail and the new file counted once: 9 requests")
+        else:
+            print(f"✗ Unexpected counts after rotation: {again}, {checkpoint['hours']}")
+
+        # Test 6: A segment counted between its rename and its gzip isn't counted again once gzipped
+        with open(costs, "a") as f:
+            f.write(success_line(hour="2025-01-02 09"))
+        update_cost_checkpoint(costs, checkpoint)
+        rotated = costs.with_name("openai_api.20250105-000000.log")
+        os.replace(costs, rotated)
+        costs.write_text(success_line(hour="2025-01-02 10"))
+        update_cost_checkpoint(costs, checkpoint)
+        counted = requests_counted(checkpoint)
+        with open(rotated, "rb") as src, gzip.open(str(rotated) + ".gz", "wb") as dst:
+            dst.write(src.read())
+        rotated.unlink()
+        update_cost_checkpoint(costs, checkpoint)
+        if counted == 11 and requests_counted(checkpoint) == 11:
+            print("✓ Rotate, analyze, gzip, analyze: the gzipped segment is recognised by content, 11 requests")
+        else:
+            print(f"✗ Gzipped segment recounted: {counted} before gzip, {requests_counted(checkpoint)} after")
+
+    print("\n✅ OpenAI log viewer tests completed!")
+
+
+if __name__ == "__main__":
+    test_view_openai_logs()
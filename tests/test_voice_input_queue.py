@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Test the voice websocket input path: the receive loop only queues frames, a per-session
+worker processes them, and the bounded queue drops or applies backpressure when full
+"""
+
+import asyncio
+import base64
+import json
+import sys
+import os
+import time
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.websockets import WebSocketState
+from voice.audio_framing import encode_frame, decode_frame
+from voice.realtime_voice import RealTimeVoiceManager
+
+RATE = 16000
+CHUNK_BYTES = 3200  # 100ms of 16-bit PCM
+STT_SECONDS = 0.5
+PROCESS_SECONDS = 0.02
+
+
+def vowel(seconds: float, f0: float = 130) -> bytes:
+    """Synthetic voiced speech, loud enough to start the VAD"""
+    t = np.arange(int(seconds * RATE)) / RATE
+    signal = sum(np.exp(-((k * f0 - 700) / 400) ** 2) * np.sin(2 * np.pi * k * f0 * t) for k in range(1, 25))
+    signal *= 1 + 0.3 * np.sin(2 * np.pi * 4 * t)
+    return (signal / np.abs(signal).max() * 0.3 * 32767).astype(np.int16).tobytes()
+
+
+def pcm_frames(audio: bytes, stream_id: int = 1):
+    chunks = [audio[i:i + CHUNK_BYTES] for i in range(0, len(audio), CHUNK_BYTES)]
+    return [encode_frame(stream_id, sequence, "pcm_s16le", chunk) for sequence, chunk in enumerate(chunks)]
+
+
+class FakeWebSocket:
+    client_state = WebSocketState.CONNECTED
+
+    def __init__(self):
+        self.events = []
+
+    async def send_text(self, data):
+        self.events.append(json.loads(data))
+
+    async def send_bytes(self, data):
+        pass
+
+    def of_type(self, event_type):
+        return [event["data"] for event in self.events if event["type"] == event_type]
+
+
+class SlowSTT:
+    def __init__(self):
+        self.utterances = 0
+
+    async def speech_to_text(self, audio_data, sample_rate=None):
+        await asyncio.sleep(STT_SECONDS)
+        self.utterances += 1
+        return ""
+
+
+class SlowManager(RealTimeVoiceManager):
+    """Takes PROCESS_SECONDS per audio frame and records which frames it processed"""
+
+    def __init__(self, frames: int, overflow: str):
+        super().__init__(None, None)
+        self.input_queue_frames = frames
+        self.input_overflow = overflow
+        self.handled = []
+
+    async def handle_websocket_binary(self, session_id, data):
+        await asyncio.sleep(PROCESS_SECONDS)
+        self.handled.append(decode_frame(data).sequence)
+
+
+class PausingTranscriber:
+    """Incremental transcriber whose finish() waits until released"""
+
+    def __init__(self):
+        self.audio = bytearray()
+        self.resets = 0
+        self.finishing = asyncio.Event()
+        self.release = asyncio.Event()
+        self.window_at_finish = None
+
+    @property
+    def has_audio(self):
+        return bool(self.audio)
+
+    def feed(self, pcm):
+        self.audio += pcm
+
+    async def finish(self):
+        self.finishing.set()
+        await self.release.wait()
+        self.window_at_finish = len(self.audio)
+        self.audio = bytearray()
+        return "", None
+
+    def reset(self):
+        self.resets += 1
+        self.audio = bytearray()
+
+
+async def receive(manager, frames, pace: float = 0.0):
+    """Play the receive loop: queue each frame; returns the longest time one took to queue (ms)"""
+    longest = 0.0
+    for frame in frames:
+        started = time.perf_counter()
+        await manager.enqueue_input("s1", frame)
+        longest = max(longest, (time.perf_counter() - started) * 1000)
+        await asyncio.sleep(pace)
+    return longest
+
+
+async def wait_until(condition, timeout: float = 10.0):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+
+
+async def test_voice_input_queue():
+    """Test the voice input queue"""
+    print("📥 Testing voice input queue...")
+    utterance = bytes(RATE) + vowel(1.0) + bytes(int(1.2 * RATE) * 2)
+    frames = pcm_frames(utterance * 2)
+
+    # Test 1: Reading continues while an utterance is transcribed
+    print("\n1️⃣ Testing receive loop during STT...")
+    stt = SlowSTT()
+    manager = RealTimeVoiceManager(stt, None)
+    await manager.connect_voice_session(FakeWebSocket(), "s1", "lu", "general", "assistant", binary_audio=True)
+    longest_inline = 0.0
+    for frame in frames:
+        started = time.perf_counter()
+        await manager.handle_websocket_binary("s1", frame)  # Before: processed inside the receive loop
+        longest_inline = max(longest_inline, (time.perf_counter() - started) * 1000)
+    await manager.disconnect_voice_session("s1")
+
+    stt = SlowSTT()
+    manager = RealTimeVoiceManager(stt, None)
+    await manager.connect_voice_session(FakeWebSocket(), "s1", "lu", "general", "assistant", binary_audio=True)
+    longest = await receive(manager, frames, pace=0.02)
+    await wait_until(lambda: stt.utterances == 2)
+    stats = manager.get_stats()["input"]["s1"]
+    if stt.utterances == 2 and longest < 10 and stats["dropped"] == 0 and stats["processed"] == len(frames):
+        print(f"✓ 2 utterances transcribed; longest receive-loop stall {longest:.1f}ms "
+              f"(inline processing: {longest_inline:.0f}ms), max lag {stats['lag_ms']['max']:.0f}ms")
+    else:
+        print(f"✗ Unexpected: {stt.utterances} utterances, stall {longest:.1f}ms, stats {stats}")
+    await manager.disconnect_voice_session("s1")
+
+    # Test 2: drop_oldest keeps the receive loop reading and drops the oldest audio
+    print("\n2️⃣ Testing drop_oldest...")
+    manager = SlowManager(frames=10, overflow="drop_oldest")
+    websocket = FakeWebSocket()
+    await manager.connect_voice_session(websocket, "s1", "lu", "general", "assistant", binary_audio=True)
+    longest = await receive(manager, pcm_frames(vowel(6.0)))
+    stats = manager.get_stats()["input"]["s1"]
+    await wait_until(lambda: manager.handled and manager.handled[-1] == 59)
+    if stats["max_depth"] <= 10 and stats["dropped"] == 60 - 10 - 1 and stats["blocked"] == 0 and longest < 10 \
+            and manager.handled == sorted(manager.handled) and manager.handled[-1] == 59:
+        print(f"✓ 60 frames queued in at most {longest:.1f}ms each; {stats['dropped']} oldest dropped, "
+              f"newest kept (processed {manager.handled[:3]}...{manager.handled[-2:]})")
+    else:
+        print(f"✗ Unexpected drops: {stats}, processed {manager.handled}")
+
+    # Test 3: Control messages skip the queue instead of waiting behind audio
+    await receive(manager, pcm_frames(vowel(2.0)))
+    depth = len(manager.voice_sessions["s1"]["input"])
+    started = time.perf_counter()
+    await manager.enqueue_input("s1", json.dumps({"type": "stop_conversation"}))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    stats = manager.get_stats()["input"]["s1"]
+    if websocket.of_type("conversation_stopped") and stats["blocked"] == 0 and stats["control_messages"] == 1:
+        print(f"✓ stop_conversation handled in {elapsed_ms:.1f}ms ahead of {depth} queued frames")
+    else:
+        print(f"✗ Control message waited: {stats}")
+
+    # Test 4: Legacy base64 audio_chunk messages are dropped under overload like binary audio
+    chunk = base64.b64encode(vowel(0.1)).decode()
+    dropped = stats["dropped"]
+    started = time.perf_counter()
+    for _ in range(30):
+        await manager.enqueue_input("s1", json.dumps({"type": "audio_chunk", "audio": chunk}))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    stats = manager.get_stats()["input"]["s1"]
+    if stats["dropped"] - dropped >= 20 and stats["blocked"] == 0 and stats["max_depth"] <= 10:
+        print(f"✓ 30 JSON audio chunks queued in {elapsed_ms:.1f}ms, {stats['dropped'] - dropped} dropped, none blocked")
+    else:
+        print(f"✗ JSON audio not droppable: {stats}")
+    await manager.disconnect_voice_session("s1")
+
+    # Test 5: block applies backpressure instead: nothing dropped, the receive loop waits
+    print("\n3️⃣ Testing block...")
+    manager = SlowManager(frames=5, overflow="block")
+    await manager.connect_voice_session(FakeWebSocket(), "s1", "lu", "general", "assistant", binary_audio=True)
+    longest = await receive(manager, pcm_frames(vowel(3.0)))
+    await wait_until(lambda: len(manager.handled) == 30)
+    stats = manager.get_stats()["input"]["s1"]
+    if manager.handled == list(range(30)) and stats["dropped"] == 0 and stats["blocked"] > 0 and stats["max_depth"] <= 5:
+        print(f"✓ All 30 frames processed in order; receive loop waited {stats['blocked']} times "
+              f"({stats['blocked_ms']:.0f}ms, longest {longest:.0f}ms)")
+    else:
+        print(f"✗ Unexpected backpressure: {stats}, processed {manager.handled}")
+
+    # Test 6: Disconnect stops the worker
+    worker = manager.voice_sessions["s1"]["input_worker"]
+    await manager.disconnect_voice_session("s1")
+    if worker.done() and "s1" not in manager.get_stats()["input"]:
+        print("✓ Worker stopped on disconnect")
+    else:
+        print("✗ Worker still running after disconnect")
+
+    # Test 7: An interrupt while the worker awaits the final transcript leaves its state alone until it is done
+    print("\n4️⃣ Testing interrupt during finish...")
+    manager = RealTimeVoiceManager(SlowSTT(), None)
+    websocket = FakeWebSocket()
+    await manager.connect_voice_session(websocket, "s1", "lu", "general", "assistant", binary_audio=True)
+    transcriber = PausingTranscriber()
+    manager.voice_sessions["s1"]["transcriber"] = transcriber
+    await receive(manager, pcm_frames(utterance))
+    await asyncio.wait_for(transcriber.finishing.wait(), timeout=10)
+    fed = len(transcriber.audio)
+    await manager.enqueue_input("s1", json.dumps({"type": "interrupt"}))
+    resets_during = transcriber.resets
+    interrupted = bool(websocket.of_type("interrupted"))
+    transcriber.release.set()
+    await wait_until(lambda: transcriber.resets == 1)
+    session = manager.voice_sessions["s1"]
+    if interrupted and resets_during == 0 and transcriber.window_at_finish == fed and transcriber.resets == 1 \
+            and not session["reset_pending"] and not session["audio_buffer"].is_recording:
+        print(f"✓ Interrupt answered at once; finish() kept its {fed // 2 / RATE:.2f}s window, reset applied afterwards")
+    else:
+        print(f"✗ Interrupt raced the worker: resets during finish {resets_during}, "
+              f"window {transcriber.window_at_finish} of {fed}, resets {transcriber.resets}")
+    await manager.disconnect_voice_session("s1")
+
+    print(f"\n📊 Queue stats: {json.dumps(stats)}")
+    print("\n✅ Voice input queue tests completed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_voice_input_queue())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Test realtime voice turns: agent response streamed into sentence TTS inside the socket,
+overlapping LLM and TTS, with per-stage timestamps sent to the client
+"""
+
+import asyncio
+import json
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.websockets import WebSocketState
+from voice.audio_framing import decode_frame
+from voice.realtime_voice import RealTimeVoiceManager
+
+RESPONSE = ("Sure, I booked the table for four at eight tonight. "
+            "The place is downtown, right next to the old cinema. "
+            "I also sent you the confirmation email with directions.")
+TOKEN_SECONDS = 0.01
+TTS_SECONDS = 0.05
+
+
+class FakeWebSocket:
+    client_state = WebSocketState.CONNECTED
+
+    def __init__(self):
+        self.events = []   # (loop time, event)
+        self.binary = []   # (loop time, frame)
+
+    async def send_text(self, data):
+        self.events.append((asyncio.get_running_loop().time(), json.loads(data)))
+
+    async def send_bytes(self, data):
+        self.binary.append((asyncio.get_running_loop().time(), decode_frame(data)))
+
+    def of_type(self, event_type):
+        return [event["data"] for _, event in self.events if event["type"] == event_type]
+
+
+class FakeSTT:
+    async def speech_to_text(self, audio_data, sample_rate=None):
+        return "book a table for four tonight"
+
+
+class FakeTTS:
+    def __init__(self):
+        self.sentences = []
+        self.cached = set()
+
+    def is_cached(self, text, voice_id=None):
+        return text in self.cached
+
+    async def text_to_speech_stream(self, text, voice_id=None):
+        self.sentences.append(text)
+        await asyncio.sleep(TTS_SECONDS)
+        yield f"<{text}>".encode()
+
+
+class FakeAgent:
+    """Streams RESPONSE word by word, like the OpenAI streaming completion"""
+
+    def __init__(self):
+        self.calls = []
+        self.finished_at = None
+
+    async def __call__(self, session_id, session, user_text, on_text):
+        self.calls.append((session_id, session["context"], session["mode"], user_text))
+        for word in RESPONSE.split(" "):
+            await asyncio.sleep(TOKEN_SECONDS)
+            on_text(word + " ")
+        self.finished_at = asyncio.get_running_loop().time()
+        return RESPONSE
+
+
+async def test_voice_turn():
+    """Test realtime voice turns"""
+    print("🗣️ Testing realtime voice turns...")
+    tts = FakeTTS()
+    agent = FakeAgent()
+    manager = RealTimeVoiceManager(FakeSTT(), tts)
+    manager.agent_handler = agent
+    charged = []
+    manager.on_tts_usage = lambda text, session_id: charged.append((session_id, text))
+    tts.cached.add(RESPONSE.split(". ")[0] + ".")
+    websocket = FakeWebSocket()
+    await manager.connect_voice_session(websocket, "s1", "lu", "work", "assistant", binary_audio=True)
+
+    # Test 1: A turn goes to the agent with the session's context and mode
+    print("\n1️⃣ Testing agent wiring...")
+    await manager.process_speech_utterance("s1", b"\x00\x00" * 1600, 16000)
+    await manager.voice_sessions["s1"]["turn"].wait()  # The turn runs in the background
+    responses = websocket.of_type("eva_response")
+    if agent.calls == [("s1", "work", "assistant", "book a table for four tonight")] \
+            and responses == [{"text": RESPONSE}] and "I heard you say" not in json.dumps(responses):
+        print(f"✓ Agent called with context 'work', mode 'assistant'; reply {RESPONSE[:40]!r}...")
+    else:
+        print(f"✗ Unexpected agent calls {agent.calls} / responses {responses}")
+
+    # Test 2: Text streams to the client and is spoken sentence by sentence
+    partial = "".join(event["text"] for event in websocket.of_type("eva_response_partial"))
+    audio = b"".join(frame.payload for _, frame in websocket.binary)
+    if partial.strip() == RESPONSE and len(tts.sentences) == 3 \
+            and audio == b"".join(f"<{sentence}>".encode() for sentence in tts.sentences):
+        print(f"✓ {len(websocket.of_type('eva_response_partial'))} text deltas; "
+              f"{len(tts.sentences)} sentences synthesized and sent in order")
+    else:
+        print(f"✗ Unexpected streaming: {partial!r}, sentences {tts.sentences}")
+
+    # Test 3: Each synthesized sentence is charged to the session, except cached ones
+    if charged == [("s1", sentence) for sentence in tts.sentences[1:]] and len(charged) == 2:
+        print(f"✓ {len(charged)} uncached sentences charged ({sum(len(text) for _, text in charged)} characters); "
+              f"cached first sentence free")
+    else:
+        print(f"✗ Unexpected charges {charged}")
+
+    # Test 4: The first audio reaches the client before the agent has finished
+    print("\n2️⃣ Testing overlap...")
+    first_audio_at = next(at for at, frame in websocket.binary if frame.payload)
+    if first_audio_at < agent.finished_at:
+        print(f"✓ First audio sent {(agent.finished_at - first_audio_at) * 1000:.0f}ms before the LLM finished")
+    else:
+        print("✗ Audio only started after the LLM finished")
+
+    # Test 5: Per-stage timestamps, live and as a summary
+    print("\n3️⃣ Testing per-stage timestamps...")
+    stages = [event["stage"] for event in websocket.of_type("turn_stage")]
+    timing = websocket.of_type("turn_timing")
+    expected = ["stt_done", "llm_first_text", "first_sentence", "tts_first_audio", "llm_done", "tts_done"]
+    summary = timing[0]["stages"] if timing else {}
+    ordered = [summary.get(stage) for stage in expected]
+    if set(stages) == set(expected) and None not in ordered and ordered == sorted(ordered):
+        print("✓ Stages (ms after speech end): " + ", ".join(f"{stage} {summary[stage]}" for stage in expected))
+    else:
+        print(f"✗ Unexpected stages {stages}, summary {timing}")
+
+    # Test 6: Without an agent engine the turn reports an error instead of echoing
+    print("\n4️⃣ Testing missing agent...")
+    manager.agent_handler = None
+    websocket.events.clear()
+    await manager.process_conversation_turn("s1", "hello")
+    errors = websocket.of_type("error")
+    if errors and not websocket.of_type("eva_response"):
+        print(f"✓ {errors[0]['message']}")
+    else:
+        print("✗ Turn ran without an agent engine")
+
+    # Test 7: An agent failure ends the turn cleanly
+    async def failing_agent(session_id, session, user_text, on_text):
+        on_text("Let me check. ")
+        raise RuntimeError("OpenAI API error 500")
+
+    manager.agent_handler = failing_agent
+    websocket.events.clear()
+    await manager.process_conversation_turn("s1", "hello")
+    errors = websocket.of_type("error")
+    if errors and "500" in errors[0]["message"] and not manager._event_tasks:
+        print("✓ Agent failure reported and the turn's tasks cleaned up")
+    else:
+        print(f"✗ Unexpected failure handling: {errors}")
+
+    print("\n✅ Realtime voice turn tests completed!")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_voice_turn())
@@ -0,0 +1,69 @@
+"""
+Binary audio framing for EVA's voice WebSocket
+Audio travels as binary WebSocket frames with a small fixed header instead of base64 inside JSON
+
+Frame layout (network byte order, 12-byte header):
+    version   uint8   FRAME_VERSION
+    flags     uint8   FLAG_END marks the last frame of a stream
+    codec     uint8   see CODECS
+    reserved  uint8
+    stream_id uint32  one id per utterance / response
+    sequence  uint32  frame number within the stream, from 0
+    payload   bytes
+"""
+
+import struct
+from dataclasses import dataclass
+from typing import Dict
+
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct(">BBBxII")
+FLAG_END = 0x01
+
+CODECS: Dict[str, int] = {
+    "pcm_s16le": 0,   # 16 kHz mono 16-bit PCM (what the VAD expects)
+    "mp3": 1,
+    "opus": 2,
+    "wav": 3,
+    "webm": 4
+}
+CODEC_NAMES: Dict[int, str] = {value: name for name, value in CODECS.items()}
+
+
+class FrameError(ValueError):
+    """A binary message that isn't a valid audio frame"""
+
+
+@dataclass
+class AudioFrame:
+    stream_id: int
+    sequence: int
+    codec: str
+    payload: bytes
+    end: bool = False
+
+
+def encode_frame(stream_id: int, sequence: int, codec: str, payload: bytes, end: bool = False) -> bytes:
+    """Build a binary audio frame"""
+    if codec not in CODECS:
+        raise FrameError(f"Unknown codec: {codec}")
+    header = FRAME_HEADER.pack(FRAME_VERSION, FLAG_END if end else 0, CODECS[codec], stream_id, sequence)
+    return header + payload
+
+
+def decode_frame(data: bytes) -> AudioFrame:
+    """Parse a binary audio frame"""
+    if len(data) < FRAME_HEADER.size:
+        raise FrameError(f"Frame too short: {len(data)} bytes")
+    version, flags, codec_id, stream_id, sequence = FRAME_HEADER.unpack_from(data)
+    if version != FRAME_VERSION:
+        raise FrameError(f"Unsupported frame version: {version}")
+    if codec_id not in CODEC_NAMES:
+        raise FrameError(f"Unknown codec id: {codec_id}")
+    return AudioFrame(
+        stream_id=stream_id,
+        sequence=sequence,
+        codec=CODEC_NAMES[codec_id],
+        payload=bytes(data[FRAME_HEADER.size:]),
+        end=bool(flags & FLAG_END)
+    )
@@ -18,6 +18,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from integrations.zep_context_manager import ContextualMemoryManager, MemoryContext, AgentMode
 from integrations.private_context_auth import PrivateContextAuth
+from voice.audio_framing import encode_frame
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +45,9 @@ class EVAVoiceWorkflow:
         
         # Track active voice conversations
         self.voice_sessions: Dict[str, Dict[str, Any]] = {}
+        
+        # Binary audio stream ids for TTS output
+        self._tts_stream_id = 0
     
     async def start_voice_session(self, 
                                 session_id: str,
@@ -249,37 +253,48 @@ class EVAVoiceWorkflow:
             yield f"Error: {str(e)}"
     
     async def generate_streaming_tts(self, text: str) -> AsyncGenerator[Dict[str, Any], None]:
-        """Generate streaming TTS response"""
+        """Generate streaming TTS response
+        
+        Audio is yielded as binary frames (voice.audio_framing) ready for websocket.send_bytes;
+        the last frame of the stream carries the END flag.
+        """
+        self._tts_stream_id += 1
+        stream_id = self._tts_stream_id
+        chunk_count = 0
         try:
             # Check if TTS handler supports streaming
             if hasattr(self.tts_handler, 'text_to_speech_stream'):
-                # Stream audio chunks
-                chunk_count = 0
-                async for audio_chunk in self.tts_handler.text_to_speech_stream(text):
-                    import base64
-                    audio_base64 = base64.b64encode(audio_chunk).decode('utf-8')
-                    yield {
-                        "type": "tts_chunk", 
-                        "audio": audio_base64,
-                        "format": "mp3",
-                        "chunk_index": chunk_count
-                    }
-                    chunk_count += 1
+                audio_chunks = self.tts_handler.text_to_speech_stream(text)
             else:
-                # Generate full audio
-                audio_data = await self.tts_handler.text_to_speech(text)
-                import base64
-                audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+                audio_chunks = self._single_chunk(await self.tts_handler.text_to_speech(text))
+            
+            async for audio_chunk in audio_chunks:
                 yield {
-                    "type": "tts_audio",
-                    "audio": audio_base64,
-                    "format": "mp3"
+                    "type": "tts_chunk",
+                    "frame": encode_frame(stream_id, chunk_count, "mp3", audio_chunk),
+                    "stream_id": stream_id,
+                    "format": "mp3",
+                    "chunk_index": chunk_count
                 }
+                chunk_count += 1
+            
+            yield {
+                "type": "tts_chunk",
+                "frame": encode_frame(stream_id, chunk_count, "mp3", b"", end=True),
+                "stream_id": stream_id,
+                "format": "mp3",
+                "chunk_index": chunk_count,
+                "is_final": True
+            }
                 
         except Exception as e:
             logger.error(f"Error generating TTS: {e}")
             yield {"type": "tts_error", "message": f"TTS error: {str(e)}"}
     
+    @staticmethod
+    async def _single_chunk(audio_data: bytes):
+        yield audio_data
+    
     async def handle_interruption(self, session_id: str):
         """Handle user interruption of current response"""
         if session_id not in self.voice_sessions:
@@ -288,8 +303,8 @@ class EVAVoiceWorkflow:
         session = self.voice_sessions[session_id]
         session["conversation_state"] = "interrupted"
         
-        # Stop any ongoing processing
-        # This would integrate with cancellation tokens in a full implementation
+        # The reply in progress runs in RealTimeVoiceManager, whose handle_interruption
+        # cancels it (agent call, TTS streams, unsaved history)
         
         logger.info(f"Voice session {session_id} interrupted")
         
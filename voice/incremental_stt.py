@@ -0,0 +1,214 @@
+"""
+Incremental transcription for the real-time voice websocket
+Decodes a rolling window of the utterance with local faster-whisper while the user is
+still speaking. Words are committed once two consecutive decodes agree on them (stable
+prefix), the audio behind committed words is dropped from the window, and end of speech
+only has to decode what is left in the window.
+"""
+
+import os
+import re
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from integrations.audio_decode import pcm16_to_float32, TARGET_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# Emit speech_partial events while the user speaks (needs local STT)
+STT_PARTIALS_ENABLED = os.getenv("STT_PARTIALS_ENABLED", "true").lower() == "true"
+# New audio needed before the window is decoded again
+STT_PARTIAL_INTERVAL_MS = int(os.getenv("STT_PARTIAL_INTERVAL_MS", "500"))
+# Longest window decoded at once; older audio is committed and dropped
+STT_PARTIAL_WINDOW_SECONDS = float(os.getenv("STT_PARTIAL_WINDOW_SECONDS", "8"))
+# Pool slots a partial decode leaves free: partials are skipped when the local STT pool has
+# no more than this many free, so end-of-speech decodes and uploads keep their capacity
+STT_PARTIAL_RESERVED_SLOTS = int(os.getenv("STT_PARTIAL_RESERVED_SLOTS", "2"))
+# Committed words passed to the decoder as context for the next window
+STT_PROMPT_WORDS = 30
+# Words ending this close to the end of the window may be cut off and are not committed yet
+COMMIT_MARGIN_SECONDS = 0.2
+
+Word = Tuple[float, float, str]  # (start s, end s, text), absolute within the utterance
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def _join(words: List[Word]) -> str:
+    return "".join(word for _, _, word in words).strip()
+
+
+class IncrementalTranscriber:
+    """Rolling-window transcription of one utterance"""
+
+    def __init__(self, stt, on_partial: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                 sample_rate: int = TARGET_SAMPLE_RATE, language: str = "en",
+                 interval_ms: int = STT_PARTIAL_INTERVAL_MS,
+                 window_seconds: float = STT_PARTIAL_WINDOW_SECONDS,
+                 reserved_slots: int = STT_PARTIAL_RESERVED_SLOTS):
+        """
+        Args:
+            stt: LocalSTTHandler (its async transcribe() with word timestamps is used)
+            on_partial: Awaited with each speech_partial payload
+            sample_rate: Rate of the PCM passed to feed()
+            reserved_slots: Pool slots partial decodes leave to other requests
+        """
+        self.stt = stt
+        self.on_partial = on_partial
+        self.sample_rate = sample_rate
+        self.language = language
+        self.interval_samples = int(TARGET_SAMPLE_RATE * interval_ms / 1000)
+        self.window_samples = int(TARGET_SAMPLE_RATE * window_seconds)
+        self.reserved_slots = reserved_slots
+        self._decode_task: Optional[asyncio.Task] = None
+        self.reset()
+
+        # Stats
+        self.partials_sent = 0
+        self.partials_skipped = 0
+        self.decodes = 0
+        self.decoded_seconds = 0.0
+
+    def reset(self):
+        """Forget the current utterance"""
+        self._chunks: List[np.ndarray] = []
+        self._window = np.zeros(0, dtype=np.float32)
+        self._window_offset = 0.0      # Utterance time (s) of the window's first sample
+        self._received = 0             # Samples received for this utterance
+        self._decoded_upto = 0         # _received at the last decode
+        self.committed: List[Word] = []
+        self.tentative: List[Word] = []
+        if self._decode_task and not self._decode_task.done():
+            self._decode_task.cancel()
+        self._decode_task = None
+
+    @property
+    def has_audio(self) -> bool:
+        return self._received > 0
+
+    def feed(self, pcm: bytes):
+        """Add speech PCM (16-bit mono); starts a window decode when enough is new"""
+        samples = pcm16_to_float32(pcm, self.sample_rate)
+        if not len(samples):
+            return
+        self._chunks.append(samples)
+        self._received += len(samples)
+
+        busy = self._decode_task is not None and not self._decode_task.done()
+        if not busy and self._received - self._decoded_upto >= self.interval_samples:
+            if getattr(self.stt, "free_slots", self.reserved_slots + 1) <= self.reserved_slots:
+                # The pool is nearly full: skip this partial rather than compete with final decodes
+                self._decoded_upto = self._received
+                self.partials_skipped += 1
+                return
+            self._decode_task = asyncio.create_task(self._decode_partial())
+
+    def _collect(self) -> np.ndarray:
+        if self._chunks:
+            self._window = np.concatenate([self._window] + self._chunks)
+            self._chunks = []
+        return self._window
+
+    async def _decode(self, window: np.ndarray) -> List[Word]:
+        """Decode the window; words come back in utterance time"""
+        prompt = _join(self.committed[-STT_PROMPT_WORDS:]) or None
+        offset = self._window_offset
+        result = await self.stt.transcribe(window, self.language, word_timestamps=True, initial_prompt=prompt)
+        self.decodes += 1
+        self.decoded_seconds += len(window) / TARGET_SAMPLE_RATE
+        committed_end = self.committed[-1][1] if self.committed else 0.0
+        # Words the window still overlaps with committed ones are dropped
+        return [(offset + start, offset + end, word) for start, end, word in (result.words or [])
+                if offset + start >= committed_end - 0.05 and _normalize(word)]
+
+    async def _decode_partial(self):
+        try:
+            self._decoded_upto = self._received
+            window = self._collect()
+            hypothesis = await self._decode(window)
+
+            # Commit the prefix this decode shares with the previous one
+            window_end = self._window_offset + len(window) / TARGET_SAMPLE_RATE
+            agreed = 0
+            while (agreed < min(len(hypothesis), len(self.tentative)) and
+                   hypothesis[agreed][1] <= window_end - COMMIT_MARGIN_SECONDS and
+                   _normalize(hypothesis[agreed][2]) == _normalize(self.tentative[agreed][2])):
+                agreed += 1
+            self.committed.extend(hypothesis[:agreed])
+            self.tentative = hypothesis[agreed:]
+
+            # Keep the window bounded: force-commit the older half if nothing agreed for too long
+            if len(self._window) > self.window_samples:
+                horizon = self._window_offset + len(self._window) / TARGET_SAMPLE_RATE - self.window_samples / TARGET_SAMPLE_RATE / 2
+                forced = [word for word in self.tentative if word[1] <= horizon]
+                self.committed.extend(forced)
+                self.tentative = self.tentative[len(forced):]
+            self._trim_window()
+
+            await self._send_partial()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Partials are best effort: the final decode still runs at end of speech
+            logger.warning(f"Partial transcription failed: {e}")
+
+    def _trim_window(self):
+        """Drop audio behind the last committed word"""
+        if not self.committed:
+            return
+        cut = round((self.committed[-1][1] - self._window_offset) * TARGET_SAMPLE_RATE)
+        if cut > 0:
+            self._window = self._window[cut:]
+            self._window_offset += cut / TARGET_SAMPLE_RATE
+
+    async def _send_partial(self):
+        if not self.on_partial:
+            return
+        committed, tentative = _join(self.committed), _join(self.tentative)
+        self.partials_sent += 1
+        await self.on_partial({
+            "text": f"{committed} {tentative}".strip(),
+            "committed": committed,
+            "tentative": tentative,
+            "audio_ms": int(self._received / TARGET_SAMPLE_RATE * 1000)
+        })
+
+    async def finish(self) -> Tuple[str, Dict[str, Any]]:
+        """
+        End of speech: decode only the trailing (uncommitted) window and return the full
+        text with timing. The transcriber is reset afterwards.
+        """
+        started = time.perf_counter()
+        try:
+            if self._decode_task and not self._decode_task.done():
+                # A partial decode of older audio is no longer useful
+                self._decode_task.cancel()
+                try:
+                    await self._decode_task
+                except asyncio.CancelledError:
+                    pass
+            window = self._collect()
+            tail = await self._decode(window) if len(window) else []
+            text = _join(self.committed + tail)
+            return text, {
+                "final_window_ms": int(len(window) / TARGET_SAMPLE_RATE * 1000),
+                "utterance_ms": int(self._received / TARGET_SAMPLE_RATE * 1000),
+                "finish_ms": round((time.perf_counter() - started) * 1000, 1),
+                "committed_words": len(self.committed)
+            }
+        finally:
+            self.reset()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "partials_sent": self.partials_sent,
+            "partials_skipped": self.partials_skipped,
+            "decodes": self.decodes,
+            "decoded_seconds": round(self.decoded_seconds, 2)
+        }
@@ -3,25 +3,97 @@ Real-time voice streaming infrastructure for EVA Agent
 Combines WebSocket communication with voice processing
 """
 
+import os
+import time
 import asyncio
 import json
 import base64
-import io
 import numpy as np
-from typing import Dict, Any, Optional, AsyncGenerator
+from typing import Dict, Any, Optional, AsyncGenerator, Awaitable, Callable, List, Tuple, Union
 from datetime import datetime
 import logging
 from fastapi import WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
 import webrtcvad
 import audioop
-from collections import deque
+from collections import OrderedDict, deque
+from voice.audio_framing import encode_frame, decode_frame, FrameError, FRAME_HEADER, FLAG_END, CODECS
+from integrations.elevenlabs_streaming import ELEVENLABS_STREAMING_SESSIONS, TTSStreamError
+from voice.incremental_stt import IncrementalTranscriber, STT_PARTIALS_ENABLED
+from integrations.tts_pipeline import SentenceChunker, SentenceTTSPipeline
 
 logger = logging.getLogger(__name__)
 
+# Payload size of outgoing binary audio frames
+AUDIO_FRAME_BYTES = 16 * 1024
+
+# WebRTC VAD filtering (0-3, higher = more aggressive) and frame length (10, 20 or 30 ms)
+VAD_AGGRESSIVENESS = int(os.getenv("VAD_AGGRESSIVENESS", "2"))
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "30"))
+# Pre-gate: frames quieter than this are silence without asking WebRTC VAD, as are
+# frames up to 12 dB louder whose zero-crossing rate says broadband noise (hiss, fans)
+VAD_ENERGY_GATE_DBFS = float(os.getenv("VAD_ENERGY_GATE_DBFS", "-55"))
+VAD_NOISE_ZCR = float(os.getenv("VAD_NOISE_ZCR", "0.35"))
+# Hysteresis over the last VAD_WINDOW_FRAMES frames: speech starts once at least
+# VAD_START_RATIO of them are voiced and ends once fewer than VAD_END_RATIO are
+VAD_WINDOW_FRAMES = int(os.getenv("VAD_WINDOW_FRAMES", "10"))
+VAD_START_RATIO = float(os.getenv("VAD_START_RATIO", "0.5"))
+VAD_END_RATIO = float(os.getenv("VAD_END_RATIO", "0.1"))
+# Audio kept from before speech onset, and the longest utterance (longer ones are ended at the cap)
+AUDIO_PRE_ROLL_MS = int(os.getenv("AUDIO_PRE_ROLL_MS", "300"))
+AUDIO_MAX_UTTERANCE_SECONDS = float(os.getenv("AUDIO_MAX_UTTERANCE_SECONDS", "30"))
+# Barge-in: speech onset while Eva is replying cancels the reply (interrupt messages always do)
+VOICE_BARGE_IN = os.getenv("VOICE_BARGE_IN", "true").lower() == "true"
+# Time a cancelled turn gets to close its streams and roll back before it is left behind
+VOICE_CANCEL_TIMEOUT_MS = int(os.getenv("VOICE_CANCEL_TIMEOUT_MS", "500"))
+# Incoming frames waiting for a session's processing worker, and what happens when that
+# many are waiting: "drop_oldest" drops the oldest raw PCM frame, "block" stops reading the socket
+VOICE_INPUT_QUEUE_FRAMES = int(os.getenv("VOICE_INPUT_QUEUE_FRAMES", "200"))
+VOICE_INPUT_OVERFLOW = os.getenv("VOICE_INPUT_OVERFLOW", "drop_oldest")
+# JSON messages handled as soon as they are received, ahead of queued audio
+CONTROL_MESSAGE_TYPES = ("interrupt", "start_conversation", "stop_conversation")
+# Compressed input streams are held whole until they end: bytes allowed per stream and
+# streams open at once per session; a stream over either cap is dropped with an error event
+VOICE_MAX_STREAM_BYTES = int(os.getenv("VOICE_MAX_STREAM_BYTES", str(4 * 1024 * 1024)))
+VOICE_MAX_INCOMING_STREAMS = int(os.getenv("VOICE_MAX_INCOMING_STREAMS", "4"))
+# Headroom above the energy gate within which the zero-crossing check applies
+NOISE_GATE_HEADROOM_DB = 12
+
+class PCMReframer:
+    """
+    Splits 16-bit PCM chunks of any size into exact frames. The partial frame at the end
+    of a chunk is kept in a fixed frame-sized buffer and completed by the next chunk.
+    """
+    
+    def __init__(self, frame_length: int):
+        self.frame_length = frame_length
+        self.frame_bytes = frame_length * 2
+        self._carry = bytearray(self.frame_bytes)
+        self._carry_len = 0
+    
+    @property
+    def pending_bytes(self) -> int:
+        return self._carry_len
+    
+    def reset(self):
+        self._carry_len = 0
+    
+    def split(self, chunk: bytes) -> np.ndarray:
+        """Complete frames in the carried remainder + chunk, as an int16 (frames, frame_length) array"""
+        data = bytes(self._carry[:self._carry_len]) + chunk if self._carry_len else chunk
+        count = len(data) // self.frame_bytes
+        whole = count * self.frame_bytes
+        self._carry_len = len(data) - whole
+        self._carry[:self._carry_len] = data[whole:]
+        return np.frombuffer(data, dtype=np.int16, count=count * self.frame_length).reshape(count, self.frame_length)
+
 class VoiceActivityDetector:
     """Voice Activity Detection using WebRTC VAD"""
     
-    def __init__(self, aggressiveness: int = 2, sample_rate: int = 16000, frame_duration: int = 30):
+    def __init__(self, aggressiveness: int = VAD_AGGRESSIVENESS, sample_rate: int = 16000,
+                 frame_duration: int = VAD_FRAME_MS, energy_gate_dbfs: float = VAD_ENERGY_GATE_DBFS,
+                 noise_zcr: float = VAD_NOISE_ZCR, window_frames: int = VAD_WINDOW_FRAMES,
+                 start_ratio: float = VAD_START_RATIO, end_ratio: float = VAD_END_RATIO):
         """
         Initialize VAD
         
@@ -29,74 +101,195 @@ class VoiceActivityDetector:
             aggressiveness: 0-3, higher = more aggressive filtering
             sample_rate: Audio sample rate (8000, 16000, 32000, 48000)
             frame_duration: Frame duration in ms (10, 20, 30)
+            energy_gate_dbfs: Frames below this RMS level are silence (pre-gate)
+            noise_zcr: Zero crossings per sample above which a quiet frame is noise
+            window_frames: Frames the speech/silence decision looks back over
+            start_ratio: Voiced share of the window that starts speech
+            end_ratio: Voiced share of the window below which speech ends
         """
+        if frame_duration not in (10, 20, 30):
+            raise ValueError(f"VAD frame duration must be 10, 20 or 30 ms, not {frame_duration}")
         self.vad = webrtcvad.Vad(aggressiveness)
         self.sample_rate = sample_rate
         self.frame_duration = frame_duration
         self.frame_length = int(sample_rate * frame_duration / 1000)
-        self.buffer = deque(maxlen=50)  # Rolling buffer for speech detection
+        self.reframer = PCMReframer(self.frame_length)
+        # Gates on summed squares per frame (RMS^2 * frame_length), which avoids a sqrt per frame
+        self.energy_gate = (32768 * 10 ** (energy_gate_dbfs / 20)) ** 2 * self.frame_length
+        self.noise_gate = self.energy_gate * 10 ** (NOISE_GATE_HEADROOM_DB / 10)
+        self.noise_crossings = noise_zcr * (self.frame_length - 1)
+        self.start_ratio = start_ratio
+        self.end_ratio = end_ratio
+        self.buffer = deque(maxlen=window_frames)  # Rolling buffer for speech detection
+        self.voiced_frames = 0  # Voiced frames in the buffer
+        self.triggered = False
         
-    def is_speech(self, audio_chunk: bytes) -> bool:
-        """Check if audio chunk contains speech"""
-        try:
-            # Ensure we have the right frame size
-            if len(audio_chunk) != self.frame_length * 2:  # 2 bytes per 16-bit sample
-                return False
-                
-            # Check if this frame contains speech
-            is_speech = self.vad.is_speech(audio_chunk, self.sample_rate)
-            
-            # Add to rolling buffer
-            self.buffer.append(is_speech)
-            
-            # Consider it speech if recent frames show speech activity
-            recent_speech = sum(self.buffer)
-            return recent_speech > len(self.buffer) * 0.3  # 30% threshold
+        # Stats
+        self.frames = 0
+        self.vad_calls = 0
+    
+    def reset(self):
+        """Drop the carried partial frame and the speech state"""
+        self.reframer.reset()
+        self.buffer.clear()
+        self.voiced_frames = 0
+        self.triggered = False
+    
+    def _gate(self, frames: np.ndarray) -> np.ndarray:
+        """True for frames that are clearly silence (low energy, or quiet and noise-like)"""
+        samples = frames.astype(np.float32)
+        energy = np.einsum("ij,ij->i", samples, samples)
+        silent = energy < self.energy_gate
+        # Zero crossings only matter for quiet frames above the energy gate
+        quiet = ~silent & (energy < self.noise_gate)
+        if quiet.any():
+            signs = np.signbit(frames[quiet])
+            crossings = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1)
+            silent[quiet] = crossings > self.noise_crossings
+        return silent
+    
+    def process(self, audio_chunk: bytes) -> List[Tuple[bytes, bool]]:
+        """
+        Split a chunk of any size into frames and decide speech for each (with hysteresis).
+        Returns (frame, is_speech) for every complete frame; a trailing partial frame is
+        carried over to the next chunk.
+        """
+        frames = self.reframer.split(audio_chunk)
+        if not len(frames):
+            return []
+        silent = self._gate(frames)
+        self.frames += len(frames)
+        
+        if not self.triggered and not self.voiced_frames and silent.all():
+            # Nothing voiced in the window and only silence coming: the decision can't change
+            self.buffer.extend([False] * min(len(frames), self.buffer.maxlen))
+            self.triggered = False
+            return [(frame.tobytes(), False) for frame in frames]
+        
+        results = []
+        buffer = self.buffer
+        start_voiced = self.start_ratio * buffer.maxlen
+        end_voiced = self.end_ratio * buffer.maxlen
+        for frame, gated in zip(frames, silent.tolist()):
+            pcm = frame.tobytes()
+            voiced = False
+            if not gated:
+                self.vad_calls += 1
+                try:
+                    voiced = self.vad.is_speech(pcm, self.sample_rate)
+                except Exception as e:
+                    logger.error(f"VAD error: {e}")
+            if len(buffer) == buffer.maxlen:
+                self.voiced_frames -= buffer[0]
+            buffer.append(voiced)
+            self.voiced_frames += voiced
             
-        except Exception as e:
-            logger.error(f"VAD error: {e}")
-            return False
+            # Hysteresis: harder to start speech than to keep it going
+            if not self.triggered and self.voiced_frames >= start_voiced:
+                self.triggered = True
+            elif self.triggered and self.voiced_frames < end_voiced:
+                self.triggered = False
+            results.append((pcm, self.triggered))
+        return results
+    
+    def is_speech(self, audio_chunk: bytes) -> bool:
+        """Check if audio chunk contains speech (the decision after its last complete frame)"""
+        self.process(audio_chunk)
+        return self.triggered
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "frames": self.frames,
+            "vad_calls": self.vad_calls,
+            "pre_gated": self.frames - self.vad_calls,
+            "speech": self.triggered
+        }
 
 class AudioBuffer:
-    """Manages audio buffering and streaming"""
+    """
+    Manages audio buffering for one voice session in a fixed-size ring of 16-bit samples.
+    Outside speech only the last pre-roll of audio is kept (so onsets aren't clipped);
+    an utterance is capped at max_utterance_seconds and ended when it reaches the cap.
+    """
     
-    def __init__(self, sample_rate: int = 16000, channels: int = 1):
+    def __init__(self, sample_rate: int = 16000, channels: int = 1,
+                 pre_roll_ms: int = AUDIO_PRE_ROLL_MS, max_utterance_seconds: float = AUDIO_MAX_UTTERANCE_SECONDS):
         self.sample_rate = sample_rate
         self.channels = channels
-        self.buffer = io.BytesIO()
-        self.speech_buffer = io.BytesIO()
+        self.pre_roll_samples = int(sample_rate * pre_roll_ms / 1000)
+        self.max_utterance_samples = int(sample_rate * max_utterance_seconds)
+        self._ring = np.zeros(self.pre_roll_samples + self.max_utterance_samples, dtype=np.int16)
+        self._written = 0          # Samples written since the session started
+        self._start = None         # Sample index where the current utterance starts
+        self._floor = 0            # Pre-roll never reaches back before the end of the last utterance
         self.is_recording = False
         self.silence_frames = 0
         self.max_silence_frames = 30  # ~1 second at 30ms frames
         
+        # Stats
+        self.utterances = 0
+        self.truncated = 0
+    
+    @property
+    def memory_bytes(self) -> int:
+        """Memory held for audio (fixed at construction)"""
+        return self._ring.nbytes
+    
+    @property
+    def speech_samples(self) -> int:
+        return self._written - self._start if self._start is not None else 0
+    
+    def _write(self, audio_data: bytes):
+        samples = np.frombuffer(audio_data, dtype=np.int16, count=len(audio_data) // 2)
+        capacity = len(self._ring)
+        if len(samples) > capacity:
+            samples = samples[-capacity:]
+            self._written += len(audio_data) // 2 - capacity
+        position = self._written % capacity
+        first = min(len(samples), capacity - position)
+        self._ring[position:position + first] = samples[:first]
+        self._ring[:len(samples) - first] = samples[first:]
+        self._written += len(samples)
+    
     def add_audio(self, audio_data: bytes, is_speech: bool):
-        """Add audio data to buffer"""
-        self.buffer.write(audio_data)
-        
-        if is_speech:
-            self.silence_frames = 0
-            if not self.is_recording:
-                self.is_recording = True
-                self.speech_buffer = io.BytesIO()
-                logger.info("Speech detected - started recording")
-            
-            self.speech_buffer.write(audio_data)
-        else:
-            if self.is_recording:
-                self.silence_frames += 1
-                self.speech_buffer.write(audio_data)  # Include some silence
-                
-                if self.silence_frames >= self.max_silence_frames:
-                    # End of speech detected
-                    logger.info("End of speech detected")
-                    return self.get_speech_audio()
+        """Add audio data to buffer; returns the utterance once it has ended (or hit the cap)"""
+        if is_speech and not self.is_recording:
+            self.is_recording = True
+            self._start = max(self._written - self.pre_roll_samples, self._floor)
+            logger.info("Speech detected - started recording")
+        
+        self._write(audio_data)
+        
+        if self.is_recording:
+            # Include some silence
+            self.silence_frames = 0 if is_speech else self.silence_frames + 1
+            if self.silence_frames >= self.max_silence_frames:
+                # End of speech detected
+                logger.info("End of speech detected")
+                return self.get_speech_audio()
+            if self.speech_samples >= self.max_utterance_samples:
+                logger.warning(f"Utterance reached {self.max_utterance_samples / self.sample_rate:.0f}s - ending it")
+                self.truncated += 1
+                return self.get_speech_audio()
         
         return None
     
+    def peek_speech_audio(self) -> bytes:
+        """The utterance recorded so far (pre-roll included), without ending it"""
+        if self._start is None:
+            return b""
+        capacity = len(self._ring)
+        start = max(self._start, self._written - capacity)
+        begin, end = start % capacity, self._written % capacity
+        if begin < end or self._written == start:
+            return self._ring[begin:end].tobytes()
+        return self._ring[begin:].tobytes() + self._ring[:end].tobytes()
+    
     def get_speech_audio(self) -> Optional[bytes]:
         """Get recorded speech audio"""
-        if self.speech_buffer.tell() > 0:
-            audio = self.speech_buffer.getvalue()
+        if self.speech_samples > 0:
+            audio = self.peek_speech_audio()
+            self.utterances += 1
             self.reset_speech_buffer()
             return audio
         return None
@@ -105,7 +298,216 @@ class AudioBuffer:
         """Reset speech recording"""
         self.is_recording = False
         self.silence_frames = 0
-        self.speech_buffer = io.BytesIO()
+        self._start = None
+        self._floor = self._written
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "memory_bytes": self.memory_bytes,
+            "buffered_ms": int(self.speech_samples / self.sample_rate * 1000),
+            "utterances": self.utterances,
+            "truncated": self.truncated
+        }
+
+def input_message_type(message: str) -> Optional[str]:
+    """The "type" of a JSON websocket message; None if it isn't a JSON object"""
+    try:
+        data = json.loads(message)
+    except ValueError:
+        return None
+    return data.get("type") if isinstance(data, dict) else None
+
+def is_droppable_frame(data: Union[bytes, str]) -> bool:
+    """
+    Raw PCM audio mid-stream (binary, or a legacy base64 audio_chunk message): losing one
+    under overload skips a moment of audio, nothing more
+    """
+    if isinstance(data, str):
+        return input_message_type(data) == "audio_chunk"
+    if len(data) < FRAME_HEADER.size:
+        return False
+    _, flags, codec_id, _, _ = FRAME_HEADER.unpack_from(data)
+    return codec_id == CODECS["pcm_s16le"] and not flags & FLAG_END
+
+class VoiceInputQueue:
+    """
+    Incoming websocket frames of one session, waiting for the session's processing worker,
+    so the receive loop never waits for VAD, STT or a turn. Bounded: when full, the oldest
+    raw PCM frame is dropped ("drop_oldest"), or the receive loop waits for room ("block",
+    which leaves the backlog in the socket). Frames that can't be dropped without breaking
+    something (JSON messages other than audio, end frames, compressed streams) always wait.
+    """
+    
+    def __init__(self, maxsize: int = VOICE_INPUT_QUEUE_FRAMES, overflow: str = VOICE_INPUT_OVERFLOW):
+        if overflow not in ("drop_oldest", "block"):
+            raise ValueError(f"Input overflow policy must be 'drop_oldest' or 'block', not {overflow!r}")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self._items: deque = deque()  # (data, droppable, queued at)
+        self._changed = asyncio.Condition()
+        
+        # Stats
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.blocked_ms = 0.0
+        self.max_depth = 0
+        self.control_messages = 0  # Handled ahead of the queue (see RealTimeVoiceManager.enqueue_input)
+        self.lag_ms = deque(maxlen=100)  # Time recent frames waited for the worker
+        self.max_lag_ms = 0.0
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    def _drop_oldest(self) -> bool:
+        for index, (_, droppable, _) in enumerate(self._items):
+            if droppable:
+                del self._items[index]
+                self.dropped += 1
+                return True
+        return False
+    
+    async def put(self, data: Union[bytes, str], droppable: Optional[bool] = None) -> bool:
+        """Queue a frame (droppable as is_droppable_frame() unless given); returns False if it was dropped instead"""
+        if droppable is None:
+            droppable = is_droppable_frame(data)
+        async with self._changed:
+            if len(self._items) >= self.maxsize:
+                if self.overflow == "drop_oldest" and droppable:
+                    if not self._drop_oldest():
+                        # Nothing older can go: this frame is the oldest droppable one
+                        self.dropped += 1
+                        return False
+                else:
+                    self.blocked += 1
+                    started = time.perf_counter()
+                    await self._changed.wait_for(lambda: len(self._items) < self.maxsize)
+                    self.blocked_ms += (time.perf_counter() - started) * 1000
+            self._items.append((data, droppable, time.perf_counter()))
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._changed.notify_all()
+        return True
+    
+    async def get(self) -> Union[bytes, str]:
+        """Next frame, waiting for one if the queue is empty"""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._items)
+            data, _, queued_at = self._items.popleft()
+            self._changed.notify_all()
+        lag_ms = (time.perf_counter() - queued_at) * 1000
+        self.lag_ms.append(lag_ms)
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        return data
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "depth": len(self._items),
+            "max_depth": self.max_depth,
+            "capacity": self.maxsize,
+            "overflow": self.overflow,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "blocked": self.blocked,
+            "blocked_ms": round(self.blocked_ms, 1),
+            "control_messages": self.control_messages,
+            "lag_ms": {
+                "last": round(self.lag_ms[-1], 1) if self.lag_ms else None,
+                "avg": round(sum(self.lag_ms) / len(self.lag_ms), 1) if self.lag_ms else None,
+                "max": round(self.max_lag_ms, 1)
+            }
+        }
+
+class TurnTimeline:
+    """Per-stage timestamps of one voice turn, in ms since the user stopped speaking"""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.speech_end_at = datetime.now().isoformat()
+        self.stages: Dict[str, float] = {}
+    
+    def mark(self, stage: str) -> Optional[float]:
+        """Record a stage the first time it is reached; returns its time, or None if already recorded"""
+        if stage in self.stages:
+            return None
+        self.stages[stage] = round((time.perf_counter() - self.started) * 1000, 1)
+        return self.stages[stage]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"speech_end_at": self.speech_end_at, "stages": dict(self.stages)}
+
+class VoiceTurn:
+    """
+    The tasks of one conversation turn (agent, text forwarding, TTS), cancelled as a group.
+    Cancelling unwinds each task at its current await, which closes the HTTP and TTS
+    streams it holds and lets the agent engine roll back what it had persisted.
+    """
+    
+    def __init__(self):
+        self.tasks: List[asyncio.Task] = []
+        self.llm_task: Optional[asyncio.Task] = None
+        self.pipeline: Optional[SentenceTTSPipeline] = None
+        self.cancelled = False
+    
+    def spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self.tasks.append(task)
+        return task
+    
+    @property
+    def active(self) -> bool:
+        return any(not task.done() for task in self.tasks)
+    
+    @property
+    def llm_active(self) -> bool:
+        return self.llm_task is not None and not self.llm_task.done()
+    
+    async def wait(self):
+        """Until every task of the turn (including ones spawned meanwhile) has finished"""
+        while self.active:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+    
+    async def cancel(self, timeout_ms: int = VOICE_CANCEL_TIMEOUT_MS) -> Dict[str, Any]:
+        """Cancel every task and wait up to timeout_ms for them to unwind; returns what was freed"""
+        started = time.perf_counter()
+        self.cancelled = True
+        pipeline = self.pipeline
+        freed = {
+            "llm_streams": int(self.llm_active),
+            "tts_requests": pipeline.in_flight if pipeline else 0,
+            "sentences_dropped": pipeline.sentences - pipeline.sentences_done if pipeline else 0,
+            "characters_dropped": pipeline.characters - pipeline.characters_done if pipeline else 0
+        }
+        # A task cancelling its own turn (e.g. disconnect on a failed send) winds down by itself
+        current = asyncio.current_task()
+        pending = [task for task in self.tasks if not task.done() and task is not current]
+        for task in pending:
+            task.cancel()
+        if pipeline:
+            pending.append(asyncio.create_task(pipeline.cancel()))
+        stragglers = set()
+        if pending:
+            _, stragglers = await asyncio.wait(pending, timeout=timeout_ms / 1000)
+            if stragglers:
+                logger.warning(f"{len(stragglers)} turn task(s) still unwinding after {timeout_ms}ms")
+        return {
+            **freed,
+            "tasks": len(pending),
+            "stragglers": len(stragglers),
+            "cancel_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+
+class SessionSpeech:
+    """TTS backend for a sentence pipeline that speaks over the voice session's own TTS connection"""
+    
+    def __init__(self, manager: "RealTimeVoiceManager", session_id: str):
+        self.manager = manager
+        self.session_id = session_id
+    
+    def text_to_speech_stream(self, text: str, voice_id: Optional[str] = None):
+        return self.manager._synthesize(self.session_id, text)
 
 class RealTimeVoiceManager:
     """Manages real-time voice connections and processing"""
@@ -113,15 +515,48 @@ class RealTimeVoiceManager:
     def __init__(self, stt_handler, tts_handler):
         self.stt_handler = stt_handler
         self.tts_handler = tts_handler
+        self.tts_router = None  # Optional TTSTierRouter choosing local or ElevenLabs per reply
+        self.local_stt = None   # Optional LocalSTTHandler for partial transcripts while the user speaks
+        # Optional (text, session_id) callback charging each uncached text sent to tts_handler
+        # (e.g. TTSCostTracker.track_usage)
+        self.on_tts_usage: Optional[Callable[[str, str], Any]] = None
+        # Agent engine: async (session_id, session, user_text, on_text) -> response text,
+        # calling on_text with each piece of the response as it streams
+        self.agent_handler: Optional[Callable[[str, Dict[str, Any], str, Callable[[str], None]], Awaitable[str]]] = None
         self.active_connections: Dict[str, WebSocket] = {}
         self.voice_sessions: Dict[str, Dict[str, Any]] = {}
+        self.input_queue_frames = VOICE_INPUT_QUEUE_FRAMES
+        self.input_overflow = VOICE_INPUT_OVERFLOW
+        self.max_stream_bytes = VOICE_MAX_STREAM_BYTES
+        self.max_incoming_streams = VOICE_MAX_INCOMING_STREAMS
+        self._event_tasks = set()  # Events sent from synchronous callbacks
+        
+        # Turn stats
+        self.turns_started = 0
+        self.turns_cancelled = 0
+        self.cancel_stragglers = 0
+        self.cancel_ms = deque(maxlen=100)
+        self.freed = {"llm_streams": 0, "tts_requests": 0, "sentences_dropped": 0, "characters_dropped": 0}
+        self.streams_rejected = 0
         
     async def connect_voice_session(self, websocket: WebSocket, session_id: str, 
-                                  user_id: str, context: str, mode: str):
-        """Initialize a new voice session"""
-        await websocket.accept()
+                                  user_id: str, context: str, mode: str,
+                                  binary_audio: bool = False, tts_latency: Optional[int] = None):
+        """Initialize a new voice session
+        
+        With binary_audio, TTS audio is sent as binary frames (see voice.audio_framing)
+        instead of base64 inside JSON events. tts_latency (0-4) overrides the TTS
+        streaming latency for this session.
+        """
+        if websocket.client_state == WebSocketState.CONNECTING:
+            await websocket.accept()
+        
+        previous = self.voice_sessions.get(session_id)
+        if previous and previous.get("input_worker"):
+            previous["input_worker"].cancel()
         
         self.active_connections[session_id] = websocket
+        input_queue = VoiceInputQueue(self.input_queue_frames, self.input_overflow)
         self.voice_sessions[session_id] = {
             "user_id": user_id,
             "context": context,
@@ -130,23 +565,108 @@ class RealTimeVoiceManager:
             "audio_buffer": AudioBuffer(),
             "is_speaking": False,
             "conversation_active": False,
-            "last_activity": datetime.now()
+            "last_activity": datetime.now(),
+            "binary_audio": binary_audio,
+            "tts_latency": tts_latency,
+            "next_stream_id": 1,
+            "incoming_streams": {},  # stream_id -> audio so far of compressed (non-PCM) input streams
+            "rejected_streams": OrderedDict(),  # Stream ids over a cap; their frames are ignored until the end frame
+            "turn": None,            # VoiceTurn of the reply in progress
+            "transcriber": self._create_transcriber(session_id),
+            "input": input_queue,    # Frames received but not yet processed
+            "input_busy": False,     # The worker is processing a frame
+            "reset_pending": False,  # An interrupt's VAD/buffer/transcriber reset, left to the worker
+            "input_worker": asyncio.create_task(self._process_input(session_id, input_queue))
         }
         
         logger.info(f"Voice session {session_id} connected for user {user_id}")
         
         await self.send_voice_event(session_id, "voice_session_connected", {
             "session_id": session_id,
-            "status": "connected"
+            "status": "connected",
+            "audio_transport": "binary" if binary_audio else "base64"
         })
     
+    def _create_transcriber(self, session_id: str) -> Optional[IncrementalTranscriber]:
+        """Streaming partial transcripts need local STT; without it utterances are transcribed whole"""
+        if not (STT_PARTIALS_ENABLED and self.local_stt):
+            return None
+        
+        async def on_partial(partial: Dict[str, Any]):
+            await self.send_voice_event(session_id, "speech_partial", partial)
+        
+        return IncrementalTranscriber(self.local_stt, on_partial=on_partial)
+    
     async def disconnect_voice_session(self, session_id: str):
         """Clean up voice session"""
         if session_id in self.active_connections:
             del self.active_connections[session_id]
-        if session_id in self.voice_sessions:
-            del self.voice_sessions[session_id]
+        session = self.voice_sessions.pop(session_id, None)
+        if session:
+            session["incoming_streams"].clear()
+            if session.get("transcriber"):
+                session["transcriber"].reset()
+            turn = session.get("turn")
+            if turn and turn.active:
+                self._record_cancel(await turn.cancel())
+        if hasattr(self.tts_handler, "close_streaming_session"):
+            await self.tts_handler.close_streaming_session(session_id)
         logger.info(f"Voice session {session_id} disconnected")
+        
+        # Last, as the worker itself may be disconnecting (a failed send)
+        worker = session.get("input_worker") if session else None
+        if worker:
+            worker.cancel()
+            if worker is not asyncio.current_task():
+                await asyncio.gather(worker, return_exceptions=True)
+    
+    async def enqueue_input(self, session_id: str, data: Union[bytes, str]) -> bool:
+        """
+        Hand a received websocket frame (binary audio or a JSON message) to the session's
+        processing worker. Returns False if the frame was dropped because the queue is full.
+        Control messages (interrupt, start/stop) are handled right away instead, so they
+        don't wait behind queued audio.
+        """
+        session = self.voice_sessions.get(session_id)
+        if not session:
+            return False
+        if isinstance(data, bytes):
+            return await session["input"].put(data)
+        message_type = input_message_type(data)
+        if message_type in CONTROL_MESSAGE_TYPES:
+            session["input"].control_messages += 1
+            await self.handle_websocket_message(session_id, data)
+            return True
+        return await session["input"].put(data, droppable=message_type == "audio_chunk")
+    
+    async def _process_input(self, session_id: str, input_queue: VoiceInputQueue):
+        """The session's processing worker: frames in arrival order, one at a time"""
+        while True:
+            data = await input_queue.get()
+            session = self.voice_sessions.get(session_id)
+            if session:
+                session["input_busy"] = True
+            try:
+                if isinstance(data, bytes):
+                    await self.handle_websocket_binary(session_id, data)
+                else:
+                    await self.handle_websocket_message(session_id, data)
+            except Exception as e:
+                logger.error(f"Error processing voice input: {e}")
+            finally:
+                if session:
+                    session["input_busy"] = False
+                    if session["reset_pending"]:
+                        self._reset_input_state(session)
+            input_queue.processed += 1
+    
+    def _reset_input_state(self, session: Dict[str, Any]):
+        """Drop the speech being recorded: VAD, utterance buffer and partial transcripts"""
+        session["reset_pending"] = False
+        session["audio_buffer"].reset_speech_buffer()
+        session["vad"].reset()
+        if session.get("transcriber"):
+            session["transcriber"].reset()
     
     async def send_voice_event(self, session_id: str, event_type: str, data: Dict[str, Any]):
         """Send event to voice session"""
@@ -177,22 +697,35 @@ class RealTimeVoiceManager:
         # Update last activity
         session["last_activity"] = datetime.now()
         
-        # Check for speech
-        is_speech = vad.is_speech(audio_data)
-        
-        # Add to buffer and check for complete utterance
-        complete_audio = audio_buffer.add_audio(audio_data, is_speech)
-        
-        if complete_audio:
-            # Speech utterance complete - process it
-            await self.process_speech_utterance(session_id, complete_audio)
+        # Chunks of any size are re-framed into exact VAD frames (remainders carry over)
+        transcriber = session.get("transcriber")
+        for frame, is_speech in vad.process(audio_data):
+            if session.get("reset_pending"):
+                break  # Interrupted while this chunk was being processed; the rest is stale
+            
+            # Add to buffer and check for complete utterance
+            was_recording = audio_buffer.is_recording
+            complete_audio = audio_buffer.add_audio(frame, is_speech)
+            
+            if VOICE_BARGE_IN and audio_buffer.is_recording and not was_recording:
+                # Barge-in: the user talking over Eva cancels the reply in progress
+                await self.cancel_turn(session_id, "speech")
+            
+            # Speech being recorded is also transcribed incrementally (from the pre-roll on)
+            if transcriber and (audio_buffer.is_recording or complete_audio):
+                transcriber.feed(frame if was_recording else audio_buffer.peek_speech_audio())
+            
+            if complete_audio:
+                # Speech utterance complete - process it
+                await self.process_speech_utterance(session_id, complete_audio, audio_buffer.sample_rate)
     
-    async def process_speech_utterance(self, session_id: str, audio_data: bytes):
-        """Process a complete speech utterance"""
+    async def process_speech_utterance(self, session_id: str, audio_data: bytes, sample_rate: Optional[int] = None):
+        """Process a complete speech utterance (raw 16-bit PCM when sample_rate is given, else an audio file)"""
         if session_id not in self.voice_sessions:
             return
             
         session = self.voice_sessions[session_id]
+        timeline = TurnTimeline()
         
         try:
             # Send status update
@@ -200,16 +733,32 @@ class RealTimeVoiceManager:
                 "status": "transcribing"
             })
             
-            # Convert speech to text
-            text = await self.stt_handler.speech_to_text(audio_data)
+            # With partials running, only the trailing window is left to decode
+            text, timing = None, None
+            transcriber = session.get("transcriber")
+            if sample_rate and transcriber and transcriber.has_audio:
+                try:
+                    text, timing = await transcriber.finish()
+                except Exception as e:
+                    logger.warning(f"Incremental transcription failed, transcribing whole utterance: {e}")
+            
+            # Convert speech to text (raw PCM skips decoding)
+            if text is None:
+                if sample_rate:
+                    text = await self.stt_handler.speech_to_text(audio_data, sample_rate=sample_rate)
+                else:
+                    text = await self.stt_handler.speech_to_text(audio_data)
             
             if text.strip():
+                self._mark_stage(session_id, timeline, "stt_done")
                 await self.send_voice_event(session_id, "speech_transcribed", {
-                    "text": text
+                    "text": text,
+                    **({"timing": timing} if timing else {})
                 })
                 
-                # Process the text through EVA's conversation system
-                await self.process_conversation_turn(session_id, text)
+                # Process the text through EVA's conversation system, in the background
+                # so the session keeps listening (and can barge in) while Eva replies
+                await self.start_turn(session_id, text, timeline)
             
         except Exception as e:
             logger.error(f"Error processing speech: {e}")
@@ -217,40 +766,153 @@ class RealTimeVoiceManager:
                 "message": f"Speech processing error: {str(e)}"
             })
     
-    async def process_conversation_turn(self, session_id: str, user_text: str):
-        """Process a conversation turn with EVA"""
+    async def start_turn(self, session_id: str, user_text: str,
+                         timeline: Optional[TurnTimeline] = None) -> VoiceTurn:
+        """Run a conversation turn as a background task group; a reply still in progress is cancelled"""
+        await self.cancel_turn(session_id, "new_turn")
+        turn = VoiceTurn()
+        self.voice_sessions[session_id]["turn"] = turn
+        self.turns_started += 1
+        turn.spawn(self.process_conversation_turn(session_id, user_text, timeline, turn))
+        return turn
+    
+    async def cancel_turn(self, session_id: str, reason: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel the session's reply in progress: the agent call (and its tool calls), the TTS
+        streams and unsent audio. Returns what was freed, or None if nothing was running.
+        """
+        session = self.voice_sessions.get(session_id)
+        turn = session.get("turn") if session else None
+        if not turn or not turn.active:
+            return None
+        report = {"reason": reason, **await turn.cancel()}
+        self._record_cancel(report)
+        logger.info(f"Voice session {session_id}: turn cancelled ({reason}) in {report['cancel_ms']}ms")
+        await self.send_voice_event(session_id, "turn_cancelled", report)
+        return report
+    
+    def _record_cancel(self, report: Dict[str, Any]):
+        self.turns_cancelled += 1
+        self.cancel_ms.append(report["cancel_ms"])
+        self.cancel_stragglers += report["stragglers"]
+        for key in self.freed:
+            self.freed[key] += report[key]
+    
+    async def process_conversation_turn(self, session_id: str, user_text: str,
+                                        timeline: Optional[TurnTimeline] = None,
+                                        turn: Optional[VoiceTurn] = None):
+        """
+        Process a conversation turn with EVA as one pipeline: the agent's response streams
+        into a sentence chunker, each sentence is synthesized as soon as it is complete, and
+        audio goes to the client while the rest of the response is still being generated.
+        Stages are reported with turn_stage events and a turn_timing summary. The turn's
+        tasks belong to turn, so cancelling it stops the whole pipeline.
+        """
         if session_id not in self.voice_sessions:
             return
             
         session = self.voice_sessions[session_id]
+        timeline = timeline or TurnTimeline()
+        turn = turn or VoiceTurn()
+        if not self.agent_handler:
+            await self.send_voice_event(session_id, "error", {
+                "message": "Conversation engine not available"
+            })
+            return
         
-        try:
-            # This will integrate with EVA's existing conversation system
-            # For now, we'll create a placeholder response
-            
-            await self.send_voice_event(session_id, "eva_thinking", {
-                "status": "processing"
+        await self.send_voice_event(session_id, "eva_thinking", {
+            "status": "processing"
+        })
+        
+        # The response is still unknown here, so the tier follows priority and budget only
+        choice = self.tts_router.select(priority="normal") if self.tts_router else None
+        backend = choice.backend if choice and choice.backend is not self.tts_handler else SessionSpeech(self, session_id)
+        codec = choice.audio_format if choice else "mp3"
+        pipeline = SentenceTTSPipeline(backend, audio_format=codec)
+        turn.pipeline = pipeline
+        chunker = SentenceChunker()
+        deltas: asyncio.Queue = asyncio.Queue()
+        
+        def speak(sentence: str):
+            if not pipeline.sentences:
+                self._mark_stage(session_id, timeline, "first_sentence")
+            pipeline.submit(sentence)
+        
+        def on_text(delta: str):
+            self._mark_stage(session_id, timeline, "llm_first_text")
+            deltas.put_nowait(delta)
+            for sentence in chunker.feed(delta):
+                speak(sentence)
+        
+        async def generate() -> str:
+            try:
+                response_text = await self.agent_handler(session_id, session, user_text, on_text)
+                if "llm_first_text" in timeline.stages:
+                    rest = chunker.flush()
+                    if rest:
+                        speak(rest)
+                elif response_text:
+                    # Nothing was streamed (e.g. an error message); speak the whole response
+                    speak(response_text)
+                self._mark_stage(session_id, timeline, "llm_done")
+                return response_text
+            finally:
+                pipeline.close()
+                deltas.put_nowait(None)
+        
+        async def forward_text():
+            while True:
+                delta = await deltas.get()
+                if delta is None:
+                    return
+                await self.send_voice_event(session_id, "eva_response_partial", {"text": delta})
+        
+        async def audio_chunks():
+            async for chunk in pipeline.chunks():
+                if chunk.data:
+                    self._mark_stage(session_id, timeline, "tts_first_audio")
+                    yield chunk.data
+        
+        async def speak_audio():
+            await self.send_voice_event(session_id, "tts_generating", {
+                "status": "generating",
+                "tier": choice.tier if choice else None
             })
-            
-            # TODO: Integrate with EVA's conversation system
-            # This should call the same logic as the regular chat endpoint
-            # but return streaming response
-            
-            # Placeholder response
-            response_text = f"I heard you say: {user_text}"
-            
+            chunks = self.tts_router.timed(choice.tier, audio_chunks()) if choice else audio_chunks()
+            await self.send_audio(session_id, chunks, codec=codec)
+            self._mark_stage(session_id, timeline, "tts_done")
+        
+        generate_task = turn.llm_task = turn.spawn(generate())
+        tasks = [generate_task, turn.spawn(forward_text()), turn.spawn(speak_audio())]
+        try:
+            response_text = await generate_task
             await self.send_voice_event(session_id, "eva_response", {
                 "text": response_text
             })
-            
-            # Generate TTS
-            await self.generate_voice_response(session_id, response_text)
+            await asyncio.gather(*tasks)
+            await self.send_voice_event(session_id, "turn_timing", {
+                **timeline.to_dict(),
+                "tts": pipeline.get_metrics()
+            })
             
         except Exception as e:
             logger.error(f"Error in conversation turn: {e}")
             await self.send_voice_event(session_id, "error", {
                 "message": f"Conversation error: {str(e)}"
             })
+        finally:
+            for task in tasks:
+                task.cancel()
+            await pipeline.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def _mark_stage(self, session_id: str, timeline: TurnTimeline, stage: str):
+        """Record a turn stage and tell the client (once per stage)"""
+        t_ms = timeline.mark(stage)
+        if t_ms is not None:
+            task = asyncio.create_task(self.send_voice_event(session_id, "turn_stage", {"stage": stage, "t_ms": t_ms}))
+            self._event_tasks.add(task)
+            task.add_done_callback(self._event_tasks.discard)
     
     async def generate_voice_response(self, session_id: str, text: str):
         """Generate and stream TTS response"""
@@ -258,20 +920,19 @@ class RealTimeVoiceManager:
             return
             
         try:
+            choice = self.tts_router.select(text) if self.tts_router else None
             await self.send_voice_event(session_id, "tts_generating", {
-                "status": "generating"
+                "status": "generating",
+                "tier": choice.tier if choice else None
             })
             
-            # Generate TTS audio
-            audio_data = await self.tts_handler.text_to_speech(text)
-            
-            # Encode audio as base64 for WebSocket transmission
-            audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-            
-            await self.send_voice_event(session_id, "voice_response", {
-                "audio": audio_base64,
-                "format": "mp3"
-            })
+            if choice and choice.backend is not self.tts_handler:
+                audio_chunks = choice.backend.text_to_speech_stream(text)
+            else:
+                audio_chunks = self._synthesize(session_id, text)
+            if choice:
+                audio_chunks = self.tts_router.timed(choice.tier, audio_chunks)
+            await self.send_audio(session_id, audio_chunks, codec=choice.audio_format if choice else "mp3")
             
         except Exception as e:
             logger.error(f"Error generating voice response: {e}")
@@ -279,6 +940,145 @@ class RealTimeVoiceManager:
                 "message": f"TTS error: {str(e)}"
             })
     
+    async def _synthesize(self, session_id: str, text: str):
+        """TTS audio for a reply, over the session's persistent streaming connection when possible"""
+        tts = self.tts_handler
+        session = self.voice_sessions[session_id]
+        cached = tts.is_cached(text) if hasattr(tts, "is_cached") else False
+        if self.on_tts_usage and not cached:
+            # Charged when synthesis starts; sentences dropped by a barge-in before that cost nothing
+            self.on_tts_usage(text, session_id)
+        if ELEVENLABS_STREAMING_SESSIONS and getattr(tts, "supports_streaming_sessions", False) and not cached:
+            streamed = []
+            context = None
+            try:
+                stream = tts.streaming_session(session_id, latency=session.get("tts_latency"))
+                context = await stream.open_context()
+                await context.send_text(text.strip() + " ")
+                await context.close()
+                async for chunk in context.audio():
+                    streamed.append(chunk)
+                    yield chunk
+                # Only a reply that completed is cached, so the next time it is served locally
+                if streamed and hasattr(tts, "cache_audio"):
+                    await tts.cache_audio(text, b"".join(streamed), voice_id=stream.voice_id)
+                return
+            except TTSStreamError as e:
+                if streamed:
+                    raise
+                logger.warning(f"TTS streaming session unavailable, using HTTP streaming: {e}")
+            finally:
+                # Cancelled mid-reply (barge-in): stop ElevenLabs generating audio nobody will hear
+                if context is not None and not context.finished:
+                    await context.abort()
+        
+        if hasattr(tts, "text_to_speech_stream"):
+            async for chunk in tts.text_to_speech_stream(text):
+                yield chunk
+        else:
+            yield await tts.text_to_speech(text)
+    
+    async def send_audio(self, session_id: str, audio_chunks, codec: str = "mp3"):
+        """Send audio to the client: binary frames as chunks arrive, or one base64 event for legacy clients"""
+        session = self.voice_sessions.get(session_id)
+        websocket = self.active_connections.get(session_id)
+        if not session or not websocket:
+            return
+        
+        if not session["binary_audio"]:
+            # Encode audio as base64 for WebSocket transmission
+            audio_data = b"".join([chunk async for chunk in audio_chunks])
+            await self.send_voice_event(session_id, "voice_response", {
+                "audio": base64.b64encode(audio_data).decode('utf-8'),
+                "format": codec
+            })
+            return
+        
+        stream_id = session["next_stream_id"]
+        session["next_stream_id"] += 1
+        await self.send_voice_event(session_id, "voice_response", {
+            "stream_id": stream_id,
+            "format": codec,
+            "transport": "binary"
+        })
+        
+        sequence = 0
+        try:
+            async for chunk in audio_chunks:
+                for start in range(0, len(chunk), AUDIO_FRAME_BYTES):
+                    await websocket.send_bytes(encode_frame(stream_id, sequence, codec, chunk[start:start + AUDIO_FRAME_BYTES]))
+                    sequence += 1
+        finally:
+            # Always close the stream so the client can finish playback
+            try:
+                await websocket.send_bytes(encode_frame(stream_id, sequence, codec, b"", end=True))
+            except Exception as e:
+                logger.error(f"Error sending audio end frame: {e}")
+    
+    async def handle_websocket_binary(self, session_id: str, data: bytes):
+        """Handle an incoming binary audio frame"""
+        session = self.voice_sessions.get(session_id)
+        if not session:
+            return
+        
+        try:
+            frame = decode_frame(data)
+        except FrameError as e:
+            await self.send_voice_event(session_id, "error", {
+                "message": f"Invalid audio frame: {str(e)}"
+            })
+            return
+        
+        if frame.codec == "pcm_s16le":
+            # Raw PCM goes through VAD frame by frame
+            if frame.payload:
+                await self.process_audio_chunk(session_id, frame.payload)
+            if frame.end:
+                session["vad"].reset()
+                speech_audio = session["audio_buffer"].get_speech_audio()
+                if speech_audio:
+                    await self.process_speech_utterance(session_id, speech_audio, session["audio_buffer"].sample_rate)
+            return
+        
+        # Compressed streams (webm/opus, mp3, ...) can't be split into VAD frames:
+        # collect them and transcribe the whole stream when the client ends it
+        streams = session["incoming_streams"]
+        rejected = session["rejected_streams"]
+        if frame.stream_id in rejected:
+            if frame.end:
+                del rejected[frame.stream_id]
+            return
+        audio = streams.get(frame.stream_id)
+        if audio is None:
+            if len(streams) >= self.max_incoming_streams:
+                await self._reject_stream(session_id, frame, f"too many open audio streams (max {self.max_incoming_streams})")
+                return
+            audio = streams[frame.stream_id] = bytearray()
+        if len(audio) + len(frame.payload) > self.max_stream_bytes:
+            del streams[frame.stream_id]
+            await self._reject_stream(session_id, frame, f"audio stream over {self.max_stream_bytes} bytes")
+            return
+        audio += frame.payload
+        if frame.end:
+            del streams[frame.stream_id]
+            if audio:
+                await self.process_speech_utterance(session_id, bytes(audio))
+    
+    async def _reject_stream(self, session_id: str, frame, reason: str):
+        """Drop an incoming stream over a cap; its remaining frames are ignored"""
+        session = self.voice_sessions[session_id]
+        if not frame.end:
+            rejected = session["rejected_streams"]
+            rejected[frame.stream_id] = True
+            if len(rejected) > self.max_incoming_streams * 4:
+                rejected.popitem(last=False)
+        self.streams_rejected += 1
+        logger.warning(f"Voice session {session_id}: dropped audio stream {frame.stream_id}: {reason}")
+        await self.send_voice_event(session_id, "error", {
+            "message": f"Audio stream {frame.stream_id} dropped: {reason}",
+            "stream_id": frame.stream_id
+        })
+    
     async def handle_websocket_message(self, session_id: str, message: str):
         """Handle incoming WebSocket message"""
         try:
@@ -316,19 +1116,49 @@ class RealTimeVoiceManager:
                 "message": f"Message handling error: {str(e)}"
             })
     
-    async def handle_interruption(self, session_id: str):
-        """Handle user interruption"""
+    async def handle_interruption(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Handle user interruption; returns what cancelling the reply in progress freed"""
         if session_id not in self.voice_sessions:
-            return
-            
+            return None
+        
         # Stop any ongoing TTS or processing
-        # Reset audio buffer
-        session = self.voice_sessions[session_id]
-        session["audio_buffer"].reset_speech_buffer()
+        cancelled = await self.cancel_turn(session_id, "interrupt")
+        
+        # Reset audio buffer. Interrupts are handled on the receive loop, so while the worker is
+        # mid-frame (e.g. awaiting the final transcript) the reset waits for it to finish that frame
+        session = self.voice_sessions.get(session_id)
+        if session:
+            if session.get("input_busy"):
+                session["reset_pending"] = True
+            else:
+                self._reset_input_state(session)
         
         await self.send_voice_event(session_id, "interrupted", {
             "status": "ready"
         })
+        return cancelled
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Turns in flight (and the upstream work they hold) and what barge-ins have freed"""
+        turns = [session["turn"] for session in self.voice_sessions.values()
+                 if session.get("turn") and session["turn"].active]
+        return {
+            "sessions": len(self.voice_sessions),
+            "active_turns": len(turns),
+            "llm_streams_in_flight": sum(turn.llm_active for turn in turns),
+            "tts_requests_in_flight": sum(turn.pipeline.in_flight for turn in turns if turn.pipeline),
+            "turns_started": self.turns_started,
+            "turns_cancelled": self.turns_cancelled,
+            "cancel_ms": {
+                "avg": round(sum(self.cancel_ms) / len(self.cancel_ms), 1) if self.cancel_ms else None,
+                "max": max(self.cancel_ms) if self.cancel_ms else None
+            },
+            "cancel_timeout_ms": VOICE_CANCEL_TIMEOUT_MS,
+            "cancel_stragglers": self.cancel_stragglers,
+            "freed": dict(self.freed),
+            "streams_rejected": self.streams_rejected,
+            "input": {session_id: session["input"].get_stats() for session_id, session in self.voice_sessions.items()}
+        }
 
 # Global voice manager instance
 voice_manager = None